@@ -0,0 +1,234 @@
+"""Dependency-aware, concurrent cog loader.
+
+Cogs declare which other cogs must be loaded before them (see
+``COG_DEPENDENCIES``). The loader starts every cog as soon as its
+dependencies have finished, so independent cogs load concurrently, and it
+records how long each cog took. Before any cog is loaded, the third-party
+modules the cogs import at top level are warmed one at a time in a worker
+thread, so heavy imports do not block the event loop. First-party modules
+(``cogs``, ``llm``, ``addons``, ...) are never imported off the main thread:
+importing the same circularly dependent packages from two threads can make
+importlib raise ``_DeadlockError`` in either of them.
+"""
+from __future__ import annotations
+
+import ast
+import asyncio
+import importlib
+import importlib.util
+import os
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+from addons.logging import get_logger
+
+log = get_logger(server_id="Bot", source=__name__)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# cog module name -> cog modules that must finish loading first.
+# Cogs that resolve other cogs lazily at call time do not need an entry.
+COG_DEPENDENCIES: Dict[str, Sequence[str]] = {
+    "botinfo": ("language_manager",),
+    "channel_manager": ("language_manager",),
+    "gen_img": ("language_manager",),
+    "gif_tools": ("language_manager",),
+    "help": ("language_manager",),
+    "internet_search": ("language_manager",),
+    "math": ("language_manager",),
+    "remind": ("language_manager",),
+    "schedule": ("language_manager",),
+    "summarizer": ("language_manager",),
+    "system_prompt_manager": ("language_manager",),
+    "update_manager": ("language_manager",),
+    "userdata": ("language_manager",),
+    "story_manager": ("system_prompt_manager",),
+}
+
+
+class CogDependencyError(Exception):
+    """Raised when the declared cog dependency graph contains a cycle."""
+
+
+@dataclass
+class CogLoadResult:
+    """Outcome of loading a single cog."""
+
+    name: str
+    duration: float = 0.0
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def plan_load_order(
+    cogs: Iterable[str], dependencies: Mapping[str, Iterable[str]]
+) -> List[List[str]]:
+    """Group cogs into dependency levels; each level only depends on earlier ones.
+
+    Dependencies on cogs that are not being loaded are ignored.
+
+    Raises:
+        CogDependencyError: If the dependency graph contains a cycle.
+    """
+    names = list(dict.fromkeys(cogs))
+    available = set(names)
+    deps = {
+        name: {d for d in dependencies.get(name, ()) if d in available and d != name}
+        for name in names
+    }
+
+    levels: List[List[str]] = []
+    done: set = set()
+    remaining = list(names)
+    while remaining:
+        level = [name for name in remaining if deps[name] <= done]
+        if not level:
+            raise CogDependencyError(f"Cog dependency cycle: {_find_cycle(remaining, deps)}")
+        levels.append(level)
+        done.update(level)
+        remaining = [name for name in remaining if name not in done]
+    return levels
+
+
+def _find_cycle(names: Sequence[str], deps: Mapping[str, set]) -> str:
+    """Return a readable ``a -> b -> a`` path for one cycle among ``names``."""
+    pending = set(names)
+    node = names[0]
+    path: List[str] = []
+    while node not in path:
+        path.append(node)
+        node = next(d for d in sorted(deps[node]) if d in pending)
+    return " -> ".join(path[path.index(node):] + [node])
+
+
+def _top_level_imports(module_name: str) -> List[str]:
+    """List absolute modules imported at the top level of ``module_name`` without executing it."""
+    spec = importlib.util.find_spec(module_name)
+    if spec is None or not spec.origin or not spec.origin.endswith(".py"):
+        return []
+    with open(spec.origin, "rb") as fh:
+        tree = ast.parse(fh.read(), filename=spec.origin)
+
+    modules: List[str] = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules.append(node.module)
+    return modules
+
+
+def _is_first_party(module_name: str, root: str = _PROJECT_ROOT) -> bool:
+    """Whether ``module_name`` belongs to a package or module in the project root."""
+    top = module_name.partition(".")[0]
+    return os.path.isdir(os.path.join(root, top)) or os.path.isfile(os.path.join(root, f"{top}.py"))
+
+
+def _third_party_imports(module_names: Iterable[str]) -> List[str]:
+    """Top-level third-party imports of ``module_names``, deduplicated in order."""
+    targets: Dict[str, None] = {}
+    for module_name in module_names:
+        try:
+            imports = _top_level_imports(module_name)
+        except Exception:
+            continue
+        for target in imports:
+            if not _is_first_party(target):
+                targets.setdefault(target, None)
+    return list(targets)
+
+
+def _warm_imports(module_names: Sequence[str]) -> None:
+    """Import the cogs' third-party dependencies one at a time.
+
+    Runs in a single worker thread before any cog is loaded, so nothing on
+    the main thread imports concurrently. Failures are ignored here; the real
+    import in ``load_extension`` reports them with full context.
+    """
+    for target in _third_party_imports(module_names):
+        try:
+            importlib.import_module(target)
+        except Exception:
+            pass
+
+
+async def load_cogs(
+    bot,
+    cogs: Iterable[str],
+    dependencies: Mapping[str, Iterable[str]] = COG_DEPENDENCIES,
+    package: str = "cogs",
+    warm_imports: bool = True,
+    logger=None,
+) -> Dict[str, CogLoadResult]:
+    """Load ``cogs`` through ``bot.load_extension`` following the dependency graph.
+
+    Every cog starts as soon as all of its dependencies have finished, whether
+    they succeeded or not (cogs fall back to lazy lookups), so a single broken
+    cog does not block the rest of startup.
+
+    Args:
+        bot: The bot whose ``load_extension`` is used.
+        cogs: Cog module names relative to ``package``.
+        dependencies: Mapping of cog name to the cogs it must load after.
+        package: Package the cog modules live in.
+        warm_imports: Pre-import the cogs' third-party imports in a worker thread.
+        logger: Logger for per-cog results; defaults to the module logger.
+
+    Returns:
+        A dict of cog name to CogLoadResult, in load-completion order.
+
+    Raises:
+        CogDependencyError: If the dependency graph contains a cycle. No cog
+            is loaded in that case.
+    """
+    logger = logger or log
+    levels = plan_load_order(cogs, dependencies)
+    names = [name for level in levels for name in level]
+    available = set(names)
+    results: Dict[str, CogLoadResult] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def load_one(name: str) -> None:
+        waits = [tasks[d] for d in dependencies.get(name, ()) if d in available and d != name]
+        if waits:
+            await asyncio.gather(*waits)
+        failed = [d for d in dependencies.get(name, ()) if d in results and not results[d].ok]
+        if failed:
+            logger.warning(f"Loading {name} although its dependencies failed: {', '.join(failed)}")
+
+        start = time.perf_counter()
+        error: Optional[BaseException] = None
+        try:
+            await bot.load_extension(f"{package}.{name}")
+        except Exception as e:
+            error = e
+        result = CogLoadResult(name=name, duration=time.perf_counter() - start, error=error)
+        results[name] = result
+        if error is None:
+            logger.info(f"Loaded {name} in {result.duration * 1000:.0f} ms")
+        else:
+            logger.error(f"Failed to load {name}", exception=error)
+            logger.error("".join(traceback.format_exception(error)))
+
+    if warm_imports:
+        start = time.perf_counter()
+        await asyncio.to_thread(_warm_imports, [f"{package}.{name}" for name in names])
+        logger.info(f"Warmed third-party cog imports in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # Levels are already topologically sorted, so dependencies' tasks exist first.
+    for name in names:
+        tasks[name] = asyncio.create_task(load_one(name))
+    await asyncio.gather(*tasks.values())
+
+    slowest = sorted(results.values(), key=lambda r: r.duration, reverse=True)[:5]
+    logger.info(
+        "Cog load times (slowest first): "
+        + ", ".join(f"{r.name}={r.duration * 1000:.0f}ms" for r in slowest)
+    )
+    return results
@@ -0,0 +1,107 @@
+"""Skip redundant application command syncs on startup.
+
+``CommandTree.sync`` is slow and rate limited, and most restarts do not change
+any slash command. This module builds the exact payload ``sync`` would upload
+(names, options, localizations), hashes a canonical form of it, and only
+syncs when the hash differs from the one stored after the last successful
+sync, or when a sync is forced.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from addons.logging import get_logger
+
+log = get_logger(server_id="Bot", source=__name__)
+
+FORCE_SYNC_ENV = "FORCE_COMMAND_SYNC"
+
+
+async def build_tree_payload(tree) -> List[Dict[str, Any]]:
+    """Return the global command payload exactly as ``tree.sync()`` would send it."""
+    commands = tree.get_commands()
+    translator = tree.translator
+    if translator:
+        return [await command.get_translated_payload(tree, translator) for command in commands]
+    return [command.to_dict(tree) for command in commands]
+
+
+def fingerprint_payload(payload: List[Dict[str, Any]], application_id: Optional[int] = None) -> str:
+    """Hash a command payload deterministically.
+
+    Dict keys are sorted at every level and top-level commands are ordered by
+    (type, name), since registration order does not matter to Discord. List
+    order inside a command (options, choices) is kept because Discord shows
+    options in that order.
+    """
+    commands = sorted(payload, key=lambda c: (c.get("type", 1), c.get("name", "")))
+    canonical = json.dumps(
+        {"application_id": application_id, "commands": commands},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _load_state(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(path: str, fingerprint: str, application_id: Optional[int]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(
+            {"fingerprint": fingerprint, "application_id": application_id, "synced_at": time.time()},
+            fh,
+            indent=2,
+        )
+    os.replace(tmp_path, path)
+
+
+def force_sync_requested() -> bool:
+    """Whether the FORCE_COMMAND_SYNC environment variable asks for a sync."""
+    return os.getenv(FORCE_SYNC_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+async def sync_if_changed(tree, state_path: str, force: bool = False, logger=None) -> bool:
+    """Sync ``tree`` only when its fingerprint changed since the last sync.
+
+    Args:
+        tree: The bot's CommandTree.
+        state_path: JSON file holding the fingerprint of the last successful sync.
+        force: Sync even if the fingerprint is unchanged.
+        logger: Logger to use; defaults to the module logger.
+
+    Returns:
+        True if ``tree.sync()`` was called, False if it was skipped.
+    """
+    logger = logger or log
+    application_id = getattr(tree.client, "application_id", None)
+    fingerprint = fingerprint_payload(await build_tree_payload(tree), application_id)
+
+    stored = _load_state(state_path).get("fingerprint")
+    if not force and stored == fingerprint:
+        logger.info(f"Command tree unchanged ({fingerprint[:12]}); skipping sync")
+        return False
+
+    reason = "forced" if force else ("first sync" if stored is None else "command tree changed")
+    logger.info(f"Syncing command tree ({reason}, {fingerprint[:12]})")
+    await tree.sync()
+    try:
+        _save_state(state_path, fingerprint, application_id)
+    except OSError as e:
+        # The sync itself succeeded; the next start will just sync again.
+        logger.warning(f"Failed to store command tree fingerprint: {e}")
+    return True
@@ -0,0 +1,247 @@
+"""Lazy module proxies and an import-time profiler.
+
+Heavy optional dependencies (sympy, yt_dlp, selenium, PIL, decord, pdf2image,
+jieba, langchain_qdrant) are only needed when a specific command runs, yet
+importing them at module level makes every bot start pay for all of them.
+
+``lazy_import("sympy")`` returns a module proxy that performs the real import
+on first attribute access; ``lazy_attr("pdf2image", "convert_from_bytes")``
+does the same for a single name imported with ``from ... import``. Proxies
+must not be used as base classes or in ``isinstance`` checks, and annotations
+that reference them should be strings so they are not evaluated at
+definition time.
+
+``ImportTimeProfiler`` records self and cumulative import time per module,
+like ``python -X importtime``, and also counts imports triggered later by
+lazy proxies. Set ``PIGPIG_PROFILE_IMPORTS=1`` to enable it at startup.
+"""
+from __future__ import annotations
+
+import importlib
+import importlib.abc
+import os
+import sys
+import threading
+import time
+import types
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+PROFILE_ENV = "PIGPIG_PROFILE_IMPORTS"
+
+# Module name -> seconds spent in the deferred import, filled in on first use.
+_lazy_load_times: Dict[str, float] = {}
+_lazy_lock = threading.RLock()
+
+
+class LazyModule(types.ModuleType):
+    """Module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is not None:
+            return module
+        with _lazy_lock:
+            module = self.__dict__["_lazy_module"]
+            if module is None:
+                start = time.perf_counter()
+                module = importlib.import_module(self.__name__)
+                _lazy_load_times.setdefault(self.__name__, time.perf_counter() - start)
+                self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+class LazyAttribute:
+    """Proxy for ``from module import name`` that resolves on first use."""
+
+    __slots__ = ("_module", "_attr", "_value")
+
+    def __init__(self, module: LazyModule, attr: str) -> None:
+        self._module = module
+        self._attr = attr
+        self._value: Any = None
+
+    def _resolve(self) -> Any:
+        if self._value is None:
+            self._value = getattr(self._module, self._attr)
+        return self._value
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self._resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._resolve(), attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy attribute {self._module.__name__}.{self._attr}>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Return ``name`` itself if already imported, otherwise a LazyModule proxy."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+def lazy_attr(module_name: str, attr: str) -> Any:
+    """Lazy equivalent of ``from module_name import attr``."""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return getattr(module, attr)
+    return LazyAttribute(LazyModule(module_name), attr)
+
+
+def lazy_load_times() -> Dict[str, float]:
+    """Seconds spent importing each lazily imported module that has been used."""
+    with _lazy_lock:
+        return dict(_lazy_load_times)
+
+
+@dataclass
+class ImportRecord:
+    """Timing for one imported module, in seconds."""
+
+    name: str
+    self_time: float
+    cumulative: float
+    depth: int
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps a real loader to time ``exec_module``."""
+
+    def __init__(self, loader: importlib.abc.Loader, profiler: "ImportTimeProfiler") -> None:
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: types.ModuleType) -> None:
+        self._profiler._enter()
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit(module.__name__, time.perf_counter() - start)
+
+    def __getattr__(self, attr: str) -> Any:
+        # get_resource_reader, is_package, get_source, ...
+        return getattr(self._loader, attr)
+
+
+class _TimedFinder(importlib.abc.MetaPathFinder):
+    def __init__(self, profiler: "ImportTimeProfiler") -> None:
+        self._profiler = profiler
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path=None, target=None):
+        if getattr(self._local, "busy", False):
+            return None
+        self._local.busy = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.busy = False
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self._profiler)
+        return spec
+
+
+class ImportTimeProfiler:
+    """Collect per-module import times while installed on ``sys.meta_path``.
+
+    Self time excludes nested imports; cumulative time includes them, matching
+    the two columns of ``python -X importtime``.
+    """
+
+    def __init__(self) -> None:
+        self.records: List[ImportRecord] = []
+        self._finder = _TimedFinder(self)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.started_at: Optional[float] = None
+
+    def _stack(self) -> List[float]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self) -> None:
+        self._stack().append(0.0)
+
+    def _exit(self, name: str, elapsed: float) -> None:
+        stack = self._stack()
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        with self._lock:
+            self.records.append(ImportRecord(name, max(elapsed - children, 0.0), elapsed, len(stack)))
+
+    def start(self) -> "ImportTimeProfiler":
+        if self._finder not in sys.meta_path:
+            sys.meta_path.insert(0, self._finder)
+            self.started_at = time.perf_counter()
+        return self
+
+    def stop(self) -> None:
+        try:
+            sys.meta_path.remove(self._finder)
+        except ValueError:
+            pass
+
+    def __enter__(self) -> "ImportTimeProfiler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @classmethod
+    def from_env(cls) -> Optional["ImportTimeProfiler"]:
+        """Start a profiler if PIGPIG_PROFILE_IMPORTS is set, else return None."""
+        if os.getenv(PROFILE_ENV, "").strip().lower() in ("1", "true", "yes", "on"):
+            return cls().start()
+        return None
+
+    def top(self, limit: int = 25) -> List[ImportRecord]:
+        """The ``limit`` slowest top-level imports by cumulative time."""
+        with self._lock:
+            roots = [r for r in self.records if r.depth == 0]
+        return sorted(roots, key=lambda r: r.cumulative, reverse=True)[:limit]
+
+    def format_report(self, limit: int = 25) -> str:
+        """Render the slowest imports in ``-X importtime`` column layout."""
+        lines = ["import time: self [us] | cumulative | imported package"]
+        for record in self.top(limit):
+            lines.append(
+                f"import time: {record.self_time * 1e6:>9.0f} | {record.cumulative * 1e6:>10.0f} | {record.name}"
+            )
+        lazy = lazy_load_times()
+        if lazy:
+            lines.append("deferred (lazy) imports, first use [us]:")
+            for name, seconds in sorted(lazy.items(), key=lambda item: item[1], reverse=True):
+                lines.append(f"  {seconds * 1e6:>10.0f} | {name}")
+        return "\n".join(lines)
@@ -0,0 +1,558 @@
+"""Inverted index over the day logs for filtered, paginated search.
+
+The log tree is ``logs/{server}/{YYYYMMDD}/{level}.jsonl``, plus the
+``.jsonl.gz`` segments written by compaction (see ``addons.log_segments``).
+The index splits every file into chunks and records, per chunk, its byte
+range, record count and min/max timestamp. Plain files are cut into chunks of
+about ``chunk_size`` bytes that never cross an hour boundary, so each chunk
+belongs to one hourly time bucket. A compacted segment uses its gzip blocks
+as chunks.
+
+The guild and level of a chunk come from its file's path. Sources and user
+ids go into a postings table that maps ``s:{source}`` and ``u:{user_id}``
+terms to chunk ids. A query intersects the postings of its terms, filters
+the chunks by guild, level and time range in SQL, and decodes only the
+chunks that survive.
+
+Indexing is incremental. For every plain file the index remembers how many
+bytes it has already covered and picks up from there. ``attach`` registers a
+``BackgroundWriter`` listener that marks the files each written batch
+touched, so ``refresh`` only has to look at those. A full rescan of the tree,
+which also notices compaction and retention, is due every
+``rescan_interval`` seconds; the owner of the index runs it in the
+background. ``search`` only indexes the touched files, and not at all while
+another refresh (such as the initial build) is running; it then answers from
+what is already indexed.
+"""
+from __future__ import annotations
+
+import gzip
+import heapq
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from addons.log_segments import (
+    TimeLike,
+    _already_compacted_bytes,
+    _record_ts,
+    _to_unix,
+    load_index,
+    segment_paths,
+)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_RESCAN_INTERVAL = 300.0
+_BUCKET_SECONDS = 3600
+_READ_SIZE = 4 * 1024 * 1024
+_COMMIT_INTERVAL = 1.0
+
+PathLike = Union[str, Path]
+
+_CREATE_TABLES_SQL = """
+CREATE TABLE IF NOT EXISTS log_files (
+    id           INTEGER PRIMARY KEY,
+    path         TEXT    NOT NULL UNIQUE,
+    server_id    TEXT    NOT NULL,
+    day          TEXT    NOT NULL,
+    level        TEXT    NOT NULL,
+    kind         TEXT    NOT NULL,             -- plain | segment
+    inode        INTEGER NOT NULL,
+    base_offset  INTEGER NOT NULL DEFAULT 0,   -- plain bytes already in the segment
+    indexed_size INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS log_chunks (
+    id       INTEGER PRIMARY KEY,
+    file_id  INTEGER NOT NULL,
+    offset   INTEGER NOT NULL,
+    length   INTEGER NOT NULL,
+    records  INTEGER NOT NULL,
+    min_ts   REAL    NOT NULL,
+    max_ts   REAL    NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS log_postings (
+    term     TEXT    NOT NULL,
+    chunk_id INTEGER NOT NULL,
+    PRIMARY KEY (term, chunk_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_log_files_server ON log_files(server_id, day);
+CREATE INDEX IF NOT EXISTS idx_log_files_day ON log_files(day);
+CREATE INDEX IF NOT EXISTS idx_log_chunks_file ON log_chunks(file_id, max_ts);
+CREATE INDEX IF NOT EXISTS idx_log_chunks_max_ts ON log_chunks(max_ts);
+CREATE INDEX IF NOT EXISTS idx_log_postings_chunk ON log_postings(chunk_id);
+"""
+
+
+@dataclass
+class IndexStats:
+    """Totals for one refresh."""
+
+    files: int = 0
+    chunks: int = 0
+    records: int = 0
+    bytes_read: int = 0
+    removed: int = 0
+
+
+@dataclass
+class SearchPage:
+    """One page of search results, newest first."""
+
+    records: List[Dict[str, Any]] = field(default_factory=list)
+    # Pass back as ``cursor`` to get the next page; None on the last page.
+    next_cursor: Optional[str] = None
+    chunks_read: int = 0
+
+
+@dataclass
+class _Chunk:
+    offset: int
+    length: int = 0
+    records: int = 0
+    min_ts: Optional[float] = None
+    max_ts: Optional[float] = None
+    terms: Set[str] = field(default_factory=set)
+
+    def add(self, record: Dict[str, Any], ts: float) -> None:
+        self.records += 1
+        self.min_ts = ts if self.min_ts is None else min(self.min_ts, ts)
+        self.max_ts = ts if self.max_ts is None else max(self.max_ts, ts)
+        source = record.get("source")
+        if source:
+            self.terms.add(f"s:{source}")
+        user_id = record.get("user_id")
+        if user_id:
+            self.terms.add(f"u:{user_id}")
+
+
+def _decode(line: bytes) -> Optional[Dict[str, Any]]:
+    if not line.strip():
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y%m%d")
+
+
+def _encode_cursor(key: Tuple[float, int, int]) -> str:
+    return f"{key[0]!r}:{key[1]}:{key[2]}"
+
+
+def _decode_cursor(cursor: str) -> Tuple[float, int, int]:
+    try:
+        ts, chunk_id, line_no = cursor.split(":")
+        return float(ts), int(chunk_id), int(line_no)
+    except ValueError:
+        raise ValueError(f"Invalid log search cursor: {cursor!r}") from None
+
+
+class LogIndex:
+    """SQLite-backed chunk index over one log directory.
+
+    All methods are synchronous; call them from a worker thread
+    (``asyncio.to_thread``) when on the event loop.
+    """
+
+    def __init__(
+        self,
+        db_path: PathLike,
+        base_path: PathLike = "logs",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        rescan_interval: float = DEFAULT_RESCAN_INTERVAL,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.base_path = Path(base_path)
+        self.chunk_size = max(1024, int(chunk_size))
+        self.rescan_interval = float(rescan_interval)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_CREATE_TABLES_SQL)
+        self._conn.commit()
+        # Guards the connection; refresh takes it per file, so searches
+        # interleave with a long initial build.
+        self._db_lock = threading.Lock()
+        self._dirty: Set[str] = set()
+        self._dirty_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._last_rescan = 0.0
+        self._writer = None
+
+    # ── Writer integration ────────────────────────────────────────────
+
+    def attach(self, writer) -> None:
+        """Mark files dirty as ``writer`` (a ``BackgroundWriter``) appends to them."""
+        self._writer = writer
+        writer.add_listener(self._on_written)
+
+    def detach(self) -> None:
+        if self._writer is not None:
+            self._writer.remove_listener(self._on_written)
+            self._writer = None
+
+    def _on_written(self, records: List[Tuple[Dict[str, Any], str]]) -> None:
+        from addons.logging import _record_date
+
+        paths = {
+            str(self.base_path / str(obj.get("server_id")) / _record_date(obj.get("timestamp"))
+                / f"{str(obj.get('level', '')).lower()}.jsonl")
+            for obj, _line in records
+        }
+        with self._dirty_lock:
+            self._dirty |= paths
+
+    # ── Indexing ──────────────────────────────────────────────────────
+
+    def refresh(self, full: Optional[bool] = None, wait: bool = True) -> IndexStats:
+        """Index what was appended since the last refresh.
+
+        Args:
+            full: Walk the whole log tree instead of only the files the writer
+                touched. Defaults to True once ``rescan_interval`` has passed
+                since the last full walk.
+            wait: Wait for a refresh already running in another thread. If
+                False, return empty stats instead.
+        """
+        stats = IndexStats()
+        if not self._refresh_lock.acquire(blocking=wait):
+            return stats
+        try:
+            if full is None:
+                full = time.monotonic() - self._last_rescan >= self.rescan_interval
+            with self._dirty_lock:
+                dirty, self._dirty = self._dirty, set()
+            if full:
+                self._last_rescan = time.monotonic()
+                present = set(self._walk())
+                with self._db_lock:
+                    known = {row[0] for row in self._conn.execute("SELECT path FROM log_files")}
+                with self._db_lock:
+                    for path in sorted(known - present):
+                        self._drop_file(path)
+                        stats.removed += 1
+                paths = sorted(present | dirty)
+            else:
+                paths = sorted(dirty)
+            last_commit = time.monotonic()
+            try:
+                for path in paths:
+                    self._refresh_path(Path(path), stats)
+                    # Group files into transactions; each commit is a sync.
+                    if time.monotonic() - last_commit >= _COMMIT_INTERVAL:
+                        with self._db_lock:
+                            self._conn.commit()
+                        last_commit = time.monotonic()
+            finally:
+                with self._db_lock:
+                    self._conn.commit()
+        finally:
+            self._refresh_lock.release()
+        return stats
+
+    def _walk(self) -> Iterator[str]:
+        if not self.base_path.is_dir():
+            return
+        for server_dir in self.base_path.iterdir():
+            if not server_dir.is_dir():
+                continue
+            for day_dir in server_dir.iterdir():
+                name = day_dir.name
+                if len(name) != 8 or not name.isdigit() or not day_dir.is_dir():
+                    continue
+                for path in day_dir.iterdir():
+                    if path.name.endswith((".jsonl", ".jsonl.gz")):
+                        yield str(path)
+
+    def _refresh_path(self, path: Path, stats: IndexStats) -> None:
+        if path.name.endswith(".jsonl.gz"):
+            self._refresh_segment(path, stats)
+        else:
+            self._refresh_plain(path, stats)
+
+    def _file_row(self, path: Path) -> Optional[Tuple[int, int, int, int]]:
+        return self._conn.execute(
+            "SELECT id, inode, base_offset, indexed_size FROM log_files WHERE path = ?", (str(path),)
+        ).fetchone()
+
+    def _drop_file(self, path: Union[str, Path]) -> None:
+        row = self._conn.execute("SELECT id FROM log_files WHERE path = ?", (str(path),)).fetchone()
+        if row is None:
+            return
+        self._conn.execute(
+            "DELETE FROM log_postings WHERE chunk_id IN (SELECT id FROM log_chunks WHERE file_id = ?)", (row[0],)
+        )
+        self._conn.execute("DELETE FROM log_chunks WHERE file_id = ?", (row[0],))
+        self._conn.execute("DELETE FROM log_files WHERE id = ?", (row[0],))
+
+    def _ensure_file(self, path: Path, kind: str, inode: int, base_offset: int) -> Tuple[int, int]:
+        """Return (file id, indexed size), starting over if the file was replaced."""
+        row = self._file_row(path)
+        if row is not None and (row[1] != inode or row[2] != base_offset):
+            self._drop_file(path)
+            row = None
+        if row is not None:
+            return row[0], row[3]
+        day_dir = path.parent
+        level = path.name.split(".", 1)[0].upper()
+        cur = self._conn.execute(
+            "INSERT INTO log_files (path, server_id, day, level, kind, inode, base_offset, indexed_size) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (str(path), day_dir.parent.name, day_dir.name, level, kind, inode, base_offset, base_offset),
+        )
+        return cur.lastrowid, base_offset
+
+    def _store_chunks(self, file_id: int, chunks: List[_Chunk], indexed_size: int, stats: IndexStats) -> None:
+        postings: List[Tuple[str, int]] = []
+        for chunk in chunks:
+            if chunk.min_ts is None:
+                continue
+            cur = self._conn.execute(
+                "INSERT INTO log_chunks (file_id, offset, length, records, min_ts, max_ts) VALUES (?, ?, ?, ?, ?, ?)",
+                (file_id, chunk.offset, chunk.length, chunk.records, chunk.min_ts, chunk.max_ts),
+            )
+            postings.extend((term, cur.lastrowid) for term in chunk.terms)
+            stats.chunks += 1
+            stats.records += chunk.records
+        self._conn.executemany("INSERT OR IGNORE INTO log_postings (term, chunk_id) VALUES (?, ?)", postings)
+        self._conn.execute("UPDATE log_files SET indexed_size = ? WHERE id = ?", (indexed_size, file_id))
+
+    def _refresh_plain(self, path: Path, stats: IndexStats) -> None:
+        try:
+            st = path.stat()
+        except OSError:
+            with self._db_lock:
+                self._drop_file(path)
+            return
+        # Bytes already folded into a compacted segment are indexed there.
+        gz_path, index_path = segment_paths(path)
+        base_offset = _already_compacted_bytes(path, load_index(index_path)) if gz_path.exists() else 0
+        with self._db_lock:
+            file_id, indexed_size = self._ensure_file(path, "plain", st.st_ino, base_offset)
+            if st.st_size < indexed_size:
+                # Truncated or rewritten in place: index it again from the start.
+                self._drop_file(path)
+                file_id, indexed_size = self._ensure_file(path, "plain", st.st_ino, base_offset)
+        if st.st_size == indexed_size:
+            return
+
+        chunks, end = self._scan_plain(path, indexed_size)
+        stats.bytes_read += end - indexed_size
+        stats.files += 1
+        with self._db_lock:
+            self._store_chunks(file_id, chunks, end, stats)
+
+    def _scan_plain(self, path: Path, start: int) -> Tuple[List[_Chunk], int]:
+        """Chunk the complete lines of ``path`` from ``start``; returns (chunks, end offset)."""
+        chunks: List[_Chunk] = []
+        current = _Chunk(offset=start)
+        bucket: Optional[int] = None
+        pos = start
+        with open(path, "rb") as fh:
+            fh.seek(start)
+            pending = b""
+            while True:
+                data = fh.read(_READ_SIZE)
+                if not data:
+                    break
+                lines = (pending + data).split(b"\n")
+                pending = lines.pop()
+                for line in lines:
+                    size = len(line) + 1
+                    record = _decode(line)
+                    ts = _record_ts(record) if record is not None else None
+                    if ts is not None:
+                        line_bucket = int(ts // _BUCKET_SECONDS)
+                        if current.records and (line_bucket != bucket or current.length >= self.chunk_size):
+                            chunks.append(current)
+                            current = _Chunk(offset=pos)
+                        bucket = line_bucket
+                        current.add(record, ts)
+                    current.length += size
+                    pos += size
+        # A partial last line is still being written; it is picked up next time.
+        if current.length:
+            chunks.append(current)
+        return chunks, pos
+
+    def _refresh_segment(self, gz_path: Path, stats: IndexStats) -> None:
+        jsonl_path = Path(str(gz_path)[: -len(".gz")])
+        index = load_index(segment_paths(jsonl_path)[1])
+        try:
+            st = gz_path.stat()
+        except OSError:
+            index = None
+        if index is None:
+            # No usable index (missing, or compaction still running); the
+            # plain file, if any, still holds the records.
+            with self._db_lock:
+                self._drop_file(gz_path)
+            return
+        with self._db_lock:
+            file_id, indexed_size = self._ensure_file(gz_path, "segment", st.st_ino, 0)
+            if index.end_offset < indexed_size:
+                self._drop_file(gz_path)
+                file_id, indexed_size = self._ensure_file(gz_path, "segment", st.st_ino, 0)
+        blocks = [b for b in index.blocks if b.offset >= indexed_size]
+        if not blocks:
+            return
+
+        chunks: List[_Chunk] = []
+        with open(gz_path, "rb") as fh:
+            for block in blocks:
+                fh.seek(block.offset)
+                data = gzip.decompress(fh.read(block.length))
+                chunk = _Chunk(offset=block.offset, length=block.length)
+                for line in data.split(b"\n"):
+                    record = _decode(line)
+                    ts = _record_ts(record) if record is not None else None
+                    if ts is not None:
+                        chunk.add(record, ts)
+                chunks.append(chunk)
+                stats.bytes_read += block.length
+        stats.files += 1
+        with self._db_lock:
+            self._store_chunks(file_id, chunks, index.end_offset, stats)
+
+    # ── Search ────────────────────────────────────────────────────────
+
+    def search(
+        self,
+        guild_id: Optional[str] = None,
+        levels: Optional[Iterable[str]] = None,
+        source: Optional[str] = None,
+        user_id: Optional[str] = None,
+        start: TimeLike = None,
+        end: TimeLike = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> SearchPage:
+        """Return up to ``limit`` matching records, newest first.
+
+        Filters combine with AND. ``levels`` matches any of the given levels.
+        ``start``/``end`` accept unix seconds, ISO strings or datetimes.
+        Records without a timestamp are never returned.
+
+        Raises:
+            ValueError: ``cursor`` is not one this method returned.
+        """
+        # Full rescans are left to the owner of the index; a search never
+        # waits behind one.
+        self.refresh(full=False, wait=False)
+        after = _decode_cursor(cursor) if cursor else None
+        start_ts, end_ts = _to_unix(start), _to_unix(end)
+        if after is not None:
+            end_ts = after[0] if end_ts is None else min(end_ts, after[0])
+        level_set = {level.upper() for level in levels} if levels else None
+
+        if guild_id or start_ts is not None or end_ts is not None:
+            # Narrow down the files first; CROSS JOIN keeps SQLite from
+            # walking the whole max_ts index instead.
+            sql = ["SELECT c.id, f.path, f.kind, c.offset, c.length, c.max_ts",
+                   "FROM log_files f CROSS JOIN log_chunks c WHERE c.file_id = f.id"]
+        else:
+            sql = ["SELECT c.id, f.path, f.kind, c.offset, c.length, c.max_ts",
+                   "FROM log_chunks c JOIN log_files f ON f.id = c.file_id WHERE 1 = 1"]
+        params: List[Any] = []
+        if guild_id:
+            sql.append("AND f.server_id = ?")
+            params.append(str(guild_id))
+        if level_set:
+            sql.append(f"AND f.level IN ({', '.join('?' * len(level_set))})")
+            params.extend(sorted(level_set))
+        # Day directories bound the candidate files before chunks are looked at.
+        if start_ts is not None:
+            sql.append("AND f.day >= ? AND c.max_ts >= ?")
+            params.extend([_day(start_ts), start_ts])
+        if end_ts is not None:
+            sql.append("AND f.day <= ? AND c.min_ts <= ?")
+            params.extend([_day(end_ts), end_ts])
+        for term in (f"s:{source}" if source else None, f"u:{user_id}" if user_id else None):
+            if term:
+                sql.append("AND c.id IN (SELECT chunk_id FROM log_postings WHERE term = ?)")
+                params.append(term)
+        sql.append("ORDER BY c.max_ts DESC, c.id DESC")
+
+        def matches(record: Dict[str, Any], ts: float) -> bool:
+            if start_ts is not None and ts < start_ts:
+                return False
+            if end_ts is not None and ts > end_ts:
+                return False
+            if source and record.get("source") != source:
+                return False
+            if user_id and str(record.get("user_id", "")) != str(user_id):
+                return False
+            return True
+
+        page = SearchPage()
+        limit = max(1, int(limit))
+        # Max-heap on (ts, chunk id, line number). A buffered record is final
+        # once it is newer than every chunk still unread.
+        heap: List[Tuple[float, int, int, Dict[str, Any]]] = []
+        results: List[Tuple[Tuple[float, int, int], Dict[str, Any]]] = []
+        handles: Dict[str, Any] = {}
+
+        def drain(bound: Optional[float]) -> bool:
+            while heap and (bound is None or -heap[0][0] > bound):
+                neg_ts, neg_chunk, neg_line, record = heapq.heappop(heap)
+                results.append(((-neg_ts, -neg_chunk, -neg_line), record))
+                if len(results) > limit:
+                    return True
+            return False
+
+        try:
+            with self._db_lock:
+                rows = self._conn.execute(" ".join(sql), params).fetchall()
+            done = False
+            for chunk_id, path, kind, offset, length, max_ts in rows:
+                if drain(max_ts):
+                    done = True
+                    break
+                fh = handles.get(path)
+                if fh is None:
+                    try:
+                        fh = handles[path] = open(path, "rb")
+                    except OSError:
+                        continue
+                fh.seek(offset)
+                data = fh.read(length)
+                if kind == "segment":
+                    data = gzip.decompress(data)
+                page.chunks_read += 1
+                for line_no, line in enumerate(data.split(b"\n")):
+                    record = _decode(line)
+                    ts = _record_ts(record) if record is not None else None
+                    if ts is None or not matches(record, ts):
+                        continue
+                    key = (ts, chunk_id, line_no)
+                    if after is not None and key >= after:
+                        continue
+                    heapq.heappush(heap, (-ts, -chunk_id, -line_no, record))
+            if not done:
+                drain(None)
+        finally:
+            for fh in handles.values():
+                fh.close()
+
+        page.records = [record for _key, record in results[:limit]]
+        if len(results) > limit:
+            page.next_cursor = _encode_cursor(results[limit - 1][0])
+        return page
+
+    def close(self) -> None:
+        self.detach()
+        with self._db_lock:
+            self._conn.close()
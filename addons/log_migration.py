@@ -0,0 +1,418 @@
+"""Parallel, checkpointed migration of historical day logs into user stats.
+
+``LogMigration`` ingests the ``receive_message`` records of
+``logs/{guild}/{YYYYMMDD}/info`` logs, plain or compacted (see
+``addons.log_segments``), into ``user_stats`` and the dashboard events.
+
+Each day log is split into chunks. A compacted segment yields one chunk per
+gzip block. A plain file yields ``chunk_size`` byte ranges, and a range owns
+the lines that start inside it, so workers can find their boundaries on their
+own. Worker processes decode the chunks and keep only message records. The
+parent applies the results strictly in log order, so streaks and first/last
+timestamps come out as in a sequential run.
+
+Each chunk's user stats commit in one transaction with a checkpoint: the file
+name and the byte offset where the chunk ends. A crash therefore resumes
+mid-file without counting a message twice. Dashboard events live in another
+database and are flushed just before that transaction, so a crash between
+the two can record one chunk's events twice. A finished day moves to
+``log_migration_state`` as before, and its checkpoint is dropped.
+
+Worker CPU time plus the time spent applying chunks is held to ``cpu_share``
+of the machine's cores, averaged over the run. When the migration gets ahead
+of that budget it sleeps, which keeps live traffic responsive. Progress and an
+ETA are logged every ``progress_interval`` seconds and exposed as
+``LogMigration.progress``.
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from addons.log_segments import (
+    SegmentIndex,
+    _already_compacted_bytes,
+    _decode_lines,
+    load_index,
+    segment_paths,
+)
+from addons.logging import get_logger
+
+logger = get_logger(server_id="system", source=__name__)
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+DEFAULT_CPU_SHARE = 0.25
+DEFAULT_PROGRESS_INTERVAL = 30.0
+_LEVEL = "info"
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A byte range of one day log file that a worker parses on its own."""
+
+    guild_id: str
+    date: str
+    path: str
+    start: int
+    end: int
+    compressed: bool
+    # Decoded bytes at the start of a compressed block that were already
+    # applied from the plain file before the day was compacted
+    skip: int = 0
+
+    @property
+    def file(self) -> str:
+        return os.path.basename(self.path)
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start
+
+
+@dataclass
+class ParsedChunk:
+    """Message records of one chunk, in log order."""
+
+    records: List[Dict[str, Any]]
+    events: List[Tuple[str, str, str, float]]
+    cpu_seconds: float
+
+
+@dataclass
+class MigrationProgress:
+    """Counters of a running migration; bytes are on-disk bytes of the planned chunks."""
+
+    days_total: int = 0
+    days_done: int = 0
+    bytes_total: int = 0
+    bytes_done: int = 0
+    records: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """Remaining time at the average rate so far, or None before any progress."""
+        elapsed = time.monotonic() - self.started_at
+        if self.bytes_done <= 0 or elapsed <= 0:
+            return None
+        return (self.bytes_total - self.bytes_done) / (self.bytes_done / elapsed)
+
+    def describe(self) -> str:
+        percent = self.bytes_done / self.bytes_total * 100 if self.bytes_total else 100.0
+        eta = self.eta_seconds
+        eta_text = f"{int(eta // 60)}m{int(eta % 60):02d}s" if eta is not None else "unknown"
+        return (
+            f"{self.days_done}/{self.days_total} days, {self.bytes_done / 1e6:.1f}/"
+            f"{self.bytes_total / 1e6:.1f} MB ({percent:.1f}%), {self.records} messages, ETA {eta_text}"
+        )
+
+
+def _message_record(record: Dict[str, Any], guild_id: str) -> Optional[Tuple[Dict[str, Any], Tuple]]:
+    """Turn a log record into a user_stats record and a dashboard event, if it is a message."""
+    if record.get("action") != "receive_message":
+        return None
+    user_id = record.get("user_id", "")
+    if not user_id:
+        return None
+    extra = record.get("extra")
+    channel_id = str((extra if isinstance(extra, dict) else {}).get("channel_id", "0"))
+    timestamp = record.get("timestamp") or datetime.now(timezone.utc).isoformat()
+    try:
+        ts = datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+    except (ValueError, AttributeError):
+        ts = time.time()
+    return (
+        {
+            "user_id": user_id,
+            "guild_id": guild_id,
+            "message_content": record.get("message", ""),
+            "channel_id": channel_id,
+            "timestamp": timestamp,
+        },
+        (guild_id, user_id, channel_id, ts),
+    )
+
+
+def parse_chunk(chunk: Chunk) -> ParsedChunk:
+    """Decode one chunk and keep its message records (runs in a worker process)."""
+    started = time.process_time()
+    records: List[Dict[str, Any]] = []
+    events: List[Tuple[str, str, str, float]] = []
+
+    def keep(record: Dict[str, Any]) -> None:
+        parsed = _message_record(record, chunk.guild_id)
+        if parsed is not None:
+            records.append(parsed[0])
+            events.append(parsed[1])
+
+    with open(chunk.path, "rb") as fh:
+        if chunk.compressed:
+            fh.seek(chunk.start)
+            data = gzip.decompress(fh.read(chunk.size))
+            skip = chunk.skip
+            if 0 < skip < len(data) and data[skip - 1:skip] != b"\n":
+                # As in a plain file, the line the offset falls in was already applied.
+                skip = data.find(b"\n", skip) + 1 or len(data)
+            for record in _decode_lines(data[skip:]):
+                keep(record)
+        else:
+            position = chunk.start
+            if position > 0:
+                # A line that starts before the range belongs to the previous chunk.
+                fh.seek(position - 1)
+                if fh.read(1) != b"\n":
+                    position += len(fh.readline())
+            fh.seek(position)
+            while position < chunk.end:
+                line = fh.readline()
+                if not line.endswith(b"\n"):
+                    break  # end of file or a line still being written
+                position += len(line)
+                for record in _decode_lines(line):
+                    keep(record)
+    return ParsedChunk(records, events, time.process_time() - started)
+
+
+def plan_day(
+    guild_id: str,
+    day_dir: Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    checkpoint: Optional[Tuple[str, int]] = None,
+) -> Optional[List[Chunk]]:
+    """List the chunks of one day log still to migrate.
+
+    Args:
+        guild_id: Guild the day belongs to.
+        day_dir: The ``logs/{guild}/{YYYYMMDD}`` directory.
+        chunk_size: Bytes per chunk of a plain file.
+        checkpoint: ``(file name, byte offset)`` already applied for this day.
+
+    Returns:
+        The chunks in log order, or None if the checkpoint no longer matches
+        the files. A checkpoint in a plain file that has since been compacted
+        is mapped onto the segment (see ``_locate_compacted_offset``).
+    """
+    date = day_dir.name
+    jsonl_path = day_dir / f"{_LEVEL}.jsonl"
+    gz_path, index_path = segment_paths(jsonl_path)
+    index = load_index(index_path) if gz_path.exists() else None
+
+    chunks: List[Chunk] = []
+    if index is not None:
+        chunks.extend(
+            Chunk(guild_id, date, str(gz_path), block.offset, block.offset + block.length, True)
+            for block in index.blocks
+        )
+    if jsonl_path.is_file():
+        size = jsonl_path.stat().st_size
+        start = _already_compacted_bytes(jsonl_path, index)
+        chunks.extend(
+            Chunk(guild_id, date, str(jsonl_path), offset, min(offset + chunk_size, size), False)
+            for offset in range(start, size, max(1, chunk_size))
+        )
+
+    if checkpoint is None:
+        return chunks
+    file_name, offset = checkpoint
+    for i, chunk in enumerate(chunks):
+        if chunk.file != file_name:
+            continue
+        if chunk.end == offset:
+            return chunks[i + 1:]
+        if chunk.start <= offset < chunk.end:
+            if chunk.compressed:
+                return None  # not a block boundary
+            return [Chunk(guild_id, date, chunk.path, offset, chunk.end, False)] + chunks[i + 1:]
+    if index is not None and file_name == jsonl_path.name:
+        located = _locate_compacted_offset(gz_path, index, offset)
+        if located is not None:
+            block, skip = located
+            if skip:
+                return [replace(chunks[block], skip=skip)] + chunks[block + 1:]
+            return chunks[block:]
+    return None
+
+
+def _locate_compacted_offset(gz_path: Path, index: SegmentIndex, offset: int) -> Optional[Tuple[int, int]]:
+    """Find where byte ``offset`` of the last plain file folded into a segment ended up.
+
+    Compaction copies the plain file's lines in order (it only drops blank
+    lines, which the log writer never produces), so the offset is the same
+    number of decoded bytes into the blocks of that compaction run.
+    Indexes written before ``compacted_from`` recorded the run's first block
+    are matched from the end: the run is the trailing blocks holding the
+    file's ``size`` bytes.
+
+    Returns:
+        ``(block number, decoded bytes into it)``, with the block number equal
+        to the block count when the whole file had been applied, or None if
+        the offset cannot be placed.
+    """
+    marker = index.compacted_from or {}
+    size = int(marker.get("size", 0))
+    first = marker.get("first_block")
+    position = int(marker.get("source_offset", 0))
+    with open(gz_path, "rb") as fh:
+
+        def decoded_length(number: int) -> int:
+            block = index.blocks[number]
+            fh.seek(block.offset)
+            return len(gzip.decompress(fh.read(block.length)))
+
+        if first is None:
+            total, first = 0, len(index.blocks)
+            while total < size and first > 0:
+                first -= 1
+                total += decoded_length(first)
+            if total != size:
+                return None
+            position = 0
+        if not position <= offset <= size:
+            return None
+        for number in range(int(first), len(index.blocks)):
+            length = decoded_length(number)
+            if offset < position + length:
+                return number, offset - position
+            position += length
+    return (len(index.blocks), 0) if position == offset else None
+
+
+class LogMigration:
+    """Migrates historical day logs through a process pool, with checkpoints.
+
+    Args:
+        logs_root: The ``logs`` directory.
+        stats_storage: ``StatsStorage`` holding user_stats and the checkpoints.
+        stats_collector: ``StatsCollector`` for dashboard events, if any.
+        workers: Worker processes; defaults to the cores ``cpu_share`` allows.
+        cpu_share: Fraction of all cores the migration may use on average.
+        chunk_size: Bytes per chunk of a plain day log.
+        progress_interval: Seconds between progress log lines.
+    """
+
+    def __init__(
+        self,
+        logs_root: Path,
+        stats_storage: Any,
+        stats_collector: Any = None,
+        workers: Optional[int] = None,
+        cpu_share: float = DEFAULT_CPU_SHARE,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+    ) -> None:
+        self.logs_root = Path(logs_root)
+        self.stats_storage = stats_storage
+        self.stats_collector = stats_collector
+        self.cpu_share = min(1.0, max(0.01, float(cpu_share)))
+        cores = os.cpu_count() or 1
+        self.workers = max(1, int(workers) if workers else int(cores * self.cpu_share))
+        self.chunk_size = max(1, int(chunk_size))
+        self.progress_interval = progress_interval
+        self.progress = MigrationProgress()
+        self._cores = cores
+        self._busy = 0.0
+
+    async def _plan(self) -> List[Tuple[str, str, List[Chunk]]]:
+        """Collect (guild, date, chunks) for every day not migrated yet, in order."""
+        days: List[Tuple[str, str, List[Chunk]]] = []
+        guild_dirs = sorted(d for d in self.logs_root.iterdir() if d.is_dir() and d.name.isdigit())
+        for guild_dir in guild_dirs:
+            guild_id = guild_dir.name
+            last_processed = await self.stats_storage.get_migration_state(guild_id)
+            checkpoint = await self.stats_storage.get_migration_checkpoint(guild_id)
+            date_dirs = sorted(
+                d for d in guild_dir.iterdir() if d.is_dir() and len(d.name) == 8 and d.name.isdigit()
+            )
+            for day_dir in date_dirs:
+                if last_processed and day_dir.name <= last_processed:
+                    continue
+                day_checkpoint = None
+                if checkpoint and checkpoint[0] == day_dir.name:
+                    day_checkpoint = checkpoint[1:]
+                chunks = await asyncio.to_thread(plan_day, guild_id, day_dir, self.chunk_size, day_checkpoint)
+                if chunks is None:
+                    logger.warning(
+                        "Log migration checkpoint for guild=%s date=%s no longer matches the "
+                        "files; migrating that day again from the start, so its messages before "
+                        "the checkpoint are counted twice", guild_id, day_dir.name,
+                    )
+                    chunks = await asyncio.to_thread(plan_day, guild_id, day_dir, self.chunk_size)
+                elif not chunks and day_checkpoint is None:
+                    continue  # no info log that day
+                days.append((guild_id, day_dir.name, chunks))
+        return days
+
+    async def run(self) -> MigrationProgress:
+        """Migrate everything not migrated yet; returns the final progress."""
+        if not self.logs_root.is_dir():
+            return self.progress
+        days = await self._plan()
+        self.progress = MigrationProgress(
+            days_total=len(days), bytes_total=sum(c.size for _, _, chunks in days for c in chunks)
+        )
+        if not days:
+            return self.progress
+        logger.info(
+            "Migrating %d day logs (%.1f MB) with %d workers at %.0f%% CPU share",
+            len(days), self.progress.bytes_total / 1e6, self.workers, self.cpu_share * 100,
+        )
+
+        loop = asyncio.get_running_loop()
+        executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        pending: Deque[Tuple[Chunk, asyncio.Future]] = deque()
+        queue = ((guild_id, date, chunk) for guild_id, date, chunks in days for chunk in chunks)
+        last_report = time.monotonic()
+        try:
+            for guild_id, date, chunks in days:
+                for chunk in chunks:
+                    # Keep every worker busy plus one chunk queued each.
+                    while len(pending) < self.workers * 2:
+                        item = next(queue, None)
+                        if item is None:
+                            break
+                        pending.append((item[2], loop.run_in_executor(executor, parse_chunk, item[2])))
+                    _queued, future = pending.popleft()
+                    await self._apply(chunk, await future)
+                    if time.monotonic() - last_report >= self.progress_interval:
+                        logger.info("Log migration: %s", self.progress.describe())
+                        last_report = time.monotonic()
+                await self.stats_storage.set_migration_state(guild_id, date)
+                self.progress.days_done += 1
+        finally:
+            for _chunk, future in pending:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("Log migration finished: %s", self.progress.describe())
+        return self.progress
+
+    async def _apply(self, chunk: Chunk, parsed: ParsedChunk) -> None:
+        started = time.monotonic()
+        if parsed.events and self.stats_collector is not None:
+            await self.stats_collector.bulk_record_messages(parsed.events)
+            await self.stats_collector.flush()
+        applied = await self.stats_storage.apply_migration_batch(
+            parsed.records, chunk.guild_id, chunk.date, chunk.file, chunk.end
+        )
+        if not applied:
+            raise RuntimeError(f"could not apply {chunk.file} of guild={chunk.guild_id} date={chunk.date}")
+        self.progress.bytes_done += chunk.size
+        self.progress.records += len(parsed.records)
+        self._busy += parsed.cpu_seconds + (time.monotonic() - started)
+        await self._throttle()
+
+    async def _throttle(self) -> None:
+        """Sleep while the work done exceeds ``cpu_share`` of the cores since the start."""
+        capacity = self.cpu_share * self._cores
+        elapsed = time.monotonic() - self.progress.started_at
+        ahead = self._busy / capacity - elapsed
+        if ahead > 0:
+            await asyncio.sleep(ahead)
@@ -0,0 +1,462 @@
+"""Compressed day-log segments with a sidecar block index.
+
+The background writer appends NDJSON records to
+``logs/{server}/{YYYYMMDD}/{level}.jsonl``. Once a day is closed, the
+compaction job rewrites each file as ``{level}.jsonl.gz``: a concatenation of
+gzip members of roughly ``block_size`` uncompressed bytes, each holding whole
+lines. Every member decodes on its own, and the file as a whole is still a
+valid gzip stream, so ``zcat`` keeps working.
+
+Next to it, ``{level}.jsonl.idx`` is a JSON sidecar listing each block's byte
+offset and length, its record count, the min/max record timestamp (unix
+seconds), and how many records of each level it holds. Readers use the index
+to seek straight to the blocks that overlap a time range and skip the rest.
+
+Records that arrive for a compacted day after compaction (late flushes) land
+in a fresh ``.jsonl`` file and are appended as new blocks on the next run.
+Readers always see both: compacted blocks first, then any plain tail.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+INDEX_VERSION = 1
+DEFAULT_BLOCK_SIZE = 256 * 1024
+# A day is only compacted once its files have not been written for this long.
+DEFAULT_GRACE_SECONDS = 3600.0
+
+PathLike = Union[str, Path]
+TimeLike = Union[int, float, str, datetime, None]
+
+
+@dataclass
+class BlockInfo:
+    """One independently decodable gzip member of a compacted segment."""
+
+    offset: int
+    length: int
+    records: int
+    min_ts: Optional[float]
+    max_ts: Optional[float]
+    levels: Dict[str, int] = field(default_factory=dict)
+
+    def overlaps(self, start: Optional[float], end: Optional[float]) -> bool:
+        """Whether the block may hold records in [start, end].
+
+        Blocks without any parseable timestamp always overlap.
+        """
+        if self.min_ts is None or self.max_ts is None:
+            return True
+        if start is not None and self.max_ts < start:
+            return False
+        if end is not None and self.min_ts > end:
+            return False
+        return True
+
+    def has_levels(self, levels: Optional[Iterable[str]]) -> bool:
+        if levels is None or not self.levels:
+            return True
+        return any(level in self.levels for level in levels)
+
+
+@dataclass
+class SegmentIndex:
+    """Sidecar index for one ``.jsonl.gz`` segment."""
+
+    blocks: List[BlockInfo] = field(default_factory=list)
+    # Size and SHA-1 of the last plain file folded into the segment, so a
+    # leftover copy that could not be deleted is not read or compacted twice,
+    # and where that run started: its first block and the source byte offset
+    # that block begins at.
+    compacted_from: Optional[Dict[str, Any]] = None
+
+    @property
+    def end_offset(self) -> int:
+        return max((b.offset + b.length for b in self.blocks), default=0)
+
+    @property
+    def records(self) -> int:
+        return sum(b.records for b in self.blocks)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": INDEX_VERSION,
+            "blocks": [
+                {
+                    "offset": b.offset,
+                    "length": b.length,
+                    "records": b.records,
+                    "min_ts": b.min_ts,
+                    "max_ts": b.max_ts,
+                    "levels": b.levels,
+                }
+                for b in self.blocks
+            ],
+            "compacted_from": self.compacted_from,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SegmentIndex":
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported log index version: {data.get('version')!r}")
+        blocks = [
+            BlockInfo(
+                offset=int(b["offset"]),
+                length=int(b["length"]),
+                records=int(b.get("records", 0)),
+                min_ts=b.get("min_ts"),
+                max_ts=b.get("max_ts"),
+                levels=dict(b.get("levels") or {}),
+            )
+            for b in data.get("blocks", [])
+        ]
+        return cls(blocks=blocks, compacted_from=data.get("compacted_from"))
+
+
+@dataclass
+class CompactionStats:
+    """Totals for one compaction run."""
+
+    files: int = 0
+    blocks: int = 0
+    records: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    errors: int = 0
+
+
+def segment_paths(jsonl_path: PathLike) -> tuple:
+    """Return (gzip segment, index) paths for a plain ``.jsonl`` path."""
+    path = str(jsonl_path)
+    return Path(path + ".gz"), Path(path + ".idx")
+
+
+def _to_unix(value: TimeLike) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _record_ts(record: Dict[str, Any]) -> Optional[float]:
+    ts = record.get("timestamp")
+    if not isinstance(ts, str):
+        return None
+    try:
+        return _to_unix(ts)
+    except ValueError:
+        return None
+
+
+def load_index(index_path: PathLike) -> Optional[SegmentIndex]:
+    """Read a sidecar index, or None if it is missing or unreadable."""
+    try:
+        with open(index_path, "r", encoding="utf-8") as fh:
+            return SegmentIndex.from_dict(json.load(fh))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_index(index_path: Path, index: SegmentIndex) -> None:
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(index.to_dict(), fh, separators=(",", ":"))
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, index_path)
+
+
+def _prefix_digest(path: Path, size: int) -> Optional[str]:
+    digest = hashlib.sha1()
+    remaining = size
+    with open(path, "rb") as fh:
+        while remaining > 0:
+            chunk = fh.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                return None
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def _already_compacted_bytes(jsonl_path: Path, index: Optional[SegmentIndex]) -> int:
+    """Length of the prefix of ``jsonl_path`` that is already in the segment."""
+    marker = index.compacted_from if index else None
+    if not marker:
+        return 0
+    size = int(marker.get("size", 0))
+    try:
+        if size <= 0 or jsonl_path.stat().st_size < size:
+            return 0
+        return size if _prefix_digest(jsonl_path, size) == marker.get("sha1") else 0
+    except OSError:
+        return 0
+
+
+def _iter_blocks(fh, block_size: int) -> Iterator[List[bytes]]:
+    lines: List[bytes] = []
+    size = 0
+    for line in fh:
+        if not line.strip():
+            continue
+        if not line.endswith(b"\n"):
+            line += b"\n"
+        lines.append(line)
+        size += len(line)
+        if size >= block_size:
+            yield lines
+            lines, size = [], 0
+    if lines:
+        yield lines
+
+
+def _describe_block(lines: List[bytes], offset: int, length: int) -> BlockInfo:
+    min_ts: Optional[float] = None
+    max_ts: Optional[float] = None
+    levels: Dict[str, int] = {}
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(record, dict):
+            continue
+        level = record.get("level")
+        if isinstance(level, str):
+            levels[level] = levels.get(level, 0) + 1
+        ts = _record_ts(record)
+        if ts is not None:
+            min_ts = ts if min_ts is None else min(min_ts, ts)
+            max_ts = ts if max_ts is None else max(max_ts, ts)
+    return BlockInfo(offset, length, len(lines), min_ts, max_ts, levels)
+
+
+def compact_file(
+    jsonl_path: PathLike,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    compresslevel: int = 6,
+) -> Optional[SegmentIndex]:
+    """Fold a plain day log into its compressed segment and delete it.
+
+    New blocks are appended to an existing segment, so late records for a
+    compacted day are picked up by running this again. The gzip data is
+    synced before the index is replaced, and the index before the plain file
+    is removed; a crash at any point leaves every record readable exactly
+    once.
+
+    Returns:
+        The updated index, or None if ``jsonl_path`` does not exist.
+    """
+    jsonl_path = Path(jsonl_path)
+    if not jsonl_path.is_file():
+        return None
+    gz_path, index_path = segment_paths(jsonl_path)
+    index = load_index(index_path) if gz_path.exists() else None
+    if index is None:
+        index = SegmentIndex()
+
+    skip = _already_compacted_bytes(jsonl_path, index)
+    source_size = jsonl_path.stat().st_size
+    if skip < source_size:
+        first_block = len(index.blocks)
+        with open(jsonl_path, "rb") as src, open(gz_path, "ab") as out:
+            # Drop bytes from an interrupted run that never made it into the index.
+            out.truncate(index.end_offset)
+            out.seek(index.end_offset)
+            src.seek(skip)
+            offset = index.end_offset
+            for lines in _iter_blocks(src, block_size):
+                data = gzip.compress(b"".join(lines), compresslevel=compresslevel, mtime=0)
+                out.write(data)
+                index.blocks.append(_describe_block(lines, offset, len(data)))
+                offset += len(data)
+            out.flush()
+            os.fsync(out.fileno())
+        index.compacted_from = {
+            "size": source_size,
+            "sha1": _prefix_digest(jsonl_path, source_size),
+            "first_block": first_block,
+            "source_offset": skip,
+        }
+        _write_index(index_path, index)
+
+    # On Windows this fails while a reader holds the file open; the next run
+    # recognises the leftover through ``compacted_from`` and retries.
+    try:
+        jsonl_path.unlink()
+    except OSError:
+        pass
+    return index
+
+
+def _utc_today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%d")
+
+
+def compact_closed_days(
+    base_path: PathLike,
+    today: Optional[str] = None,
+    grace_seconds: float = DEFAULT_GRACE_SECONDS,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> CompactionStats:
+    """Compact every ``*.jsonl`` under ``base_path`` for days before ``today``.
+
+    Args:
+        base_path: The log root (``logs/``).
+        today: UTC day as YYYYMMDD; days on or after it are left alone.
+        grace_seconds: Skip files modified more recently than this.
+        block_size: Target uncompressed bytes per gzip block.
+    """
+    stats = CompactionStats()
+    root = Path(base_path)
+    if not root.is_dir():
+        return stats
+    today = today or _utc_today()
+    now = time.time()
+
+    for server_dir in sorted(p for p in root.iterdir() if p.is_dir()):
+        for day_dir in sorted(p for p in server_dir.iterdir() if p.is_dir()):
+            name = day_dir.name
+            if len(name) != 8 or not name.isdigit() or name >= today:
+                continue
+            for jsonl_path in sorted(day_dir.glob("*.jsonl")):
+                try:
+                    st = jsonl_path.stat()
+                    if now - st.st_mtime < grace_seconds:
+                        continue
+                    gz_path, index_path = segment_paths(jsonl_path)
+                    previous = load_index(index_path) if gz_path.exists() else None
+                    before = previous.end_offset if previous else 0
+                    blocks_before = len(previous.blocks) if previous else 0
+                    index = compact_file(jsonl_path, block_size=block_size)
+                except OSError:
+                    stats.errors += 1
+                    continue
+                if index is None:
+                    continue
+                stats.files += 1
+                stats.blocks += len(index.blocks) - blocks_before
+                stats.bytes_in += st.st_size
+                stats.bytes_out += index.end_offset - before
+                stats.records += sum(b.records for b in index.blocks[blocks_before:])
+    return stats
+
+
+def _decode_lines(data: bytes) -> Iterator[Dict[str, Any]]:
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            yield record
+
+
+def _matches(record: Dict[str, Any], start: Optional[float], end: Optional[float], levels) -> bool:
+    if levels is not None and record.get("level") not in levels:
+        return False
+    if start is None and end is None:
+        return True
+    ts = _record_ts(record)
+    if ts is None:
+        return False
+    return (start is None or ts >= start) and (end is None or ts <= end)
+
+
+def iter_segment(
+    jsonl_path: PathLike,
+    start: TimeLike = None,
+    end: TimeLike = None,
+    levels: Optional[Iterable[str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield records of one day log whose timestamp lies in [start, end].
+
+    Reads the compressed segment for ``jsonl_path`` (only the blocks the
+    index says overlap the range) followed by the plain file, if any.
+    ``start``/``end`` accept unix seconds, ISO strings or datetimes (naive
+    means UTC); records without a timestamp are skipped when either is given.
+    """
+    jsonl_path = Path(jsonl_path)
+    start_ts, end_ts = _to_unix(start), _to_unix(end)
+    level_set = set(levels) if levels is not None else None
+    gz_path, index_path = segment_paths(jsonl_path)
+
+    index = load_index(index_path) if gz_path.exists() else None
+    if index is not None:
+        with open(gz_path, "rb") as fh:
+            for block in index.blocks:
+                if not block.overlaps(start_ts, end_ts) or not block.has_levels(level_set):
+                    continue
+                fh.seek(block.offset)
+                data = gzip.decompress(fh.read(block.length))
+                for record in _decode_lines(data):
+                    if _matches(record, start_ts, end_ts, level_set):
+                        yield record
+    # A segment without an index is a compaction that never finished; the
+    # plain file still holds all of its records.
+
+    if jsonl_path.is_file():
+        skip = _already_compacted_bytes(jsonl_path, index)
+        with open(jsonl_path, "rb") as fh:
+            fh.seek(skip)
+            for line in fh:
+                for record in _decode_lines(line):
+                    if _matches(record, start_ts, end_ts, level_set):
+                        yield record
+
+
+def has_day_log(day_dir: PathLike, level: str = "info") -> bool:
+    """Whether ``day_dir`` holds a plain or compacted log for ``level``."""
+    jsonl_path = Path(day_dir) / f"{level.lower()}.jsonl"
+    return jsonl_path.is_file() or segment_paths(jsonl_path)[0].is_file()
+
+
+def iter_day_records(
+    day_dir: PathLike,
+    level: str = "info",
+    start: TimeLike = None,
+    end: TimeLike = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield the ``level`` records of one ``logs/{server}/{YYYYMMDD}`` directory."""
+    return iter_segment(Path(day_dir) / f"{level.lower()}.jsonl", start, end)
+
+
+def read_range(
+    base_path: PathLike,
+    server_id: str,
+    start: TimeLike,
+    end: TimeLike,
+    levels: Iterable[str] = ("INFO",),
+) -> Iterator[Dict[str, Any]]:
+    """Yield a server's records of the given levels with timestamps in [start, end].
+
+    Only the day directories that can contain the range are opened, and
+    within them only the overlapping blocks are decompressed.
+    """
+    start_ts, end_ts = _to_unix(start), _to_unix(end)
+    server_dir = Path(base_path) / str(server_id)
+    if not server_dir.is_dir():
+        return
+    first = datetime.fromtimestamp(start_ts, timezone.utc).strftime("%Y%m%d") if start_ts is not None else ""
+    last = datetime.fromtimestamp(end_ts, timezone.utc).strftime("%Y%m%d") if end_ts is not None else "99999999"
+    level_names = [level.upper() for level in levels]
+    for day_dir in sorted(p for p in server_dir.iterdir() if p.is_dir()):
+        if not (first <= day_dir.name <= last):
+            continue
+        for level in level_names:
+            yield from iter_segment(day_dir / f"{level.lower()}.jsonl", start_ts, end_ts, [level])
@@ -1,6 +1,7 @@
 # addons/logging_manager.py
 # Core logging manager implementing structured NDJSON sinks and console rendering.
 
+import atexit
 import json
 import os
 import threading
@@ -9,10 +10,11 @@ import traceback
 import logging
 import sys
 import asyncio
+from collections import OrderedDict
 from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
 from queue import Empty, Full, Queue
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 from loguru import logger as loguru_logger
 
@@ -43,6 +45,8 @@ _MINIMAL_DEFAULTS = {
         },
     },
     "async": {"batch_size": 500, "flush_interval": 2.0},
+    "files": {"max_open": 128, "fsync": "never", "fsync_interval": 5.0},
+    "rotation": {"policy": "daily", "compress": True, "retention_days": 300, "compact": False, "block_size": 262144},
     "log_base_path": "logs",
     "use_emoji": False,
 }
@@ -143,6 +147,7 @@ def load_config_from_settings() -> None:
         **CONFIG.get("color_map", {}).get("fields", {}),
     }
     CONFIG["async"] = {**_MINIMAL_DEFAULTS.get("async", {}), **CONFIG.get("async", {})}
+    CONFIG["files"] = {**_MINIMAL_DEFAULTS.get("files", {}), **(_LOG_CFG.get("files") or {})}
     # Ensure use_emoji respects user config in LOG_CFG, otherwise fall back to minimal default
     CONFIG["use_emoji"] = _LOG_CFG.get("use_emoji", _MINIMAL_DEFAULTS.get("use_emoji", False))
 
@@ -198,9 +203,9 @@ class LogRecord:
     trace_id: Optional[str] = None
     extra: Dict[str, Any] = field(default_factory=dict)
 
-    def to_json_line(self) -> str:
-        """Serialize record to a single NDJSON line."""
-        obj = {
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the record as a plain dict in NDJSON field order."""
+        return {
             "timestamp": self.timestamp,
             "level": self.level,
             "source": self.source,
@@ -212,7 +217,239 @@ class LogRecord:
             "trace_id": self.trace_id,
             "extra": self.extra or {},
         }
-        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    def to_json_line(self) -> str:
+        """Serialize record to a single NDJSON line."""
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+# What LoggerAdapter._emit hands to the writer: everything needed to build the
+# record later, without doing any of the work on the calling thread.
+# (unix_time, level, source, server_id, channel, bound_context, event_fields, message, exception)
+PendingRecord = Tuple[float, str, str, str, str, Dict[str, Any], Dict[str, Any], Any, Any]
+# Records shown on the console are built by _emit itself and queued as built.
+QueuedEntry = Union[PendingRecord, List[LogRecord]]
+
+
+def _iso_utc(unix_time: float) -> str:
+    """Format a unix time as ISO 8601 UTC with a trailing Z."""
+    return datetime.fromtimestamp(unix_time, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _shows_on_console(level: str, console_cfg: Dict[str, Any]) -> bool:
+    """Whether a record of ``level`` is rendered to the console."""
+    if not console_cfg.get("enabled", True):
+        return False
+    console_min = LoggerAdapter._LEVEL_NAME_TO_INT.get(str(console_cfg.get("level", "INFO")).upper(), 20)
+    return LoggerAdapter._LEVEL_NAME_TO_INT.get(level.upper(), 20) >= console_min
+
+
+def _build_records(entry: PendingRecord) -> List[LogRecord]:
+    """Turn a pending entry into its LogRecord plus an optional exception follow-up."""
+    unix_time, level, source, server_id, channel, bound, event_fields, message, exception = entry
+    timestamp = _iso_utc(unix_time)
+    # Merge contexts: bound_context < event_fields (event_fields override bound)
+    merged = {**bound, **(event_fields or {})}
+    # Extract standard fields
+    channel_or_file = merged.pop("channel_or_file", None) or merged.pop("channel", None) or channel or ""
+    user_id = str(merged.pop("user_id", merged.pop("user", ""))) if merged.get("user_id") or merged.get("user") else merged.pop("user_id", "")
+    action = merged.pop("action", "")
+    trace_id = merged.pop("trace_id", None)
+    # Message: prefer passed message parameter, but allow 'message' in event_fields to override
+    msg_field = merged.pop("message", None)
+    full_message = msg_field if msg_field is not None else (message or "")
+    # Remaining merged keys become 'extra'
+    extra = merged or {}
+
+    record = LogRecord(
+        timestamp=timestamp,
+        level=level.upper(),
+        source=source,
+        server_id=server_id,
+        channel_or_file=str(channel_or_file),
+        user_id=str(user_id) if user_id is not None else "",
+        action=str(action),
+        message=str(full_message),
+        trace_id=str(trace_id) if trace_id is not None else None,
+        extra=extra,
+    )
+    records = [record]
+
+    # If an exception object passed, also write a structured error record
+    if exception is not None:
+        if isinstance(exception, BaseException):
+            exc_text = "".join(traceback.format_exception(type(exception), exception, exception.__traceback__))
+            # Attach stack trace into extra and write an ERROR-level follow-up record
+            records.append(LogRecord(
+                timestamp=timestamp,
+                level="ERROR",
+                source=source,
+                server_id=server_id,
+                channel_or_file=record.channel_or_file,
+                user_id=record.user_id,
+                action="exception",
+                message=record.message,
+                trace_id=trace_id,
+                extra={"exception": exc_text},
+            ))
+        else:
+            # Gracefully handle non-exception objects passed as exception (e.g. from printf-style calls)
+            records.append(LogRecord(
+                timestamp=timestamp,
+                level="WARNING",
+                source=source,
+                server_id=server_id,
+                channel_or_file=record.channel_or_file,
+                user_id=record.user_id,
+                action="logging_misuse",
+                message=f"Invalid exception argument passed to logger: {exception!r}",
+                trace_id=trace_id,
+                extra={"invalid_exception_arg": str(exception)},
+            ))
+    return records
+
+
+def _fd_soft_limit() -> Optional[int]:
+    """Return the process soft limit on open file descriptors, if known."""
+    try:
+        import resource
+        soft, _hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        return None if soft == resource.RLIM_INFINITY else int(soft)
+    except Exception:
+        return None
+
+
+class _FileHandlePool:
+    """LRU pool of append-mode handles for day-partitioned log files.
+
+    Handles stay open across batches so hot guild logs are not reopened on
+    every flush. The pool closes the least recently used handle once
+    ``max_open`` is reached, closes handles for past days when the UTC date
+    rolls over, and applies the configured fsync policy:
+
+    - ``never``: flush to the OS after each batch only.
+    - ``batch``: fsync every file written in a batch (old ``fsync_on_flush``).
+    - ``interval``: fsync files written since the last sync at most every
+      ``fsync_interval`` seconds.
+    """
+
+    FSYNC_POLICIES = ("never", "batch", "interval")
+
+    def __init__(self, max_open: int = 128, fsync_policy: str = "never", fsync_interval: float = 5.0):
+        limit = _fd_soft_limit()
+        if limit:
+            # Leave most descriptors to sockets, databases and the rest of the bot.
+            max_open = min(max_open, max(1, limit // 4))
+        self.max_open = max(1, int(max_open))
+        self.fsync_policy = fsync_policy if fsync_policy in self.FSYNC_POLICIES else "never"
+        self.fsync_interval = float(fsync_interval)
+        self._handles: "OrderedDict[str, Tuple[Any, str]]" = OrderedDict()
+        self._dirty: set = set()
+        self._last_fsync = time.monotonic()
+        self._day: Optional[str] = None
+        self.metrics = {"opens": 0, "evictions": 0, "rollover_closes": 0, "fsyncs": 0}
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def _get(self, path: str, date_str: str):
+        entry = self._handles.get(path)
+        if entry is not None:
+            self._handles.move_to_end(path)
+            return entry[0]
+        while len(self._handles) >= self.max_open:
+            old_path, _ = next(iter(self._handles.items()))
+            self._close(old_path)
+            self.metrics["evictions"] += 1
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fh = open(path, "a", encoding="utf-8")
+        self._handles[path] = (fh, date_str)
+        self.metrics["opens"] += 1
+        return fh
+
+    def _close(self, path: str) -> None:
+        entry = self._handles.pop(path, None)
+        self._dirty.discard(path)
+        if entry is None:
+            return
+        fh = entry[0]
+        try:
+            fh.flush()
+            if self.fsync_policy != "never":
+                os.fsync(fh.fileno())
+        except Exception:
+            pass
+        try:
+            fh.close()
+        except Exception:
+            pass
+
+    def write(self, path: str, date_str: str, data: str) -> None:
+        """Append data to path and flush it to the OS.
+
+        On failure the handle is discarded so a retry reopens the file.
+        """
+        try:
+            fh = self._get(path, date_str)
+            fh.write(data)
+            fh.flush()
+        except Exception:
+            self._close(path)
+            raise
+        self._dirty.add(path)
+
+    def end_batch(self) -> None:
+        """Apply the fsync policy after a batch has been written."""
+        if self.fsync_policy == "batch":
+            self._fsync_dirty()
+        elif self.fsync_policy == "interval":
+            self.maybe_fsync()
+
+    def maybe_fsync(self) -> None:
+        """fsync dirty files if the interval policy is due."""
+        if self.fsync_policy == "interval" and self._dirty and time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._fsync_dirty()
+
+    def _fsync_dirty(self) -> None:
+        for path in list(self._dirty):
+            entry = self._handles.get(path)
+            if entry is None:
+                continue
+            try:
+                os.fsync(entry[0].fileno())
+                self.metrics["fsyncs"] += 1
+            except Exception:
+                # fsync best-effort; do not fail whole write if unsupported
+                pass
+        self._dirty.clear()
+        self._last_fsync = time.monotonic()
+
+    def roll_over(self, today: str) -> None:
+        """Close handles for days before today once the UTC date changes."""
+        if self._day == today:
+            return
+        self._day = today
+        for path, (_fh, date_str) in list(self._handles.items()):
+            if date_str < today:
+                self._close(path)
+                self.metrics["rollover_closes"] += 1
+
+    def close_all(self) -> None:
+        """Flush, sync per policy, and close every open handle."""
+        for path in list(self._handles):
+            self._close(path)
+
+
+def _record_date(ts: Any) -> str:
+    """Return YYYYMMDD for an ISO timestamp, falling back to the current UTC date."""
+    if isinstance(ts, str):
+        if len(ts) >= 10 and ts[4] == "-" and ts[7] == "-" and ts[:4].isdigit():
+            return ts[0:4] + ts[5:7] + ts[8:10]
+        try:
+            return datetime.fromisoformat(ts.replace("Z", "+00:00")).strftime("%Y%m%d")
+        except Exception:
+            pass
+    return datetime.utcnow().strftime("%Y%m%d")
 
 
 class BackgroundWriter:
@@ -226,11 +463,23 @@ class BackgroundWriter:
         self.batch_size: int = int(async_cfg.get("batch_size", 500))
         self.flush_interval: float = float(async_cfg.get("flush_interval", 2.0))
         self.queue_maxsize: int = max(8, self.batch_size * 4)
-        self._queue: "Queue[Dict[str, Any]]" = Queue(maxsize=self.queue_maxsize)
+        files_cfg = CONFIG.get("files", {}) or {}
+        # addons.settings resolves the legacy fsync_on_flush switch into files.fsync.
+        fsync_policy = files_cfg.get("fsync") or "never"
+        self._pool = _FileHandlePool(
+            max_open=int(files_cfg.get("max_open", 128)),
+            fsync_policy=str(fsync_policy).lower(),
+            fsync_interval=float(files_cfg.get("fsync_interval", 5.0)),
+        )
+        self._queue: "Queue[QueuedEntry]" = Queue(maxsize=self.queue_maxsize)
         self._thread = threading.Thread(target=self._worker, name="logging-writer", daemon=True)
         self._stop_event = threading.Event()
         self._metrics = {"emitted": 0, "dropped": 0}
+        self._dropped_reported = 0
+        self._listeners: List[Any] = []
         self._thread.start()
+        # The thread is a daemon; flush and close files when the interpreter exits.
+        atexit.register(self.stop)
 
     @classmethod
     def get_instance(cls) -> "BackgroundWriter":
@@ -239,17 +488,34 @@ class BackgroundWriter:
                 cls._instance = BackgroundWriter()
             return cls._instance
 
-    def enqueue(self, server_id: str, level: str, json_line: str, timestamp_iso: str) -> None:
-        """Attempt to enqueue a log event non-blocking. On full queue, drop and report."""
-        item = {"server_id": str(server_id), "level": level, "json_line": json_line, "timestamp": timestamp_iso}
+    def submit(self, entry: QueuedEntry) -> None:
+        """Enqueue a pending record without blocking; on a full queue, drop and count it.
+
+        Drops are reported by the writer thread as one WARNING record per
+        batch rather than per dropped record.
+        """
         try:
-            self._queue.put_nowait(item)
+            self._queue.put_nowait(entry)
             self._metrics["emitted"] += 1
         except Full:
-            # Drop the record and report asynchronously
             self._metrics["dropped"] += 1
-            err = Exception(f"Logging queue full (maxsize={self.queue_maxsize}). Dropping log for server_id={server_id}")
-            self._report_error_async(err, "addons/logging_manager.py/enqueue")
+
+    def metrics(self) -> Dict[str, int]:
+        """Counters for submitted and dropped records."""
+        return dict(self._metrics)
+
+    def add_listener(self, callback) -> None:
+        """Call callback(records) on the writer thread after each batch is written.
+
+        records is a list of (record_dict, json_line) pairs in submission order.
+        The callback must be quick and must not log through this module.
+        """
+        if callback not in self._listeners:
+            self._listeners = self._listeners + [callback]
+
+    def remove_listener(self, callback) -> None:
+        """Stop calling a listener registered with add_listener."""
+        self._listeners = [cb for cb in self._listeners if cb is not callback]
 
     def _report_error_async(self, exc: Exception, context: str) -> None:
         """Report errors through func.report_error if available, fallback to printing."""
@@ -267,136 +533,158 @@ class BackgroundWriter:
             print("Failed to report error from logging manager:", traceback.format_exc())
 
     def stop(self, timeout: float = 5.0) -> None:
-        """Signal worker to stop and flush remaining items."""
+        """Signal worker to stop, flush remaining items and close open files."""
         self._stop_event.set()
-        self._thread.join(timeout=timeout)
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
 
     def _worker(self) -> None:
         """Worker loop: collect batches and perform grouped writes per server/date/level."""
-        # Retry policy
-        max_retries = 3
-        retry_backoff = 0.2
-        while not self._stop_event.is_set():
-            batch: List[Dict[str, Any]] = []
-            start = time.time()
-            # Block up to flush_interval to collect at least one item
-            try:
-                first = self._queue.get(timeout=self.flush_interval)
-                batch.append(first)
-            except Empty:
-                # Timeout: nothing to flush
-                continue
+        try:
+            while not self._stop_event.is_set():
+                self._pool.roll_over(datetime.utcnow().strftime("%Y%m%d"))
+                batch: List[Dict[str, Any]] = []
+                # Block up to flush_interval to collect at least one item
+                try:
+                    first = self._queue.get(timeout=self.flush_interval)
+                    batch.append(first)
+                except Empty:
+                    # Timeout: nothing to flush, but an fsync may be due
+                    self._pool.maybe_fsync()
+                    continue
 
-            # Drain additional items up to batch_size - 1 without blocking
-            while len(batch) < self.batch_size:
+                # Drain additional items up to batch_size - 1 without blocking
+                while len(batch) < self.batch_size:
+                    try:
+                        item = self._queue.get_nowait()
+                        batch.append(item)
+                    except Empty:
+                        break
+
+                self._write_batch(batch)
+
+            # Drain remaining items on exit
+            remaining: List[Dict[str, Any]] = []
+            while True:
                 try:
-                    item = self._queue.get_nowait()
-                    batch.append(item)
+                    remaining.append(self._queue.get_nowait())
                 except Empty:
                     break
+            if remaining:
+                # Attempt a final flush (best-effort)
+                self._write_batch(remaining, max_retries=1)
+        finally:
+            self._pool.close_all()
+
+    def _dropped_record(self) -> Optional[LogRecord]:
+        """A WARNING record summarizing drops since the last report, if any."""
+        dropped = self._metrics["dropped"]
+        if dropped == self._dropped_reported:
+            return None
+        count, self._dropped_reported = dropped - self._dropped_reported, dropped
+        return LogRecord(
+            timestamp=_iso_utc(time.time()),
+            level="WARNING",
+            source=__name__,
+            server_id="Bot",
+            action="log_dropped",
+            message=f"Logging queue full (maxsize={self.queue_maxsize}); dropped {count} records ({dropped} total)",
+            extra={"dropped": count, "dropped_total": dropped},
+        )
 
-            # Group by server_id + date + level to minimize file writes
-            grouped: Dict[str, List[str]] = {}
-            for it in batch:
-                try:
-                    ts = it.get("timestamp")
-                    # parse date from ISO timestamp robustly
-                    if isinstance(ts, str):
-                        try:
-                            dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-                            date_str = dt.strftime("%Y%m%d")
-                        except Exception:
-                            date_str = datetime.utcnow().strftime("%Y%m%d")
-                    else:
-                        date_str = datetime.utcnow().strftime("%Y%m%d")
-                    server = str(it.get("server_id", "unknown"))
-                    level = it.get("level", "INFO")
-                    key = f"{server}|{date_str}|{level}"
-                    grouped.setdefault(key, []).append(it.get("json_line", ""))
-                except Exception:
-                    # Should not fail; report and continue
-                    self._report_error_async(Exception("Failed to bucket log item"), "_worker/bucketing")
-
-            # Write each group into its file in a robust manner
-            for key, lines in grouped.items():
-                server, date_str, level = key.split("|", 2)
-                log_dir = os.path.join(CONFIG.get("log_base_path", "logs"), server, date_str)
-                os.makedirs(log_dir, exist_ok=True)
-                filename = os.path.join(log_dir, f"{level.lower()}.jsonl")
-                attempt = 0
-                written = False
-                last_exc: Optional[Exception] = None
-                while attempt < max_retries and not written:
-                    try:
-                        # Write all lines in one open/append operation to reduce syscalls
-                        with open(filename, "a", encoding="utf-8") as fh:
-                            fh.write("\n".join(lines))
-                            fh.write("\n")
-                            fh.flush()
-                            if CONFIG.get("fsync_on_flush", False):
-                                try:
-                                    os.fsync(fh.fileno())
-                                except Exception:
-                                    # fsync best-effort; do not fail whole write if unsupported
-                                    pass
-                        written = True
-                    except Exception as e:
-                        last_exc = e
-                        attempt += 1
-                        time.sleep(retry_backoff * attempt)
-                if not written:
-                    # On persistent failure write emergency stash and report
-                    try:
-                        emergency_dir = os.path.join(CONFIG.get("log_base_path", "logs"), "emergency")
-                        os.makedirs(emergency_dir, exist_ok=True)
-                        tsnow = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-                        emergency_file = os.path.join(emergency_dir, f"emergency_{server}_{tsnow}.jsonl")
-                        with open(emergency_file, "a", encoding="utf-8") as ef:
-                            ef.write("\n".join(lines))
-                            ef.write("\n")
-                    except Exception as e2:
-                        # If even emergency write fails, report both errors
-                        combined = Exception(f"Failed to write logs and emergency stash: {last_exc} ; {e2}")
-                        self._report_error_async(combined, "addons/logging_manager.py/_worker")
-                    else:
-                        self._report_error_async(last_exc or Exception("Unknown write error"), "addons/logging_manager.py/_worker")
-
-        # Drain remaining items on exit
-        remaining: List[Dict[str, Any]] = []
-        while True:
+    def _write_batch(self, batch: List[QueuedEntry], max_retries: int = 3) -> None:
+        """Build and serialize a batch and append each file group in one write."""
+        retry_backoff = 0.2
+        base_path = CONFIG.get("log_base_path", "logs")
+        listeners = self._listeners
+        published: List[Tuple[Dict[str, Any], str]] = []
+
+        records: List[LogRecord] = []
+        for entry in batch:
+            if isinstance(entry, list):
+                # Already built and rendered to the console by _emit
+                records.extend(entry)
+                continue
             try:
-                remaining.append(self._queue.get_nowait())
-            except Empty:
-                break
-        if remaining:
-            # Attempt a final flush (best-effort)
-            grouped_final: Dict[str, List[str]] = {}
-            for it in remaining:
-                ts = it.get("timestamp")
-                if isinstance(ts, str):
-                    try:
-                        dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-                        date_str = dt.strftime("%Y%m%d")
-                    except Exception:
-                        date_str = datetime.utcnow().strftime("%Y%m%d")
-                else:
-                    date_str = datetime.utcnow().strftime("%Y%m%d")
-                server = str(it.get("server_id", "unknown"))
-                level = it.get("level", "INFO")
-                key = f"{server}|{date_str}|{level}"
-                grouped_final.setdefault(key, []).append(it.get("json_line", ""))
-            for key, lines in grouped_final.items():
-                server, date_str, level = key.split("|", 2)
-                log_dir = os.path.join(CONFIG.get("log_base_path", "logs"), server, date_str)
-                os.makedirs(log_dir, exist_ok=True)
-                filename = os.path.join(log_dir, f"{level.lower()}.jsonl")
+                records.extend(_build_records(entry))
+            except Exception as e:
+                self._report_error_async(e, "addons/logging_manager.py/_write_batch/build")
+        dropped = self._dropped_record()
+        if dropped is not None:
+            records.append(dropped)
+            console_cfg = CONFIG.get("console", {})
+            if _shows_on_console(dropped.level, console_cfg):
+                self._render_console(dropped, console_cfg)
+
+        # Group by server_id + date + level to minimize file writes
+        grouped: Dict[Tuple[str, str, str], List[str]] = {}
+        for record in records:
+            try:
+                obj = record.to_dict()
+                json_line = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+                key = (str(record.server_id), _record_date(record.timestamp), record.level)
+                grouped.setdefault(key, []).append(json_line)
+                if listeners:
+                    published.append((obj, json_line))
+            except Exception:
+                # Should not fail; report and continue
+                self._report_error_async(Exception("Failed to bucket log item"), "_worker/bucketing")
+                continue
+
+        # Write each group into its file in a robust manner
+        for (server, date_str, level), lines in grouped.items():
+            filename = os.path.join(base_path, server, date_str, f"{level.lower()}.jsonl")
+            data = "\n".join(lines) + "\n"
+            attempt = 0
+            written = False
+            last_exc: Optional[Exception] = None
+            while attempt < max_retries and not written:
                 try:
-                    with open(filename, "a", encoding="utf-8") as fh:
-                        fh.write("\n".join(lines))
-                        fh.write("\n")
-                        fh.flush()
+                    self._pool.write(filename, date_str, data)
+                    written = True
                 except Exception as e:
-                    self._report_error_async(e, "addons/logging_manager.py/final_flush")
+                    last_exc = e
+                    attempt += 1
+                    if attempt < max_retries:
+                        time.sleep(retry_backoff * attempt)
+            if not written:
+                # On persistent failure write emergency stash and report
+                try:
+                    emergency_dir = os.path.join(base_path, "emergency")
+                    os.makedirs(emergency_dir, exist_ok=True)
+                    tsnow = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+                    emergency_file = os.path.join(emergency_dir, f"emergency_{server}_{tsnow}.jsonl")
+                    with open(emergency_file, "a", encoding="utf-8") as ef:
+                        ef.write(data)
+                except Exception as e2:
+                    # If even emergency write fails, report both errors
+                    combined = Exception(f"Failed to write logs and emergency stash: {last_exc} ; {e2}")
+                    self._report_error_async(combined, "addons/logging_manager.py/_worker")
+                else:
+                    self._report_error_async(last_exc or Exception("Unknown write error"), "addons/logging_manager.py/_worker")
+
+        self._pool.end_batch()
+
+        for callback in listeners:
+            try:
+                callback(published)
+            except Exception as e:
+                self._report_error_async(e, "addons/logging_manager.py/_write_batch/listener")
+
+    @staticmethod
+    def _render_console(record: LogRecord, console_cfg: Dict[str, Any]) -> None:
+        """Render one record to the loguru console sink."""
+        try:
+            line = LoggerAdapter._format_console_line(record)
+            # Only emit colored ANSI sequences if both configured and the runtime supports it.
+            if console_cfg.get("color", True) and globals().get("CONSOLE_COLOR_ENABLED", False):
+                # apply color mapping (now produces ANSI sequences)
+                loguru_logger.log(record.level, LoggerAdapter._colorize_line(record, line))
+            else:
+                # Emit plain text message to avoid raw tags or unsupported ANSI codes.
+                loguru_logger.log(record.level, line)
+        except Exception as e:
+            print("console render error:", e)
 
 
 class LoggerAdapter:
@@ -482,38 +770,28 @@ class LoggerAdapter:
         return LoggerAdapter(self.server_id, source=self.source, channel=self.channel, bound=merged)
 
     def _emit(self, level: str, message: str, exception: Optional[BaseException], **event_fields: Any) -> None:
-        """Compose structured record, enqueue NDJSON line, and render to console as single-line text."""
-        # Compose timestamp in ISO 8601 UTC
-        timestamp = datetime.utcnow().replace(tzinfo=timezone.utc).isoformat().replace("+00:00", "Z")
-        # Merge contexts: bound_context < event_fields (event_fields override bound)
-        merged = {**self.bound_context, **(event_fields or {})}
-        # Extract standard fields
-        channel_or_file = merged.pop("channel_or_file", None) or merged.pop("channel", None) or self.channel or ""
-        user_id = str(merged.pop("user_id", merged.pop("user", ""))) if merged.get("user_id") or merged.get("user") else merged.pop("user_id", "")
-        action = merged.pop("action", "")
-        trace_id = merged.pop("trace_id", None)
-        # Message: prefer passed message parameter, but allow 'message' in event_fields to override
-        msg_field = merged.pop("message", None)
-        full_message = msg_field if msg_field is not None else (message or "")
-        # Remaining merged keys become 'extra'
-        extra = merged or {}
-
-        record = LogRecord(
-            timestamp=timestamp,
-            level=level.upper(),
-            source=self.source,
-            server_id=self.server_id,
-            channel_or_file=str(channel_or_file),
-            user_id=str(user_id) if user_id is not None else "",
-            action=str(action),
-            message=str(full_message),
-            trace_id=str(trace_id) if trace_id is not None else None,
-            extra=extra,
+        """Render the event to the console and hand it to the background writer.
+
+        A record at or above the console level is built and rendered here,
+        so its console line is neither delayed by the writer's batching nor
+        lost when the queue is full or the process dies. Other records are
+        only queued as a tuple, because callers are usually on the event
+        loop. Serializing NDJSON and dashboard streaming happen on the writer
+        thread for both, so objects passed as fields are read there and
+        should not be mutated after the call.
+        """
+        entry = (
+            time.time(), level, self.source, self.server_id, self.channel,
+            self.bound_context, event_fields, message, exception,
         )
-        json_line = record.to_json_line()
-        # Enqueue for background file write
         try:
-            self._writer.enqueue(self.server_id, record.level, json_line, timestamp)
+            console_cfg = CONFIG.get("console", {})
+            if _shows_on_console(level, console_cfg):
+                built = _build_records(entry)
+                BackgroundWriter._render_console(built[0], console_cfg)
+                self._writer.submit(built)
+            else:
+                self._writer.submit(entry)
         except Exception as e:
             # Always report errors through func.report_error
             if func:
@@ -524,95 +802,8 @@ class LoggerAdapter:
             else:
                 print("enqueue error:", e)
 
-        # Broadcast to WebSocket dashboard if possible
-        try:
-            from dashboard.websocket.log_streamer import log_streamer
-            obj = {
-                "timestamp": timestamp,
-                "level": level.upper(),
-                "source": self.source,
-                "server_id": self.server_id,
-                "channel_or_file": str(channel_or_file),
-                "user_id": str(user_id) if user_id is not None else "",
-                "action": str(action),
-                "message": str(full_message),
-                "trace_id": str(trace_id) if trace_id is not None else None,
-                "extra": extra,
-            }
-            try:
-                loop = asyncio.get_running_loop()
-                loop.create_task(log_streamer.broadcast(obj))
-            except RuntimeError:
-                pass # not in an async loop thread
-        except Exception:
-            pass
-
-        # Render to console if enabled
-        try:
-            console_cfg = CONFIG.get("console", {})
-            if console_cfg.get("enabled", True):
-                line = self._format_console_line(record)
-                # Only emit colored ANSI sequences if both configured and the runtime supports it.
-                if console_cfg.get("color", True) and globals().get("CONSOLE_COLOR_ENABLED", False):
-                    # apply color mapping (now produces ANSI sequences)
-                    colorized = self._colorize_line(record, line)
-                    loguru_logger.log(record.level, colorized)
-                else:
-                    # Emit plain text message to avoid raw tags or unsupported ANSI codes.
-                    loguru_logger.log(record.level, line)
-        except Exception as e:
-            if func:
-                try:
-                    asyncio.create_task(func.report_error(e, "addons/logging_manager.py/_emit/console"))
-                except Exception:
-                    print("console render error:", e)
-            else:
-                print("console render error:", e)
-
-        # If an exception object passed, also send a structured error record
-        if exception is not None:
-            try:
-                if isinstance(exception, BaseException):
-                    exc_text = "".join(traceback.format_exception(type(exception), exception, exception.__traceback__))
-                    # Attach stack trace into extra and write an ERROR-level follow-up record
-                    exc_record = LogRecord(
-                        timestamp=datetime.utcnow().replace(tzinfo=timezone.utc).isoformat().replace("+00:00", "Z"),
-                        level="ERROR",
-                        source=self.source,
-                        server_id=self.server_id,
-                        channel_or_file=str(channel_or_file),
-                        user_id=str(user_id) if user_id is not None else "",
-                        action="exception",
-                        message=str(full_message),
-                        trace_id=trace_id,
-                        extra={"exception": exc_text},
-                    )
-                    self._writer.enqueue(self.server_id, exc_record.level, exc_record.to_json_line(), exc_record.timestamp)
-                else:
-                    # Gracefully handle non-exception objects passed as exception (e.g. from printf-style calls)
-                    warn_record = LogRecord(
-                        timestamp=datetime.utcnow().replace(tzinfo=timezone.utc).isoformat().replace("+00:00", "Z"),
-                        level="WARNING",
-                        source=self.source,
-                        server_id=self.server_id,
-                        channel_or_file=str(channel_or_file),
-                        user_id=str(user_id) if user_id is not None else "",
-                        action="logging_misuse",
-                        message=f"Invalid exception argument passed to logger: {exception!r}",
-                        trace_id=trace_id,
-                        extra={"invalid_exception_arg": str(exception)},
-                    )
-                    self._writer.enqueue(self.server_id, warn_record.level, warn_record.to_json_line(), warn_record.timestamp)
-            except Exception as e:
-                if func:
-                    try:
-                        asyncio.create_task(func.report_error(e, "addons/logging_manager.py/_emit/exception_dump"))
-                    except Exception:
-                        print("exception dump error:", e)
-                else:
-                    print("exception dump error:", e)
-
-    def _format_console_line(self, record: LogRecord) -> str:
+    @classmethod
+    def _format_console_line(cls, record: LogRecord) -> str:
         """Create enhanced console representation with simplified timestamp and optional emoji."""
         # Simplify timestamp to HH:MM:SS only
         try:
@@ -624,7 +815,7 @@ class LoggerAdapter:
         # Get emoji if enabled
         emoji = ""
         if CONFIG.get("use_emoji", True):
-            emoji = self._LEVEL_EMOJI.get(record.level, "📝") + " "
+            emoji = cls._LEVEL_EMOJI.get(record.level, "📝") + " "
         
         # Build parts - only include non-empty fields
         parts = [f"[{time_str}]", f"[{record.level}]", f"[{record.source}]"]
@@ -643,7 +834,8 @@ class LoggerAdapter:
         body = " ".join(filter(None, [action_part, msg_part]))
         return f"{emoji}{header} {body}"
 
-    def _colorize_line(self, record: LogRecord, line: str) -> str:
+    @classmethod
+    def _colorize_line(cls, record: LogRecord, line: str) -> str:
         """Apply ANSI color codes to different parts of the log line for better readability."""
         
         color_map = CONFIG.get("color_map", {})
@@ -662,10 +854,10 @@ class LoggerAdapter:
         
         # Helper to wrap text with color
         def colorize(text: str, color_name: str) -> str:
-            color_code = self._COLORS.get(color_name.lower(), "")
+            color_code = cls._COLORS.get(color_name.lower(), "")
             if not color_code:
                 return text
-            return f"{color_code}{text}{self._COLORS['reset']}"
+            return f"{color_code}{text}{cls._COLORS['reset']}"
         
         try:
             # Simplify timestamp to HH:MM:SS only
@@ -678,7 +870,7 @@ class LoggerAdapter:
             # Get emoji if enabled
             emoji = ""
             if CONFIG.get("use_emoji", True):
-                emoji = self._LEVEL_EMOJI.get(record.level, "📝") + " "
+                emoji = cls._LEVEL_EMOJI.get(record.level, "📝") + " "
             
             # Colorize each component
             timestamp_colored = colorize(f"[{time_str}]", timestamp_color)
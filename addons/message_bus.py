@@ -0,0 +1,179 @@
+"""In-process message event bus.
+
+``PigPig.on_message`` publishes every guild message once; bookkeeping
+consumers (episodic tracker, dashboard stats, per-user stats) subscribe and
+process the messages in the background, so the reply path never waits on
+database writes.
+
+Each subscriber has its own bounded queue and worker task. The worker drains
+up to ``batch_size`` events, waiting at most ``flush_interval`` seconds for a
+batch to fill, and hands the whole list to the subscriber's handler. When a
+queue is full, new events for that subscriber are dropped and counted rather
+than blocking the publisher.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from addons.logging import get_logger
+
+log = get_logger(server_id="Bot", source=__name__)
+
+BatchHandler = Callable[[List["MessageEvent"]], Awaitable[None]]
+
+
+@dataclass
+class MessageEvent:
+    """A published message plus the time ``on_message`` received it."""
+
+    message: Any
+    received_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class SubscriberStats:
+    """Counters for one subscriber."""
+
+    queued: int = 0
+    processed: int = 0
+    dropped: int = 0
+    batches: int = 0
+    errors: int = 0
+
+
+class _Subscriber:
+    def __init__(
+        self,
+        name: str,
+        handler: BatchHandler,
+        max_queue: int,
+        batch_size: int,
+        flush_interval: float,
+    ) -> None:
+        self.name = name
+        self.handler = handler
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.stats = SubscriberStats()
+        self.task: Optional[asyncio.Task] = None
+
+    def ensure_worker(self) -> None:
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run(), name=f"message-bus:{self.name}")
+
+    async def _next_batch(self) -> List[MessageEvent]:
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self.handler(batch)
+                self.stats.processed += len(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats.errors += 1
+                log.error(f"Message bus subscriber '{self.name}' failed on {len(batch)} events", exception=e)
+            finally:
+                self.stats.batches += 1
+                for _ in batch:
+                    self.queue.task_done()
+
+
+class MessageBus:
+    """Fan out published messages to background subscribers."""
+
+    def __init__(self) -> None:
+        self._subscribers: Dict[str, _Subscriber] = {}
+        self._closed = False
+
+    def subscribe(
+        self,
+        name: str,
+        handler: BatchHandler,
+        max_queue: int = 10000,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+    ) -> None:
+        """Register ``handler`` to receive batches of published events.
+
+        Args:
+            name: Unique subscriber name; subscribing again replaces it.
+            handler: Coroutine called with a non-empty list of MessageEvent.
+            max_queue: Events buffered before new ones are dropped.
+            batch_size: Maximum events per handler call.
+            flush_interval: Seconds to wait for a batch to fill.
+        """
+        if max_queue < 1 or batch_size < 1:
+            raise ValueError("max_queue and batch_size must be at least 1")
+        self.unsubscribe(name)
+        self._subscribers[name] = _Subscriber(name, handler, max_queue, batch_size, flush_interval)
+
+    def unsubscribe(self, name: str) -> None:
+        """Remove a subscriber, discarding anything still queued for it."""
+        subscriber = self._subscribers.pop(name, None)
+        if subscriber and subscriber.task and not subscriber.task.done():
+            subscriber.task.cancel()
+
+    def publish(self, message: Any) -> MessageEvent:
+        """Queue ``message`` for every subscriber without waiting.
+
+        Must be called from the event loop. Returns the published event.
+        """
+        event = MessageEvent(message)
+        if self._closed:
+            return event
+        for subscriber in self._subscribers.values():
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscriber.stats.dropped += 1
+                if subscriber.stats.dropped == 1 or subscriber.stats.dropped % 1000 == 0:
+                    log.warning(
+                        f"Message bus queue for '{subscriber.name}' is full; "
+                        f"{subscriber.stats.dropped} events dropped so far"
+                    )
+                continue
+            subscriber.stats.queued += 1
+            subscriber.ensure_worker()
+        return event
+
+    def stats(self) -> Dict[str, SubscriberStats]:
+        """Per-subscriber counters."""
+        return {name: sub.stats for name, sub in self._subscribers.items()}
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Stop accepting events, drain the queues for up to ``timeout`` seconds, then stop the workers."""
+        self._closed = True
+        subscribers = list(self._subscribers.values())
+        pending = [sub.queue.join() for sub in subscribers if sub.task and not sub.task.done()]
+        if pending:
+            try:
+                await asyncio.wait_for(asyncio.gather(*pending), timeout)
+            except asyncio.TimeoutError:
+                left = {sub.name: sub.queue.qsize() for sub in subscribers if sub.queue.qsize()}
+                log.warning(f"Message bus closed with undelivered events: {left}")
+        for sub in subscribers:
+            if sub.task and not sub.task.done():
+                sub.task.cancel()
+        await asyncio.gather(*(sub.task for sub in subscribers if sub.task), return_exceptions=True)
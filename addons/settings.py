@@ -99,9 +99,20 @@ class BaseConfig:
                 }
             },
             "async": {"batch_size": 500, "flush_interval": 2.0},
-            "rotation": {"policy": "daily", "compress": True, "retention_days": 300},
+            # compact: gzip closed day logs into indexed blocks (addons/log_segments.py).
+            # Off by default, since it replaces the raw .jsonl files.
+            "rotation": {
+                "policy": "daily",
+                "compress": True,
+                "retention_days": 300,
+                "compact": False,
+                "block_size": 262144,
+            },
             "per_level_retention": {"INFO": 300, "WARNING": 300, "ERROR": 900},
             "fsync_on_flush": False,
+            # Open log file handles kept by the background writer and the
+            # fsync policy: never | batch (every flush) | interval.
+            "files": {"max_open": 128, "fsync": "never", "fsync_interval": 5.0},
             "log_base_path": "logs",
             "use_emoji": False,  # Enable emoji indicators in console output
             # Per-logger overrides to reduce noise from verbose third-party libraries.
@@ -142,6 +153,12 @@ class BaseConfig:
         merged["async"] = {**defaults["async"], **cfg.get("async", {})}
         merged["rotation"] = {**defaults["rotation"], **cfg.get("rotation", {})}
         merged["per_level_retention"] = {**defaults["per_level_retention"], **cfg.get("per_level_retention", {})}
+        files_cfg = cfg.get("files", {}) or {}
+        merged["files"] = {**defaults["files"], **files_cfg}
+        # An explicit files.fsync wins; otherwise the legacy fsync_on_flush
+        # switch picks between "batch" and "never".
+        if not files_cfg.get("fsync"):
+            merged["files"]["fsync"] = "batch" if merged.get("fsync_on_flush") else "never"
         
         # Merge third_party_levels (dict of logger name -> level)
         merged["third_party_levels"] = {
@@ -347,6 +364,14 @@ class MemoryConfig:
         # Background memory processing concurrency and delay
         self.processing_concurrency: int = int(data.get("processing_concurrency", 1))
         self.processing_delay: float = float(data.get("processing_delay", 30.0))
+        # Seconds between writes of the per-channel message counters kept in memory
+        self.counter_flush_interval: float = float(data.get("counter_flush_interval", 30.0))
+        # Smallest share of wall time background memory jobs keep while replies run
+        self.min_background_share: float = float(data.get("min_background_share", 0.2))
+        # Conversation segments summarized at once, and where batches are split into segments
+        self.summarization_concurrency: int = int(data.get("summarization_concurrency", 3))
+        self.segment_max_gap: float = float(data.get("segment_max_gap", 1800.0))
+        self.segment_max_messages: int = int(data.get("segment_max_messages", 60))
 
 class _AttachmentImageConfig:
     def __init__(self, data: dict) -> None:
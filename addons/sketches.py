@@ -0,0 +1,365 @@
+"""Bounded-memory summaries for activity statistics.
+
+``HyperLogLog`` estimates distinct counts (e.g. active users of a channel on
+a day) in a few kilobytes, and sketches of disjoint periods merge into the
+sketch of their union (Flajolet et al., "HyperLogLog: the analysis of a
+near-optimal cardinality estimation algorithm", 2007; small-range correction
+from Heule et al., "HyperLogLog in Practice", 2013). With ``m = 2**precision``
+registers the relative standard error is ``1.04 / sqrt(m)``: about 2.3% at
+the default precision of 11. Below ``2.5 * m`` distinct values the estimate
+switches to linear counting, which is close to exact for small sets.
+
+``SpaceSaving`` keeps approximate heavy hitters (the most frequent keys of a
+stream, e.g. a user's words or emojis) in a fixed number of counters
+(Metwally, Agrawal & El Abbadi, "Efficient Computation of Frequent and
+Top-k Elements in Data Streams", 2005).
+
+Error bounds, for a summary of capacity ``k`` over a stream of ``N`` items:
+
+- every tracked key's ``count`` overestimates its true frequency by at most
+  its ``error``, so ``count - error <= true <= count``;
+- every ``error`` is at most the smallest tracked count, which is at most
+  ``N / k``;
+- any key with true frequency above ``N / k`` is tracked, and an untracked
+  key occurred at most ``min_count`` times.
+
+Summaries merge (Cafaro, Pulimeno & Tempesta, "A parallel space saving
+algorithm for frequent items and the Hurwitz zeta distribution", 2016) with
+the same guarantees over the combined stream, which is how batches of exact
+counts are folded in.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+_FORMAT_VERSION = 1
+_HLL_DENSE = 1
+_HLL_SPARSE = 2
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter summary holding at most ``capacity`` keys.
+
+    Unit updates are O(1): counters are grouped into buckets by count (the
+    paper's Stream-Summary), so the minimum is found without a scan.
+    Weighted updates and merges are O(k) in the worst case.
+    """
+
+    __slots__ = ("capacity", "total", "_counts", "_errors", "_buckets", "_min")
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.total = 0
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        # count -> keys with that count (dict as an insertion-ordered set)
+        self._buckets: Dict[int, Dict[str, None]] = {}
+        self._min = 0
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._counts
+
+    @property
+    def min_count(self) -> int:
+        """Smallest tracked count once full (bounds every error), else 0."""
+        return self._min if len(self._counts) >= self.capacity else 0
+
+    # ── Updates ───────────────────────────────────────────────────────
+
+    def _bucket_add(self, key: str, count: int) -> None:
+        self._buckets.setdefault(count, {})[key] = None
+
+    def _bucket_remove(self, key: str, count: int) -> None:
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+
+    def _set(self, key: str, count: int, error: int) -> None:
+        old = self._counts.get(key)
+        if old is not None:
+            self._bucket_remove(key, old)
+        self._counts[key] = count
+        self._errors[key] = error
+        self._bucket_add(key, count)
+
+    def update(self, key: str, count: int = 1) -> None:
+        """Add ``count`` occurrences of ``key``."""
+        if count <= 0:
+            return
+        self.total += count
+        old = self._counts.get(key)
+        if old is not None:
+            self._set(key, old + count, self._errors[key])
+            if old == self._min and old not in self._buckets:
+                self._min = old + 1 if count == 1 else min(self._buckets)
+            return
+        if len(self._counts) < self.capacity:
+            self._set(key, count, 0)
+            self._min = count if len(self._counts) == 1 else min(self._min, count)
+            return
+        # Full: the new key takes over the least frequent counter.
+        floor = self._min
+        victim = next(iter(self._buckets[floor]))
+        self._bucket_remove(victim, floor)
+        del self._counts[victim]
+        del self._errors[victim]
+        self._set(key, floor + count, floor)
+        if floor not in self._buckets:
+            self._min = floor + 1 if count == 1 else min(self._buckets)
+
+    def merge(self, other: Union["SpaceSaving", Mapping[str, int]]) -> List[str]:
+        """Fold in another summary, or exact counts from a batch.
+
+        Keys missing on one side are charged that side's ``min_count`` (the
+        most they could have occurred there unseen). Of the combined keys the
+        ``capacity`` largest are kept, ties broken by key.
+
+        Returns:
+            Keys that were tracked before the merge and have been dropped.
+        """
+        if isinstance(other, SpaceSaving):
+            other_counts, other_errors, other_min = other._counts, other._errors, other.min_count
+            added = other.total
+        else:
+            other_counts = {key: n for key, n in other.items() if n > 0}
+            other_errors, other_min = {}, 0
+            added = sum(other_counts.values())
+        own_min = self.min_count
+
+        combined: Dict[str, Tuple[int, int]] = {}
+        for key, count in self._counts.items():
+            extra = other_counts.get(key)
+            if extra is None:
+                combined[key] = (count + other_min, self._errors[key] + other_min)
+            else:
+                combined[key] = (count + extra, self._errors[key] + other_errors.get(key, 0))
+        for key, count in other_counts.items():
+            if key not in combined:
+                combined[key] = (count + own_min, other_errors.get(key, 0) + own_min)
+
+        kept = sorted(combined.items(), key=lambda item: (-item[1][0], item[0]))[: self.capacity]
+        kept_keys = {key for key, _ in kept}
+        dropped = [key for key in self._counts if key not in kept_keys]
+        self._counts, self._errors, self._buckets = {}, {}, {}
+        for key, (count, error) in kept:
+            self._set(key, count, error)
+        self._min = min(self._buckets) if self._buckets else 0
+        self.total += added
+        return dropped
+
+    # ── Queries ───────────────────────────────────────────────────────
+
+    def estimate(self, key: str) -> int:
+        """Upper bound on the frequency of ``key``."""
+        count = self._counts.get(key)
+        return self.min_count if count is None else count
+
+    def bounds(self, key: str) -> Tuple[int, int]:
+        """``(lower, upper)`` bounds on the frequency of ``key``."""
+        count = self._counts.get(key)
+        if count is None:
+            return 0, self.min_count
+        return count - self._errors[key], count
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """Tracked ``(key, count, error)`` by count descending, then key."""
+        items = sorted(self._counts.items(), key=lambda item: (-item[1], item[0]))
+        return [(key, count, self._errors[key]) for key, count in items[:n]]
+
+    # ── Serialization ─────────────────────────────────────────────────
+
+    @classmethod
+    def from_entries(
+        cls, capacity: int, entries: Iterable[Tuple[str, int, int]], total: Optional[int] = None
+    ) -> "SpaceSaving":
+        """Rebuild a summary from ``(key, count, error)`` entries.
+
+        ``total`` defaults to the sum of counts, which is exact for a
+        summary built by unit updates.
+        """
+        sketch = cls(capacity)
+        for key, count, error in sorted(entries, key=lambda e: (-e[1], e[0]))[:capacity]:
+            sketch._set(key, count, error)
+        sketch._min = min(sketch._buckets) if sketch._buckets else 0
+        sketch.total = sum(sketch._counts.values()) if total is None else total
+        return sketch
+
+    def to_bytes(self) -> bytes:
+        """Serialize as varints: version, capacity, total, then entries."""
+        out = bytearray([_FORMAT_VERSION])
+        _put_varint(out, self.capacity)
+        _put_varint(out, self.total)
+        _put_varint(out, len(self._counts))
+        for key, count in self._counts.items():
+            raw = key.encode("utf-8")
+            _put_varint(out, len(raw))
+            out += raw
+            _put_varint(out, count)
+            _put_varint(out, self._errors[key])
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SpaceSaving":
+        """Inverse of ``to_bytes``.
+
+        Raises:
+            ValueError: Unknown format version or truncated data.
+        """
+        if not data or data[0] != _FORMAT_VERSION:
+            raise ValueError("unsupported SpaceSaving encoding")
+        pos = 1
+        capacity, pos = _get_varint(data, pos)
+        total, pos = _get_varint(data, pos)
+        size, pos = _get_varint(data, pos)
+        entries = []
+        for _ in range(size):
+            length, pos = _get_varint(data, pos)
+            if pos + length > len(data):
+                raise ValueError("truncated SpaceSaving encoding")
+            key = data[pos:pos + length].decode("utf-8")
+            pos += length
+            count, pos = _get_varint(data, pos)
+            error, pos = _get_varint(data, pos)
+            entries.append((key, count, error))
+        return cls.from_entries(capacity, entries, total)
+
+
+class HyperLogLog:
+    """Mergeable distinct-count estimator with ``2**precision`` registers.
+
+    Serializes sparsely (register index and value pairs) while few registers
+    are set, so sketches of quiet channels stay small.
+    """
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = 11) -> None:
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str) -> bool:
+        """Record one occurrence of ``value``; returns whether a register changed."""
+        h = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+        p = self.precision
+        index = h >> (64 - p)
+        rest = h & ((1 << (64 - p)) - 1)
+        rank = (64 - p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def update(self, values: Iterable[str]) -> bool:
+        """Add every value; returns whether any register changed."""
+        changed = False
+        for value in values:
+            changed = self.add(value) or changed
+        return changed
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Fold ``other`` in; the result estimates the union.
+
+        Raises:
+            ValueError: The sketches have different precisions.
+        """
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLog sketches of different precision")
+        regs = self.registers
+        for i, value in enumerate(other.registers):
+            if value > regs[i]:
+                regs[i] = value
+
+    @classmethod
+    def union(cls, sketches: Iterable["HyperLogLog"], precision: int = 11) -> "HyperLogLog":
+        """Merge many sketches at once (register-wise max in one pass).
+
+        Raises:
+            ValueError: The sketches have different precisions.
+        """
+        sketches = list(sketches)
+        result = cls(sketches[0].precision if sketches else precision)
+        if any(s.precision != result.precision for s in sketches):
+            raise ValueError("cannot merge HyperLogLog sketches of different precision")
+        if len(sketches) == 1:
+            result.registers[:] = sketches[0].registers
+        elif sketches:
+            result.registers[:] = bytes(map(max, *(s.registers for s in sketches)))
+        return result
+
+    def count(self) -> int:
+        """Estimated number of distinct values added."""
+        m = len(self.registers)
+        zeros = self.registers.count(0)
+        if zeros == m:
+            return 0
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        """Encode as ``[format, precision]`` then dense registers or sparse pairs."""
+        nonzero = [(i, r) for i, r in enumerate(self.registers) if r]
+        if len(nonzero) * 3 < len(self.registers):
+            out = bytearray([_HLL_SPARSE, self.precision])
+            for i, r in nonzero:
+                out += i.to_bytes(2, "big")
+                out.append(r)
+            return bytes(out)
+        return bytes([_HLL_DENSE, self.precision]) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        """Inverse of ``to_bytes``.
+
+        Raises:
+            ValueError: Unknown format or malformed data.
+        """
+        if len(data) < 2 or data[0] not in (_HLL_DENSE, _HLL_SPARSE):
+            raise ValueError("unsupported HyperLogLog encoding")
+        sketch = cls(data[1])
+        body = data[2:]
+        if data[0] == _HLL_DENSE:
+            if len(body) != len(sketch.registers):
+                raise ValueError("malformed HyperLogLog encoding")
+            sketch.registers[:] = body
+            return sketch
+        if len(body) % 3:
+            raise ValueError("malformed HyperLogLog encoding")
+        for pos in range(0, len(body), 3):
+            index = int.from_bytes(body[pos:pos + 2], "big")
+            if index >= len(sketch.registers):
+                raise ValueError("malformed HyperLogLog encoding")
+            sketch.registers[index] = body[pos + 2]
+        return sketch
+
+
+def _put_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("truncated SpaceSaving encoding")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
@@ -48,6 +48,7 @@ import update
 from function import func, ROOT_DIR
 import json
 import asyncio
+import time
 from datetime import datetime, timezone
 from discord.ext import commands, tasks
 from itertools import cycle
@@ -55,6 +56,10 @@ from cogs.music_lib.state_manager import StateManager
 from cogs.music_lib.ui_manager import UIManager
 from llm.orchestrator import Orchestrator
 from addons.logging import get_logger
+from addons.cog_loader import load_cogs
+from addons.command_sync import force_sync_requested, sync_if_changed
+from addons.message_bus import MessageBus
+from addons.log_segments import DEFAULT_BLOCK_SIZE, compact_closed_days
 
 # Module-level logger for bot module
 log = get_logger(server_id="Bot", source=__name__)
@@ -104,7 +109,12 @@ class PigPig(commands.Bot):
 
         # Statistics Subsystem
         from dashboard.services.stats_collector import StatsCollector
-        self.stats_collector = StatsCollector()
+        stats_cfg = (getattr(base_config, "dashboard", {}) or {}).get("stats", {}) or {}
+        self.stats_collector = StatsCollector(
+            batch_size=int(stats_cfg.get("batch_size", 500)),
+            flush_interval=float(stats_cfg.get("flush_interval", 1.0)),
+            read_your_writes=bool(stats_cfg.get("read_your_writes", True)),
+        )
 
         # Memory subsystem (instantiate only when enabled)
         if getattr(memory_config, "enabled", True):
@@ -136,6 +146,10 @@ class PigPig(commands.Bot):
             self.user_manager = None
             self.vector_manager = None
             self.message_tracker = None
+
+        # Bookkeeping consumers read messages from the bus in the background
+        self.message_bus = MessageBus()
+        self._subscribe_message_bus()
         
         self.status_cycle = cycle([
             (discord.ActivityType.listening, "大家的聲音"),
@@ -164,6 +178,38 @@ class PigPig(commands.Bot):
             )
         )
 
+    @tasks.loop(hours=6)
+    async def prune_reply_index_task(self):
+        """Drop reply index entries older than the configured maximum age."""
+        reply_index = getattr(self, "reply_index", None)
+        if reply_index is None:
+            return
+        try:
+            await reply_index.prune()
+        except Exception as e:
+            await func.report_error(e, "prune_reply_index_task")
+
+    @tasks.loop(hours=6)
+    async def compact_logs_task(self):
+        """Compress closed day logs into indexed gzip segments."""
+        log_cfg = getattr(base_config, "logging", {}) or {}
+        rotation = log_cfg.get("rotation", {}) or {}
+        if not rotation.get("compact", False):
+            return
+        try:
+            stats = await asyncio.to_thread(
+                compact_closed_days,
+                log_cfg.get("log_base_path", "logs"),
+                block_size=int(rotation.get("block_size", DEFAULT_BLOCK_SIZE)),
+            )
+            if stats.files:
+                log.info(
+                    f"Compacted {stats.files} log files ({stats.records} records): "
+                    f"{stats.bytes_in / 1e6:.1f} MB -> {stats.bytes_out / 1e6:.1f} MB"
+                )
+        except Exception as e:
+            await func.report_error(e, "compact_logs_task")
+
     async def _change_presence(self, *args, **kwargs):
         """Wrapper for change_presence to handle connection errors.
         
@@ -218,6 +264,27 @@ class PigPig(commands.Bot):
                     # Final fallback: create logger without additional context
                     self.loggers[guild_id] = get_logger(server_id=guild_id, source="server")
         
+    def _subscribe_message_bus(self) -> None:
+        """Register the built-in bookkeeping subscribers on the message bus.
+
+        Cogs may add their own (e.g. StatsCog for per-user stats).
+        """
+        if self.message_tracker:
+            async def track(events):
+                await self.message_tracker.track_messages([e.message for e in events])
+
+            # Small batches keep the per-channel threshold checks timely.
+            self.message_bus.subscribe("message_tracker", track, batch_size=50, flush_interval=0.2)
+
+        if self.stats_collector:
+            async def record(events):
+                await self.stats_collector.bulk_record_messages([
+                    (str(e.message.guild.id), str(e.message.author.id), str(e.message.channel.id), e.received_at)
+                    for e in events
+                ])
+
+            self.message_bus.subscribe("stats_collector", record, batch_size=200, flush_interval=1.0)
+
     async def on_message(self, message: discord.Message, /) -> None:
         """Handle incoming Discord messages.
         
@@ -239,14 +306,16 @@ class PigPig(commands.Bot):
             - Ignores messages from DMs (no guild)
             - Ignores messages from other bots
             - Checks channel permissions and modes before processing
+            - Tracking and statistics are published to the message bus and
+              never delay the reply
         """
+        received = time.perf_counter()
         try:
 
             if not message.guild or message.author.bot:
                 return
-            
-            if self.message_tracker:
-                await self.message_tracker.track_message(message)
+
+            self.message_bus.publish(message)
             
             # Update user activity and names in background
             if hasattr(self, 'user_manager') and self.user_manager:
@@ -256,17 +325,6 @@ class PigPig(commands.Bot):
                     message.author.display_name
                 ))
 
-            # Record message event for dashboard statistics
-            try:
-                if hasattr(self, 'stats_collector') and self.stats_collector:
-                    await self.stats_collector.record_message(
-                        guild_id=str(message.guild.id),
-                        user_id=str(message.author.id),
-                        channel_id=str(message.channel.id),
-                    )
-            except Exception:
-                pass  # Stats recording must never block message handling
-
             guild_id = str(message.guild.id)
             self.setup_logger_for_guild(guild_id)
             logger = self.loggers[guild_id]
@@ -313,6 +371,11 @@ class PigPig(commands.Bot):
                             _announce = (_seen_ver != _current_ver)
 
                     message_edit = await message.reply("...")
+                    self._index_reply(message, message_edit)
+                    bound_log.debug(
+                        message=f"First reply sent {(time.perf_counter() - received) * 1000:.0f} ms after receive",
+                        action="reply_latency",
+                    )
                     await self.orchestrator.handle_message(
                         self, message_edit, message, bound_log,
                         announce_new_version=_announce,
@@ -326,6 +389,36 @@ class PigPig(commands.Bot):
         except Exception as e:
             await func.report_error(e, f"on_message: {e}")
             
+    def _index_reply(self, message: discord.Message, reply: discord.Message) -> None:
+        """Record reply in the reply index so a later edit of message can replace it."""
+        reply_index = getattr(self, "reply_index", None)
+        if reply_index is None:
+            return
+        try:
+            reply_index.add_reply(message.id, reply.id, message.channel.id)
+        except Exception as e:
+            log.warning(f"Failed to index reply {reply.id} to message {message.id}: {e}")
+
+    async def _delete_previous_replies(self, message: discord.Message, channel) -> None:
+        """Delete every bot message indexed as a reply to message.
+
+        Falls back to scanning the last 50 messages when the reply index is
+        unavailable.
+        """
+        reply_index = getattr(self, "reply_index", None)
+        if reply_index is None:
+            async for msg in channel.history(limit=50):
+                if msg.reference and msg.reference.message_id == message.id and msg.author.id == self.user.id:
+                    await msg.delete()
+            return
+
+        for reply_id in await reply_index.get_replies(message.id):
+            try:
+                await channel.get_partial_message(reply_id).delete()
+            except discord.NotFound:
+                pass  # Already deleted by a user or moderator
+        await reply_index.remove_replies(message.id)
+
     async def on_message_edit(self, before: discord.Message, after: discord.Message):
         """Handle edited Discord messages.
         
@@ -346,7 +439,8 @@ class PigPig(commands.Bot):
             - Ignores edits in DMs
             - Ignores edits from bots
             - Only responds to messages that mention the bot
-            - Searches last 50 messages to find bot's previous reply
+            - Finds the bot's previous reply (including continuation
+              messages) through the reply index, without reading history
         """
         try:
             if not before.guild or before.author.bot or not after.guild or after.author.bot:
@@ -365,10 +459,7 @@ class PigPig(commands.Bot):
             
             # Implement logic for generating responses
             if self.user.id in after.raw_mentions and not after.mention_everyone:
-                    # Fetch the bot's previous reply
-                    async for msg in after.channel.history(limit=50):
-                        if msg.reference and msg.reference.message_id == before.id and msg.author.id == self.user.id:
-                            await msg.delete()  # Delete previous reply
+                    await self._delete_previous_replies(before, after.channel)
                     if channel_manager:
                         guild_id = str(after.guild.id)
                         is_allowed, auto_response_enabled, channel_mode = channel_manager.is_allowed_channel(after.channel, guild_id)
@@ -392,6 +483,7 @@ class PigPig(commands.Bot):
 
                         if is_allowed and (self.user.id in after.raw_mentions and not after.mention_everyone or auto_response_enabled or is_reply_to_bot):
                             message_edit = await after.reply("...")
+                            self._index_reply(after, message_edit)
                             await self.orchestrator.handle_message(self,message_edit, after, logger)
                             
         except Exception as e:
@@ -405,14 +497,15 @@ class PigPig(commands.Bot):
         2. Initializing MessageHandler
         3. Starting IPC server if enabled
         4. Updating version in settings
-        5. Syncing command tree with Discord
+        5. Syncing command tree with Discord when its fingerprint changed
         
         Returns:
             None
             
         Note:
             - Filters out __init__.py, private modules (_*), and hidden files (.*) 
-            - Prints success/failure for each cog load attempt
+            - Loads independent cogs concurrently per addons.cog_loader.COG_DEPENDENCIES
+            - Logs success/failure and load time for each cog
             - Initializes performance monitoring
         """
         # Initialize logging system early to ensure background writer starts.
@@ -427,24 +520,21 @@ class PigPig(commands.Bot):
                 log.error(f"Failed to initialize system logger: {e}")
 
         # Loading all the modules in `cogs` folder
-        for module in os.listdir(ROOT_DIR + '/cogs'):
-            # Filter conditions:
-            # 1. Must be a .py file
-            # 2. Exclude __init__.py (package initialization file)
-            # 3. Exclude files starting with _ (private modules)
-            # 4. Exclude files starting with . (hidden files)
+        # Filter conditions:
+        # 1. Must be a .py file
+        # 2. Exclude __init__.py (package initialization file)
+        # 3. Exclude files starting with _ (private modules)
+        # 4. Exclude files starting with . (hidden files)
+        cog_names = sorted(
+            module[:-3] for module in os.listdir(ROOT_DIR + '/cogs')
             if (module.endswith('.py') and
                 module != '__init__.py' and
                 not module.startswith('_') and
-                not module.startswith('.')):
-                try:
-                    await self.load_extension(f"cogs.{module[:-3]}")
-                    logger = getattr(self, "system_logger", log)
-                    logger.info(f"Loaded {module[:-3]}")
-                except Exception as e:
-                    logger = getattr(self, "system_logger", log)
-                    logger.error(f"Failed to load {module[:-3]}", exception=e)
-                    logger.error(traceback.format_exc())
+                not module.startswith('.'))
+        )
+        # Independent cogs load concurrently; declared dependencies
+        # (e.g. language_manager) finish first. A dependency cycle aborts startup.
+        await load_cogs(self, cog_names, logger=getattr(self, "system_logger", log))
 
         # Initialize Orchestrator after cogs are loaded so UserDataCog is available
         self.orchestrator = Orchestrator(self)
@@ -456,6 +546,11 @@ class PigPig(commands.Bot):
         self.version_storage = GuildVersionStorage(_version_db_path)
         log.info("GuildVersionStorage initialized")
 
+        # Reply index for on_message_edit — shares the version database file.
+        from cogs.memory.db.reply_index import ReplyIndexStorage
+        self.reply_index = ReplyIndexStorage(_version_db_path)
+        log.info("ReplyIndexStorage initialized")
+
         # Provide running event loop to storage (for thread-safe coroutine submission) if supported.
         if getattr(memory_config, "enabled", True) and getattr(self, "storage", None):
             try:
@@ -545,7 +640,14 @@ class PigPig(commands.Bot):
 
         self.tree.on_error = on_tree_error
 
-        await self.tree.sync()
+        # Only hit the rate-limited sync endpoint when a slash command changed.
+        # Set FORCE_COMMAND_SYNC=1 to sync regardless.
+        await sync_if_changed(
+            self.tree,
+            os.path.join(ROOT_DIR, "data", "command_tree_fingerprint.json"),
+            force=force_sync_requested(),
+            logger=getattr(self, "system_logger", log),
+        )
 
         # ── Dashboard server startup ──────────────────────────────────
         try:
@@ -646,6 +748,10 @@ class PigPig(commands.Bot):
         # Start status update task
         if not self.change_status_task.is_running():
             self.change_status_task.start()
+        if not self.prune_reply_index_task.is_running():
+            self.prune_reply_index_task.start()
+        if not self.compact_logs_task.is_running():
+            self.compact_logs_task.start()
 
     async def on_error(self, event_method: str, *args, **kwargs):
         """Handle errors in event handlers.
@@ -788,8 +894,11 @@ class PigPig(commands.Bot):
         
         Performs cleanup in the following order:
         1. Calls parent class close() to disconnect from Discord
-        2. Cancels all pending asyncio tasks
-        3. Shuts down default executor thread pool
+        2. Drains the message bus, message tracker counters, stats collector
+           and reply index so queued tracking/stats events and reply ids are
+           written
+        3. Cancels all pending asyncio tasks
+        4. Shuts down default executor thread pool
         
         Returns:
             None
@@ -811,6 +920,37 @@ class PigPig(commands.Bot):
             # Close parent class (disconnect from Discord, etc.)
             await super().close()
 
+            # Flush queued bookkeeping before remaining tasks are cancelled
+            try:
+                await self.message_bus.close()
+            except Exception as e:
+                logger = getattr(self, "system_logger", log)
+                logger.error(f"Error occurred while draining message bus: {e}", exception=e)
+
+            message_tracker = getattr(self, "message_tracker", None)
+            if message_tracker is not None:
+                try:
+                    await message_tracker.close()
+                except Exception as e:
+                    logger = getattr(self, "system_logger", log)
+                    logger.error(f"Error occurred while flushing channel message counters: {e}", exception=e)
+
+            stats_collector = getattr(self, "stats_collector", None)
+            if stats_collector is not None:
+                try:
+                    await stats_collector.close()
+                except Exception as e:
+                    logger = getattr(self, "system_logger", log)
+                    logger.error(f"Error occurred while flushing stats events: {e}", exception=e)
+
+            reply_index = getattr(self, "reply_index", None)
+            if reply_index is not None:
+                try:
+                    await reply_index.flush()
+                except Exception as e:
+                    logger = getattr(self, "system_logger", log)
+                    logger.error(f"Error occurred while flushing reply index: {e}", exception=e)
+
             # Gracefully cancel all remaining tasks in event loop to avoid Task exception was never retrieved
             pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task() and not t.done()]
             for task in pending:
@@ -2,13 +2,6 @@ import os
 import random
 import platform
 from time import sleep
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 import re
@@ -16,6 +9,16 @@ import concurrent.futures
 import asyncio
 import threading
 from addons.logging import get_logger
+from addons.lazy_import import lazy_attr, lazy_import
+
+# selenium is only needed once a crawl actually runs.
+webdriver = lazy_import("selenium.webdriver")
+Service = lazy_attr("selenium.webdriver.chrome.service", "Service")
+By = lazy_attr("selenium.webdriver.common.by", "By")
+Keys = lazy_attr("selenium.webdriver.common.keys", "Keys")
+Options = lazy_attr("selenium.webdriver.chrome.options", "Options")
+WebDriverWait = lazy_attr("selenium.webdriver.support.ui", "WebDriverWait")
+EC = lazy_import("selenium.webdriver.support.expected_conditions")
 
 logger = get_logger(server_id="Bot", source="eat.crawler")
 
@@ -28,7 +28,6 @@ import base64
 import aiohttp
 from google import genai
 from google.genai import types
-from PIL import Image
 from typing import List, Optional, Dict
 from addons.tokens import tokens
 from llm.utils.media import image_to_base64
@@ -36,6 +35,9 @@ from .language_manager import LanguageManager
 from llm.utils.send_message import safe_edit_message
 from function import func
 from addons.logging import get_logger
+from addons.lazy_import import lazy_import
+
+Image = lazy_import("PIL.Image")
 
 # Module-level logger. Use "Bot" as default server_id for module-level events.
 log = get_logger(server_id="Bot", source=__name__)
@@ -60,7 +62,7 @@ class ImageGenerationCog(commands.Cog, name="ImageGenerationCog"):
         """Get the conversation history for a specific channel"""
         return self.conversation_history.get(channel_id, [])
 
-    def _update_conversation_history(self, channel_id: int, role: str, content: str, images: Optional[List[Image.Image]] = None):
+    def _update_conversation_history(self, channel_id: int, role: str, content: str, images: Optional[List["Image.Image"]] = None):
         """Update the conversation history"""
         if channel_id not in self.conversation_history:
             self.conversation_history[channel_id] = []
@@ -78,7 +80,7 @@ class ImageGenerationCog(commands.Cog, name="ImageGenerationCog"):
         prompt: str,
         guild_id: str,
         channel_id: int,
-        input_images: Optional[List[Image.Image]] = None,
+        input_images: Optional[List["Image.Image"]] = None,
         channel: Optional[discord.TextChannel] = None
     ) -> Dict:
         """
@@ -240,14 +242,14 @@ class ImageGenerationCog(commands.Cog, name="ImageGenerationCog"):
             else:
                 await interaction.followup.send(content=content)
 
-    def _image_to_base64(self, image: Image.Image) -> str:
+    def _image_to_base64(self, image: "Image.Image") -> str:
         """Convert a PIL Image to a base64-encoded string"""
         buffered = io.BytesIO()
         image.save(buffered, format="JPEG")
         img_str = base64.b64encode(buffered.getvalue()).decode()
         return img_str
 
-    async def generate_with_gemini(self, prompt: str, image_input: List[Image.Image], dialogue_history: List[Dict]) -> tuple[Optional[io.BytesIO], Optional[str]]:
+    async def generate_with_gemini(self, prompt: str, image_input: List["Image.Image"], dialogue_history: List[Dict]) -> tuple[Optional[io.BytesIO], Optional[str]]:
         """Generate images using the Gemini API"""
         try:
             content_parts = []
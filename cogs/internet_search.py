@@ -26,10 +26,6 @@ from google import genai
 from google.genai import types
 import time
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 from youtube_search import YoutubeSearch
 import random
@@ -50,6 +46,13 @@ from .language_manager import LanguageManager
 from llm.utils.send_message import safe_edit_message
 from function import func
 from addons.logging import get_logger
+from addons.lazy_import import lazy_attr, lazy_import
+
+# selenium is only needed once a page is actually scraped.
+webdriver = lazy_import("selenium.webdriver")
+By = lazy_attr("selenium.webdriver.common.by", "By")
+Options = lazy_attr("selenium.webdriver.chrome.options", "Options")
+Service = lazy_attr("selenium.webdriver.chrome.service", "Service")
 
 def install_driver():
     """Install Chrome driver using ChromeDriverManager."""
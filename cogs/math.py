@@ -22,12 +22,10 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import sympy
-from sympy.parsing.sympy_parser import (
-    parse_expr,
-    standard_transformations,
-    implicit_multiplication_application,
-)
+from addons.lazy_import import lazy_import
+# sympy takes seconds to import; defer it until the first calculation.
+sympy = lazy_import("sympy")
+sympy_parser = lazy_import("sympy.parsing.sympy_parser")
 from typing import Optional, Any
 import re
 import unicodedata
@@ -112,8 +110,8 @@ class MathCalculatorCog(commands.Cog):
 
             # Define parsing transformations, supporting implicit multiplication etc.
             transformations = (
-                standard_transformations +
-                (implicit_multiplication_application,)
+                sympy_parser.standard_transformations +
+                (sympy_parser.implicit_multiplication_application,)
             )
 
             # Normalize expression
@@ -175,7 +173,7 @@ class MathCalculatorCog(commands.Cog):
             expression = extracted
 
             # Safely parse expression
-            sympy_expr = parse_expr(
+            sympy_expr = sympy_parser.parse_expr(
                 expression,
                 transformations=transformations,
                 evaluate=True,
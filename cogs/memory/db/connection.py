@@ -1,13 +1,24 @@
 """Database connection manager for the memory cog.
 
 Handles SQLite connection lifecycle, thread-safe access, and error reporting.
+
+Reads use a connection per thread (``get_connection``). Writes go through
+``write``, which hands them to a single writer thread per database. The
+writer takes whatever writes are queued, runs each one in its own
+SAVEPOINT inside one ``BEGIN IMMEDIATE`` transaction, commits once, and then
+resolves every write's future. Many small writes therefore share one lock
+acquisition and one commit rather than contending for the WAL lock from
+worker threads. A failing write is rolled back to its savepoint alone.
+Writes run in submission order, so two writes to the same row (or any other
+key) are never reordered.
 """
 import asyncio
+import queue
 import sqlite3
 import threading
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar, Union
 
 from function import func
 from ..exceptions import DatabaseError
@@ -17,22 +28,40 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from bot import PigPig
 
+T = TypeVar("T")
+
+# Upper bound on writes folded into one transaction by the writer thread.
+DEFAULT_MAX_WRITE_BATCH = 256
+
+# (fn, args, future, loop) as queued by DatabaseConnection.write
+_WriteRequest = Tuple[Callable[..., Any], Tuple[Any, ...], asyncio.Future, asyncio.AbstractEventLoop]
+
 
 class DatabaseConnection:
     """Manage SQLite connections per-thread and provide thread-safe access."""
 
-    def __init__(self, db_path: Union[str, Path], bot: Optional["PigPig"] = None):
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        bot: Optional["PigPig"] = None,
+        max_write_batch: int = DEFAULT_MAX_WRITE_BATCH,
+    ):
         """Initialize connection manager.
 
         This class intentionally does not create database schema; schema creation
         belongs to schema.create_tables.
         """
+        if max_write_batch < 1:
+            raise ValueError("max_write_batch must be >= 1")
         self.db_path = Path(db_path)
         self.bot = bot
         self._loop = None
         self.logger = get_logger(server_id="system", source=__name__)
         self._lock = threading.RLock()
         self._connections: Dict[int, sqlite3.Connection] = {}
+        self.max_write_batch = max_write_batch
+        self._write_queue: Optional["queue.SimpleQueue[Optional[_WriteRequest]]"] = None
+        self._writer: Optional[threading.Thread] = None
 
         # Ensure database directory exists
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -64,6 +93,30 @@ class DatabaseConnection:
             except Exception:
                 pass
 
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open a connection with the standard PRAGMAs and make sure the schema exists."""
+        conn = sqlite3.connect(
+            str(self.db_path),
+            check_same_thread=False,
+            timeout=30.0
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+
+        try:
+            # A one-row version check unless migrations are pending.
+            schema.create_tables(conn)
+        except Exception as se:
+            # Log and report, but allow connection to be used so errors surface later.
+            self.logger.warning("Failed to create or verify DB schema: %s", se)
+            try:
+                self._report_error_threadsafe(se, "Failed to create DB schema")
+            except Exception:
+                self.logger.exception("Failed to report schema creation error thread-safe")
+        return conn
+
     @contextmanager
     def get_connection(self):
         """Context manager that yields a sqlite3.Connection bound to the current thread."""
@@ -72,44 +125,12 @@ class DatabaseConnection:
         with self._lock:
             if thread_id not in self._connections:
                 try:
-                    conn = sqlite3.connect(
-                        str(self.db_path),
-                        check_same_thread=False,
-                        timeout=30.0
-                    )
-                    conn.row_factory = sqlite3.Row
-                    conn.execute("PRAGMA foreign_keys = ON")
-                    conn.execute("PRAGMA journal_mode = WAL")
-                    conn.execute("PRAGMA synchronous = NORMAL")
-
-                    try:
-                        self.logger.debug("Attempting to create/verify DB schema for %s", str(self.db_path))
-                        schema.create_tables(conn)
-                        try:
-                            conn.commit()
-                        except Exception as commit_exc:
-                            # Some SQLite builds or PRAGMA combinations may make commit unnecessary;
-                            # log at debug level and continue.
-                            self.logger.debug("Commit after schema.create_tables failed or unnecessary: %s", commit_exc)
-                        try:
-                            tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()]
-                            self.logger.debug("DB schema verified for %s; tables: %s", str(self.db_path), tables)
-                        except Exception as list_exc:
-                            self.logger.debug("Unable to list tables after schema creation: %s", list_exc)
-                    except Exception as se:
-                        # Log and report, but allow connection to be used so errors surface later.
-                        self.logger.warning("Failed to create or verify DB schema: %s", se)
-                        try:
-                            self._report_error_threadsafe(se, "Failed to create DB schema")
-                        except Exception:
-                            self.logger.exception("Failed to report schema creation error thread-safe")
-    
-                    self._connections[thread_id] = conn
+                    self._connections[thread_id] = self._open_connection()
                 except Exception as e:
                     self.logger.debug("DB except: no loop=%s thread=%s", self._loop is None, threading.get_ident())
                     self._report_error_threadsafe(e, "Failed to create database connection")
                     raise DatabaseError(f"Failed to create database connection: {e}")
-    
+
             conn = self._connections[thread_id]
 
         try:
@@ -155,8 +176,131 @@ class DatabaseConnection:
 
             raise DatabaseError(f"Database operation failed: {e}")
 
+    # ------------------------------------------------------------------
+    # Group-commit writer
+    # ------------------------------------------------------------------
+
+    def write(self, fn: Callable[..., T], *args: Any) -> "asyncio.Future[T]":
+        """Run ``fn(conn, *args)`` on the writer thread and return a future for its result.
+
+        ``fn`` runs inside the writer's transaction and must not commit or
+        roll back. The future resolves once the transaction holding the
+        write has committed, so a read issued afterwards sees it. If ``fn``
+        raises, only its own changes are rolled back and the future fails
+        with DatabaseError; a failed commit fails every write of the batch.
+        Writes are applied in the order ``write`` is called, and a write
+        still runs if its caller stops waiting for it.
+
+        Must be called from a running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._write_queue = queue.SimpleQueue()
+                self._writer = threading.Thread(
+                    target=self._run_writer,
+                    args=(self._write_queue,),
+                    name=f"db-writer-{self.db_path.name}",
+                    daemon=True,
+                )
+                self._writer.start()
+            self._write_queue.put((fn, args, future, loop))
+        return future
+
+    def _run_writer(self, requests: "queue.SimpleQueue[Optional[_WriteRequest]]") -> None:
+        """Writer thread: commit queued writes in batches until told to stop (``None``)."""
+        conn: Optional[sqlite3.Connection] = None
+        stopping = False
+        try:
+            while not stopping:
+                first = requests.get()
+                if first is None:
+                    break
+                batch = [first]
+                while len(batch) < self.max_write_batch:
+                    try:
+                        request = requests.get_nowait()
+                    except queue.Empty:
+                        break
+                    if request is None:
+                        stopping = True
+                        break
+                    batch.append(request)
+
+                if conn is None:
+                    try:
+                        conn = self._open_connection()
+                        # Transactions are managed explicitly below.
+                        conn.isolation_level = None
+                    except Exception as e:
+                        self._report_error_threadsafe(e, "Failed to create database writer connection")
+                        error = DatabaseError(f"Failed to create database connection: {e}")
+                        self._settle(batch, [(False, error)] * len(batch))
+                        continue
+                self._settle(batch, self._commit_batch(conn, batch))
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception as e:
+                    self.logger.warning("Error closing writer connection: %s", e)
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: List[_WriteRequest]) -> List[Tuple[bool, Any]]:
+        """Run a batch of writes in one transaction; return (ok, result or error) per write."""
+        outcomes: List[Tuple[bool, Any]] = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, args, _future, _loop in batch:
+                conn.execute("SAVEPOINT write")
+                try:
+                    result = fn(conn, *args)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write")
+                    conn.execute("RELEASE write")
+                    self.logger.debug("Database write %s failed: %s", getattr(fn, "__name__", fn), e)
+                    error = DatabaseError(f"Database operation failed: {e}")
+                    error.__cause__ = e
+                    outcomes.append((False, error))
+                else:
+                    conn.execute("RELEASE write")
+                    outcomes.append((True, result))
+            conn.execute("COMMIT")
+            return outcomes
+        except Exception as e:
+            try:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            except Exception as rb_exc:
+                self.logger.warning("DB rollback failed: %s", rb_exc)
+            self._report_error_threadsafe(e, "Database write batch failed")
+            error = DatabaseError(f"Database write batch failed: {e}")
+            return [
+                outcomes[i] if i < len(outcomes) and not outcomes[i][0] else (False, error)
+                for i in range(len(batch))
+            ]
+
+    @staticmethod
+    def _settle(batch: List[_WriteRequest], outcomes: List[Tuple[bool, Any]]) -> None:
+        """Resolve each write's future on its own event loop."""
+        for (_fn, _args, future, loop), (ok, value) in zip(batch, outcomes):
+            try:
+                loop.call_soon_threadsafe(_resolve, future, ok, value)
+            except RuntimeError:
+                # The caller's loop has closed; nobody is waiting for this result.
+                pass
+
     def close_connections(self) -> None:
-        """Close all managed SQLite connections."""
+        """Close all managed SQLite connections.
+
+        Writes already submitted are committed before the writer thread stops.
+        """
+        with self._lock:
+            writer, requests = self._writer, self._write_queue
+            self._writer = self._write_queue = None
+        if writer is not None and requests is not None:
+            requests.put(None)
+            writer.join()
         with self._lock:
             for thread_id, conn in list(self._connections.items()):
                 try:
@@ -164,4 +308,13 @@ class DatabaseConnection:
                 except Exception as e:
                     self.logger.warning("Error closing connection for thread %s: %s", thread_id, e)
             self._connections.clear()
-            self.logger.info("All database connections closed")
\ No newline at end of file
+            self.logger.info("All database connections closed")
+
+
+def _resolve(future: asyncio.Future, ok: bool, value: Any) -> None:
+    if future.done():
+        return
+    if ok:
+        future.set_result(value)
+    else:
+        future.set_exception(value)
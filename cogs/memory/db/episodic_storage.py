@@ -9,7 +9,7 @@ import json
 import asyncio
 import sqlite3
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
 
 from .connection import DatabaseConnection
 from addons.logging import get_logger
@@ -18,6 +18,21 @@ from function import func
 logger = get_logger(server_id="system", source=__name__)
 
 
+class SpoolRow(NamedTuple):
+    """One tracked message as kept in channel_message_spool."""
+    channel_id: int
+    message_id: int
+    # Message seen right before this one in the channel, 0 if unknown
+    prev_id: int
+    author_id: int
+    author_name: str
+    author_bot: bool
+    content: str
+    created_at: float
+    # Message this one replies to, 0 for none
+    reply_to_id: int = 0
+
+
 class EpisodicStorage:
     """Handles channel memory state management."""
 
@@ -33,31 +48,10 @@ class EpisodicStorage:
             await func.report_error(e, "initialize_channel_memory_state failed")
 
     def _initialize_channel_memory_state_sync(self) -> None:
-        with self.db.get_connection() as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS channel_memory_state (
-                    channel_id INTEGER PRIMARY KEY,
-                    message_count INTEGER NOT NULL DEFAULT 0,
-                    start_message_id INTEGER NOT NULL DEFAULT 0,
-                    last_summary_timestamp REAL DEFAULT 0,
-                    last_summary_text TEXT
-                )
-                """
-            )
-            
-            # Attempt to add columns if they don't exist (migration)
-            try:
-                conn.execute("ALTER TABLE channel_memory_state ADD COLUMN last_summary_timestamp REAL DEFAULT 0")
-            except sqlite3.OperationalError:
-                pass
-
-            try:
-                conn.execute("ALTER TABLE channel_memory_state ADD COLUMN last_summary_text TEXT")
-            except sqlite3.OperationalError:
-                pass
-                
-            conn.commit()
+        # The table is created by the schema migrations, which run when the
+        # first connection is opened (see schema.py).
+        with self.db.get_connection():
+            pass
 
     async def get_channel_memory_state(self, channel_id: int) -> Optional[Dict[str, int]]:
         """Get the memory state for a specific channel.
@@ -66,7 +60,8 @@ class EpisodicStorage:
             channel_id (int): The channel ID to get state for.
             
         Returns:
-            Optional[Dict[str, int]]: Dictionary with 'message_count' and 'start_message_id', or None if not found.
+            Optional[Dict[str, int]]: Dictionary with 'message_count', 'start_message_id',
+            'last_summary_timestamp', 'last_summary_text' and 'last_message_id', or None if not found.
         """
         try:
             return await asyncio.to_thread(self._get_channel_memory_state_sync, channel_id)
@@ -77,7 +72,8 @@ class EpisodicStorage:
     def _get_channel_memory_state_sync(self, channel_id: int) -> Optional[Dict[str, Any]]:
         with self.db.get_connection() as conn:
             cursor = conn.execute(
-                "SELECT message_count, start_message_id, last_summary_timestamp, last_summary_text FROM channel_memory_state WHERE channel_id = ?",
+                "SELECT message_count, start_message_id, last_summary_timestamp, last_summary_text, last_message_id "
+                "FROM channel_memory_state WHERE channel_id = ?",
                 (channel_id,)
             )
             row = cursor.fetchone()
@@ -86,7 +82,8 @@ class EpisodicStorage:
                     "message_count": int(row["message_count"]),
                     "start_message_id": int(row["start_message_id"]),
                     "last_summary_timestamp": float(row["last_summary_timestamp"]) if row["last_summary_timestamp"] else 0.0,
-                    "last_summary_text": str(row["last_summary_text"]) if row["last_summary_text"] else ""
+                    "last_summary_text": str(row["last_summary_text"]) if row["last_summary_text"] else "",
+                    "last_message_id": int(row["last_message_id"] or 0),
                 }
             return None
 
@@ -96,7 +93,8 @@ class EpisodicStorage:
         message_count: int, 
         start_message_id: int,
         last_summary_timestamp: Optional[float] = None,
-        last_summary_text: Optional[str] = None
+        last_summary_text: Optional[str] = None,
+        last_message_id: Optional[int] = None,
     ) -> None:
         """Update the memory state for a specific channel.
         
@@ -106,52 +104,181 @@ class EpisodicStorage:
             start_message_id (int): The start message ID.
             last_summary_timestamp (Optional[float]): Timestamp of last summary. If None, keeps existing value.
             last_summary_text (Optional[str]): Text of last summary. If None, keeps existing value.
+            last_message_id (Optional[int]): Newest message counted in message_count. If None, keeps existing value.
         """
         try:
-            await asyncio.to_thread(
-                self._update_channel_memory_state_sync,
-                channel_id, message_count, start_message_id, last_summary_timestamp, last_summary_text
+            await self.db.write(
+                self._update_channel_memory_state_tx,
+                channel_id, message_count, start_message_id, last_summary_timestamp, last_summary_text,
+                last_message_id,
             )
         except Exception as e:
             await func.report_error(e, f"update_channel_memory_state failed for channel {channel_id}")
 
-    def _update_channel_memory_state_sync(
-        self, 
+    def _update_channel_memory_state_tx(
+        self,
+        conn: sqlite3.Connection,
         channel_id: int, 
         message_count: int, 
         start_message_id: int,
         last_summary_timestamp: Optional[float] = None,
-        last_summary_text: Optional[str] = None
+        last_summary_text: Optional[str] = None,
+        last_message_id: Optional[int] = None,
     ) -> None:
-        with self.db.get_connection() as conn:
-            # Fetch existing values if not provided
-            current_timestamp = 0.0
-            current_text = ""
+        # Fetch existing values if not provided
+        current_timestamp = 0.0
+        current_text = ""
+        current_last_id = 0
             
-            if last_summary_timestamp is None or last_summary_text is None:
-                cursor = conn.execute("SELECT last_summary_timestamp, last_summary_text FROM channel_memory_state WHERE channel_id = ?", (channel_id,))
-                row = cursor.fetchone()
-                if row:
-                    if last_summary_timestamp is None and row["last_summary_timestamp"]:
-                        current_timestamp = row["last_summary_timestamp"]
-                    if last_summary_text is None and row["last_summary_text"]:
-                        current_text = row["last_summary_text"]
+        if last_summary_timestamp is None or last_summary_text is None or last_message_id is None:
+            cursor = conn.execute(
+                "SELECT last_summary_timestamp, last_summary_text, last_message_id FROM channel_memory_state WHERE channel_id = ?",
+                (channel_id,),
+            )
+            row = cursor.fetchone()
+            if row:
+                if last_summary_timestamp is None and row["last_summary_timestamp"]:
+                    current_timestamp = row["last_summary_timestamp"]
+                if last_summary_text is None and row["last_summary_text"]:
+                    current_text = row["last_summary_text"]
+                if last_message_id is None and row["last_message_id"]:
+                    current_last_id = row["last_message_id"]
             
-            if last_summary_timestamp is not None:
-                current_timestamp = last_summary_timestamp
+        if last_summary_timestamp is not None:
+            current_timestamp = last_summary_timestamp
             
-            if last_summary_text is not None:
-                current_text = last_summary_text
-
-            conn.execute(
-                """
-                INSERT OR REPLACE INTO channel_memory_state
-                (channel_id, message_count, start_message_id, last_summary_timestamp, last_summary_text)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (channel_id, message_count, start_message_id, current_timestamp, current_text)
+        if last_summary_text is not None:
+            current_text = last_summary_text
+
+        if last_message_id is not None:
+            current_last_id = last_message_id
+
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO channel_memory_state
+            (channel_id, message_count, start_message_id, last_summary_timestamp, last_summary_text, last_message_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (channel_id, message_count, start_message_id, current_timestamp, current_text, current_last_id)
+        )
+
+    async def save_channel_message_counts(
+        self, counts: List[Tuple[int, int, int]], spooled: Sequence[SpoolRow] = ()
+    ) -> bool:
+        """Store message counters kept in memory, in one write.
+
+        Args:
+            counts (List[Tuple[int, int, int]]): (channel_id, message_count, last_message_id)
+                for channels that already have a state row.
+            spooled (Sequence[SpoolRow]): Tracked messages to append to the spool in the same
+                transaction.
+
+        Returns:
+            bool: Whether the counters were written.
+        """
+        if not counts and not spooled:
+            return True
+        try:
+            await self.db.write(_save_message_counts, counts, spooled)
+            return True
+        except Exception as e:
+            await func.report_error(e, f"save_channel_message_counts failed for {len(counts)} channels")
+            return False
+
+    async def spool_messages(self, rows: Sequence[SpoolRow]) -> bool:
+        """Append messages to the spool, replacing rows already there.
+
+        Returns:
+            bool: Whether the rows were written.
+        """
+        if not rows:
+            return True
+        try:
+            await self.db.write(_spool_messages, rows)
+            return True
+        except Exception as e:
+            await func.report_error(e, f"spool_messages failed for {len(rows)} messages")
+            return False
+
+    async def get_spooled_messages(self, channel_id: int, from_message_id: int, limit: int) -> List[SpoolRow]:
+        """Get spooled messages of a channel, oldest first.
+
+        Args:
+            channel_id (int): The channel ID.
+            from_message_id (int): Smallest message ID to return.
+            limit (int): Maximum number of rows.
+
+        Returns:
+            List[SpoolRow]: The rows, empty on error.
+        """
+        try:
+            return await asyncio.to_thread(self._get_spooled_messages_sync, channel_id, from_message_id, limit)
+        except Exception as e:
+            await func.report_error(e, f"get_spooled_messages failed for channel {channel_id}")
+            return []
+
+    def _get_spooled_messages_sync(self, channel_id: int, from_message_id: int, limit: int) -> List[SpoolRow]:
+        with self.db.get_connection() as conn:
+            cursor = conn.execute(
+                f"SELECT {_SPOOL_COLUMNS} FROM channel_message_spool "
+                "WHERE channel_id = ? AND message_id >= ? ORDER BY message_id LIMIT ?",
+                (channel_id, from_message_id, limit),
             )
-            conn.commit()
+            return [
+                SpoolRow(*row[:5], bool(row["author_bot"]), *row[6:])
+                for row in cursor.fetchall()
+            ]
+
+    async def trim_spooled_messages(self, channel_id: int, before_message_id: int) -> None:
+        """Drop spooled messages of a channel older than before_message_id."""
+        try:
+            await self.db.write(_trim_spool, channel_id, before_message_id)
+        except Exception as e:
+            await func.report_error(e, f"trim_spooled_messages failed for channel {channel_id}")
+
+    async def save_job_progress(
+        self, channel_id: int, start_message_id: int, end_message_id: int, summaries: str
+    ) -> None:
+        """Store the progress of a channel's background memory job.
+
+        Args:
+            channel_id (int): The channel ID.
+            start_message_id (int): First message the job covers.
+            end_message_id (int): Last message the job covers.
+            summaries (str): JSON list of the event summaries produced so far.
+        """
+        try:
+            await self.db.write(_save_job_progress, channel_id, start_message_id, end_message_id, summaries)
+        except Exception as e:
+            await func.report_error(e, f"save_job_progress failed for channel {channel_id}")
+
+    async def get_job_progress(self, channel_id: int) -> Optional[Dict[str, Any]]:
+        """Get the stored progress of a channel's background memory job.
+
+        Returns:
+            Optional[Dict[str, Any]]: 'start_message_id', 'end_message_id' and 'summaries',
+            or None if there is none.
+        """
+        try:
+            return await asyncio.to_thread(self._get_job_progress_sync, channel_id)
+        except Exception as e:
+            await func.report_error(e, f"get_job_progress failed for channel {channel_id}")
+            return None
+
+    def _get_job_progress_sync(self, channel_id: int) -> Optional[Dict[str, Any]]:
+        with self.db.get_connection() as conn:
+            row = conn.execute(
+                "SELECT start_message_id, end_message_id, summaries FROM memory_job_progress WHERE channel_id = ?",
+                (channel_id,),
+            ).fetchone()
+            return dict(row) if row else None
+
+    async def clear_job_progress(self, channel_id: int) -> None:
+        """Forget the progress of a channel's finished background memory job."""
+        try:
+            await self.db.write(_clear_job_progress, channel_id)
+        except Exception as e:
+            await func.report_error(e, f"clear_job_progress failed for channel {channel_id}")
 
     async def get_total_count(self) -> int:
         """Return total number of channel memory states stored."""
@@ -167,4 +294,47 @@ class EpisodicStorage:
                 "SELECT COUNT(*) as count FROM channel_memory_state"
             )
             row = cursor.fetchone()
-            return int(row["count"]) if row else 0
\ No newline at end of file
+            return int(row["count"]) if row else 0
+
+
+_SPOOL_COLUMNS = (
+    "channel_id, message_id, prev_id, author_id, author_name, author_bot, content, created_at, reply_to_id"
+)
+
+
+def _save_message_counts(
+    conn: sqlite3.Connection, counts: List[Tuple[int, int, int]], spooled: Sequence[SpoolRow]
+) -> None:
+    conn.executemany(
+        "UPDATE channel_memory_state SET message_count = ?, last_message_id = ? WHERE channel_id = ?",
+        [(count, last_id, channel_id) for channel_id, count, last_id in counts],
+    )
+    _spool_messages(conn, spooled)
+
+
+def _spool_messages(conn: sqlite3.Connection, rows: Sequence[SpoolRow]) -> None:
+    conn.executemany(
+        f"INSERT OR REPLACE INTO channel_message_spool ({_SPOOL_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+
+
+def _trim_spool(conn: sqlite3.Connection, channel_id: int, before_message_id: int) -> None:
+    conn.execute(
+        "DELETE FROM channel_message_spool WHERE channel_id = ? AND message_id < ?",
+        (channel_id, before_message_id),
+    )
+
+
+def _save_job_progress(
+    conn: sqlite3.Connection, channel_id: int, start_message_id: int, end_message_id: int, summaries: str
+) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO memory_job_progress "
+        "(channel_id, start_message_id, end_message_id, summaries, updated_at) VALUES (?, ?, ?, ?, ?)",
+        (channel_id, start_message_id, end_message_id, summaries, datetime.now().timestamp()),
+    )
+
+
+def _clear_job_progress(conn: sqlite3.Connection, channel_id: int) -> None:
+    conn.execute("DELETE FROM memory_job_progress WHERE channel_id = ?", (channel_id,))
@@ -5,9 +5,10 @@ inside jokes, relationships, and special events.
 """
 from __future__ import annotations
 
+import asyncio
 import sqlite3
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 from .connection import DatabaseConnection
 from function import func
@@ -50,6 +51,43 @@ class KnowledgeStorage:
             await func.report_error(e, f"get_knowledge failed (type: {target_type}, id: {target_id})")
             return None
 
+    async def get_context_knowledge(
+        self, guild_id: Optional[str], channel_id: str
+    ) -> Dict[Tuple[str, str], Optional[str]]:
+        """Retrieve guild and channel knowledge for a message context in one query.
+
+        Args:
+            guild_id: The guild snowflake ID, or None for DMs.
+            channel_id: The channel snowflake ID.
+
+        Returns:
+            A dict keyed by ``(target_type, target_id)`` with an entry for every
+            requested scope; scopes without stored knowledge map to None.
+
+        Raises:
+            DatabaseError: If the query fails. Callers decide whether to cache.
+        """
+        return await asyncio.to_thread(self._get_context_knowledge_sync, guild_id, channel_id)
+
+    def _get_context_knowledge_sync(
+        self, guild_id: Optional[str], channel_id: str
+    ) -> Dict[Tuple[str, str], Optional[str]]:
+        keys = [("channel", channel_id)]
+        if guild_id:
+            keys.append(("guild", guild_id))
+        result: Dict[Tuple[str, str], Optional[str]] = {key: None for key in keys}
+
+        clauses = " OR ".join("(target_type = ? AND target_id = ?)" for _ in keys)
+        params = tuple(value for key in keys for value in key)
+        with self.db.get_connection() as conn:
+            cursor = conn.execute(
+                f"SELECT target_type, target_id, content FROM knowledge WHERE {clauses}",
+                params,
+            )
+            for row in cursor.fetchall():
+                result[(row["target_type"], row["target_id"])] = row["content"]
+        return result
+
     async def update_knowledge(self, target_type: str, target_id: str, content: str) -> bool:
         """Update or insert knowledge for a specific scope.
 
@@ -63,19 +101,8 @@ class KnowledgeStorage:
         """
         try:
             now_iso = datetime.utcnow().isoformat()
-            with self.db.get_connection() as conn:
-                conn.execute(
-                    """
-                    INSERT INTO knowledge (target_type, target_id, content, updated_at)
-                    VALUES (?, ?, ?, ?)
-                    ON CONFLICT(target_type, target_id) DO UPDATE SET
-                        content = excluded.content,
-                        updated_at = excluded.updated_at
-                    """,
-                    (target_type, target_id, content, now_iso),
-                )
-                conn.commit()
-                return True
+            await self.db.write(_upsert_knowledge, target_type, target_id, content, now_iso)
+            return True
         except Exception as e:
             await func.report_error(e, f"update_knowledge failed (type: {target_type}, id: {target_id})")
             return False
@@ -91,13 +118,30 @@ class KnowledgeStorage:
             True if something was deleted, False otherwise.
         """
         try:
-            with self.db.get_connection() as conn:
-                cursor = conn.execute(
-                    "DELETE FROM knowledge WHERE target_type = ? AND target_id = ?",
-                    (target_type, target_id),
-                )
-                conn.commit()
-                return cursor.rowcount > 0
+            return await self.db.write(_delete_knowledge, target_type, target_id)
         except Exception as e:
             await func.report_error(e, f"delete_knowledge failed (type: {target_type}, id: {target_id})")
             return False
+
+
+def _upsert_knowledge(
+    conn: sqlite3.Connection, target_type: str, target_id: str, content: str, updated_at: str
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO knowledge (target_type, target_id, content, updated_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(target_type, target_id) DO UPDATE SET
+            content = excluded.content,
+            updated_at = excluded.updated_at
+        """,
+        (target_type, target_id, content, updated_at),
+    )
+
+
+def _delete_knowledge(conn: sqlite3.Connection, target_type: str, target_id: str) -> bool:
+    cursor = conn.execute(
+        "DELETE FROM knowledge WHERE target_type = ? AND target_id = ?",
+        (target_type, target_id),
+    )
+    return cursor.rowcount > 0
@@ -9,6 +9,8 @@ from __future__ import annotations
 import json
 import sqlite3
 import asyncio
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
@@ -19,91 +21,137 @@ from addons.logging import get_logger
 logger = get_logger(server_id="system", source=__name__)
 
 
+# SQLite's default SQLITE_MAX_VARIABLE_NUMBER is 999 on older builds.
+_MAX_IN_PARAMS = 500
+
+
 class ProceduralStorage:
-    """Handles users table and config storage."""
+    """Handles users table and config storage.
 
-    def __init__(self, db: DatabaseConnection) -> None:
+    User lookups go through a small batching loader: ids requested by
+    concurrent callers within ``batch_window`` seconds are coalesced and
+    served with one ``IN (...)`` query in a worker thread, so the event loop
+    never runs SQL. Results (including "no such user") are kept in a bounded
+    LRU cache that write paths invalidate.
+    """
+
+    def __init__(
+        self,
+        db: DatabaseConnection,
+        cache_size_limit: int = 1000,
+        batch_window: float = 0.005,
+    ) -> None:
+        if cache_size_limit < 0:
+            raise ValueError("cache_size_limit must be >= 0")
         self.db = db
-        self._user_cache: Dict[str, UserInfo] = {}
-        self._cache_size_limit = 1000
+        # discord_id -> UserInfo, or None for a cached miss (negative entry)
+        self._user_cache: "OrderedDict[str, Optional[UserInfo]]" = OrderedDict()
+        self._cache_size_limit = cache_size_limit
+        self._cache_lock = threading.Lock()
+        # Bumped on every invalidation so in-flight batches do not re-cache stale rows.
+        self._cache_epoch = 0
+        self._batch_window = batch_window
+        self._pending_lookups: Dict[str, asyncio.Future] = {}
+        self._batch_task: Optional[asyncio.Task] = None
+        self._inflight_flushes: set = set()
+        self._flush_lock = asyncio.Lock()
         self.logger = logger
 
     async def get_user_info(self, discord_id: str) -> Optional[UserInfo]:
-        if discord_id in self._user_cache:
-            return self._user_cache[discord_id]
-
-        try:
-            return await asyncio.to_thread(self._get_user_info_sync, discord_id)
-        except Exception as e:
-            await func.report_error(e, f"get_user_info failed (user: {discord_id})")
-            return None
-
-    def _get_user_info_sync(self, discord_id: str) -> Optional[UserInfo]:
-        with self.db.get_connection() as conn:
-            cursor = conn.execute(
-                """
-                SELECT discord_id, discord_name, display_names,
-                       procedural_memory, user_background, created_at
-                FROM users
-                WHERE discord_id = ?
-                """,
-                (discord_id,),
-            )
-            row = cursor.fetchone()
-            if not row:
-                return None
-
-            display_names = []
-            if row["display_names"]:
-                try:
-                    display_names = json.loads(row["display_names"])
-                    if not isinstance(display_names, list):
-                        display_names = [str(display_names)]
-                except Exception:
-                    display_names = [row["display_names"]]
-
-            created_at = None
-            if row["created_at"]:
-                try:
-                    created_at = datetime.fromisoformat(row["created_at"])
-                except Exception:
-                    try:
-                        created_at = datetime.fromtimestamp(float(row["created_at"]))
-                    except Exception:
-                        created_at = None
-
-            user_info = UserInfo(
-                discord_id=str(row["discord_id"]),
-                discord_name=row["discord_name"] or "",
-                display_names=display_names,
-                procedural_memory=row["procedural_memory"],
-                user_background=row["user_background"],
-                created_at=created_at,
-            )
-
-            self._update_cache(discord_id, user_info)
-            return user_info
+        results = await self.get_users_info([discord_id])
+        return results.get(discord_id)
 
     async def get_users_info(self, discord_ids: List[str]) -> Dict[str, UserInfo]:
-        """Fetch multiple users efficiently using a single SQL query."""
+        """Fetch multiple users, coalescing concurrent lookups into batched queries."""
         if not discord_ids:
             return {}
 
         results: Dict[str, UserInfo] = {}
-        missing_ids = []
+        waiting: Dict[str, asyncio.Future] = {}
 
-        for discord_id in discord_ids:
-            if discord_id in self._user_cache:
-                results[discord_id] = self._user_cache[discord_id]
+        for discord_id in dict.fromkeys(str(uid) for uid in discord_ids):
+            hit, user_info = self._cache_lookup(discord_id)
+            if hit:
+                if user_info is not None:
+                    results[discord_id] = user_info
             else:
-                missing_ids.append(discord_id)
-
-        if not missing_ids:
-            return results
+                waiting[discord_id] = self._enqueue_lookup(discord_id)
+
+        if waiting:
+            # The futures are shared with concurrent callers. asyncio.wait,
+            # unlike gather, does not cancel them if this caller is cancelled.
+            await asyncio.wait(waiting.values())
+            for discord_id, future in waiting.items():
+                user_info = future.result()
+                if user_info is not None:
+                    results[discord_id] = user_info
+        return results
 
+    def _enqueue_lookup(self, discord_id: str) -> asyncio.Future:
+        """Join the pending batch for ``discord_id``, scheduling a flush if needed."""
+        future = self._pending_lookups.get(discord_id)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending_lookups[discord_id] = future
+
+        if len(self._pending_lookups) >= _MAX_IN_PARAMS:
+            # A full batch does not wait for the window to close.
+            self._spawn_flush(self._take_pending())
+        elif self._batch_task is None:
+            self._batch_task = asyncio.create_task(self._flush_after_window())
+        return future
+
+    def _take_pending(self) -> Dict[str, asyncio.Future]:
+        batch, self._pending_lookups = self._pending_lookups, {}
+        return batch
+
+    def _spawn_flush(self, batch: Dict[str, asyncio.Future]) -> None:
+        task = asyncio.create_task(self._flush_batch(batch))
+        self._inflight_flushes.add(task)
+        task.add_done_callback(self._inflight_flushes.discard)
+
+    async def _flush_after_window(self) -> None:
+        try:
+            await asyncio.sleep(self._batch_window)
+        finally:
+            self._batch_task = None
+        batch = self._take_pending()
+        if batch:
+            await self._flush_batch(batch)
+
+    async def _flush_batch(self, batch: Dict[str, asyncio.Future]) -> None:
+        ids = list(batch)
         try:
-            with self.db.get_connection() as conn:
-                placeholders = ",".join("?" * len(missing_ids))
+            # One batch query at a time: parallel worker threads would only
+            # fight the event loop for the GIL.
+            async with self._flush_lock:
+                epoch = self._cache_epoch
+                fetched = await asyncio.to_thread(self._get_users_info_sync, ids)
+        except Exception as e:
+            await func.report_error(e, f"get_users_info failed for {len(ids)} users")
+            # Resolve as misses without caching, so the next request retries.
+            for future in batch.values():
+                if not future.done():
+                    future.set_result(None)
+            return
+
+        cacheable = epoch == self._cache_epoch
+        for discord_id, future in batch.items():
+            user_info = fetched.get(discord_id)
+            if cacheable:
+                self._update_cache(discord_id, user_info)
+            if not future.done():
+                future.set_result(user_info)
+
+    def _get_users_info_sync(self, discord_ids: List[str]) -> Dict[str, UserInfo]:
+        results: Dict[str, UserInfo] = {}
+        with self.db.get_connection() as conn:
+            for i in range(0, len(discord_ids), _MAX_IN_PARAMS):
+                chunk = discord_ids[i:i + _MAX_IN_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
                 cursor = conn.execute(
                     f"""
                     SELECT discord_id, discord_name, display_names,
@@ -111,47 +159,42 @@ class ProceduralStorage:
                     FROM users
                     WHERE discord_id IN ({placeholders})
                     """,
-                    tuple(missing_ids),
+                    tuple(chunk),
                 )
+                for row in cursor.fetchall():
+                    user_info = self._row_to_user_info(row)
+                    results[user_info.discord_id] = user_info
+        return results
 
-                rows = cursor.fetchall()
-                for row in rows:
-                    discord_id = str(row["discord_id"])
-
-                    display_names = []
-                    if row["display_names"]:
-                        try:
-                            display_names = json.loads(row["display_names"])
-                            if not isinstance(display_names, list):
-                                display_names = [str(display_names)]
-                        except Exception:
-                            display_names = [row["display_names"]]
-
+    @staticmethod
+    def _row_to_user_info(row: sqlite3.Row) -> UserInfo:
+        display_names = []
+        if row["display_names"]:
+            try:
+                display_names = json.loads(row["display_names"])
+                if not isinstance(display_names, list):
+                    display_names = [str(display_names)]
+            except Exception:
+                display_names = [row["display_names"]]
+
+        created_at = None
+        if row["created_at"]:
+            try:
+                created_at = datetime.fromisoformat(row["created_at"])
+            except Exception:
+                try:
+                    created_at = datetime.fromtimestamp(float(row["created_at"]))
+                except Exception:
                     created_at = None
-                    if row["created_at"]:
-                        try:
-                            created_at = datetime.fromisoformat(row["created_at"])
-                        except Exception:
-                            try:
-                                created_at = datetime.fromtimestamp(float(row["created_at"]))
-                            except Exception:
-                                created_at = None
-
-                    user_info = UserInfo(
-                        discord_id=discord_id,
-                        discord_name=row["discord_name"] or "",
-                        display_names=display_names,
-                        procedural_memory=row["procedural_memory"],
-                        user_background=row["user_background"],
-                        created_at=created_at,
-                    )
-
-                    self._update_cache(discord_id, user_info)
-                    results[discord_id] = user_info
 
-        except Exception as e:
-            await func.report_error(e, f"get_users_info failed for {len(missing_ids)} users")
-        return results
+        return UserInfo(
+            discord_id=str(row["discord_id"]),
+            discord_name=row["discord_name"] or "",
+            display_names=display_names,
+            procedural_memory=row["procedural_memory"],
+            user_background=row["user_background"],
+            created_at=created_at,
+        )
 
     async def update_user_data(
         self,
@@ -163,10 +206,12 @@ class ProceduralStorage:
         nickname: Optional[str] = None,
     ) -> bool:
         try:
-            return await asyncio.to_thread(
-                self._update_user_data_sync,
+            await self.db.write(
+                self._update_user_data_tx,
                 discord_id, discord_name, procedural_memory, user_background, display_names, nickname
             )
+            self._invalidate_cache(discord_id)
+            return True
         except sqlite3.IntegrityError as ie:
             await func.report_error(ie, f"Integrity error updating user {discord_id}")
             return False
@@ -174,157 +219,147 @@ class ProceduralStorage:
             await func.report_error(e, f"update_user_data failed (user: {discord_id})")
             return False
 
-    def _update_user_data_sync(
+    def _update_user_data_tx(
         self,
+        conn: sqlite3.Connection,
         discord_id: str,
         discord_name: str,
         procedural_memory: Optional[str] = None,
         user_background: Optional[str] = None,
         display_names: Optional[List[str]] = None,
         nickname: Optional[str] = None,
-    ) -> bool:
-        with self.db.get_connection() as conn:
-            cursor = conn.execute(
-                "SELECT discord_id, discord_name, display_names, procedural_memory, user_background FROM users WHERE discord_id = ?",
-                (discord_id,)
+    ) -> None:
+        cursor = conn.execute(
+            "SELECT discord_id, discord_name, display_names, procedural_memory, user_background FROM users WHERE discord_id = ?",
+            (discord_id,)
+        )
+        row = cursor.fetchone()
+        exists = row is not None
+
+        existing_display_names = []
+        if row and row["display_names"]:
+            try:
+                existing_display_names = json.loads(row["display_names"])
+            except Exception:
+                existing_display_names = [row["display_names"]]
+
+        new_display_names = set(existing_display_names)
+        if display_names:
+            new_display_names.update(display_names)
+        if discord_name:
+            new_display_names.add(discord_name)
+        if nickname:
+            new_display_names.add(nickname)
+
+        if exists:
+            # If a field is None, it means "keep existing value".
+            # If a field is empty string, it means "clear/set to empty".
+            # COALESCE in SQL doesn't distinguish between None and missing if we pass NULL.
+            # So we handle it here.
+            final_name = discord_name if discord_name is not None else row["discord_name"]
+            final_pm = procedural_memory if procedural_memory is not None else row["procedural_memory"]
+            final_bg = user_background if user_background is not None else row["user_background"]
+
+            conn.execute(
+                """
+                UPDATE users
+                SET discord_name = ?,
+                    display_names = ?,
+                    procedural_memory = ?,
+                    user_background = ?
+                WHERE discord_id = ?
+                """,
+                (
+                    final_name,
+                    json.dumps(list(new_display_names), ensure_ascii=False),
+                    final_pm,
+                    final_bg,
+                    discord_id,
+                ),
+            )
+        else:
+            now_iso = datetime.utcnow().isoformat()
+            conn.execute(
+                """
+                INSERT INTO users (discord_id, discord_name, display_names, procedural_memory, user_background, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    discord_id,
+                    discord_name or "",
+                    json.dumps(list(new_display_names), ensure_ascii=False),
+                    procedural_memory,
+                    user_background,
+                    now_iso,
+                ),
             )
-            row = cursor.fetchone()
-            exists = row is not None
-
-            existing_display_names = []
-            if row and row["display_names"]:
-                try:
-                    existing_display_names = json.loads(row["display_names"])
-                except Exception:
-                    existing_display_names = [row["display_names"]]
-
-            new_display_names = set(existing_display_names)
-            if display_names:
-                new_display_names.update(display_names)
-            if discord_name:
-                new_display_names.add(discord_name)
-            if nickname:
-                new_display_names.add(nickname)
-
-            if exists:
-                # If a field is None, it means "keep existing value".
-                # If a field is empty string, it means "clear/set to empty".
-                # COALESCE in SQL doesn't distinguish between None and missing if we pass NULL.
-                # So we handle it here.
-                final_name = discord_name if discord_name is not None else row["discord_name"]
-                final_pm = procedural_memory if procedural_memory is not None else row["procedural_memory"]
-                final_bg = user_background if user_background is not None else row["user_background"]
-
-                conn.execute(
-                    """
-                    UPDATE users
-                    SET discord_name = ?,
-                        display_names = ?,
-                        procedural_memory = ?,
-                        user_background = ?
-                    WHERE discord_id = ?
-                    """,
-                    (
-                        final_name,
-                        json.dumps(list(new_display_names), ensure_ascii=False),
-                        final_pm,
-                        final_bg,
-                        discord_id,
-                    ),
-                )
-            else:
-                now_iso = datetime.utcnow().isoformat()
-                conn.execute(
-                    """
-                    INSERT INTO users (discord_id, discord_name, display_names, procedural_memory, user_background, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        discord_id,
-                        discord_name or "",
-                        json.dumps(list(new_display_names), ensure_ascii=False),
-                        procedural_memory,
-                        user_background,
-                        now_iso,
-                    ),
-                )
-            conn.commit()
-
-            if discord_id in self._user_cache:
-                del self._user_cache[discord_id]
-            return True
 
     async def delete_user_data(self, discord_id: str) -> bool:
         try:
-            return await asyncio.to_thread(self._delete_user_data_sync, discord_id)
+            deleted = await self.db.write(self._delete_user_data_tx, discord_id)
+            if deleted:
+                self._invalidate_cache(discord_id)
+            return deleted
         except Exception as e:
             await func.report_error(e, f"delete_user_data failed (user: {discord_id})")
             return False
 
-    def _delete_user_data_sync(self, discord_id: str) -> bool:
-        with self.db.get_connection() as conn:
-            cursor = conn.execute("DELETE FROM users WHERE discord_id = ?", (discord_id,))
-            conn.commit()
-            deleted = cursor.rowcount > 0
-
-            if deleted and discord_id in self._user_cache:
-                del self._user_cache[discord_id]
-            return deleted
+    def _delete_user_data_tx(self, conn: sqlite3.Connection, discord_id: str) -> bool:
+        cursor = conn.execute("DELETE FROM users WHERE discord_id = ?", (discord_id,))
+        return cursor.rowcount > 0
 
     async def update_user_activity(self, discord_id: str, discord_name: str, nickname: Optional[str] = None) -> bool:
         try:
-            return await asyncio.to_thread(self._update_user_activity_sync, discord_id, discord_name, nickname)
+            await self.db.write(self._update_user_activity_tx, discord_id, discord_name, nickname)
+            self._invalidate_cache(discord_id)
+            return True
         except Exception as e:
             await func.report_error(e, f"update_user_activity failed (user: {discord_id})")
             return False
 
-    def _update_user_activity_sync(self, discord_id: str, discord_name: str, nickname: Optional[str] = None) -> bool:
-        with self.db.get_connection() as conn:
-            cursor = conn.execute("SELECT display_names FROM users WHERE discord_id = ?", (discord_id,))
-            row = cursor.fetchone()
-            if row:
-                existing_display_names = []
-                if row["display_names"]:
-                    try:
-                        existing_display_names = json.loads(row["display_names"])
-                    except Exception:
-                        existing_display_names = [row["display_names"]]
-                changed = False
-                if discord_name and discord_name not in existing_display_names:
-                    existing_display_names.append(discord_name)
-                    changed = True
-                if nickname and nickname not in existing_display_names:
-                    existing_display_names.append(nickname)
-                    changed = True
+    def _update_user_activity_tx(
+        self, conn: sqlite3.Connection, discord_id: str, discord_name: str, nickname: Optional[str] = None
+    ) -> None:
+        cursor = conn.execute("SELECT display_names FROM users WHERE discord_id = ?", (discord_id,))
+        row = cursor.fetchone()
+        if row:
+            existing_display_names = []
+            if row["display_names"]:
+                try:
+                    existing_display_names = json.loads(row["display_names"])
+                except Exception:
+                    existing_display_names = [row["display_names"]]
+            changed = False
+            if discord_name and discord_name not in existing_display_names:
+                existing_display_names.append(discord_name)
+                changed = True
+            if nickname and nickname not in existing_display_names:
+                existing_display_names.append(nickname)
+                changed = True
                 
-                if changed:
-                    conn.execute(
-                        """
-                        UPDATE users
-                        SET discord_name = COALESCE(?, discord_name),
-                            display_names = COALESCE(?, display_names)
-                        WHERE discord_id = ?
-                        """,
-                        (discord_name or None, json.dumps(existing_display_names, ensure_ascii=False), discord_id),
-                    )
-            else:
-                now_iso = datetime.utcnow().isoformat()
-                names = set()
-                if discord_name: names.add(discord_name)
-                if nickname: names.add(nickname)
-                display_names = list(names)
+            if changed:
                 conn.execute(
                     """
-                    INSERT INTO users (discord_id, discord_name, display_names, created_at)
-                    VALUES (?, ?, ?, ?)
+                    UPDATE users
+                    SET discord_name = COALESCE(?, discord_name),
+                        display_names = COALESCE(?, display_names)
+                    WHERE discord_id = ?
                     """,
-                    (discord_id, discord_name or "", json.dumps(display_names, ensure_ascii=False), now_iso),
+                    (discord_name or None, json.dumps(existing_display_names, ensure_ascii=False), discord_id),
                 )
-            conn.commit()
-
-            if discord_id in self._user_cache:
-                del self._user_cache[discord_id]
-            return True
+        else:
+            now_iso = datetime.utcnow().isoformat()
+            names = set()
+            if discord_name: names.add(discord_name)
+            if nickname: names.add(nickname)
+            display_names = list(names)
+            conn.execute(
+                """
+                INSERT INTO users (discord_id, discord_name, display_names, created_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                (discord_id, discord_name or "", json.dumps(display_names, ensure_ascii=False), now_iso),
+            )
 
     async def get_all_users(self, limit: int = 500, offset: int = 0) -> List[UserInfo]:
         """Return all users ordered by creation date (newest first)."""
@@ -348,35 +383,7 @@ class ProceduralStorage:
             )
             rows = cursor.fetchall()
 
-        users: List[UserInfo] = []
-        for row in rows:
-            display_names: List[str] = []
-            if row["display_names"]:
-                try:
-                    parsed = json.loads(row["display_names"])
-                    display_names = parsed if isinstance(parsed, list) else [str(parsed)]
-                except Exception:
-                    display_names = [row["display_names"]]
-
-            created_at = None
-            if row["created_at"]:
-                try:
-                    created_at = datetime.fromisoformat(row["created_at"])
-                except Exception:
-                    try:
-                        created_at = datetime.fromtimestamp(float(row["created_at"]))
-                    except Exception:
-                        created_at = None
-
-            users.append(UserInfo(
-                discord_id=str(row["discord_id"]),
-                discord_name=row["discord_name"] or "",
-                display_names=display_names,
-                procedural_memory=row["procedural_memory"],
-                user_background=row["user_background"],
-                created_at=created_at,
-            ))
-        return users
+        return [self._row_to_user_info(row) for row in rows]
 
     async def get_users_count(self) -> int:
         """Return total number of users in the database."""
@@ -407,22 +414,33 @@ class ProceduralStorage:
 
     async def set_config(self, key: str, value: str) -> None:
         try:
-            await asyncio.to_thread(self._set_config_sync, key, value)
+            await self.db.write(self._set_config_tx, key, value)
         except Exception as e:
             await func.report_error(e, f"set_config failed (key: {key})")
 
-    def _set_config_sync(self, key: str, value: str) -> None:
-        with self.db.get_connection() as conn:
-            conn.execute("INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", (key, value))
-            conn.commit()
-
-    def _update_cache(self, user_id: str, user_info: UserInfo) -> None:
-        try:
-            if len(self._user_cache) >= self._cache_size_limit:
-                oldest = next(iter(self._user_cache))
-                del self._user_cache[oldest]
+    @staticmethod
+    def _set_config_tx(conn: sqlite3.Connection, key: str, value: str) -> None:
+        conn.execute("INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", (key, value))
+
+    def _cache_lookup(self, user_id: str) -> "tuple[bool, Optional[UserInfo]]":
+        """Return ``(hit, user_info)``; a hit with ``None`` is a cached miss."""
+        with self._cache_lock:
+            if user_id not in self._user_cache:
+                return False, None
+            self._user_cache.move_to_end(user_id)
+            return True, self._user_cache[user_id]
+
+    def _update_cache(self, user_id: str, user_info: Optional[UserInfo]) -> None:
+        if self._cache_size_limit == 0:
+            return
+        with self._cache_lock:
             self._user_cache[user_id] = user_info
-        except Exception as e:
-            # This runs in a thread — cannot await or create tasks
-            import logging as _logging
-            _logging.getLogger(__name__).exception("cache update failed: %s", e)
\ No newline at end of file
+            self._user_cache.move_to_end(user_id)
+            while len(self._user_cache) > self._cache_size_limit:
+                self._user_cache.popitem(last=False)
+
+    def _invalidate_cache(self, user_id: str) -> None:
+        # Called from worker threads after writes.
+        with self._cache_lock:
+            self._cache_epoch += 1
+            self._user_cache.pop(user_id, None)
@@ -0,0 +1,210 @@
+"""Index of the bot's replies to user messages.
+
+Maps a user message id to the ids of every bot message posted in answer to
+it (the placeholder reply and any continuation messages), so that
+``on_message_edit`` can delete the old answer without scanning channel
+history over REST.
+
+Recording a reply sits on the reply path, so ``add_reply`` only queues the
+row; a single background task writes queued rows in order through
+``asyncio.to_thread``. Reads flush the queue first.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from addons.logging import get_logger
+
+logger = get_logger(server_id="system", source=__name__)
+
+# Replies older than this are pruned; edits to older prompts are rare.
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+_CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS message_replies (
+    user_message_id  INTEGER NOT NULL,
+    reply_message_id INTEGER NOT NULL,
+    channel_id       INTEGER NOT NULL,
+    part             INTEGER NOT NULL,
+    created_at       REAL    NOT NULL,
+    PRIMARY KEY (user_message_id, reply_message_id)
+);
+CREATE INDEX IF NOT EXISTS idx_message_replies_created ON message_replies(created_at);
+"""
+
+# (user_message_id, reply_message_id, channel_id, created_at)
+_PendingReply = Tuple[int, int, int, float]
+
+
+class ReplyIndexStorage:
+    """SQLite-backed map of user message id -> bot reply message ids.
+
+    Uses an isolated SQLite connection so it works regardless of whether
+    the memory sub-system is enabled.
+    """
+
+    def __init__(self, db_path: Union[str, Path], max_age: float = DEFAULT_MAX_AGE) -> None:
+        """Initialize and ensure the required table exists.
+
+        Args:
+            db_path: Path to the SQLite database file, or ":memory:" for tests.
+            max_age: Age in seconds after which prune() drops entries.
+        """
+        self.db_path = Path(db_path) if db_path != ":memory:" else Path(":memory:")
+        self.max_age = max_age
+        self._conn: Optional[sqlite3.Connection] = None
+        # Worker threads share one connection; writes and reads take turns.
+        self._db_lock = threading.Lock()
+        self._pending: List[_PendingReply] = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._ensure_table()
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open (or reuse) the SQLite connection.
+
+        Returns:
+            An open sqlite3.Connection.
+        """
+        if self._conn is None:
+            path_str = str(self.db_path)
+            if path_str != ":memory:":
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path_str, check_same_thread=False)
+        return self._conn
+
+    def _ensure_table(self) -> None:
+        """Create the message_replies table if it does not exist."""
+        with self._db_lock:
+            conn = self._open_connection()
+            conn.executescript(_CREATE_TABLE_SQL)
+            conn.commit()
+
+    def add_reply(
+        self,
+        user_message_id: int,
+        reply_message_id: int,
+        channel_id: int,
+        created_at: Optional[float] = None,
+    ) -> None:
+        """Record that reply_message_id is part of the answer to user_message_id.
+
+        Returns immediately when called on an event loop; the row is written
+        by a background flush. Parts are numbered in the order they are
+        added; adding the same reply twice is a no-op.
+
+        Args:
+            user_message_id: The user's prompt message id.
+            reply_message_id: A bot message answering it.
+            channel_id: Channel both messages are in.
+            created_at: Unix time of the reply; defaults to now.
+        """
+        self._pending.append((
+            user_message_id,
+            reply_message_id,
+            channel_id,
+            created_at if created_at is not None else time.time(),
+        ))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts): write synchronously.
+            rows, self._pending = self._pending, []
+            self._add_replies_sync(rows)
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self.flush())
+
+    async def flush(self) -> None:
+        """Write every queued reply, in the order they were added."""
+        async with self._flush_lock:
+            while self._pending:
+                rows, self._pending = self._pending, []
+                try:
+                    await asyncio.to_thread(self._add_replies_sync, rows)
+                except Exception as exc:
+                    logger.error(f"Failed to write {len(rows)} reply index entries: {exc}")
+
+    def _add_replies_sync(self, rows: List[_PendingReply]) -> None:
+        with self._db_lock:
+            conn = self._open_connection()
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO message_replies
+                    (user_message_id, reply_message_id, channel_id, part, created_at)
+                VALUES (?, ?, ?,
+                    (SELECT COUNT(*) FROM message_replies WHERE user_message_id = ?), ?)
+                """,
+                [(user_id, reply_id, channel_id, user_id, created_at) for user_id, reply_id, channel_id, created_at in rows],
+            )
+            conn.commit()
+
+    async def get_replies(self, user_message_id: int) -> List[int]:
+        """Return the reply message ids for a user message, in posting order.
+
+        Args:
+            user_message_id: The user's prompt message id.
+
+        Returns:
+            Reply message ids, empty if none are known.
+        """
+        try:
+            await self.flush()
+            return await asyncio.to_thread(self._get_replies_sync, user_message_id)
+        except Exception as exc:
+            logger.error(f"get_replies failed for message {user_message_id}: {exc}")
+            return []
+
+    def _get_replies_sync(self, user_message_id: int) -> List[int]:
+        with self._db_lock:
+            rows = self._open_connection().execute(
+                "SELECT reply_message_id FROM message_replies WHERE user_message_id = ? ORDER BY part",
+                (user_message_id,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    async def remove_replies(self, user_message_id: int) -> None:
+        """Forget all replies to a user message.
+
+        Args:
+            user_message_id: The user's prompt message id.
+        """
+        try:
+            await self.flush()
+            await asyncio.to_thread(self._remove_replies_sync, user_message_id)
+        except Exception as exc:
+            logger.error(f"remove_replies failed for message {user_message_id}: {exc}")
+
+    def _remove_replies_sync(self, user_message_id: int) -> None:
+        with self._db_lock:
+            conn = self._open_connection()
+            conn.execute("DELETE FROM message_replies WHERE user_message_id = ?", (user_message_id,))
+            conn.commit()
+
+    async def prune(self, max_age: Optional[float] = None, now: Optional[float] = None) -> int:
+        """Delete entries older than max_age seconds.
+
+        Args:
+            max_age: Age limit in seconds; defaults to the instance's max_age.
+            now: Current Unix time, for tests.
+
+        Returns:
+            Number of rows deleted.
+        """
+        cutoff = (now if now is not None else time.time()) - (max_age if max_age is not None else self.max_age)
+        await self.flush()
+        deleted = await asyncio.to_thread(self._prune_sync, cutoff)
+        if deleted:
+            logger.info(f"Pruned {deleted} reply index entries")
+        return deleted
+
+    def _prune_sync(self, cutoff: float) -> int:
+        with self._db_lock:
+            conn = self._open_connection()
+            cursor = conn.execute("DELETE FROM message_replies WHERE created_at < ?", (cutoff,))
+            conn.commit()
+        return cursor.rowcount
@@ -1,21 +1,83 @@
 """Database schema creation for the memory cog.
 
-Contains SQL statements to create required tables and indexes, and performs
-small migrations if needed.
+The schema is built by an ordered list of migration steps, ``MIGRATIONS``.
+Step ``n`` takes a database from version ``n - 1`` to ``n``, and the
+version reached is kept in the ``schema_version`` table. ``create_tables``
+runs on every new connection, but once a database is current that costs a
+single one-row SELECT. Pending steps run once, in one ``BEGIN IMMEDIATE``
+transaction, under a process-wide lock. The version is re-read after the
+lock is taken, so concurrent connections (or processes) never apply a step
+twice.
+
+Databases created before the runner have no ``schema_version`` row and are
+treated as version 0. Every step therefore checks the shape it finds
+(``IF NOT EXISTS``, column lists) instead of assuming one, so any of the
+historical shapes upgrades cleanly. New schema changes are appended as new
+steps; existing steps are never edited.
 
 All comments and logs are written in English per project rules.
 """
 import sqlite3
-from typing import Any
+import threading
+from typing import Callable, List
 from addons.logging import get_logger
 logger = get_logger(server_id="system", source=__name__)
 
+# Serializes upgrades within this process; BEGIN IMMEDIATE covers other processes.
+_MIGRATION_LOCK = threading.Lock()
+
 
 def create_tables(conn: sqlite3.Connection) -> None:
-    """Create necessary tables and indexes on the provided SQLite connection.
+    """Bring the database behind ``conn`` to ``SCHEMA_VERSION``.
 
-    This mirrors the previous implementation in DatabaseManager._create_tables.
+    Cheap when the database is already current. Leaves no transaction open.
     """
+    version = schema_version(conn)
+    if version == SCHEMA_VERSION:
+        return
+    if version > SCHEMA_VERSION:
+        logger.warning(
+            "Database schema version %d is newer than this build (%d); leaving it as is.",
+            version, SCHEMA_VERSION,
+        )
+        return
+
+    with _MIGRATION_LOCK:
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+            start = schema_version(conn)
+            for target in range(start + 1, SCHEMA_VERSION + 1):
+                MIGRATIONS[target - 1](conn)
+            if start < SCHEMA_VERSION:
+                conn.execute("DELETE FROM schema_version")
+                conn.execute("INSERT INTO schema_version (version) VALUES (?)", (SCHEMA_VERSION,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    if start < SCHEMA_VERSION:
+        logger.info("Database schema upgraded from version %d to %d.", start, SCHEMA_VERSION)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    """Return the recorded schema version, 0 if the database predates the runner."""
+    try:
+        row = conn.execute("SELECT version FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] if row else 0
+
+
+# ---------------------------------------------------------------------------
+# Migration steps (run inside the runner's transaction; never commit)
+# ---------------------------------------------------------------------------
+
+
+def _create_base_tables(conn: sqlite3.Connection) -> None:
+    """Version 1: the users, config, knowledge, user_stats and bookkeeping tables."""
     cursor = conn.cursor()
     # Table for storing user information
     cursor.execute(
@@ -71,10 +133,6 @@ def create_tables(conn: sqlite3.Connection) -> None:
             user_id TEXT NOT NULL,
             guild_id TEXT NOT NULL,
             total_messages INTEGER NOT NULL DEFAULT 0,
-            active_hours TEXT NOT NULL DEFAULT '{}',
-            top_channels TEXT NOT NULL DEFAULT '{}',
-            top_emojis TEXT NOT NULL DEFAULT '{}',
-            top_words TEXT NOT NULL DEFAULT '{}',
             streak_days INTEGER NOT NULL DEFAULT 0,
             streak_last_date TEXT,
             last_active_at DATETIME,
@@ -105,4 +163,192 @@ def create_tables(conn: sqlite3.Connection) -> None:
         """
     )
 
-    logger.info("Database tables created or verified successfully.")
\ No newline at end of file
+
+def _add_user_stat_counts(conn: sqlite3.Connection) -> None:
+    """Version 2: per-user counters move from JSON columns to user_stat_counts."""
+    cursor = conn.cursor()
+    # Per-user counters behind user_stats: kind is 'hour' (0-23), 'channel',
+    # 'emoji' or 'word'
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_stat_counts (
+            user_id TEXT NOT NULL,
+            guild_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, guild_id, kind, key)
+        ) WITHOUT ROWID;
+        """
+    )
+    _migrate_user_stats_blobs(conn)
+
+
+def _add_counter_error(conn: sqlite3.Connection) -> None:
+    """Version 3: channel/emoji/word counters become Space-Saving summaries.
+
+    kind 'hour' stays exact (0-23); for the others count may overestimate
+    by at most error.
+    """
+    counter_columns = {row[1] for row in conn.execute("PRAGMA table_info(user_stat_counts)")}
+    if "error" not in counter_columns:
+        conn.execute("ALTER TABLE user_stat_counts ADD COLUMN error INTEGER NOT NULL DEFAULT 0")
+
+
+def _add_log_migration_checkpoint(conn: sqlite3.Connection) -> None:
+    """Version 4: byte offsets inside the log day being migrated."""
+    cursor = conn.cursor()
+    # Position inside the day being migrated (the end of the last applied chunk)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS log_migration_checkpoint (
+            guild_id    TEXT PRIMARY KEY,
+            date        TEXT NOT NULL,
+            file        TEXT NOT NULL,
+            byte_offset INTEGER NOT NULL
+        );
+        """
+    )
+
+
+def _add_channel_memory_state(conn: sqlite3.Connection) -> None:
+    """Version 5: channel_memory_state, with the id of the last counted message.
+
+    The table used to be created by EpisodicStorage on start-up, which also
+    added last_summary_timestamp and last_summary_text to older copies.
+    last_message_id lets message counters held in memory be reconciled with
+    the channel after a crash.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS channel_memory_state (
+            channel_id INTEGER PRIMARY KEY,
+            message_count INTEGER NOT NULL DEFAULT 0,
+            start_message_id INTEGER NOT NULL DEFAULT 0,
+            last_summary_timestamp REAL DEFAULT 0,
+            last_summary_text TEXT,
+            last_message_id INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(channel_memory_state)")}
+    for column, ddl in (
+        ("last_summary_timestamp", "REAL DEFAULT 0"),
+        ("last_summary_text", "TEXT"),
+        ("last_message_id", "INTEGER NOT NULL DEFAULT 0"),
+    ):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE channel_memory_state ADD COLUMN {column} {ddl}")
+
+
+def _add_message_spool(conn: sqlite3.Connection) -> None:
+    """Version 6: the local spool of tracked messages that summarization reads.
+
+    prev_id is the message the tracker saw right before this one in the
+    channel, or 0 when it does not know; a row whose prev_id is not the row
+    before it marks a gap that has to be fetched over REST.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS channel_message_spool (
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            prev_id INTEGER NOT NULL DEFAULT 0,
+            author_id INTEGER NOT NULL,
+            author_name TEXT NOT NULL,
+            author_bot INTEGER NOT NULL DEFAULT 0,
+            content TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (channel_id, message_id)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _add_memory_job_progress(conn: sqlite3.Connection) -> None:
+    """Version 7: progress of background memory jobs, so paused or
+    interrupted jobs do not redo their LLM calls.
+
+    summaries is a JSON list of the event summaries produced so far for the
+    messages from start_message_id to end_message_id.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS memory_job_progress (
+            channel_id INTEGER PRIMARY KEY,
+            start_message_id INTEGER NOT NULL,
+            end_message_id INTEGER NOT NULL,
+            summaries TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )
+        """
+    )
+
+
+def _add_spool_reply_to(conn: sqlite3.Connection) -> None:
+    """Version 8: the message each spooled message replies to, 0 for none.
+
+    Summarization keeps reply chains in one segment, so it needs them for
+    messages read back from the spool as well.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(channel_message_spool)")}
+    if "reply_to_id" not in columns:
+        conn.execute("ALTER TABLE channel_message_spool ADD COLUMN reply_to_id INTEGER NOT NULL DEFAULT 0")
+
+
+MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    _create_base_tables,
+    _add_user_stat_counts,
+    _add_counter_error,
+    _add_log_migration_checkpoint,
+    _add_channel_memory_state,
+    _add_message_spool,
+    _add_memory_job_progress,
+    _add_spool_reply_to,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+# Legacy JSON columns of user_stats and the user_stat_counts kind each held.
+_USER_STATS_BLOBS = {
+    "active_hours": "hour",
+    "top_channels": "channel",
+    "top_emojis": "emoji",
+    "top_words": "word",
+}
+
+
+def _migrate_user_stats_blobs(conn: sqlite3.Connection) -> None:
+    """Move the JSON counter columns of user_stats into user_stat_counts.
+
+    Databases created before the counter table kept active_hours,
+    top_channels, top_emojis and top_words as JSON objects on each row.
+    Their entries are added to user_stat_counts and the columns dropped
+    (or emptied where the SQLite build cannot drop columns).
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(user_stats)")}
+    legacy = [col for col in _USER_STATS_BLOBS if col in columns]
+    if not legacy:
+        return
+    moved = 0
+    for col in legacy:
+        cur = conn.execute(
+            f"""
+            INSERT INTO user_stat_counts (user_id, guild_id, kind, key, count)
+            SELECT s.user_id, s.guild_id, ?, j.key, j.value
+            FROM user_stats AS s, json_each(s.{col}) AS j
+            WHERE s.{col} != '{{}}' AND json_valid(s.{col}) AND json_type(s.{col}) = 'object'
+                AND j.type = 'integer'
+            ON CONFLICT (user_id, guild_id, kind, key) DO UPDATE SET
+                count = count + excluded.count
+            """,
+            (_USER_STATS_BLOBS[col],),
+        )
+        moved += max(cur.rowcount, 0)
+        try:
+            conn.execute(f"ALTER TABLE user_stats DROP COLUMN {col}")
+        except sqlite3.OperationalError:
+            # SQLite < 3.35 cannot drop columns; leave it empty instead.
+            conn.execute(f"UPDATE user_stats SET {col} = '{{}}' WHERE {col} != '{{}}'")
+    if moved:
+        logger.info(f"Migrated {moved} user_stats counters into user_stat_counts.")
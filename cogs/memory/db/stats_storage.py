@@ -1,42 +1,35 @@
 """StatsStorage: handles user statistics and log migration state persistence.
 
-This module provides CRUD operations for the user_stats and
-log_migration_state tables, supporting real-time message tracking and
+This module provides CRUD operations for the user_stats, user_stat_counts,
+log_migration_state and log_migration_checkpoint tables, supporting real-time message tracking and
 historical log migration.
+
+Updates are upserts: totals and streaks on the user_stats row, an exact
+hour counter, and bounded Space-Saving summaries (at most
+``_SKETCH_CAPACITY`` rows per user) for channels, emojis and words in
+user_stat_counts. A batch is aggregated in memory first, so it costs one
+user_stats write per (user, guild) and one summary merge per
+(user, guild, kind) rather than one of each per message, all in a single
+transaction. Writes go through ``DatabaseConnection.write``, whose writer
+thread holds the write lock while the streaks are read.
 """
 from __future__ import annotations
 
-import json
 import re
 import sqlite3
 import asyncio
 from collections import Counter
-from datetime import datetime, date
-from typing import Any, Dict, List, Optional, Set
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
 
 from .connection import DatabaseConnection
+from ..text import segment_words
 from function import func
 from addons.logging import get_logger
 
 logger = get_logger(server_id="system", source=__name__)
 
-# ---------------------------------------------------------------------------
-# Chinese / CJK stop-words (compact set for jieba filtering)
-# ---------------------------------------------------------------------------
-_STOP_WORDS: Set[str] = {
-    "的", "了", "在", "是", "我", "有", "和", "就", "不", "人", "都", "一",
-    "一個", "上", "也", "很", "到", "說", "要", "去", "你", "會", "著",
-    "沒有", "看", "好", "自己", "這", "他", "她", "它", "麼", "嗎", "吧",
-    "啊", "嗯", "喔", "欸", "耶", "呢", "哦", "哈", "噢", "呀", "唉",
-    "把", "讓", "被", "從", "而", "且", "但", "跟", "對", "所以", "因為",
-    "如果", "那", "還", "比", "這個", "那個", "什麼", "怎麼", "可以",
-    "沒", "能", "已經", "過", "之", "等", "多", "時", "個", "可", "來",
-    "the", "a", "an", "is", "are", "was", "were", "be", "been", "am",
-    "do", "did", "does", "i", "you", "he", "she", "it", "we", "they",
-    "and", "or", "but", "in", "on", "at", "to", "for", "of", "with",
-    "that", "this", "not", "no", "so", "if", "my", "me", "your",
-}
-
 # Regex for extracting emoji (both Unicode and Discord custom <:name:id>)
 _UNICODE_EMOJI_RE = re.compile(
     "["
@@ -54,9 +47,81 @@ _UNICODE_EMOJI_RE = re.compile(
 )
 _DISCORD_EMOJI_RE = re.compile(r"<a?:\w+:\d+>")
 
-# Maximum number of words to keep in top_words to prevent unbounded growth
+# Maximum number of words reported in top_words
 _MAX_TOP_WORDS = 200
 
+# Channels, emojis and words are kept as Space-Saving summaries (see
+# addons.sketches) of this many counters per user and guild. A reported count
+# overestimates by at most the row's error, which is at most
+# (user's messages in the kind) / capacity.
+_SKETCH_CAPACITY = {
+    "channel": 50,
+    "emoji": 50,
+    "word": 2 * _MAX_TOP_WORDS,
+}
+
+# user_stat_counts kind -> key of the dict returned by get_user_stats
+_COUNTER_COLUMNS = {
+    "hour": "active_hours",
+    "channel": "top_channels",
+    "emoji": "top_emojis",
+    "word": "top_words",
+}
+
+# Parameters: user_id, guild_id, batch message count, streak days and last
+# date after the batch (see _advance_streak), last and first timestamp.
+_UPSERT_USER_STATS_SQL = """
+INSERT INTO user_stats (
+    user_id, guild_id, total_messages, streak_days, streak_last_date,
+    last_active_at, first_message_at
+) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (user_id, guild_id) DO UPDATE SET
+    total_messages = total_messages + excluded.total_messages,
+    streak_days = excluded.streak_days,
+    streak_last_date = excluded.streak_last_date,
+    last_active_at = excluded.last_active_at,
+    first_message_at = COALESCE(first_message_at, excluded.first_message_at)
+"""
+
+# Bound variables per row-value lookup, under SQLite's default limit of 999.
+_LOOKUP_VARIABLES = 900
+
+_UPSERT_COUNT_SQL = """
+INSERT INTO user_stat_counts (user_id, guild_id, kind, key, count) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (user_id, guild_id, kind, key) DO UPDATE SET count = count + excluded.count
+"""
+
+# Space-Saving merge of exact batch counts, as SpaceSaving.merge: a new key
+# starts at the summary's floor (its smallest count once full) plus its
+# count, with the floor as error; a tracked key just adds its count.
+# Parameters: user_id, guild_id, kind, key, count + floor, floor.
+_MERGE_COUNT_SQL = """
+INSERT INTO user_stat_counts (user_id, guild_id, kind, key, count, error) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (user_id, guild_id, kind, key) DO UPDATE SET
+    count = count + excluded.count - excluded.error
+"""
+
+# Drops the ?4 smallest counters of one summary (ties: largest key first),
+# leaving the same rows as SpaceSaving.merge keeps.
+_EVICT_SQL = """
+DELETE FROM user_stat_counts
+WHERE user_id = ?1 AND guild_id = ?2 AND kind = ?3 AND key IN (
+    SELECT key FROM user_stat_counts
+    WHERE user_id = ?1 AND guild_id = ?2 AND kind = ?3
+    ORDER BY count, key DESC LIMIT ?4
+)
+"""
+
+
+@dataclass
+class _UserBatch:
+    """One (user, guild)'s share of a batch, in message order."""
+
+    first_at: str
+    last_at: str = ""
+    messages: int = 0
+    days: List[str] = field(default_factory=list)
+
 
 class StatsStorage:
     """Handles user_stats and log_migration_state table operations.
@@ -99,12 +164,26 @@ class StatsStorage:
             row = cursor.fetchone()
             if not row:
                 return None
-            
+
             res = dict(row)
-            # Parse JSON columns
-            for col in ["active_hours", "top_channels", "top_emojis", "top_words"]:
-                if res.get(col):
-                    res[col] = _safe_json_load(res[col])
+            counters: Dict[str, Dict[str, int]] = {kind: {} for kind in _COUNTER_COLUMNS}
+            cursor = conn.execute(
+                "SELECT kind, key, count FROM user_stat_counts "
+                "WHERE user_id = ? AND guild_id = ? AND kind != 'word'",
+                (user_id, guild_id),
+            )
+            for kind, key, count in cursor:
+                if kind in counters:
+                    counters[kind][key] = count
+            cursor = conn.execute(
+                "SELECT key, count FROM user_stat_counts "
+                "WHERE user_id = ? AND guild_id = ? AND kind = 'word' "
+                "ORDER BY count DESC, key LIMIT ?",
+                (user_id, guild_id, _MAX_TOP_WORDS),
+            )
+            counters["word"] = dict(cursor.fetchall())
+            for kind, column in _COUNTER_COLUMNS.items():
+                res[column] = counters[kind]
             return res
 
     async def upsert_user_stats(
@@ -117,266 +196,29 @@ class StatsStorage:
     ) -> None:
         """Insert or update cumulative stats for a single message event."""
         try:
-            await asyncio.to_thread(
-                self._upsert_user_stats_sync,
-                user_id,
-                guild_id,
-                message_content,
-                channel_id,
-                timestamp,
-            )
+            await self.db.write(_apply_batch, [{
+                "user_id": user_id,
+                "guild_id": guild_id,
+                "message_content": message_content,
+                "channel_id": channel_id,
+                "timestamp": timestamp,
+            }])
         except Exception as e:
             await func.report_error(
                 e,
                 f"upsert_user_stats failed (user={user_id}, guild={guild_id})",
             )
 
-    def _upsert_user_stats_sync(
-        self,
-        user_id: str,
-        guild_id: str,
-        message_content: str,
-        channel_id: str,
-        timestamp: str,
-    ) -> None:
-        # Parse timestamp
-        try:
-            dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-        except (ValueError, AttributeError):
-            dt = datetime.utcnow()
-
-        hour_key = str(dt.hour)
-        today_str = dt.strftime("%Y-%m-%d")
-
-        # Extract emojis
-        emojis = _extract_emojis(message_content)
-
-        # Segment words with jieba
-        words = _segment_words(message_content)
-
-        with self.db.get_connection() as conn:
-            # Read existing row
-            cursor = conn.execute(
-                "SELECT * FROM user_stats WHERE user_id = ? AND guild_id = ?",
-                (user_id, guild_id),
-            )
-            existing = cursor.fetchone()
-
-            if existing:
-                row = dict(existing)
-                total = row.get("total_messages", 0) + 1
-
-                # Merge JSON fields
-                active_hours = _safe_json_load(row.get("active_hours", "{}"))
-                active_hours[hour_key] = active_hours.get(hour_key, 0) + 1
-
-                top_channels = _safe_json_load(row.get("top_channels", "{}"))
-                if channel_id:
-                    top_channels[channel_id] = (
-                        top_channels.get(channel_id, 0) + 1
-                    )
-
-                top_emojis = _safe_json_load(row.get("top_emojis", "{}"))
-                for em in emojis:
-                    top_emojis[em] = top_emojis.get(em, 0) + 1
-
-                top_words_dict = _safe_json_load(row.get("top_words", "{}"))
-                for w in words:
-                    top_words_dict[w] = top_words_dict.get(w, 0) + 1
-                top_words_dict = _trim_top_words(top_words_dict)
-
-                # Streak calculation
-                streak_last = row.get("streak_last_date")
-                streak_days = row.get("streak_days", 0)
-                streak_days, streak_last_date = _compute_streak(
-                    streak_days, streak_last, today_str
-                )
-
-                first_message_at = row.get("first_message_at") or timestamp
-
-                conn.execute(
-                    """
-                    UPDATE user_stats SET
-                        total_messages = ?,
-                        active_hours = ?,
-                        top_channels = ?,
-                        top_emojis = ?,
-                        top_words = ?,
-                        streak_days = ?,
-                        streak_last_date = ?,
-                        last_active_at = ?,
-                        first_message_at = ?
-                    WHERE user_id = ? AND guild_id = ?
-                    """,
-                    (
-                        total,
-                        json.dumps(active_hours, ensure_ascii=False),
-                        json.dumps(top_channels, ensure_ascii=False),
-                        json.dumps(top_emojis, ensure_ascii=False),
-                        json.dumps(top_words_dict, ensure_ascii=False),
-                        streak_days,
-                        streak_last_date,
-                        timestamp,
-                        first_message_at,
-                        user_id,
-                        guild_id,
-                    ),
-                )
-            else:
-                # First message ever for this user in this guild
-                active_hours = {hour_key: 1}
-                top_channels = {channel_id: 1} if channel_id else {}
-                top_emojis_dict = dict(Counter(emojis))
-                top_words_dict = dict(Counter(words))
-                top_words_dict = _trim_top_words(top_words_dict)
-
-                conn.execute(
-                    """
-                    INSERT INTO user_stats (
-                        user_id, guild_id, total_messages,
-                        active_hours, top_channels, top_emojis, top_words,
-                        streak_days, streak_last_date,
-                        last_active_at, first_message_at
-                    ) VALUES (?, ?, 1, ?, ?, ?, ?, 1, ?, ?, ?)
-                    """,
-                    (
-                        user_id,
-                        guild_id,
-                        json.dumps(active_hours, ensure_ascii=False),
-                        json.dumps(top_channels, ensure_ascii=False),
-                        json.dumps(top_emojis_dict, ensure_ascii=False),
-                        json.dumps(top_words_dict, ensure_ascii=False),
-                        today_str,
-                        timestamp,
-                        timestamp,
-                    ),
-                )
-            conn.commit()
-
     async def bulk_upsert_user_stats(self, records: List[Dict[str, Any]]) -> None:
         """Insert or update cumulative stats for a batch of message events."""
         if not records:
             return
 
         try:
-            await asyncio.to_thread(self._bulk_upsert_user_stats_sync, records)
+            await self.db.write(_apply_batch, records)
         except Exception as e:
             await func.report_error(e, "bulk_upsert_user_stats failed")
 
-    def _bulk_upsert_user_stats_sync(self, records: List[Dict[str, Any]]) -> None:
-        with self.db.get_connection() as conn:
-            for rec in records:
-                user_id = rec["user_id"]
-                guild_id = rec["guild_id"]
-                message_content = rec["message_content"]
-                channel_id = rec["channel_id"]
-                timestamp = rec["timestamp"]
-
-                try:
-                    dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-                except (ValueError, AttributeError):
-                    dt = datetime.utcnow()
-
-                hour_key = str(dt.hour)
-                today_str = dt.strftime("%Y-%m-%d")
-
-                emojis = _extract_emojis(message_content)
-                words = _segment_words(message_content)
-
-                cursor = conn.execute(
-                    "SELECT * FROM user_stats WHERE user_id = ? AND guild_id = ?",
-                    (user_id, guild_id),
-                )
-                existing = cursor.fetchone()
-
-                if existing:
-                    row = dict(existing)
-                    total = row.get("total_messages", 0) + 1
-
-                    active_hours = _safe_json_load(row.get("active_hours", "{}"))
-                    active_hours[hour_key] = active_hours.get(hour_key, 0) + 1
-
-                    top_channels = _safe_json_load(row.get("top_channels", "{}"))
-                    if channel_id:
-                        top_channels[channel_id] = (
-                            top_channels.get(channel_id, 0) + 1
-                        )
-
-                    top_emojis = _safe_json_load(row.get("top_emojis", "{}"))
-                    for em in emojis:
-                        top_emojis[em] = top_emojis.get(em, 0) + 1
-
-                    top_words_dict = _safe_json_load(row.get("top_words", "{}"))
-                    for w in words:
-                        top_words_dict[w] = top_words_dict.get(w, 0) + 1
-                    top_words_dict = _trim_top_words(top_words_dict)
-
-                    streak_last = row.get("streak_last_date")
-                    streak_days = row.get("streak_days", 0)
-                    streak_days, streak_last_date = _compute_streak(
-                        streak_days, streak_last, today_str
-                    )
-
-                    first_message_at = row.get("first_message_at") or timestamp
-
-                    conn.execute(
-                        """
-                        UPDATE user_stats SET
-                            total_messages = ?,
-                            active_hours = ?,
-                            top_channels = ?,
-                            top_emojis = ?,
-                            top_words = ?,
-                            streak_days = ?,
-                            streak_last_date = ?,
-                            last_active_at = ?,
-                            first_message_at = ?
-                        WHERE user_id = ? AND guild_id = ?
-                        """,
-                        (
-                            total,
-                            json.dumps(active_hours, ensure_ascii=False),
-                            json.dumps(top_channels, ensure_ascii=False),
-                            json.dumps(top_emojis, ensure_ascii=False),
-                            json.dumps(top_words_dict, ensure_ascii=False),
-                            streak_days,
-                            streak_last_date,
-                            timestamp,
-                            first_message_at,
-                            user_id,
-                            guild_id,
-                        ),
-                    )
-                else:
-                    active_hours = {hour_key: 1}
-                    top_channels = {channel_id: 1} if channel_id else {}
-                    top_emojis_dict = dict(Counter(emojis))
-                    top_words_dict = dict(Counter(words))
-                    top_words_dict = _trim_top_words(top_words_dict)
-
-                    conn.execute(
-                        """
-                        INSERT INTO user_stats (
-                            user_id, guild_id, total_messages,
-                            active_hours, top_channels, top_emojis, top_words,
-                            streak_days, streak_last_date,
-                            last_active_at, first_message_at
-                        ) VALUES (?, ?, 1, ?, ?, ?, ?, 1, ?, ?, ?)
-                        """,
-                        (
-                            user_id,
-                            guild_id,
-                            json.dumps(active_hours, ensure_ascii=False),
-                            json.dumps(top_channels, ensure_ascii=False),
-                            json.dumps(top_emojis_dict, ensure_ascii=False),
-                            json.dumps(top_words_dict, ensure_ascii=False),
-                            today_str,
-                            timestamp,
-                            timestamp,
-                        ),
-                    )
-            conn.commit()
-
     # ------------------------------------------------------------------
     # log_migration_state CRUD
     # ------------------------------------------------------------------
@@ -400,27 +242,56 @@ class StatsStorage:
             row = cursor.fetchone()
             return row["last_processed_date"] if row else None
 
-    async def set_migration_state(self, guild_id: str, date_str: str) -> None:
-        """Record the last processed date for historical log migration."""
+    async def get_migration_checkpoint(self, guild_id: str) -> Optional[Tuple[str, str, int]]:
+        """Get (date, file name, byte offset) of a partially migrated day, if any."""
         try:
-            await asyncio.to_thread(self._set_migration_state_sync, guild_id, date_str)
+            return await asyncio.to_thread(self._get_migration_checkpoint_sync, guild_id)
         except Exception as e:
             await func.report_error(
-                e, f"set_migration_state failed (guild={guild_id})"
+                e, f"get_migration_checkpoint failed (guild={guild_id})"
             )
+            return None
 
-    def _set_migration_state_sync(self, guild_id: str, date_str: str) -> None:
+    def _get_migration_checkpoint_sync(self, guild_id: str) -> Optional[Tuple[str, str, int]]:
         with self.db.get_connection() as conn:
-            conn.execute(
-                """
-                INSERT INTO log_migration_state (guild_id, last_processed_date)
-                VALUES (?, ?)
-                ON CONFLICT(guild_id) DO UPDATE SET
-                    last_processed_date = excluded.last_processed_date
-                """,
-                (guild_id, date_str),
+            row = conn.execute(
+                "SELECT date, file, byte_offset FROM log_migration_checkpoint WHERE guild_id = ?",
+                (guild_id,),
+            ).fetchone()
+            return (row["date"], row["file"], row["byte_offset"]) if row else None
+
+    async def apply_migration_batch(
+        self,
+        records: List[Dict[str, Any]],
+        guild_id: str,
+        date_str: str,
+        file_name: str,
+        byte_offset: int,
+    ) -> bool:
+        """Add migrated messages and advance the day's checkpoint in one transaction.
+
+        Returns:
+            Whether the batch was committed.
+        """
+        try:
+            await self.db.write(
+                _apply_migration_batch, records, (guild_id, date_str, file_name, byte_offset)
+            )
+            return True
+        except Exception as e:
+            await func.report_error(
+                e, f"apply_migration_batch failed (guild={guild_id}, date={date_str})"
+            )
+            return False
+
+    async def set_migration_state(self, guild_id: str, date_str: str) -> None:
+        """Record the last processed date for historical log migration."""
+        try:
+            await self.db.write(_set_migration_state, guild_id, date_str)
+        except Exception as e:
+            await func.report_error(
+                e, f"set_migration_state failed (guild={guild_id})"
             )
-            conn.commit()
 
 
 # ======================================================================
@@ -428,17 +299,183 @@ class StatsStorage:
 # ======================================================================
 
 
-def _safe_json_load(raw: Any) -> Dict[str, int]:
-    """Safely parse a JSON string into a dict, defaulting to empty dict."""
-    if not raw:
-        return {}
-    if isinstance(raw, dict):
-        return raw
+def _set_migration_state(conn: sqlite3.Connection, guild_id: str, date_str: str) -> None:
+    """Mark a day as migrated and drop its checkpoint (no commit)."""
+    conn.execute(
+        """
+        INSERT INTO log_migration_state (guild_id, last_processed_date)
+        VALUES (?, ?)
+        ON CONFLICT(guild_id) DO UPDATE SET
+            last_processed_date = excluded.last_processed_date
+        """,
+        (guild_id, date_str),
+    )
+    conn.execute("DELETE FROM log_migration_checkpoint WHERE guild_id = ?", (guild_id,))
+
+
+def _apply_migration_batch(
+    conn: sqlite3.Connection, records: List[Dict[str, Any]], checkpoint: Tuple[str, str, str, int]
+) -> None:
+    """Apply migrated messages and move the day's checkpoint past them (no commit)."""
+    _apply_batch(conn, records)
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO log_migration_checkpoint (guild_id, date, file, byte_offset)
+        VALUES (?, ?, ?, ?)
+        """,
+        checkpoint,
+    )
+
+
+def _apply_batch(conn: sqlite3.Connection, records: List[Dict[str, Any]]) -> None:
+    """Add a batch of messages to user_stats and its counters (no commit).
+
+    The result is the same as applying the records one by one in order,
+    except that each Space-Saving summary takes the batch's exact counts in a
+    single merge.
+    """
+    users: Dict[Tuple[str, str], _UserBatch] = {}
+    hours: Counter = Counter()
+    counts: Dict[Tuple[str, str, str], Counter] = {}
+
+    for rec in records:
+        user_id, guild_id, timestamp = rec["user_id"], rec["guild_id"], rec["timestamp"]
+        try:
+            dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        except (ValueError, AttributeError):
+            dt = datetime.utcnow()
+
+        agg = users.get((user_id, guild_id))
+        if agg is None:
+            agg = users[(user_id, guild_id)] = _UserBatch(first_at=timestamp)
+        agg.messages += 1
+        agg.last_at = timestamp
+        day = dt.strftime("%Y-%m-%d")
+        if not agg.days or agg.days[-1] != day:
+            agg.days.append(day)
+
+        hours[(user_id, guild_id, str(dt.hour))] += 1
+        if rec["channel_id"]:
+            counts.setdefault((user_id, guild_id, "channel"), Counter())[rec["channel_id"]] += 1
+        emojis = _extract_emojis(rec["message_content"])
+        if emojis:
+            counts.setdefault((user_id, guild_id, "emoji"), Counter()).update(emojis)
+        words = segment_words(rec["message_content"])
+        if words:
+            counts.setdefault((user_id, guild_id, "word"), Counter()).update(words)
+
+    streaks = _load_streaks(conn, list(users))
+    rows = []
+    for key, agg in users.items():
+        streak_days, last_date = streaks.get(key, (0, None))
+        for day in agg.days:
+            streak_days, last_date = _advance_streak(streak_days, last_date, day)
+        rows.append((*key, agg.messages, streak_days, last_date, agg.last_at, agg.first_at))
+    conn.executemany(_UPSERT_USER_STATS_SQL, rows)
+    conn.executemany(
+        _UPSERT_COUNT_SQL, [(user_id, guild_id, "hour", hour, n) for (user_id, guild_id, hour), n in hours.items()]
+    )
+    _merge_counts(conn, counts)
+
+
+def _load_streaks(
+    conn: sqlite3.Connection, keys: List[Tuple[str, str]]
+) -> Dict[Tuple[str, str], Tuple[int, Optional[str]]]:
+    """Fetch (streak_days, streak_last_date) for the existing (user, guild) rows."""
+    return {
+        (user_id, guild_id): (streak_days, last_date)
+        for user_id, guild_id, streak_days, last_date in _select_in(
+            conn,
+            "WITH k (user_id, guild_id) AS ({values}) "
+            "SELECT user_id, guild_id, streak_days, streak_last_date FROM k CROSS JOIN user_stats USING (user_id, guild_id)",
+            keys,
+        )
+    }
+
+
+def _advance_streak(streak_days: int, last_date: Optional[str], day: str) -> Tuple[int, str]:
+    """Apply one message on ``day`` to a streak.
+
+    The same day keeps it, the next day extends it, a later day restarts it
+    at 1, and an earlier day (an out-of-order message) leaves it alone.
+    """
     try:
-        parsed = json.loads(raw)
-        return parsed if isinstance(parsed, dict) else {}
-    except (json.JSONDecodeError, TypeError):
-        return {}
+        previous = date.fromisoformat(last_date) if last_date else None
+    except ValueError:
+        previous = None
+    if previous is None:
+        return 1, day
+    gap = (date.fromisoformat(day) - previous).days
+    if gap == 0:
+        return streak_days, last_date
+    if gap == 1:
+        return streak_days + 1, day
+    if gap > 1:
+        return 1, day
+    return streak_days, last_date
+
+
+def _merge_counts(
+    conn: sqlite3.Connection, summaries: Dict[Tuple[str, str, str], Dict[str, int]]
+) -> None:
+    """Fold exact counts into Space-Saving summaries, keyed by (user, guild, kind).
+
+    Each step runs once for the whole batch: summary sizes and floors, which
+    keys are already tracked, the merge upserts and the evictions.
+    """
+    sizes = {
+        (user_id, guild_id, kind): (size, floor)
+        for user_id, guild_id, kind, size, floor in _select_in(
+            conn,
+            "WITH k (user_id, guild_id, kind) AS ({values}) "
+            "SELECT user_id, guild_id, kind, COUNT(*), MIN(count) "
+            "FROM k CROSS JOIN user_stat_counts USING (user_id, guild_id, kind) "
+            "GROUP BY user_id, guild_id, kind",
+            list(summaries),
+        )
+    }
+    tracked = Counter(
+        (user_id, guild_id, kind)
+        for user_id, guild_id, kind, _key in _select_in(
+            conn,
+            "WITH k (user_id, guild_id, kind, key) AS ({values}) "
+            "SELECT user_id, guild_id, kind, key FROM k CROSS JOIN user_stat_counts USING (user_id, guild_id, kind, key)",
+            [(*summary, key) for summary, counts in summaries.items() for key in counts],
+        )
+    )
+    merges = []
+    evictions = []
+    for summary, counts in summaries.items():
+        capacity = _SKETCH_CAPACITY[summary[2]]
+        size, floor = sizes.get(summary, (0, 0))
+        floor = floor if size >= capacity else 0
+        merges.extend((*summary, key, n + floor, floor) for key, n in counts.items())
+        excess = size + len(counts) - tracked[summary] - capacity
+        if excess > 0:
+            evictions.append((*summary, excess))
+    conn.executemany(_MERGE_COUNT_SQL, merges)
+    conn.executemany(_EVICT_SQL, evictions)
+
+
+def _select_in(conn: sqlite3.Connection, sql: str, keys: List[Tuple]) -> List[Tuple]:
+    """Run ``sql`` with ``{values}`` bound to ``keys`` as a VALUES list, in chunks.
+
+    The queries join a CTE over the VALUES list to the table: SQLite plans a
+    row-value ``IN`` as a full scan but a join as primary-key lookups.
+    """
+    rows: List[Tuple] = []
+    if not keys:
+        return rows
+    placeholder = "(" + ", ".join("?" * len(keys[0])) + ")"
+    chunk_size = _LOOKUP_VARIABLES // len(keys[0])
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+        cursor = conn.execute(
+            sql.format(values="VALUES " + ", ".join([placeholder] * len(chunk))),
+            [value for key in chunk for value in key],
+        )
+        rows.extend(tuple(row) for row in cursor)
+    return rows
 
 
 def _extract_emojis(text: str) -> List[str]:
@@ -455,82 +492,3 @@ def _extract_emojis(text: str) -> List[str]:
     for match in _DISCORD_EMOJI_RE.finditer(text):
         results.append(match.group())
     return results
-
-
-def _segment_words(text: str) -> List[str]:
-    """Segment text using jieba and filter stop-words / noise.
-
-    Returns a list of meaningful words (length >= 2, not pure digits,
-    not in the stop-word set).
-    """
-    if not text:
-        return []
-    try:
-        import jieba
-    except ImportError:
-        logger.warning("jieba not installed; skipping word segmentation.")
-        return []
-
-    # Remove URLs, mentions, and custom emoji markup before segmenting
-    cleaned = re.sub(r"https?://\S+", "", text)
-    cleaned = re.sub(r"<@!?\d+>", "", cleaned)
-    cleaned = re.sub(r"<#\d+>", "", cleaned)
-    cleaned = re.sub(r"<a?:\w+:\d+>", "", cleaned)
-
-    words: List[str] = []
-    for word in jieba.cut(cleaned):
-        w = word.strip().lower()
-        if len(w) < 2:
-            continue
-        if w.isdigit():
-            continue
-        if w in _STOP_WORDS:
-            continue
-        words.append(w)
-    return words
-
-
-def _trim_top_words(words_dict: Dict[str, int]) -> Dict[str, int]:
-    """Keep only the top N words by frequency to prevent unbounded growth."""
-    if len(words_dict) <= _MAX_TOP_WORDS:
-        return words_dict
-    sorted_items = sorted(words_dict.items(), key=lambda x: x[1], reverse=True)
-    return dict(sorted_items[:_MAX_TOP_WORDS])
-
-
-def _compute_streak(
-    current_streak: int, last_date_str: Optional[str], today_str: str
-) -> tuple[int, str]:
-    """Compute the updated streak days based on the last active date.
-
-    Args:
-        current_streak: The current consecutive active days count.
-        last_date_str: The last active date in YYYY-MM-DD format, or None.
-        today_str: Today's date in YYYY-MM-DD format.
-
-    Returns:
-        A tuple of (updated_streak_days, updated_last_date_str).
-    """
-    if not last_date_str:
-        return 1, today_str
-
-    if last_date_str == today_str:
-        # Same day, no change
-        return current_streak, today_str
-
-    try:
-        last_date = date.fromisoformat(last_date_str)
-        today = date.fromisoformat(today_str)
-        diff = (today - last_date).days
-
-        if diff == 1:
-            # Consecutive day
-            return current_streak + 1, today_str
-        elif diff > 1:
-            # Streak broken
-            return 1, today_str
-        else:
-            # Negative diff (shouldn't happen), keep current
-            return current_streak, last_date_str
-    except (ValueError, TypeError):
-        return 1, today_str
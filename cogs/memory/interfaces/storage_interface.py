@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, TYPE_CHECKING
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
 import discord
 
 if TYPE_CHECKING:
+    from ..db.episodic_storage import SpoolRow
     from ..users.manager import UserInfo
 
 
@@ -77,7 +78,8 @@ class EpisodicStorageInterface(ABC):
         message_count: int, 
         start_message_id: int,
         last_summary_timestamp: Optional[float] = None,
-        last_summary_text: Optional[str] = None
+        last_summary_text: Optional[str] = None,
+        last_message_id: Optional[int] = None,
     ) -> None:
         """Update the memory state for a specific channel.
         
@@ -87,9 +89,54 @@ class EpisodicStorageInterface(ABC):
             start_message_id (int): The start message ID.
             last_summary_timestamp (Optional[float]): Timestamp of last summary.
             last_summary_text (Optional[str]): Text of last summary.
+            last_message_id (Optional[int]): Newest message counted in message_count.
         """
         raise NotImplementedError
 
+    @abstractmethod
+    async def save_channel_message_counts(
+        self, counts: List[Tuple[int, int, int]], spooled: Sequence["SpoolRow"] = ()
+    ) -> bool:
+        """Store (channel_id, message_count, last_message_id) for existing channel states,
+        and append spooled messages, in one write.
+
+        Returns:
+            bool: Whether the counters were written.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def spool_messages(self, rows: Sequence["SpoolRow"]) -> bool:
+        """Append messages to the spool, replacing rows already there."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_spooled_messages(self, channel_id: int, from_message_id: int, limit: int) -> List["SpoolRow"]:
+        """Get up to limit spooled messages of a channel from from_message_id on, oldest first."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def trim_spooled_messages(self, channel_id: int, before_message_id: int) -> None:
+        """Drop spooled messages of a channel older than before_message_id."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def save_job_progress(
+        self, channel_id: int, start_message_id: int, end_message_id: int, summaries: str
+    ) -> None:
+        """Store the event summaries (JSON) a channel's background memory job produced so far."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_job_progress(self, channel_id: int) -> Optional[Dict[str, Any]]:
+        """Get the stored progress of a channel's background memory job, or None."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def clear_job_progress(self, channel_id: int) -> None:
+        """Forget the progress of a channel's finished background memory job."""
+        raise NotImplementedError
+
 
 class StorageInterface(ProceduralStorageInterface, EpisodicStorageInterface):
     """Combined interface kept for backward compatibility."""
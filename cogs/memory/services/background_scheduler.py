@@ -0,0 +1,124 @@
+"""Priority scheduling between foreground replies and background memory jobs.
+
+Replies run inside ``foreground()``. Background memory jobs (summarization,
+vectorization) run inside ``background_job()`` and call ``checkpoint()`` at
+points where pausing is safe, between LLM calls rather than during one.
+While any reply is running, a checkpoint waits for the replies to finish
+instead of the job being cancelled, so no LLM work is thrown away.
+
+Constant traffic must not starve the jobs. Each job is guaranteed at least
+``min_share`` of wall time over every ``window`` seconds: a pause lasts at
+most ``(1 - min_share) * window``. If the replies are still running then,
+the job goes on, and its checkpoints do not pause it again for the next
+``min_share * window`` seconds.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from addons.logging import get_logger
+
+log = get_logger(server_id="Bot", source=__name__)
+
+DEFAULT_MIN_SHARE = 0.2
+DEFAULT_WINDOW = 60.0
+
+
+@dataclass
+class SchedulerStats:
+    """Counters across all background jobs."""
+
+    checkpoints: int = 0
+    pauses: int = 0
+    # Pauses ended by the minimum share while replies were still running
+    forced_resumes: int = 0
+    paused_seconds: float = 0.0
+
+
+class _Job:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        # Checkpoints before this loop time do not pause (set after a forced resume)
+        self.protected_until = 0.0
+
+
+_current_job: contextvars.ContextVar[Optional[_Job]] = contextvars.ContextVar("memory_background_job", default=None)
+
+
+class BackgroundScheduler:
+    """Pauses background memory jobs at checkpoints while replies run."""
+
+    def __init__(self, min_share: float = DEFAULT_MIN_SHARE, window: float = DEFAULT_WINDOW) -> None:
+        """
+        Args:
+            min_share: Smallest fraction of wall time a background job keeps
+                while replies run; 0 pauses jobs for as long as replies run,
+                1 never pauses them.
+            window: Seconds over which the share is guaranteed.
+        """
+        self.min_share = min(max(min_share, 0.0), 1.0)
+        self.window = window
+        self._foreground = 0
+        self._idle: Optional[asyncio.Event] = None
+        self._stats = SchedulerStats()
+
+    def _idle_event(self) -> asyncio.Event:
+        # Created lazily so the scheduler can be built outside the event loop.
+        if self._idle is None:
+            self._idle = asyncio.Event()
+            if self._foreground == 0:
+                self._idle.set()
+        return self._idle
+
+    @asynccontextmanager
+    async def foreground(self) -> AsyncIterator[None]:
+        """Marks a reply as running; background jobs pause at their next checkpoint."""
+        self._foreground += 1
+        self._idle_event().clear()
+        try:
+            yield
+        finally:
+            self._foreground -= 1
+            if self._foreground == 0:
+                self._idle_event().set()
+
+    @asynccontextmanager
+    async def background_job(self, name: str) -> AsyncIterator[None]:
+        """Runs the body as a background job whose checkpoints can pause it."""
+        token = _current_job.set(_Job(name))
+        try:
+            yield
+        finally:
+            _current_job.reset(token)
+
+    async def checkpoint(self) -> None:
+        """
+        Waits while replies are running, for at most what the job's minimum
+        share allows. Returns at once when no reply is running, or when
+        called outside ``background_job()``.
+        """
+        job = _current_job.get()
+        if job is None:
+            return
+        self._stats.checkpoints += 1
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if not self._foreground or self.min_share >= 1.0 or now < job.protected_until:
+            return
+        timeout = None if self.min_share <= 0.0 else (1.0 - self.min_share) * self.window
+        self._stats.pauses += 1
+        try:
+            await asyncio.wait_for(self._idle_event().wait(), timeout)
+        except asyncio.TimeoutError:
+            self._stats.forced_resumes += 1
+            job.protected_until = loop.time() + self.min_share * self.window
+            log.debug(f"Background job {job.name} resumed after {timeout:.1f}s to keep its minimum share")
+        self._stats.paused_seconds += loop.time() - now
+
+    def stats(self) -> SchedulerStats:
+        """Returns a copy of the counters."""
+        return SchedulerStats(**vars(self._stats))
@@ -6,7 +6,7 @@ from __future__ import annotations
 import asyncio
 import json
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional, cast, TypeVar, Type
+from typing import Awaitable, Callable, List, Dict, Any, Optional, cast, TypeVar, Type
 from datetime import timezone
 
 import discord
@@ -18,6 +18,7 @@ from langchain_core.messages import HumanMessage
 from function import func
 from addons.settings import MemoryConfig, prompt_config
 from addons.logging import get_logger
+from cogs.memory.services.segmentation import segment_messages, summarize_segments
 from llm.model_manager import ModelManager
 from llm.model_circuit_breaker import get_model_circuit_breaker
 from llm.utils.model_init import create_model_instance
@@ -248,33 +249,51 @@ class EventSummarizationService:
                 log.exception("func.report_error failed")
             return None
 
-    async def summarize_events(self, messages: List[discord.Message], previous_summary: str = "") -> List[EventSummary]:
+    async def summarize_events(
+        self,
+        messages: List[discord.Message],
+        previous_summary: str = "",
+        checkpoint: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> List[EventSummary]:
         """
         Process a list of messages and extract event summaries using LLM.
-        
+
+        The messages are split into conversation segments, which are
+        summarized concurrently, at most ``summarization_concurrency`` at a
+        time. If any segment fails, nothing is returned, so the caller
+        retries the whole batch.
+
         Args:
             messages: List of Discord messages to process
             previous_summary: Summary of previous events for context
-            
+            checkpoint: Awaited before each segment's LLM call, where a
+                background job may be paused
+
         Returns:
-            List of EventSummary objects representing extracted events
+            List of EventSummary objects representing extracted events, in message order
         """
         if not messages:
             return []
 
         try:
-            # Group messages into events (initial implementation treats all as single event)
             grouped_messages = await self._group_messages(messages)
-            
-            # Process each group into event summaries
+            results = await summarize_segments(
+                grouped_messages,
+                lambda group: self._process_message_group(group, previous_summary),
+                int(getattr(self.settings, "summarization_concurrency", 3)),
+                checkpoint,
+            )
+            if results is None:
+                # Summaries of the other segments would let the caller move past this one's messages.
+                log.warning(f"A segment of {len(messages)} messages failed to summarize; dropping the batch for a retry")
+                return []
+
             event_summaries = []
-            for message_group in grouped_messages:
-                summary_list = await self._process_message_group(message_group, previous_summary)
-                if summary_list:
-                    event_summaries.extend(summary_list)
-            
+            for summary_list in results:
+                event_summaries.extend(summary_list)
+
             return event_summaries
-            
+
         except Exception as e:
             log.error(f"Error in summarize_events: {e}", exc_info=True)
             await func.report_error(e, "EventSummarizationService/summarize_events")
@@ -282,21 +301,26 @@ class EventSummarizationService:
 
     async def _group_messages(self, messages: List[discord.Message]) -> List[List[discord.Message]]:
         """
-        Group related messages into events.
-        
-        Current implementation: treat all messages as a single event.
-        Future implementation: implement sophisticated grouping algorithms.
-        
+        Group related messages into conversation segments.
+
+        Splits on time gaps, at the segment size limit and at topic shifts
+        that no reply chain crosses; see ``segmentation.segment_messages``.
+        Runs in a worker thread, since jieba tokenization is CPU-bound.
+
         Args:
             messages: List of Discord messages
-            
+
         Returns:
             List of message groups, each group is a list of messages
         """
-        # For now, treat all messages as a single event
-        # This provides a foundation for future sophisticated grouping algorithms
-        log.debug(f"Grouping {len(messages)} messages as single event (initial implementation)")
-        return [messages]
+        groups = await asyncio.to_thread(
+            segment_messages,
+            messages,
+            max_gap=float(getattr(self.settings, "segment_max_gap", 1800.0)),
+            max_size=int(getattr(self.settings, "segment_max_messages", 60)),
+        )
+        log.debug(f"Grouped {len(messages)} messages into {len(groups)} segment(s)")
+        return groups
 
     async def _process_message_group(self, messages: List[discord.Message], previous_summary: str = "") -> Optional[List[EventSummary]]:
         """
@@ -2,15 +2,19 @@
 
 import asyncio
 import discord
+import json
 import logging
-from typing import TYPE_CHECKING, Union
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 from function import func
 from addons.settings import MemoryConfig
-from datetime import datetime
+from datetime import datetime, timezone
 
+from cogs.memory.db.episodic_storage import SpoolRow
 from cogs.memory.interfaces.storage_interface import StorageInterface
-from cogs.memory.services.event_summarization_service import EventSummarizationService, EventSummary
+from cogs.memory.services.background_scheduler import DEFAULT_MIN_SHARE, BackgroundScheduler
+from cogs.memory.services.event_summarization_service import EventMetadata, EventSummarizationService, EventSummary
 from cogs.memory.services.vectorization_service import VectorizationService
 
 if TYPE_CHECKING:
@@ -31,6 +35,74 @@ def discord_id_to_unix_timestamp(message_id: int) -> float:
     DISCORD_EPOCH = 1420070400000  # Discord epoch in milliseconds
     return ((message_id >> 22) + DISCORD_EPOCH) / 1000
 
+@dataclass
+class _ChannelCounter:
+    """Message counter of one channel since its last summary."""
+    count: int
+    last_message_id: int
+    last_summary_timestamp: float
+    last_seen_at: float
+    # (count, last_message_id) as last written to channel_memory_state
+    flushed: Tuple[int, int] = (0, 0)
+    # Last message appended to the spool, 0 when the message before the next one is unknown
+    spool_tail: int = 0
+
+
+class _SpooledAuthor(NamedTuple):
+    id: int
+    name: str
+    display_name: str
+    bot: bool
+
+
+class _SpooledReference(NamedTuple):
+    message_id: int
+
+
+class SpooledMessage:
+    """
+    A message read back from the spool, with the attributes of discord.Message
+    that EventSummarizationService uses. Reactions are not spooled.
+    """
+    __slots__ = ("id", "content", "created_at", "author", "channel", "guild", "reactions", "reference")
+
+    def __init__(self, row: SpoolRow, channel):
+        self.id = row.message_id
+        self.content = row.content
+        self.created_at = datetime.fromtimestamp(row.created_at, tz=timezone.utc)
+        self.author = _SpooledAuthor(row.author_id, row.author_name, row.author_name, row.author_bot)
+        self.channel = channel
+        self.guild = getattr(channel, "guild", None)
+        self.reactions = ()
+        self.reference = _SpooledReference(row.reply_to_id) if row.reply_to_id else None
+
+
+def _spool_row(channel_id: int, prev_id: int, message: discord.Message) -> SpoolRow:
+    author = message.author
+    return SpoolRow(
+        channel_id=channel_id,
+        message_id=message.id,
+        prev_id=prev_id,
+        author_id=author.id,
+        author_name=getattr(author, "display_name", None) or author.name,
+        author_bot=bool(author.bot),
+        content=message.content or "",
+        created_at=message.created_at.timestamp(),
+        reply_to_id=getattr(getattr(message, "reference", None), "message_id", None) or 0,
+    )
+
+
+def _summaries_to_json(summaries: List[EventSummary]) -> str:
+    return json.dumps([asdict(summary) for summary in summaries], ensure_ascii=False)
+
+
+def _summaries_from_json(text: str) -> List[EventSummary]:
+    return [
+        EventSummary(**{**item, "metadata": EventMetadata(**item["metadata"])})
+        for item in json.loads(text)
+    ]
+
+
 class MessageTracker:
     """
     Tracks new messages in channels for the memory system.
@@ -53,7 +125,14 @@ class MessageTracker:
         # Global semaphore to limit concurrent background memory processing
         concurrency = getattr(self.settings, "processing_concurrency", 1)
         self._processing_semaphore = asyncio.Semaphore(concurrency)
-        self._active_summarization_task = None
+        # Channels whose memory job has started; they are not rescheduled until it ends
+        self._running_channels = set()
+        self.scheduler = BackgroundScheduler(getattr(self.settings, "min_background_share", DEFAULT_MIN_SHARE))
+        # channel_id -> message counter since the last summary, written by flush_counters
+        self._counters: Dict[int, _ChannelCounter] = {}
+        # Spool rows not written yet; flush_counters writes them with the counters
+        self._spool_pending: List[SpoolRow] = []
+        self._flush_task: Optional[asyncio.Task] = None
 
     async def track_message(self, message: discord.Message):
         """
@@ -63,62 +142,253 @@ class MessageTracker:
         Args:
             message (discord.Message): The message to track.
         """
-        if message.author.bot:
-            return
+        await self.track_messages([message])
+
+    async def track_messages(self, messages: List[discord.Message]):
+        """
+        Tracks a batch of messages against the per-channel counters held in
+        memory. The database is only touched when a channel is first seen
+        (one read, plus the new state row for a new channel), when a channel
+        crosses a threshold, and by the periodic flush.
+
+        Every message of a channel with a counter, bot messages included, is
+        also queued for the local spool that summarization reads, and written
+        with the counters.
+
+        Messages must be in arrival order; bot messages are not counted.
+
+        Args:
+            messages (List[discord.Message]): The messages to track.
+        """
+        by_channel: Dict[int, List[discord.Message]] = {}
+        to_spool: Dict[int, List[discord.Message]] = {}
+        for message in messages:
+            to_spool.setdefault(message.channel.id, []).append(message)
+            if message.author.bot:
+                continue
+            by_channel.setdefault(message.channel.id, []).append(message)
+
+        if by_channel:
+            self._ensure_flush_task()
+
+        for channel_id, channel_messages in by_channel.items():
+            first, last = channel_messages[0], channel_messages[-1]
+            try:
+                counter = self._counters.get(channel_id)
+                if counter is None:
+                    counter = await self._load_counter(last.channel, first, last, len(channel_messages))
+                else:
+                    counter.count += len(channel_messages)
+                    counter.last_message_id = max(counter.last_message_id, last.id)
+                self._spool(channel_id, to_spool.pop(channel_id))
+                if counter is None:
+                    continue
+
+                previous_time, counter.last_seen_at = counter.last_seen_at, last.created_at.timestamp()
+                new_message_count = counter.count
+                last_summary_timestamp = counter.last_summary_timestamp
+                # Default time threshold: 1 hour (3600 seconds) if not in settings
+                time_threshold = getattr(self.settings, 'time_threshold', 3600)
 
-        try:
-            # Update channel memory state
-            channel_id = message.channel.id
-            channel_state = await self.storage.get_channel_memory_state(channel_id)
-            
-            if channel_state is None:
-                # Initialize new channel state
-                await self.storage.update_channel_memory_state(
-                    channel_id, 
-                    1, 
-                    message.id,
-                    last_summary_timestamp=message.created_at.timestamp()
-                )
-            else:
-                # Update existing channel state
-                new_message_count = channel_state['message_count'] + 1
-                await self.storage.update_channel_memory_state(channel_id, new_message_count, channel_state['start_message_id'])
-                
                 # Check if message threshold is reached
                 if new_message_count >= self.settings.message_threshold:
+                    if new_message_count - len(channel_messages) < self.settings.message_threshold:
+                        await self.flush_counters([channel_id])
                     # Log threshold reached and trigger async task
                     logger.info(f"Message threshold reached for channel {channel_id} (count: {new_message_count}), triggering memory processing")
                     # Ensure channel is a valid messageable channel before passing to _schedule_processing
-                    if isinstance(message.channel, (discord.TextChannel, discord.VoiceChannel, discord.StageChannel, discord.Thread)):
-                        self._schedule_processing(message.channel)
+                    if isinstance(last.channel, (discord.TextChannel, discord.VoiceChannel, discord.StageChannel, discord.Thread)):
+                        self._schedule_processing(last.channel)
                     else:
                         logger.warning(f"Skipping memory processing for unsupported channel {channel_id}")
                 else:
                     # Check time threshold
-                    last_summary_timestamp = channel_state.get('last_summary_timestamp', 0.0)
-                    current_time = message.created_at.timestamp()
-                    # Default time threshold: 1 hour (3600 seconds) if not in settings
-                    time_threshold = getattr(self.settings, 'time_threshold', 3600)
-                    
+                    current_time = counter.last_seen_at
+
                     if current_time - last_summary_timestamp > time_threshold and new_message_count > 0:
+                         if previous_time - last_summary_timestamp <= time_threshold:
+                             await self.flush_counters([channel_id])
                          logger.info(f"Time threshold reached for channel {channel_id} (last: {last_summary_timestamp}), triggering memory processing")
-                         if isinstance(message.channel, (discord.TextChannel, discord.VoiceChannel, discord.StageChannel, discord.Thread)):
-                            self._schedule_processing(message.channel)
-                
-        except Exception as e:
-            await func.report_error(e, f"Failed to track message {message.id}")
+                         if isinstance(last.channel, (discord.TextChannel, discord.VoiceChannel, discord.StageChannel, discord.Thread)):
+                            self._schedule_processing(last.channel)
+
+            except Exception as e:
+                await func.report_error(e, f"Failed to track message {last.id}")
+
+        # Channels with only bot messages in this batch
+        for channel_id, channel_messages in to_spool.items():
+            self._spool(channel_id, channel_messages)
+
+    def _spool(self, channel_id: int, messages: Sequence[discord.Message]) -> None:
+        """Queues messages of a channel with a loaded counter for the spool."""
+        counter = self._counters.get(channel_id)
+        if counter is None:
+            return
+        for message in messages:
+            self._spool_pending.append(_spool_row(channel_id, counter.spool_tail, message))
+            counter.spool_tail = message.id
+
+    async def _load_counter(
+        self, channel, first: discord.Message, last: discord.Message, batch_size: int
+    ) -> "Optional[_ChannelCounter]":
+        """
+        Loads a channel's counter from its stored state on first sight.
+
+        A new channel gets its state row written right away. For a known
+        channel, messages after the stored last_message_id and before this
+        batch were either counted but not yet flushed when the bot stopped,
+        or sent while it was offline; they are recounted from the channel
+        history, up to what is still needed to reach the message threshold,
+        and spooled. If the recount does not reach this batch, the spool has
+        a gap before it.
+
+        Returns:
+            The counter including this batch, or None for a channel seen for
+            the first time with a single message.
+        """
+        channel_id = channel.id
+        last_id = last.id
+        channel_state = await self.storage.get_channel_memory_state(channel_id)
+        if channel_id in self._counters:
+            # Loaded by a concurrent batch while the state was being read.
+            counter = self._counters[channel_id]
+            counter.count += batch_size
+            counter.last_message_id = max(counter.last_message_id, last_id)
+            return counter
+
+        if channel_state is None:
+            # Initialize new channel state
+            last_summary_timestamp = first.created_at.timestamp()
+            counter = _ChannelCounter(
+                count=batch_size,
+                last_message_id=last_id,
+                last_summary_timestamp=last_summary_timestamp,
+                last_seen_at=last_summary_timestamp,
+            )
+            self._counters[channel_id] = counter
+            await self.storage.update_channel_memory_state(
+                channel_id,
+                batch_size,
+                first.id,
+                last_summary_timestamp=last_summary_timestamp,
+                last_message_id=last_id,
+            )
+            counter.flushed = (batch_size, last_id)
+            return None if batch_size == 1 else counter
+
+        stored_count = channel_state["message_count"]
+        stored_last_id = channel_state.get("last_message_id", 0)
+        fetched: Optional[List[discord.Message]] = None
+        if stored_last_id and first.id > stored_last_id:
+            fetched = await self._fetch_between(channel, stored_last_id, first.id, self.settings.message_threshold - stored_count)
+        missed = sum(not message.author.bot for message in fetched or ())
+        if missed:
+            logger.info(f"Recounted {missed} messages in channel {channel.id} not covered by the stored counter")
+        counter = _ChannelCounter(
+            count=stored_count + missed + batch_size,
+            last_message_id=max(stored_last_id, last_id),
+            last_summary_timestamp=channel_state.get("last_summary_timestamp", 0.0),
+            last_seen_at=first.created_at.timestamp(),
+            flushed=(stored_count, stored_last_id),
+            spool_tail=stored_last_id,
+        )
+        self._counters[channel_id] = counter
+        if fetched is not None:
+            self._spool(channel_id, fetched)
+        if fetched is None or len(fetched) >= self.settings.message_threshold - stored_count:
+            counter.spool_tail = 0
+        return counter
+
+    async def _fetch_between(self, channel, after_id: int, before_id: int, limit: int) -> Optional[List[discord.Message]]:
+        """
+        Fetches up to ``limit`` messages strictly between two message ids,
+        oldest first, over REST.
+
+        Returns:
+            The messages, or None when nothing was fetched because of the
+            limit or an error.
+        """
+        if limit <= 0:
+            return None
+        try:
+            return [
+                message async for message in channel.history(
+                    after=discord.Object(id=after_id), before=discord.Object(id=before_id), limit=limit
+                )
+            ]
+        except (discord.Forbidden, discord.HTTPException) as e:
+            logger.warning(f"Could not fetch messages of channel {channel.id} after {after_id}: {e}")
+            return None
+
+    async def flush_counters(self, channel_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Writes the in-memory counters that changed since their last write,
+        and every queued spool row, in one write.
+
+        Args:
+            channel_ids: Only flush these channels; all by default.
+
+        Returns:
+            int: The number of channels written.
+        """
+        ids = self._counters.keys() if channel_ids is None else channel_ids
+        dirty = []
+        for channel_id in ids:
+            counter = self._counters.get(channel_id)
+            if counter is not None and counter.flushed != (counter.count, counter.last_message_id):
+                dirty.append((channel_id, counter.count, counter.last_message_id))
+        spooled, self._spool_pending = self._spool_pending, []
+        if not dirty and not spooled:
+            return 0
+        if await self.storage.save_channel_message_counts(dirty, spooled):
+            for channel_id, count, last_id in dirty:
+                self._counters[channel_id].flushed = (count, last_id)
+        else:
+            self._spool_pending[:0] = spooled
+        return len(dirty)
+
+    def _ensure_flush_task(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        interval = getattr(self.settings, "counter_flush_interval", 30.0)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush_counters()
+            except Exception as e:
+                await func.report_error(e, "Failed to flush channel message counters")
+
+    async def close(self) -> None:
+        """Stops the periodic flush and writes the remaining counters."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush_counters()
 
     def _schedule_processing(self, channel: Union[discord.TextChannel, discord.VoiceChannel, discord.StageChannel, discord.Thread]):
         """
         Schedules channel memory processing with a debounce delay.
         This prevents the background LLM task from competing with 
         the immediate reply generation triggered just after this.
+
+        A job that has already started is left alone; it pauses for replies
+        at its checkpoints instead.
         """
         channel_id = channel.id
+        if channel_id in self._running_channels:
+            return
         
-        # Cancel any existing pending task for this channel
-        if channel_id in self._processing_tasks and not self._processing_tasks[channel_id].done():
-            self._processing_tasks[channel_id].cancel()
+        # Cancel any existing pending task for this channel (not the one
+        # asking for the next draining batch)
+        pending = self._processing_tasks.get(channel_id)
+        if pending is not None and not pending.done() and pending is not asyncio.current_task():
+            pending.cancel()
             
         async def delayed_process():
             try:
@@ -138,150 +408,244 @@ class MessageTracker:
         # Schedule the new task
         self._processing_tasks[channel_id] = asyncio.create_task(delayed_process())
 
-    def interrupt_all(self):
+    def foreground(self):
         """
-        Interrupts all pending and active memory processing tasks.
-        This is called when a high-priority conversation task (handle_message) starts.
+        Async context manager that marks a high-priority conversation task
+        (handle_message) as running. Background memory jobs pause at their
+        next checkpoint until it ends, within their minimum share.
         """
-        # 1. Cancel all pending debounce/delay tasks
-        for channel_id, task in list(self._processing_tasks.items()):
-            if not task.done():
-                task.cancel()
-        self._processing_tasks.clear()
-        
-        # 2. Cancel the active LLM summarization task if it exists
-        if self._active_summarization_task and not self._active_summarization_task.done():
-            logger.info("High-priority message detected: Interrupting active background memory processing.")
-            self._active_summarization_task.cancel()
+        return self.scheduler.foreground()
 
     async def _process_channel_memory(self, channel: Union[discord.TextChannel, discord.VoiceChannel, discord.StageChannel, discord.Thread]):
         """
         Processes memory for a channel when threshold is reached.
+
+        Runs as a background job of the scheduler, pausing at checkpoints
+        while replies run. The event summaries are stored as job progress
+        once produced, so a job cancelled before it finishes (on shutdown)
+        does not summarize the same messages again. A channel has at most
+        one job running; when a job leaves messages behind, the next
+        draining batch is scheduled once it has finished.
         
         Args:
             channel (discord.TextChannel): The channel to process memory for.
         """
-        # Register current task as the active summarization task for global interruption
-        self._active_summarization_task = asyncio.current_task()
-        
+        if channel.id in self._running_channels:
+            logger.info(f"Memory processing for channel {channel.id} is already running")
+            return
+        self._running_channels.add(channel.id)
+        more_remaining = False
         try:
-            logger.info(f"Processing memory for channel {channel.id}")
-            
-            # Get channel state
-            state = await self.storage.get_channel_memory_state(channel.id)
-            if not state:
-                logger.error(f"No memory state found for channel {channel.id}")
-                return
-            
-            # Get start message
-            start_message = None
-            try:
-                start_message = await channel.fetch_message(state['start_message_id'])
-            except discord.NotFound:
-                logger.warning(f"Start message {state['start_message_id']} not found in channel {channel.id}, calculating timestamp from ID")
-            except discord.Forbidden:
-                logger.error(f"Permission denied to fetch start message {state['start_message_id']} in channel {channel.id}")
-                return
-                
-            # Get message history
-            all_messages = []
-            
-            if start_message:
-                # Use the actual message object
-                all_messages.append(start_message)
-                start_timestamp = start_message.created_at
-            else:
-                # Calculate timestamp from message ID when message is not found
-                start_timestamp = discord.utils.snowflake_time(state['start_message_id'])
-                logger.info(f"Calculated timestamp from message ID: {start_timestamp}")
-            
-            # Get messages after the calculated/found timestamp
-            messages = []
-            # Use a bounded limit based on message threshold to prevent memory exhaustion
-            # Multiple of 2 provides a safety margin while preventing unbounded fetches
-            fetch_limit = getattr(self.settings, "message_threshold", 100) * 2
-            async for message in channel.history(after=start_timestamp, limit=fetch_limit):
-                messages.append(message)
-            
-            all_messages.extend(messages)
-            
-            logger.info(f"Retrieved {len(all_messages)} messages for processing in channel {channel.id}")
-            
-            # Initialize EventSummarizationService
-            summarization_service = EventSummarizationService(self.bot, self.settings)
-            
-            # Call event summarization
-            messages_to_process = all_messages
+            async with self.scheduler.background_job(f"channel {channel.id}"):
+                more_remaining = await self._run_channel_memory_job(channel)
+        except asyncio.CancelledError:
+            logger.info(f"Memory processing for channel {channel.id} was cancelled; stored progress is kept for the next run.")
+            # Do not re-raise; we want to exit gracefully without updating DB state
+            # Next time threshold is reached, it will resume from the stored progress.
+            return
+        except Exception as e:
+            await func.report_error(e, f"Failed to process memory for channel {channel.id}")
+        finally:
+            self._running_channels.discard(channel.id)
+
+        # If the number of retrieved messages equals the fetch limit, it indicates
+        # that there are likely more historical messages remaining in this channel.
+        # We schedule another processing cycle to automatically drain the queue.
+        if more_remaining:
+            logger.info(
+                f"Retrieved maximum batch size for channel {channel.id}. "
+                "More historical messages may remain. Scheduling next draining batch."
+            )
+            self._schedule_processing(channel)
+
+    async def _run_channel_memory_job(self, channel) -> bool:
+        """Runs one memory cycle; returns whether messages are left for another."""
+        checkpoint = self.scheduler.checkpoint
+        logger.info(f"Processing memory for channel {channel.id}")
+        
+        # Get channel state
+        state = await self.storage.get_channel_memory_state(channel.id)
+        if not state:
+            logger.error(f"No memory state found for channel {channel.id}")
+            return False
+        
+        # Use a bounded limit based on message threshold to prevent memory exhaustion
+        # Multiple of 2 provides a safety margin while preventing unbounded fetches
+        fetch_limit = getattr(self.settings, "message_threshold", 100) * 2
+        await self.flush_counters([channel.id])
+        await checkpoint()
+        collected = await self._collect_messages(channel, state['start_message_id'], fetch_limit)
+        if collected is None:
+            return False
+        messages_to_process, after_start = collected
+        more_remaining = after_start == fetch_limit
+
+        logger.info(f"Retrieved {len(messages_to_process)} messages for processing in channel {channel.id}")
+
+        event_summaries = None
+        progress = await self.storage.get_job_progress(channel.id)
+        if progress and progress["start_message_id"] == messages_to_process[0].id:
+            covered = [m for m in messages_to_process if m.id <= progress["end_message_id"]]
+            if covered and covered[-1].id == progress["end_message_id"]:
+                more_remaining = more_remaining or len(covered) < len(messages_to_process)
+                messages_to_process = covered
+                event_summaries = _summaries_from_json(progress["summaries"])
+                logger.info(f"Resuming memory job for channel {channel.id} with {len(event_summaries)} stored event summaries")
+
+        if event_summaries is None:
             # Get previous summary for context
-            channel_state = await self.storage.get_channel_memory_state(channel.id)
-            previous_summary = channel_state.get("last_summary_text", "") if channel_state else ""
+            previous_summary = state.get("last_summary_text", "")
 
-            # Summarize events
+            # Summarize events; the service checkpoints before each segment
+            summarization_service = EventSummarizationService(self.bot, self.settings)
             event_summaries = await summarization_service.summarize_events(
                 messages_to_process, 
-                previous_summary=previous_summary
+                previous_summary=previous_summary,
+                checkpoint=checkpoint,
             )
             
             # Check if event summaries is empty
             if not event_summaries:
                 logger.info(f"No events summarized from {len(messages_to_process)} messages in channel {channel.id}")
-                return
-            
-            # Log successful retrieval of event summaries
-            logger.info(f"Successfully retrieved {len(event_summaries)} event summaries from channel {channel.id}")
-            
-            # Initialize VectorizationService
-            vector_manager = getattr(self.bot, "vector_manager", None)
-            vectorization_service = VectorizationService(
-                bot=self.bot,
-                storage=self.storage,
-                vector_manager=vector_manager,
-                settings=self.settings
+                return False
+            await self.storage.save_job_progress(
+                channel.id, messages_to_process[0].id, messages_to_process[-1].id,
+                _summaries_to_json(event_summaries),
             )
-            
-            # Process event summaries through VectorizationService
-            await vectorization_service.process_event_summaries(event_summaries)
-            
-            # Log successful submission of event summaries to VectorizationService
-            logger.info(f"Successfully submitted {len(event_summaries)} event summaries from channel {channel.id} to vectorization service")
-            
-            # Update channel memory state for next processing cycle
-            # Update channel memory state for next processing cycle
-            # Combine all summaries into one text for the next context
-            combined_summary = "\n".join([s.query_value for s in event_summaries])
-            
-            await self.storage.update_channel_memory_state(
-                channel_id=channel.id,
-                message_count=0,
-                start_message_id=messages_to_process[-1].id,
-                last_summary_timestamp=datetime.now().timestamp(),
-                last_summary_text=combined_summary
-            )
-            
-            # Log successful update of channel memory state
-            logger.info(f"Successfully updated memory state for channel {channel.id}, new start_message_id: {messages_to_process[-1].id}")
-            
-            # If the number of retrieved messages equals the fetch limit, it indicates
-            # that there are likely more historical messages remaining in this channel.
-            # We schedule another processing cycle to automatically drain the queue.
-            if len(messages) == fetch_limit:
-                logger.info(
-                    f"Retrieved maximum batch size ({fetch_limit}) for channel {channel.id}. "
-                    "More historical messages may remain. Scheduling next draining batch."
-                )
-                self._schedule_processing(channel)
-            
-        except asyncio.CancelledError:
-            logger.info(f"Memory processing for channel {channel.id} was interrupted to prioritize user conversation.")
-            # Do not re-raise; we want to exit gracefully without updating DB state
-            # Next time threshold is reached, it will try again from original state.
-            return
-        except Exception as e:
-            await func.report_error(e, f"Failed to process memory for channel {channel.id}")
-        finally:
-            # Clear active task reference if we are the one registered
-            if self._active_summarization_task == asyncio.current_task():
-                self._active_summarization_task = None
+        
+        # Log successful retrieval of event summaries
+        logger.info(f"Successfully retrieved {len(event_summaries)} event summaries from channel {channel.id}")
+        
+        await checkpoint()
+        # Initialize VectorizationService
+        vector_manager = getattr(self.bot, "vector_manager", None)
+        vectorization_service = VectorizationService(
+            bot=self.bot,
+            storage=self.storage,
+            vector_manager=vector_manager,
+            settings=self.settings
+        )
+        
+        # Process event summaries through VectorizationService
+        await vectorization_service.process_event_summaries(event_summaries)
+        
+        # Log successful submission of event summaries to VectorizationService
+        logger.info(f"Successfully submitted {len(event_summaries)} event summaries from channel {channel.id} to vectorization service")
+        
+        # Update channel memory state for next processing cycle
+        # Combine all summaries into one text for the next context
+        combined_summary = "\n".join([s.query_value for s in event_summaries])
+        
+        summary_timestamp = datetime.now().timestamp()
+        counter = self._counters.get(channel.id)
+        last_message_id = max(messages_to_process[-1].id, counter.last_message_id if counter else 0)
+        await self.storage.update_channel_memory_state(
+            channel_id=channel.id,
+            message_count=0,
+            start_message_id=messages_to_process[-1].id,
+            last_summary_timestamp=summary_timestamp,
+            last_summary_text=combined_summary,
+            last_message_id=last_message_id,
+        )
+        if counter is not None:
+            counter.count = 0
+            counter.last_message_id = last_message_id
+            counter.last_summary_timestamp = summary_timestamp
+            counter.flushed = (0, last_message_id)
+        await self.storage.clear_job_progress(channel.id)
+        
+        # The last processed message stays as the start of the next cycle
+        await self.storage.trim_spooled_messages(channel.id, messages_to_process[-1].id)
+
+        # Log successful update of channel memory state
+        logger.info(f"Successfully updated memory state for channel {channel.id}, new start_message_id: {messages_to_process[-1].id}")
+        return more_remaining
+
+    async def _collect_messages(
+        self, channel, start_message_id: int, fetch_limit: int
+    ) -> "Optional[Tuple[List, int]]":
+        """
+        Collects the start message and up to ``fetch_limit`` messages after
+        it from the spool. The tracker saw all of them through the gateway,
+        so REST is only used to fill gaps in the spool: a row whose prev_id
+        is not the row before it (messages sent while the bot was offline,
+        or lost with unflushed rows), or a start message that is not
+        spooled, in which case the whole range is fetched as before.
+
+        Returns:
+            (messages, number of messages after the start), or None when the
+            channel history cannot be read.
+        """
+        rows = await self.storage.get_spooled_messages(channel.id, start_message_id, fetch_limit + 1)
+        if not rows or rows[0].message_id != start_message_id:
+            return await self._fetch_history(channel, start_message_id, fetch_limit)
+
+        messages: List = [SpooledMessage(rows[0], channel)]
+        repaired: List[SpoolRow] = []
+        for row in rows[1:]:
+            if len(messages) > fetch_limit:
+                break
+            previous_id = messages[-1].id
+            if row.prev_id != previous_id:
+                limit = fetch_limit + 1 - len(messages)
+                gap = await self._fetch_between(channel, previous_id, row.message_id, limit)
+                if gap is None:
+                    return await self._fetch_history(channel, start_message_id, fetch_limit)
+                logger.info(f"Backfilled {len(gap)} messages missing from the spool of channel {channel.id}")
+                repaired.extend(_spool_row(channel.id, prev.id, message) for prev, message in zip([messages[-1]] + gap, gap))
+                messages.extend(gap)
+                if len(gap) == limit:
+                    break
+                row = row._replace(prev_id=messages[-1].id)
+                repaired.append(row)
+            messages.append(SpooledMessage(row, channel))
+        await self.storage.spool_messages(repaired)
+        messages = messages[:fetch_limit + 1]
+        return messages, len(messages) - 1
+
+    async def _fetch_history(self, channel, start_message_id: int, fetch_limit: int) -> "Optional[Tuple[List, int]]":
+        """
+        Fetches the start message and the messages after it over REST, and
+        spools them so the next cycle can read them locally.
+
+        Returns:
+            (messages, number of messages after the start), or None when the
+            start message cannot be read.
+        """
+        logger.info(f"Spool of channel {channel.id} does not reach message {start_message_id}, fetching history")
+        # Get start message
+        start_message = None
+        try:
+            start_message = await channel.fetch_message(start_message_id)
+        except discord.NotFound:
+            logger.warning(f"Start message {start_message_id} not found in channel {channel.id}, calculating timestamp from ID")
+        except discord.Forbidden:
+            logger.error(f"Permission denied to fetch start message {start_message_id} in channel {channel.id}")
+            return None
+
+        # Get message history
+        all_messages = []
+
+        if start_message:
+            # Use the actual message object
+            all_messages.append(start_message)
+            start_timestamp = start_message.created_at
+        else:
+            # Calculate timestamp from message ID when message is not found
+            start_timestamp = discord.utils.snowflake_time(start_message_id)
+            logger.info(f"Calculated timestamp from message ID: {start_timestamp}")
+
+        # Get messages after the calculated/found timestamp
+        messages = []
+        async for message in channel.history(after=start_timestamp, limit=fetch_limit):
+            messages.append(message)
+
+        all_messages.extend(messages)
+        await self.storage.spool_messages([
+            _spool_row(channel.id, prev.id if prev else 0, message)
+            for prev, message in zip([None] + all_messages, all_messages)
+        ])
+        return all_messages, len(messages)
 
     def get_pending_count(self) -> int:
         """
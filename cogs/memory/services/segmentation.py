@@ -0,0 +1,167 @@
+"""Splitting a channel's message batch into conversation segments.
+
+EventSummarizationService summarizes each segment with its own LLM call,
+so segments can run concurrently and each prompt only carries one
+conversation. A batch is cut
+
+- where two consecutive messages are more than ``max_gap`` seconds apart;
+- where a segment reaches ``max_size`` messages;
+- where the topic shifts: the words of the ``window`` messages before a
+  point and the ``window`` messages after it have a cosine similarity
+  below ``topic_threshold``. Words come from jieba, so Chinese text is
+  compared by word rather than by character. A topic cut needs at least
+  ``min_size`` messages on both sides, and is never made across a reply:
+  a message replying to one before the point keeps the conversation
+  together.
+
+Time and size cuts always apply; the other rules only decide where a long
+stretch of continuous chat is split.
+
+``summarize_segments`` runs the per-segment calls under a concurrency cap.
+A batch is only summarized if every segment is: one failed segment fails
+the batch, so the caller retries the whole range instead of advancing past
+messages that were never summarized.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+from collections import Counter
+from typing import Awaitable, Callable, Iterable, List, Optional, Sequence, TypeVar
+
+from cogs.memory.text import segment_words
+
+M = TypeVar("M")
+R = TypeVar("R")
+
+DEFAULT_MAX_GAP = 1800.0
+DEFAULT_MIN_SIZE = 5
+DEFAULT_MAX_SIZE = 60
+DEFAULT_WINDOW = 4
+DEFAULT_TOPIC_THRESHOLD = 0.1
+
+
+def _reply_target(message) -> Optional[int]:
+    return getattr(getattr(message, "reference", None), "message_id", None)
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    dot = sum(count * b[word] for word, count in a.items() if word in b)
+    if not dot:
+        return 0.0
+    norm = math.sqrt(sum(c * c for c in a.values())) * math.sqrt(sum(c * c for c in b.values()))
+    return dot / norm
+
+
+def _bag(bags: Sequence[Counter], start: int, end: int) -> Counter:
+    total: Counter = Counter()
+    for bag in bags[start:end]:
+        total.update(bag)
+    return total
+
+
+def segment_messages(
+    messages: Sequence[M],
+    max_gap: float = DEFAULT_MAX_GAP,
+    min_size: int = DEFAULT_MIN_SIZE,
+    max_size: int = DEFAULT_MAX_SIZE,
+    window: int = DEFAULT_WINDOW,
+    topic_threshold: float = DEFAULT_TOPIC_THRESHOLD,
+    tokenize: Callable[[str], Iterable[str]] = segment_words,
+) -> List[List[M]]:
+    """
+    Splits messages, oldest first, into consecutive segments.
+
+    Args:
+        messages: Objects with ``id``, ``content``, ``created_at`` and
+            optionally ``reference.message_id``, like discord.Message.
+        max_gap: Seconds of silence that always end a segment.
+        min_size: Fewest messages on either side of a topic cut.
+        max_size: Most messages in one segment.
+        window: Messages compared on each side of a candidate topic cut.
+        topic_threshold: Word similarity below which the topic has shifted.
+        tokenize: Splits a message's content into words.
+
+    Returns:
+        The segments in order; together they hold every message once.
+    """
+    if not messages:
+        return []
+    max_size = max(max_size, 1)
+    position = {message.id: i for i, message in enumerate(messages)}
+    # For each message, the position of the earlier message it replies to, or -1
+    replies_to = []
+    for i, message in enumerate(messages):
+        target = position.get(_reply_target(message), -1)
+        replies_to.append(target if target < i else -1)
+    bags = [Counter(tokenize(message.content or "")) for message in messages]
+
+    segments: List[List[M]] = []
+    start = 0
+    for cut in range(1, len(messages)):
+        gap = (messages[cut].created_at - messages[cut - 1].created_at).total_seconds()
+        if gap > max_gap or cut - start >= max_size or (
+            cut - start >= min_size
+            and len(messages) - cut >= min_size
+            and not any(start <= target < cut for target in replies_to[cut:])
+            and _topic_shifts(bags, max(start, cut - window), cut, cut + window, topic_threshold)
+        ):
+            segments.append(list(messages[start:cut]))
+            start = cut
+    segments.append(list(messages[start:]))
+    return segments
+
+
+def _topic_shifts(bags: Sequence[Counter], before: int, cut: int, after: int, threshold: float) -> bool:
+    left, right = _bag(bags, before, cut), _bag(bags, cut, after)
+    # Messages without words (stickers, links, emoji) say nothing about the topic.
+    if not left or not right:
+        return False
+    return _cosine(left, right) < threshold
+
+
+async def summarize_segments(
+    segments: Sequence[Sequence[M]],
+    summarize: Callable[[Sequence[M]], Awaitable[Optional[R]]],
+    concurrency: int,
+    checkpoint: Optional[Callable[[], Awaitable[None]]] = None,
+) -> Optional[List[R]]:
+    """
+    Summarizes segments concurrently, at most ``concurrency`` at a time.
+
+    Args:
+        segments: The segments, in order.
+        summarize: Summarizes one segment; returns None when it failed.
+        concurrency: Most segments summarized at once.
+        checkpoint: Awaited before each segment's call.
+
+    Returns:
+        The results in segment order, or None as soon as a segment fails;
+        the segments still running are then cancelled, and those not
+        started yet never start.
+    """
+    limit = asyncio.Semaphore(max(1, concurrency))
+    failed = False
+
+    async def run(segment: Sequence[M]) -> Optional[R]:
+        nonlocal failed
+        async with limit:
+            if checkpoint is not None:
+                await checkpoint()
+            # A segment waiting for a slot that a failed one just freed
+            if failed:
+                return None
+            result = await summarize(segment)
+            failed = failed or result is None
+            return result
+
+    tasks = [asyncio.ensure_future(run(segment)) for segment in segments]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            if await finished is None:
+                return None
+        return [task.result() for task in tasks]
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
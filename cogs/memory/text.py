@@ -0,0 +1,63 @@
+"""Word segmentation shared by the memory system.
+
+``segment_words`` splits message text into words with jieba, so Chinese
+text is handled by word rather than by character. StatsStorage counts
+its results for users' top words, and the conversation segmenter
+compares them to find topic shifts.
+"""
+from __future__ import annotations
+
+import re
+from typing import List, Set
+
+from addons.logging import get_logger
+
+logger = get_logger(server_id="system", source=__name__)
+
+# Chinese / CJK stop-words (compact set for jieba filtering)
+STOP_WORDS: Set[str] = {
+    "的", "了", "在", "是", "我", "有", "和", "就", "不", "人", "都", "一",
+    "一個", "上", "也", "很", "到", "說", "要", "去", "你", "會", "著",
+    "沒有", "看", "好", "自己", "這", "他", "她", "它", "麼", "嗎", "吧",
+    "啊", "嗯", "喔", "欸", "耶", "呢", "哦", "哈", "噢", "呀", "唉",
+    "把", "讓", "被", "從", "而", "且", "但", "跟", "對", "所以", "因為",
+    "如果", "那", "還", "比", "這個", "那個", "什麼", "怎麼", "可以",
+    "沒", "能", "已經", "過", "之", "等", "多", "時", "個", "可", "來",
+    "the", "a", "an", "is", "are", "was", "were", "be", "been", "am",
+    "do", "did", "does", "i", "you", "he", "she", "it", "we", "they",
+    "and", "or", "but", "in", "on", "at", "to", "for", "of", "with",
+    "that", "this", "not", "no", "so", "if", "my", "me", "your",
+}
+
+
+def segment_words(text: str) -> List[str]:
+    """Segment text using jieba and filter stop-words / noise.
+
+    Returns a list of meaningful words (length >= 2, not pure digits,
+    not in the stop-word set).
+    """
+    if not text:
+        return []
+    try:
+        import jieba
+    except ImportError:
+        logger.warning("jieba not installed; skipping word segmentation.")
+        return []
+
+    # Remove URLs, mentions, and custom emoji markup before segmenting
+    cleaned = re.sub(r"https?://\S+", "", text)
+    cleaned = re.sub(r"<@!?\d+>", "", cleaned)
+    cleaned = re.sub(r"<#\d+>", "", cleaned)
+    cleaned = re.sub(r"<a?:\w+:\d+>", "", cleaned)
+
+    words: List[str] = []
+    for word in jieba.cut(cleaned):
+        w = word.strip().lower()
+        if len(w) < 2:
+            continue
+        if w.isdigit():
+            continue
+        if w in STOP_WORDS:
+            continue
+        words.append(w)
+    return words
@@ -13,7 +13,6 @@ from typing import List, Optional
 from qdrant_client import QdrantClient
 
 from qdrant_client.models import Distance, VectorParams, FieldCondition, MatchAny, MatchValue,Filter
-from langchain_qdrant import QdrantVectorStore
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 
@@ -21,6 +20,10 @@ from addons.settings import MemoryConfig
 from addons.tokens import tokens
 from cogs.memory.exceptions import VectorOperationError, SearchError
 from cogs.memory.interfaces.vector_store_interface import MemoryFragment, VectorStoreInterface
+from addons.lazy_import import lazy_attr
+
+# langchain_qdrant pulls in a large dependency tree; load it with the first store.
+QdrantVectorStore = lazy_attr("langchain_qdrant", "QdrantVectorStore")
 
 logger = logging.getLogger(__name__)
 
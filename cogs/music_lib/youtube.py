@@ -1,7 +1,6 @@
 import os
 import subprocess
 import asyncio
-import yt_dlp
 import discord
 import random
 import re
@@ -9,6 +8,9 @@ from typing import Optional, Any, Dict, List, Set
 from youtube_search import YoutubeSearch
 from addons.settings import music_config
 from addons.logging import get_logger
+from addons.lazy_import import lazy_import
+
+yt_dlp = lazy_import("yt_dlp")
 
 log = get_logger(source=__name__, server_id="system")
 
@@ -1,15 +1,12 @@
 """StatsCog: real-time user statistics tracking and historical log migration.
 
-Listens for on_message events to update per-user stats in the user_stats
-table, and runs a low-priority background task on cog load to ingest
-historical NDJSON log files.
+Subscribes to the bot's message bus to update per-user stats in the
+user_stats table in batches, and runs a low-priority background task on
+cog load to ingest historical NDJSON log files.
 """
 from __future__ import annotations
 
 import asyncio
-import json
-import os
-import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
@@ -17,6 +14,13 @@ from typing import Optional
 from discord.ext import commands
 
 from addons.logging import get_logger
+from addons.log_migration import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CPU_SHARE,
+    DEFAULT_PROGRESS_INTERVAL,
+    LogMigration,
+)
+from addons.settings import base_config
 from cogs.memory.db.stats_storage import StatsStorage
 from function import func, ROOT_DIR
 
@@ -62,71 +66,58 @@ class StatsCog(commands.Cog):
             )
 
     async def cog_load(self) -> None:
-        """Start background log migration task when cog loads."""
+        """Subscribe to the message bus and start background log migration."""
         if self.stats_storage:
+            message_bus = getattr(self.bot, "message_bus", None)
+            if message_bus:
+                message_bus.subscribe("user_stats", self._on_message_batch, batch_size=200, flush_interval=1.0)
             self._migration_task = asyncio.create_task(
                 self._migrate_logs_background()
             )
             logger.info("Background log migration task scheduled.")
 
     async def cog_unload(self) -> None:
-        """Cancel background migration task on cog unload."""
+        """Unsubscribe from the message bus and cancel background migration."""
+        message_bus = getattr(self.bot, "message_bus", None)
+        if message_bus:
+            message_bus.unsubscribe("user_stats")
         if self._migration_task and not self._migration_task.done():
             self._migration_task.cancel()
             logger.info("Background log migration task cancelled.")
 
     # ------------------------------------------------------------------
-    # Real-time on_message listener
+    # Real-time message bus subscriber
     # ------------------------------------------------------------------
 
-    @commands.Cog.listener()
-    async def on_message(self, message) -> None:
-        """Update user stats for every incoming message.
+    async def _on_message_batch(self, events) -> None:
+        """Update user stats for a batch of messages published by on_message.
+
+        Dashboard message events are recorded by the bot's own
+        ``stats_collector`` subscriber, so only per-user stats are handled here.
 
         Args:
-            message: The Discord message object.
+            events: MessageEvent objects from the bot's message bus.
         """
-        # Skip bot messages and DMs
-        if not message.guild or message.author.bot:
-            return
         if not self.stats_storage:
             return
 
-        try:
-            user_id = str(message.author.id)
-            guild_id = str(message.guild.id)
-            channel_name = getattr(message.channel, "name", "unknown")
-            timestamp = (
-                message.created_at.isoformat()
-                if message.created_at
-                else datetime.now(timezone.utc).isoformat()
-            )
-            content = message.content or ""
-
-            # 1) Update cumulative stats in procedural.db
-            await asyncio.shield(
-                self.stats_storage.upsert_user_stats(
-                    user_id=user_id,
-                    guild_id=guild_id,
-                    message_content=content,
-                    channel_id=str(message.channel.id),
-                    timestamp=timestamp,
-                )
-            )
-
-            # 2) Update event stats in stats.db for dashboard trends
-            if hasattr(self.bot, "stats_collector"):
-                await self.bot.stats_collector.record_message(
-                    guild_id=guild_id,
-                    user_id=user_id,
-                    channel_id=str(message.channel.id)
-                )
-
-        except Exception as e:
-            # Non-critical: log and continue; do not break message flow
-            logger.warning(
-                "StatsCog on_message stats update failed: %s", e
-            )
+        records = []
+        for event in events:
+            message = event.message
+            records.append({
+                "user_id": str(message.author.id),
+                "guild_id": str(message.guild.id),
+                "message_content": message.content or "",
+                "channel_id": str(message.channel.id),
+                "timestamp": (
+                    message.created_at.isoformat()
+                    if message.created_at
+                    else datetime.now(timezone.utc).isoformat()
+                ),
+            })
+
+        # Shield so a cog unload mid-write does not leave a half-applied batch
+        await asyncio.shield(self.stats_storage.bulk_upsert_user_stats(records))
 
     # ------------------------------------------------------------------
     # Background historical log migration
@@ -135,8 +126,11 @@ class StatsCog(commands.Cog):
     async def _migrate_logs_background(self) -> None:
         """Ingest historical NDJSON log files into user_stats and stats.db.
 
-        Processes logs/{guild_id}/{YYYYMMDD}/info.jsonl files that have
-        not been processed yet (tracked via log_migration_state table).
+        Processes logs/{guild_id}/{YYYYMMDD}/info.jsonl files, plain or
+        compacted (see addons.log_segments), that have not been processed
+        yet (tracked via the log_migration_state and log_migration_checkpoint
+        tables). Parsing runs in a process pool throttled to a CPU share;
+        see addons.log_migration.
         """
         if not self.stats_storage:
             return
@@ -145,8 +139,9 @@ class StatsCog(commands.Cog):
         await self.bot.wait_until_ready()
         
         # Ensure StatsCollector is initialized
-        if hasattr(self.bot, "stats_collector"):
-            await self.bot.stats_collector.initialize()
+        stats_collector = getattr(self.bot, "stats_collector", None)
+        if stats_collector is not None:
+            await stats_collector.initialize()
 
         # Small initial delay to avoid competing with startup I/O
         await asyncio.sleep(10)
@@ -158,29 +153,18 @@ class StatsCog(commands.Cog):
 
         logger.info("Starting background log migration from %s", logs_root)
 
+        cfg = ((getattr(base_config, "dashboard", {}) or {}).get("stats", {}) or {}).get("migration", {}) or {}
+        migration = LogMigration(
+            logs_root,
+            self.stats_storage,
+            stats_collector,
+            workers=cfg.get("workers"),
+            cpu_share=float(cfg.get("cpu_share", DEFAULT_CPU_SHARE)),
+            chunk_size=int(cfg.get("chunk_size", DEFAULT_CHUNK_SIZE)),
+            progress_interval=float(cfg.get("progress_interval", DEFAULT_PROGRESS_INTERVAL)),
+        )
         try:
-            # Find all guild_id directories (numeric names only)
-            guild_dirs = sorted(
-                d for d in logs_root.iterdir()
-                if d.is_dir() and d.name.isdigit()
-            )
-
-            for guild_dir in guild_dirs:
-                guild_id = guild_dir.name
-                try:
-                    await self._migrate_guild_logs(guild_id, guild_dir)
-                except asyncio.CancelledError:
-                    logger.info("Migration cancelled for guild %s", guild_id)
-                    return
-                except Exception as e:
-                    logger.error(
-                        "Migration failed for guild %s: %s", guild_id, e
-                    )
-                    await func.report_error(
-                        e, f"Log migration failed for guild {guild_id}"
-                    )
-                    continue
-
+            await migration.run()
             logger.info("Background log migration completed for all guilds.")
         except asyncio.CancelledError:
             logger.info("Background log migration task was cancelled.")
@@ -188,137 +172,6 @@ class StatsCog(commands.Cog):
             logger.error("Background log migration encountered error: %s", e)
             await func.report_error(e, "Background log migration failed")
 
-    async def _migrate_guild_logs(
-        self, guild_id: str, guild_dir: Path
-    ) -> None:
-        """Migrate log files for a single guild.
-
-        Args:
-            guild_id: The guild's Discord snowflake ID.
-            guild_dir: Path to the guild's log directory.
-        """
-        # Get last processed date
-        last_processed = await self.stats_storage.get_migration_state(guild_id)
-
-        # Find date directories (YYYYMMDD format)
-        date_dirs = sorted(
-            d for d in guild_dir.iterdir()
-            if d.is_dir() and len(d.name) == 8 and d.name.isdigit()
-        )
-
-        if not date_dirs:
-            return
-
-        processed_count = 0
-
-        for date_dir in date_dirs:
-            date_str = date_dir.name
-
-            # Skip already-processed dates
-            if last_processed and date_str <= last_processed:
-                continue
-
-            jsonl_path = date_dir / "info.jsonl"
-            if not jsonl_path.is_file():
-                continue
-
-            logger.info(
-                "Migrating logs for guild=%s date=%s", guild_id, date_str
-            )
-
-            batch_count = 0
-            batch_cumulative = []
-            batch_events = []
-            
-            try:
-                with open(jsonl_path, "r", encoding="utf-8") as fh:
-                    for line in fh:
-                        line = line.strip()
-                        if not line:
-                            continue
-
-                        try:
-                            record = json.loads(line)
-                        except json.JSONDecodeError:
-                            continue
-
-                        # Only process actual user messages
-                        if record.get("action") != "receive_message":
-                            continue
-
-                        user_id = record.get("user_id", "")
-                        if not user_id:
-                            continue
-
-                        channel_name = record.get("channel_or_file", "unknown")
-                        channel_id = str(record.get("extra", {}).get("channel_id", "0"))
-                        timestamp_str = record.get(
-                            "timestamp",
-                            datetime.now(timezone.utc).isoformat(),
-                        )
-                        content = record.get("message", "")
-
-                        # Cumulative stats record
-                        batch_cumulative.append({
-                            "user_id": user_id,
-                            "guild_id": guild_id,
-                            "message_content": content,
-                            "channel_id": channel_id,
-                            "timestamp": timestamp_str,
-                        })
-
-                        # Event stats record (for trends)
-                        try:
-                            dt = datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
-                            ts_float = dt.timestamp()
-                        except Exception:
-                            ts_float = time.time()
-                        
-                        batch_events.append((guild_id, user_id, channel_id, ts_float))
-
-                        batch_count += 1
-                        processed_count += 1
-
-                        # Yield event loop every 500 records
-                        if len(batch_cumulative) >= 500:
-                            await self.stats_storage.bulk_upsert_user_stats(batch_cumulative)
-                            if hasattr(self.bot, "stats_collector"):
-                                await self.bot.stats_collector.bulk_record_messages(batch_events)
-                            
-                            batch_cumulative.clear()
-                            batch_events.clear()
-                            await asyncio.sleep(0)
-
-                    # Process any remaining records
-                    if batch_cumulative:
-                        await self.stats_storage.bulk_upsert_user_stats(batch_cumulative)
-                        if hasattr(self.bot, "stats_collector"):
-                            await self.bot.stats_collector.bulk_record_messages(batch_events)
-
-            except Exception as e:
-                logger.error("Error reading %s: %s", jsonl_path, e)
-                await func.report_error(e, f"Log migration read error: {jsonl_path}")
-                continue
-
-            # Mark this date as processed
-            await self.stats_storage.set_migration_state(guild_id, date_str)
-            logger.info(
-                "Completed migration for guild=%s date=%s (%d records)",
-                guild_id,
-                date_str,
-                batch_count,
-            )
-
-            # Sleep between days to avoid I/O contention
-            await asyncio.sleep(30)
-
-        if processed_count > 0:
-            logger.info(
-                "Guild %s migration complete: %d total records processed.",
-                guild_id,
-                processed_count,
-            )
-
 
 async def setup(bot: commands.Bot) -> None:
     """Register StatsCog with the bot."""
@@ -480,6 +480,25 @@ class UserDataCog(commands.Cog):
         return merged_content
 
 
+    async def _write_through_knowledge(
+        self, target_type: str, target_id: str, content: Optional[str]
+    ) -> None:
+        """Update the KnowledgeMemoryProvider cache in place after a save or clear."""
+        try:
+            orchestrator = getattr(self.bot, "orchestrator", None)
+            if orchestrator:
+                provider = getattr(
+                    getattr(orchestrator, "context_manager", None),
+                    "knowledge_provider",
+                    None,
+                )
+                if provider and hasattr(provider, "put"):
+                    await provider.put(target_type, target_id, content)
+                elif provider and hasattr(provider, "invalidate"):
+                    await provider.invalidate(target_type, target_id)
+        except Exception as cache_err:
+            self.logger.warning(f"Failed to update knowledge cache for {target_type} {target_id}: {cache_err}")
+
     async def _save_knowledge_data(
         self,
         target_type: str,
@@ -510,20 +529,7 @@ class UserDataCog(commands.Cog):
                 success = await self.knowledge_storage.update_knowledge(target_type, target_id, merged)
                 
                 if success:
-                    # Invalidate KnowledgeMemoryProvider cache
-                    try:
-                        orchestrator = getattr(self.bot, "orchestrator", None)
-                        if orchestrator:
-                            provider = getattr(
-                                getattr(orchestrator, "context_manager", None),
-                                "knowledge_provider",
-                                None,
-                            )
-                            if provider and hasattr(provider, "invalidate"):
-                                await provider.invalidate(target_type, target_id)
-                    except Exception as cache_err:
-                        self.logger.warning(f"Failed to invalidate knowledge cache for {target_type} {target_id}: {cache_err}")
-
+                    await self._write_through_knowledge(target_type, target_id, merged)
                     self.logger.info(f"Successfully persisted {target_type} knowledge.")
                     return f"Successfully updated {target_type} knowledge."
                 else:
@@ -547,20 +553,7 @@ class UserDataCog(commands.Cog):
                 success = await self.knowledge_storage.delete_knowledge(target_type, target_id)
 
                 if success:
-                    # Invalidate KnowledgeMemoryProvider cache
-                    try:
-                        orchestrator = getattr(self.bot, "orchestrator", None)
-                        if orchestrator:
-                            provider = getattr(
-                                getattr(orchestrator, "context_manager", None),
-                                "knowledge_provider",
-                                None,
-                            )
-                            if provider and hasattr(provider, "invalidate"):
-                                await provider.invalidate(target_type, target_id)
-                    except Exception as cache_err:
-                        self.logger.warning(f"Failed to invalidate knowledge cache for {target_type} {target_id}: {cache_err}")
-
+                    await self._write_through_knowledge(target_type, target_id, None)
                     self.logger.info(f"Successfully cleared {target_type} knowledge.")
                     return f"Successfully cleared {target_type} knowledge."
                 else:
@@ -915,20 +908,7 @@ class UserDataCog(commands.Cog):
         try:
             success = await self.knowledge_storage.delete_knowledge(target_type, target_id)
             if success:
-                # Invalidate cache
-                try:
-                    orchestrator = getattr(self.bot, "orchestrator", None)
-                    if orchestrator:
-                        provider = getattr(
-                            getattr(orchestrator, "context_manager", None),
-                            "knowledge_provider",
-                            None,
-                        )
-                        if provider and hasattr(provider, "invalidate"):
-                            await provider.invalidate(target_type, target_id)
-                except Exception as cache_err:
-                    self.logger.warning(f"Failed to invalidate knowledge cache for {target_type} {target_id}: {cache_err}")
-
+                await self._write_through_knowledge(target_type, target_id, None)
                 await interaction.edit_original_response(content=f"Successfully cleared {target_type} knowledge.")
             else:
                 await interaction.edit_original_response(content=f"There was no {target_type} knowledge to clear or an error occurred.")
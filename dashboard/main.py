@@ -26,6 +26,7 @@ from dashboard.routers.stats import router as stats_router
 from dashboard.websocket.log_streamer import router as ws_router
 from dashboard.middleware.rate_limit import limiter, rate_limit_exceeded_handler
 from dashboard.services.stats_collector import StatsCollector
+from dashboard.services.log_search import LogSearchService
 
 if TYPE_CHECKING:
     from bot import PigPig
@@ -71,8 +72,21 @@ def create_app(bot: "PigPig") -> FastAPI:
     else:
         app.state.qdrant_client = None
 
-    # ── CORS ──────────────────────────────────────────────────────────
     dashboard_cfg = getattr(base_config, "dashboard", {}) or {}
+
+    # Indexed log search; the index is built in start_dashboard
+    search_cfg = dashboard_cfg.get("log_search", {}) or {}
+    if search_cfg.get("enabled", True):
+        log_cfg = getattr(base_config, "logging", {}) or {}
+        app.state.log_search = LogSearchService(
+            base_path=log_cfg.get("log_base_path", "logs"),
+            chunk_size=int(search_cfg.get("chunk_size", 65536)),
+            rescan_interval=float(search_cfg.get("rescan_interval", 300)),
+        )
+    else:
+        app.state.log_search = None
+
+    # ── CORS ──────────────────────────────────────────────────────────
     cors_origins = dashboard_cfg.get("cors_origins", ["http://localhost:5173"])
     app.add_middleware(
         CORSMiddleware,
@@ -135,6 +149,26 @@ async def start_dashboard(bot: "PigPig") -> None:
     # Store reference on bot for graceful shutdown
     bot._dashboard_app = app
 
+    # Stream records from the background log writer to WebSocket clients
+    from dashboard.websocket.log_streamer import log_streamer
+    stream_cfg = dashboard_cfg.get("log_stream", {}) or {}
+    try:
+        log_streamer.configure(
+            queue_size=stream_cfg.get("queue_size"),
+            overflow=stream_cfg.get("overflow"),
+            send_timeout=stream_cfg.get("send_timeout"),
+        )
+    except ValueError as exc:
+        log.error(f"Invalid dashboard.log_stream config, using defaults: {exc}")
+    log_streamer.attach(asyncio.get_running_loop())
+
+    if app.state.log_search is not None:
+        try:
+            await app.state.log_search.initialize()
+        except Exception as exc:
+            log.error(f"Log search initialization failed: {exc}")
+            app.state.log_search = None
+
     config = uvicorn.Config(
         app=app,
         host=host,
@@ -159,3 +193,7 @@ async def stop_dashboard(bot: "PigPig") -> None:
     if server:
         server.should_exit = True
         log.info("Dashboard server stopped.")
+    app = getattr(bot, "_dashboard_app", None)
+    log_search = getattr(app.state, "log_search", None) if app else None
+    if log_search is not None:
+        await log_search.close()
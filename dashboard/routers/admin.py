@@ -103,6 +103,7 @@ _CONFIG_ALLOWED_KEYS: dict[str, set[str]] = {
         "ollama_url", "vllm_url", "provider_options", "vector_search_k", "keyword_search_k",
         "fetch_batch_size", "process_batch_size",
         "message_threshold", "time_threshold", "processing_concurrency", "processing_delay",
+        "min_background_share", "summarization_concurrency", "segment_max_gap", "segment_max_messages",
     },
     "music": {"music_temp_base", "ffmpeg", "youtube_cookies_path"},
 }
@@ -355,7 +356,10 @@ async def get_user_detail(
             user_row = await user_cursor.fetchone()
 
             stats_cursor = await db.execute(
-                "SELECT guild_id, total_messages, streak_days, last_active_at, first_message_at, top_channels "
+                "SELECT guild_id, total_messages, streak_days, last_active_at, first_message_at, "
+                "(SELECT json_group_object(c.key, c.count) FROM user_stat_counts AS c "
+                "WHERE c.user_id = user_stats.user_id AND c.guild_id = user_stats.guild_id "
+                "AND c.kind = 'channel') AS top_channels "
                 "FROM user_stats WHERE user_id = ? ORDER BY total_messages DESC",
                 (user_id,),
             )
@@ -481,6 +485,8 @@ async def admin_delete_user_memory(
                 deleted["procedural_users"] = c.rowcount
                 c = await db.execute("DELETE FROM user_stats WHERE user_id = ?", (user_id,))
                 deleted["user_stats"] = c.rowcount
+                c = await db.execute("DELETE FROM user_stat_counts WHERE user_id = ?", (user_id,))
+                deleted["user_stat_counts"] = c.rowcount
                 await db.commit()
         except Exception as exc:
             log.error(f"admin_delete_user_memory failed for {user_id}: {exc}")
@@ -488,6 +494,8 @@ async def admin_delete_user_memory(
 
     if stats_db.exists():
         try:
+            # Write buffered events first so none are recorded after the delete
+            await _get_stats(request).flush()
             async with aiosqlite.connect(str(stats_db)) as db:
                 c = await db.execute("DELETE FROM message_events WHERE user_id = ?", (user_id,))
                 deleted["message_events"] = c.rowcount
@@ -512,3 +520,41 @@ async def admin_delete_user_memory(
     log.info(f"Admin GDPR deletion for user {user_id} by owner: {deleted}")
     return JSONResponse({"detail": "User memory deleted", "user_id": user_id, "deleted_rows": deleted})
 
+
+
+# ── Log Search ────────────────────────────────────────────────────────
+
+@router.get("/logs/search")
+async def search_logs(
+    request: Request,
+    guild_id: str | None = Query(default=None),
+    level: str | None = Query(default=None, description="Comma-separated levels, e.g. WARNING,ERROR"),
+    source: str | None = Query(default=None),
+    user_id: str | None = Query(default=None),
+    start: str | None = Query(default=None, description="ISO time or unix seconds"),
+    end: str | None = Query(default=None, description="ISO time or unix seconds"),
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = Query(default=None),
+    user: dict = Depends(require_owner),
+) -> JSONResponse:
+    """Search the indexed logs of every guild, newest first (Bot Owner only).
+
+    Pass the returned ``next_cursor`` as ``cursor`` to fetch the next page.
+    """
+    service = getattr(request.app.state, "log_search", None)
+    if service is None:
+        raise HTTPException(status_code=503, detail="Log search is disabled")
+    try:
+        page = await service.search(
+            guild_id=guild_id,
+            levels=[lv for lv in level.split(",") if lv] if level else None,
+            source=source,
+            user_id=user_id,
+            start=start,
+            end=end,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return JSONResponse(page)
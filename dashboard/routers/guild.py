@@ -10,6 +10,7 @@ Endpoints:
     GET  /api/guild/{guild_id}/prompt        — System prompt config
     PUT  /api/guild/{guild_id}/prompt        — Update system prompt
     GET  /api/guild/{guild_id}/stats         — Guild-scoped statistics
+    GET  /api/guild/{guild_id}/logs/search   — Indexed, paginated log search
 """
 
 from __future__ import annotations
@@ -21,7 +22,7 @@ import aiosqlite
 from pathlib import Path
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import JSONResponse
 
 from addons.logging import get_logger
@@ -884,3 +885,56 @@ async def guild_stats(
     except Exception as e:
         log.error(f"Guild stats error for {guild_id}: {e}")
         return JSONResponse({"error": str(e)}, status_code=500)
+
+
+# ── Log Search ────────────────────────────────────────────────────────
+
+@router.get("/{guild_id}/logs/search")
+async def search_guild_logs(
+    guild_id: str,
+    request: Request,
+    level: str | None = Query(default=None, description="Comma-separated levels, e.g. WARNING,ERROR"),
+    source: str | None = Query(default=None),
+    user_id: str | None = Query(default=None),
+    start: str | None = Query(default=None, description="ISO time or unix seconds"),
+    end: str | None = Query(default=None, description="ISO time or unix seconds"),
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = Query(default=None),
+    user: dict[str, Any] = Depends(get_current_user),
+) -> JSONResponse:
+    """Search a guild's indexed logs, newest first.
+
+    Args:
+        guild_id: The target Discord guild ID.
+        request: FastAPI request.
+        level: Comma-separated levels to include; all levels if omitted.
+        source: Logger source (module name) to match exactly.
+        user_id: Discord user ID to match exactly.
+        start: Earliest timestamp, ISO 8601 or unix seconds.
+        end: Latest timestamp, ISO 8601 or unix seconds.
+        limit: Page size.
+        cursor: ``next_cursor`` from the previous page.
+        user: Authenticated user payload.
+
+    Returns:
+        JSON with ``records`` and ``next_cursor`` (null on the last page).
+    """
+    require_guild_admin_access(guild_id, user)
+
+    service = getattr(request.app.state, "log_search", None)
+    if service is None:
+        raise HTTPException(status_code=503, detail="Log search is disabled")
+    try:
+        page = await service.search(
+            guild_id=guild_id,
+            levels=[lv for lv in level.split(",") if lv] if level else None,
+            source=source,
+            user_id=user_id,
+            start=start,
+            end=end,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return JSONResponse(page)
@@ -31,6 +31,15 @@ router = APIRouter(prefix="/api/user", tags=["user"])
 _PROCEDURAL_DB = Path(ROOT_DIR) / "data" / "memory" / "procedural.db"
 _EPISODIC_DB   = Path(ROOT_DIR) / "data" / "memory" / "episodic.db"
 
+# active_hours / top_channels of a user_stats row as JSON objects, built from
+# its user_stat_counts counters.
+_COUNTER_JSON_SQL = ", ".join(
+    f"(SELECT json_group_object(c.key, c.count) FROM user_stat_counts AS c "
+    f"WHERE c.user_id = user_stats.user_id AND c.guild_id = user_stats.guild_id "
+    f"AND c.kind = '{kind}') AS {column}"
+    for kind, column in (("hour", "active_hours"), ("channel", "top_channels"))
+)
+
 from addons.settings import memory_config
 
 
@@ -251,7 +260,7 @@ async def get_episodic_memory(
 
             if guild_id:
                 cursor = await db.execute(
-                    "SELECT guild_id, total_messages, active_hours, top_channels, "
+                    f"SELECT guild_id, total_messages, {_COUNTER_JSON_SQL}, "
                     "streak_days, last_active_at, first_message_at "
                     "FROM user_stats WHERE user_id = ? AND guild_id = ? LIMIT ? OFFSET ?",
                     (user_id, guild_id, limit, offset),
@@ -262,7 +271,7 @@ async def get_episodic_memory(
                 )
             else:
                 cursor = await db.execute(
-                    "SELECT guild_id, total_messages, active_hours, top_channels, "
+                    f"SELECT guild_id, total_messages, {_COUNTER_JSON_SQL}, "
                     "streak_days, last_active_at, first_message_at "
                     "FROM user_stats WHERE user_id = ? ORDER BY total_messages DESC LIMIT ? OFFSET ?",
                     (user_id, limit, offset),
@@ -402,6 +411,10 @@ async def delete_episodic_by_guild(
                 "DELETE FROM user_stats WHERE user_id = ? AND guild_id = ?",
                 (user_id, guild_id),
             )
+            await db.execute(
+                "DELETE FROM user_stat_counts WHERE user_id = ? AND guild_id = ?",
+                (user_id, guild_id),
+            )
             await db.commit()
             deleted = cursor.rowcount
     except Exception as exc:
@@ -465,6 +478,8 @@ async def delete_user_memory(
                 deleted["procedural_users"] = c.rowcount
                 c = await db.execute("DELETE FROM user_stats WHERE user_id = ?", (user_id,))
                 deleted["user_stats"] = c.rowcount
+                c = await db.execute("DELETE FROM user_stat_counts WHERE user_id = ?", (user_id,))
+                deleted["user_stat_counts"] = c.rowcount
                 await db.commit()
         except Exception as exc:
             log.error(f"Failed to delete procedural memory for {user_id}: {exc}")
@@ -476,6 +491,8 @@ async def delete_user_memory(
     stats_db = Path(ROOT_DIR) / "data" / "stats" / "stats.db"
     if stats_db.exists():
         try:
+            # Write buffered events first so none are recorded after the delete
+            await request.app.state.stats_collector.flush()
             async with aiosqlite.connect(str(stats_db)) as db:
                 cursor = await db.execute(
                     "DELETE FROM message_events WHERE user_id = ?", (user_id,)
@@ -0,0 +1,122 @@
+"""Log search service backed by the incremental log index.
+
+Wraps ``addons.log_index.LogIndex`` (stored in ``data/logs/log_index.db``)
+for the dashboard: the index is built in a worker thread at startup, kept
+current through the background log writer, rescanned in full every
+``rescan_interval`` seconds, and queried off the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Any, Optional
+
+from addons.log_index import DEFAULT_CHUNK_SIZE, DEFAULT_RESCAN_INTERVAL, LogIndex
+from addons.logging import BackgroundWriter, get_logger
+from function import ROOT_DIR
+
+log = get_logger(server_id="Bot", source=__name__)
+
+_DB_PATH = os.path.join(ROOT_DIR, "data", "logs", "log_index.db")
+
+MAX_PAGE_SIZE = 500
+
+
+def _parse_time(value: Optional[str]) -> Optional[float | str]:
+    """Accept unix seconds as well as the ISO strings ``LogIndex`` parses."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+class LogSearchService:
+    """Async facade over a ``LogIndex`` for the dashboard routers."""
+
+    def __init__(
+        self,
+        base_path: str = "logs",
+        db_path: str = _DB_PATH,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        rescan_interval: float = DEFAULT_RESCAN_INTERVAL,
+    ) -> None:
+        self._base_path = base_path
+        self._db_path = db_path
+        self._chunk_size = chunk_size
+        self._rescan_interval = rescan_interval
+        self._index: Optional[LogIndex] = None
+        self._build_task: Optional[asyncio.Task] = None
+
+    async def initialize(self) -> None:
+        """Open the index, follow the log writer and start the initial build."""
+        self._index = await asyncio.to_thread(
+            LogIndex, self._db_path, self._base_path, self._chunk_size, self._rescan_interval
+        )
+        self._index.attach(BackgroundWriter.get_instance())
+        self._build_task = asyncio.create_task(self._build(), name="log-index-build")
+
+    async def _build(self) -> None:
+        try:
+            stats = await asyncio.to_thread(self._index.refresh, True)
+            log.info(
+                f"Log index ready: {stats.files} files, {stats.records} records, "
+                f"{stats.bytes_read / 1e6:.1f} MB read"
+            )
+        except Exception as exc:
+            log.error(f"Log index build failed: {exc}")
+        # Searches only index the files the writer touched; compaction and
+        # retention are picked up here.
+        while True:
+            await asyncio.sleep(self._rescan_interval)
+            try:
+                await asyncio.to_thread(self._index.refresh, True)
+            except Exception as exc:
+                log.error(f"Log index rescan failed: {exc}")
+
+    async def search(
+        self,
+        guild_id: Optional[str] = None,
+        levels: Optional[list[str]] = None,
+        source: Optional[str] = None,
+        user_id: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """Return one page of matching records, newest first.
+
+        Raises:
+            RuntimeError: The service was not initialized.
+            ValueError: Invalid ``cursor`` or time bound.
+        """
+        if self._index is None:
+            raise RuntimeError("Log search is not initialized")
+        page = await asyncio.to_thread(
+            self._index.search,
+            guild_id=guild_id,
+            levels=levels,
+            source=source,
+            user_id=user_id,
+            start=_parse_time(start),
+            end=_parse_time(end),
+            limit=min(max(1, limit), MAX_PAGE_SIZE),
+            cursor=cursor,
+        )
+        return {"records": page.records, "next_cursor": page.next_cursor}
+
+    async def close(self) -> None:
+        """Stop following the log writer and close the index database."""
+        if self._build_task is not None:
+            self._build_task.cancel()
+            try:
+                await self._build_task
+            except asyncio.CancelledError:
+                pass
+            self._build_task = None
+        if self._index is not None:
+            await asyncio.to_thread(self._index.close)
+            self._index = None
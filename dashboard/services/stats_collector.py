@@ -3,9 +3,33 @@
 Records message events, LLM call events, and command usage into
 ``data/stats/stats.db``.  Provides aggregation queries for the
 dashboard statistics endpoints.
+
+Writes are write-behind: the ``record_*`` methods only append to an
+in-memory buffer, which a background task flushes over one long-lived
+connection with ``executemany`` in a single transaction, whenever
+``batch_size`` events are pending or ``flush_interval`` seconds have
+passed.  ``close()`` flushes what is left.  With ``read_your_writes``
+enabled, queries flush the buffer first so the dashboard never lags
+behind recorded events.
+
+The global and per-model endpoints read hourly and daily rollups
+(``stats_hourly`` / ``stats_daily``, keyed by event type, guild and model)
+instead of scanning the event tables.  Each flush updates the rollups in the
+same transaction as the raw inserts.  On the first start after upgrading the
+rollups are backfilled from existing events in the background, and
+``scripts/backfill_stats_rollups.py`` rebuilds them on demand.
+
+Distinct active users come from HyperLogLog sketches
+(``active_user_sketches``), one per guild, channel and local day plus a
+guild-wide one under the empty channel id.  Flushes fold new posters into
+them, and a date range is answered by merging its daily sketches, so the
+count never rescans ``message_events``.  The estimate has a standard error
+of about 2.3% (see ``addons.sketches``).
 """
 
+import asyncio
 import os
+import sqlite3
 import time
 from typing import Any, Optional
 from datetime import datetime, timedelta
@@ -13,12 +37,14 @@ from datetime import datetime, timedelta
 import aiosqlite
 
 from addons.logging import get_logger
+from addons.sketches import HyperLogLog
 from function import ROOT_DIR
 
 log = get_logger(server_id="Bot", source=__name__)
 
 _DB_PATH = os.path.join(ROOT_DIR, "data", "stats", "stats.db")
 _PROCEDURAL_DB = os.path.join(ROOT_DIR, "data", "memory", "procedural.db")
+_SKETCH_PRECISION = 11
 
 # ── SQL Schemas ───────────────────────────────────────────────────────
 _SCHEMA_SQL = """
@@ -51,8 +77,225 @@ CREATE INDEX IF NOT EXISTS idx_msg_ts    ON message_events(timestamp);
 CREATE INDEX IF NOT EXISTS idx_msg_guild ON message_events(guild_id);
 CREATE INDEX IF NOT EXISTS idx_llm_ts    ON llm_call_events(timestamp);
 CREATE INDEX IF NOT EXISTS idx_cmd_ts    ON command_events(timestamp);
+
+-- Rollups: event_type is 'message', 'llm_call' or 'command'; model_name is
+-- empty except for LLM calls.  bucket is the unix time of the hour start,
+-- day the local calendar date (as date(..., 'localtime')).
+CREATE TABLE IF NOT EXISTS stats_hourly (
+    event_type  TEXT    NOT NULL,
+    bucket      INTEGER NOT NULL,
+    guild_id    TEXT    NOT NULL,
+    model_name  TEXT    NOT NULL DEFAULT '',
+    events      INTEGER NOT NULL DEFAULT 0,
+    errors      INTEGER NOT NULL DEFAULT 0,
+    duration_ms REAL    NOT NULL DEFAULT 0,
+    PRIMARY KEY (event_type, bucket, guild_id, model_name)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS stats_daily (
+    event_type  TEXT    NOT NULL,
+    day         TEXT    NOT NULL,
+    guild_id    TEXT    NOT NULL,
+    model_name  TEXT    NOT NULL DEFAULT '',
+    events      INTEGER NOT NULL DEFAULT 0,
+    errors      INTEGER NOT NULL DEFAULT 0,
+    duration_ms REAL    NOT NULL DEFAULT 0,
+    PRIMARY KEY (event_type, day, guild_id, model_name)
+) WITHOUT ROWID;
+
+-- HyperLogLog of the users who posted; channel_id '' is the whole guild.
+CREATE TABLE IF NOT EXISTS active_user_sketches (
+    guild_id    TEXT NOT NULL,
+    day         TEXT NOT NULL,
+    channel_id  TEXT NOT NULL,
+    sketch      BLOB NOT NULL,
+    PRIMARY KEY (guild_id, day, channel_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS stats_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_ROLLUP_UPSERT_SQL = {
+    table: f"""
+INSERT INTO {table} (event_type, {key}, guild_id, model_name, events, errors, duration_ms)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (event_type, {key}, guild_id, model_name) DO UPDATE SET
+    events      = events + excluded.events,
+    errors      = errors + excluded.errors,
+    duration_ms = duration_ms + excluded.duration_ms
+"""
+    for table, key in (("stats_hourly", "bucket"), ("stats_daily", "day"))
+}
+
+# Rollup rows of a rolling window: hours up to the next local midnight from
+# stats_hourly, whole days after it from stats_daily.
+_ROLLUP_WINDOW_SQL = """
+SELECT event_type, model_name, events, errors, duration_ms FROM stats_hourly
+    WHERE event_type IN ({types}) AND bucket >= ? AND bucket < ?
+UNION ALL
+SELECT event_type, model_name, events, errors, duration_ms FROM stats_daily
+    WHERE event_type IN ({types}) AND day >= ?
 """
 
+# Recomputes both rollups from the event tables in one transaction.
+ROLLUP_BACKFILL_SQL = """
+BEGIN IMMEDIATE;
+DELETE FROM stats_hourly;
+DELETE FROM stats_daily;
+INSERT INTO stats_hourly
+    SELECT 'message', CAST(timestamp / 3600 AS INTEGER) * 3600 AS b, guild_id, '', COUNT(*), 0, 0
+    FROM message_events GROUP BY b, guild_id;
+INSERT INTO stats_hourly
+    SELECT 'llm_call', CAST(timestamp / 3600 AS INTEGER) * 3600 AS b, guild_id, model_name,
+           COUNT(*), SUM(success = 0), SUM(duration_ms)
+    FROM llm_call_events GROUP BY b, guild_id, model_name;
+INSERT INTO stats_hourly
+    SELECT 'command', CAST(timestamp / 3600 AS INTEGER) * 3600 AS b, guild_id, '', COUNT(*), 0, 0
+    FROM command_events GROUP BY b, guild_id;
+INSERT INTO stats_daily
+    SELECT 'message', date(timestamp, 'unixepoch', 'localtime') AS d, guild_id, '', COUNT(*), 0, 0
+    FROM message_events GROUP BY d, guild_id;
+INSERT INTO stats_daily
+    SELECT 'llm_call', date(timestamp, 'unixepoch', 'localtime') AS d, guild_id, model_name,
+           COUNT(*), SUM(success = 0), SUM(duration_ms)
+    FROM llm_call_events GROUP BY d, guild_id, model_name;
+INSERT INTO stats_daily
+    SELECT 'command', date(timestamp, 'unixepoch', 'localtime') AS d, guild_id, '', COUNT(*), 0, 0
+    FROM command_events GROUP BY d, guild_id;
+INSERT OR REPLACE INTO stats_meta (key, value) VALUES ('rollups_built_at', strftime('%s', 'now'));
+COMMIT;
+"""
+
+_SKETCH_SELECT_SQL = "SELECT sketch FROM active_user_sketches WHERE guild_id = ? AND day = ? AND channel_id = ?"
+_SKETCH_UPSERT_SQL = "INSERT OR REPLACE INTO active_user_sketches (guild_id, day, channel_id, sketch) VALUES (?, ?, ?, ?)"
+
+# stats_meta keys marking a completed backfill.
+_ROLLUPS_MARKER = "rollups_built_at"
+_SKETCHES_MARKER = "user_sketches_built_at"
+
+_INSERT_SQL = {
+    "message_events": "INSERT INTO message_events (guild_id, user_id, channel_id, timestamp) VALUES (?, ?, ?, ?)",
+    "llm_call_events": "INSERT INTO llm_call_events (guild_id, model_name, timestamp, duration_ms, success) VALUES (?, ?, ?, ?, ?)",
+    "command_events": "INSERT INTO command_events (guild_id, user_id, command_name, timestamp) VALUES (?, ?, ?, ?)",
+}
+
+
+def _rollup_rows(batch: dict[str, list[tuple]]) -> tuple[list[tuple], list[tuple]]:
+    """Aggregate buffered event rows into hourly and daily rollup increments."""
+    hourly: dict[tuple, list] = {}
+    daily: dict[tuple, list] = {}
+
+    def add(event_type: str, ts: float, guild_id: str, model: str, error: int, duration: float) -> None:
+        for acc, key in (
+            (hourly, (event_type, int(ts // 3600) * 3600, guild_id, model)),
+            (daily, (event_type, datetime.fromtimestamp(ts).strftime("%Y-%m-%d"), guild_id, model)),
+        ):
+            totals = acc.get(key)
+            if totals is None:
+                acc[key] = [1, error, duration]
+            else:
+                totals[0] += 1
+                totals[1] += error
+                totals[2] += duration
+
+    for guild_id, _user, _channel, ts in batch["message_events"]:
+        add("message", ts, guild_id, "", 0, 0.0)
+    for guild_id, model, ts, duration_ms, success in batch["llm_call_events"]:
+        add("llm_call", ts, guild_id, model, 0 if success else 1, duration_ms)
+    for guild_id, _user, _command, ts in batch["command_events"]:
+        add("command", ts, guild_id, "", 0, 0.0)
+    return (
+        [(*key, *totals) for key, totals in hourly.items()],
+        [(*key, *totals) for key, totals in daily.items()],
+    )
+
+
+def _active_users(rows: list[tuple]) -> dict[tuple[str, str, str], set[str]]:
+    """Group message rows into posters per (guild, local day, channel), guild-wide under channel ''."""
+    users: dict[tuple[str, str, str], set[str]] = {}
+    for guild_id, user_id, channel_id, ts in rows:
+        day = datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+        users.setdefault((guild_id, day, channel_id), set()).add(user_id)
+        users.setdefault((guild_id, day, ""), set()).add(user_id)
+    return users
+
+
+def _new_sketch(users: set[str]) -> bytes:
+    sketch = HyperLogLog(_SKETCH_PRECISION)
+    sketch.update(users)
+    return sketch.to_bytes()
+
+
+def rebuild_active_user_sketches(conn: sqlite3.Connection) -> int:
+    """Recompute ``active_user_sketches`` from ``message_events`` in one transaction.
+
+    Streams the events in time order and writes each local day's sketches
+    once the day is complete.
+
+    Returns:
+        Number of sketches written.
+    """
+    written = 0
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM active_user_sketches")
+        users: dict[tuple[str, str, str], set[str]] = {}
+        day, day_end = "", float("-inf")
+
+        def write_day() -> int:
+            conn.executemany(
+                _SKETCH_UPSERT_SQL, [(*key, _new_sketch(members)) for key, members in users.items()]
+            )
+            return len(users)
+
+        rows = conn.execute("SELECT guild_id, channel_id, user_id, timestamp FROM message_events ORDER BY timestamp")
+        for guild_id, channel_id, user_id, ts in rows:
+            if ts >= day_end:
+                written += write_day()
+                users.clear()
+                local = datetime.fromtimestamp(ts)
+                day = local.strftime("%Y-%m-%d")
+                day_end = (local.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)).timestamp()
+            users.setdefault((guild_id, day, channel_id), set()).add(user_id)
+            users.setdefault((guild_id, day, ""), set()).add(user_id)
+        written += write_day()
+        conn.execute(
+            "INSERT OR REPLACE INTO stats_meta (key, value) VALUES (?, strftime('%s', 'now'))", (_SKETCHES_MARKER,)
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return written
+
+
+def _rebuild_sketches_at(db_path: str) -> int:
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        return rebuild_active_user_sketches(conn)
+    finally:
+        conn.close()
+
+
+def _rollup_window(cutoff: float, event_types: tuple[str, ...]) -> tuple[str, tuple]:
+    """Build the rollup rows query for events of ``event_types`` since ``cutoff``.
+
+    The hour containing ``cutoff`` counts whole.
+
+    Returns:
+        The ``_ROLLUP_WINDOW_SQL`` subquery and its parameters.
+    """
+    next_day = (datetime.fromtimestamp(cutoff) + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    sql = _ROLLUP_WINDOW_SQL.format(types=", ".join("?" * len(event_types)))
+    params = (
+        *event_types, int(cutoff // 3600) * 3600, int(next_day.timestamp()),
+        *event_types, next_day.strftime("%Y-%m-%d"),
+    )
+    return sql, params
+
 
 def _period_to_days(period: str) -> int:
     """Convert a period string like '7d', '30d', '90d' to number of days."""
@@ -73,91 +316,236 @@ def _fill_missing_days(daily_data: list[dict], days: int) -> list[dict]:
 class StatsCollector:
     """Async statistics collector writing to and reading from SQLite."""
 
-    def __init__(self, db_path: str = _DB_PATH) -> None:
+    def __init__(
+        self,
+        db_path: str = _DB_PATH,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        read_your_writes: bool = True,
+    ) -> None:
         self._db_path = db_path
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.read_your_writes = read_your_writes
         self._initialized = False
+        self._db: Optional[aiosqlite.Connection] = None
+        self._init_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._backfill_task: Optional[asyncio.Task] = None
+        self._pending: dict[str, list[tuple]] = {table: [] for table in _INSERT_SQL}
+        self._pending_count = 0
 
     async def initialize(self) -> None:
-        """Create database directory and tables if they don't exist."""
-        os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
-        async with aiosqlite.connect(self._db_path) as db:
+        """Open the connection, create tables and start the flush task.
+
+        Safe to call more than once; later calls are no-ops.
+        """
+        async with self._init_lock:
+            if self._initialized:
+                return
+            os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
+            db = await aiosqlite.connect(self._db_path)
+            db.row_factory = aiosqlite.Row
+            await db.execute("PRAGMA journal_mode=WAL")
+            await db.execute("PRAGMA synchronous=NORMAL")
             await db.executescript(_SCHEMA_SQL)
             await db.commit()
-        self._initialized = True
+            async with db.execute(
+                "SELECT key FROM stats_meta WHERE key IN (?, ?)", (_ROLLUPS_MARKER, _SKETCHES_MARKER)
+            ) as cursor:
+                built = {row["key"] async for row in cursor}
+            self._db = db
+            if len(built) < 2:
+                # Can take a while on a large history; writes keep buffering meanwhile.
+                self._backfill_task = asyncio.create_task(
+                    self._backfill(rollups=_ROLLUPS_MARKER not in built, sketches=_SKETCHES_MARKER not in built),
+                    name="stats-rollup-backfill",
+                )
+            self._flush_task = asyncio.create_task(self._flush_loop(), name="stats-flush")
+            self._initialized = True
         log.info(f"Stats database initialized at {self._db_path}")
 
+    async def close(self) -> None:
+        """Stop the flush task, write pending events and close the connection."""
+        if self._backfill_task is not None:
+            await self._backfill_task
+            self._backfill_task = None
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        if self._db is not None:
+            await self.flush()
+            await self._db.close()
+            self._db = None
+        self._initialized = False
+
+    # ── Write-behind buffer ───────────────────────────────────────────
+
+    def _enqueue(self, table: str, rows: list[tuple]) -> None:
+        self._pending[table].extend(rows)
+        self._pending_count += len(rows)
+        if self._pending_count >= self.batch_size:
+            self._wakeup.set()
+
+    @property
+    def pending(self) -> int:
+        """Number of recorded events not yet committed to the database."""
+        return self._pending_count
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write all buffered events in one transaction.
+
+        On failure the events are put back in front of the buffer and retried
+        on the next flush.
+
+        Returns:
+            Number of events written.
+        """
+        async with self._flush_lock:
+            if not self._pending_count or self._db is None:
+                return 0
+            batch, self._pending = self._pending, {table: [] for table in _INSERT_SQL}
+            count = sum(len(rows) for rows in batch.values())
+            try:
+                for table, rows in batch.items():
+                    if rows:
+                        await self._db.executemany(_INSERT_SQL[table], rows)
+                hourly, daily = _rollup_rows(batch)
+                await self._db.executemany(_ROLLUP_UPSERT_SQL["stats_hourly"], hourly)
+                await self._db.executemany(_ROLLUP_UPSERT_SQL["stats_daily"], daily)
+                await self._update_sketches(batch["message_events"])
+                await self._db.commit()
+            except Exception as exc:
+                log.error(f"Failed to flush {count} stats events: {exc}")
+                try:
+                    await self._db.rollback()
+                except Exception:
+                    pass
+                for table, rows in batch.items():
+                    self._pending[table][:0] = rows
+                return 0
+            self._pending_count -= count
+            return count
+
+    async def _update_sketches(self, rows: list[tuple]) -> None:
+        """Fold a batch's posters into the daily sketches (part of the flush transaction)."""
+        upserts = []
+        for key, users in _active_users(rows).items():
+            async with self._db.execute(_SKETCH_SELECT_SQL, key) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                upserts.append((*key, _new_sketch(users)))
+                continue
+            sketch = HyperLogLog.from_bytes(row["sketch"])
+            if sketch.update(users):
+                upserts.append((*key, sketch.to_bytes()))
+        if upserts:
+            await self._db.executemany(_SKETCH_UPSERT_SQL, upserts)
+
+    async def _backfill(self, rollups: bool = True, sketches: bool = True) -> None:
+        log.info("Backfilling stats rollups from existing events")
+        try:
+            async with self._flush_lock:
+                await self._run_backfill(self._db, rollups, sketches)
+        except Exception as exc:
+            log.error(f"Stats rollup backfill failed: {exc}")
+        else:
+            log.info("Stats rollups backfilled")
+
+    async def rebuild_rollups(self) -> None:
+        """Recompute the rollup tables and active-user sketches from the event tables."""
+        db = await self._connection()
+        async with self._flush_lock:
+            await self._run_backfill(db)
+
+    async def _run_backfill(self, db: aiosqlite.Connection, rollups: bool = True, sketches: bool = True) -> None:
+        if rollups:
+            try:
+                await db.executescript(ROLLUP_BACKFILL_SQL)
+            except Exception:
+                await db.rollback()
+                raise
+        if sketches:
+            # Python-side hashing; a worker thread on its own connection keeps the loop free.
+            await asyncio.to_thread(_rebuild_sketches_at, self._db_path)
+
+    async def _connection(self) -> aiosqlite.Connection:
+        """Return the shared connection for a query, flushing first if configured."""
+        if not self._initialized:
+            await self.initialize()
+        if self._backfill_task is not None and not self._backfill_task.done():
+            # Rollups are incomplete until the first backfill finishes.
+            await asyncio.shield(self._backfill_task)
+        if self.read_your_writes:
+            await self.flush()
+        return self._db
+
     # ── Write methods ─────────────────────────────────────────────────
 
     async def record_message(self, guild_id: str, user_id: str, channel_id: str, timestamp: Optional[float] = None) -> None:
-        async with aiosqlite.connect(self._db_path) as db:
-            await db.execute(
-                "INSERT INTO message_events (guild_id, user_id, channel_id, timestamp) VALUES (?, ?, ?, ?)",
-                (guild_id, user_id, channel_id, timestamp or time.time()),
-            )
-            await db.commit()
+        self._enqueue("message_events", [(guild_id, user_id, channel_id, timestamp or time.time())])
 
     async def bulk_record_messages(self, records: list[tuple[str, str, str, float]]) -> None:
-        """Record multiple message events in a single transaction.
+        """Record multiple message events.
         
         Args:
             records: List of (guild_id, user_id, channel_id, timestamp)
         """
         if not records:
             return
-        async with aiosqlite.connect(self._db_path) as db:
-            await db.executemany(
-                "INSERT INTO message_events (guild_id, user_id, channel_id, timestamp) VALUES (?, ?, ?, ?)",
-                records,
-            )
-            await db.commit()
+        self._enqueue("message_events", list(records))
 
     async def record_llm_call(self, guild_id: str, model_name: str, duration_ms: float, success: bool = True, timestamp: Optional[float] = None) -> None:
-        async with aiosqlite.connect(self._db_path) as db:
-            await db.execute(
-                "INSERT INTO llm_call_events (guild_id, model_name, timestamp, duration_ms, success) VALUES (?, ?, ?, ?, ?)",
-                (guild_id, model_name, timestamp or time.time(), duration_ms, int(success)),
-            )
-            await db.commit()
+        self._enqueue("llm_call_events", [(guild_id, model_name, timestamp or time.time(), duration_ms, int(success))])
 
     async def record_command(self, guild_id: str, user_id: str, command_name: str, timestamp: Optional[float] = None) -> None:
-        async with aiosqlite.connect(self._db_path) as db:
-            await db.execute(
-                "INSERT INTO command_events (guild_id, user_id, command_name, timestamp) VALUES (?, ?, ?, ?)",
-                (guild_id, user_id, command_name, timestamp or time.time()),
-            )
-            await db.commit()
+        self._enqueue("command_events", [(guild_id, user_id, command_name, timestamp or time.time())])
 
     # ── Query methods ─────────────────────────────────────────────────
 
     async def get_global_stats(self, period: str = "30d") -> dict[str, Any]:
+        """Totals over the period from the rollups."""
         days = _period_to_days(period)
         cutoff = time.time() - (days * 86400)
-
-        async with aiosqlite.connect(self._db_path) as db:
-            db.row_factory = aiosqlite.Row
-
-            cursor = await db.execute("SELECT COUNT(*) as cnt FROM message_events WHERE timestamp >= ?", (cutoff,))
-            total_messages = (await cursor.fetchone())["cnt"]
-
-            cursor = await db.execute(
-                "SELECT COUNT(*) as cnt, SUM(CASE WHEN success = 0 THEN 1 ELSE 0 END) as errors, AVG(duration_ms) as avg_ms "
-                "FROM llm_call_events WHERE timestamp >= ?", (cutoff,)
-            )
-            row = await cursor.fetchone()
-            total_llm = row["cnt"] or 0
-            total_errors = row["errors"] or 0
-            avg_ms = round(row["avg_ms"], 2) if row["avg_ms"] else 0.0
-            error_rate = round(total_errors / total_llm * 100, 2) if total_llm > 0 else 0.0
-
-            cursor = await db.execute(
-                "SELECT date(timestamp, 'unixepoch', 'localtime') as day, COUNT(*) as cnt "
-                "FROM message_events WHERE timestamp >= ? GROUP BY day ORDER BY day", (cutoff,)
-            )
-            daily = [{"date": r["day"], "count": r["cnt"]} async for r in cursor]
-            daily = _fill_missing_days(daily, days)
-
-            cursor = await db.execute("SELECT COUNT(*) as cnt FROM command_events WHERE timestamp >= ?", (cutoff,))
-            total_commands = (await cursor.fetchone())["cnt"]
+        first_day = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+
+        db = await self._connection()
+
+        window, params = _rollup_window(cutoff, ("message", "llm_call", "command"))
+        cursor = await db.execute(
+            "SELECT event_type, SUM(events) as cnt, SUM(errors) as errors, SUM(duration_ms) as duration "
+            f"FROM ({window}) GROUP BY event_type", params,
+        )
+        totals = {r["event_type"]: r async for r in cursor}
+        total_messages = totals["message"]["cnt"] if "message" in totals else 0
+        total_commands = totals["command"]["cnt"] if "command" in totals else 0
+        llm = totals.get("llm_call")
+        total_llm = llm["cnt"] if llm else 0
+        total_errors = llm["errors"] if llm else 0
+        avg_ms = round(llm["duration"] / total_llm, 2) if total_llm > 0 else 0.0
+        error_rate = round(total_errors / total_llm * 100, 2) if total_llm > 0 else 0.0
+
+        cursor = await db.execute(
+            "SELECT day, SUM(events) as cnt FROM stats_daily "
+            "WHERE event_type = 'message' AND day >= ? GROUP BY day ORDER BY day", (first_day,)
+        )
+        daily = [{"date": r["day"], "count": r["cnt"]} async for r in cursor]
+        daily = _fill_missing_days(daily, days)
 
         accurate_total = await self._get_accurate_total()
         
@@ -173,51 +561,50 @@ class StatsCollector:
         }
 
     async def get_model_stats(self, period: str = "30d") -> dict[str, Any]:
+        """Per-model LLM totals over the period from the rollups."""
         days = _period_to_days(period)
         cutoff = time.time() - (days * 86400)
 
-        async with aiosqlite.connect(self._db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute(
-                "SELECT model_name, COUNT(*) as calls, AVG(duration_ms) as avg_ms, "
-                "SUM(CASE WHEN success = 0 THEN 1 ELSE 0 END) as errors "
-                "FROM llm_call_events WHERE timestamp >= ? GROUP BY model_name ORDER BY calls DESC", (cutoff,)
-            )
-            models = []
-            async for row in cursor:
-                models.append({
-                    "model": row["model_name"],
-                    "calls": row["calls"],
-                    "avg_response_ms": round(row["avg_ms"], 2) if row["avg_ms"] else 0.0,
-                    "error_rate": round(row["errors"] / row["calls"] * 100, 2) if row["calls"] > 0 else 0.0,
-                    "errors": row["errors"] or 0,
-                })
+        db = await self._connection()
+        window, params = _rollup_window(cutoff, ("llm_call",))
+        cursor = await db.execute(
+            "SELECT model_name, SUM(events) as calls, SUM(duration_ms) as duration, SUM(errors) as errors "
+            f"FROM ({window}) GROUP BY model_name ORDER BY calls DESC", params,
+        )
+        models = []
+        async for row in cursor:
+            models.append({
+                "model": row["model_name"],
+                "calls": row["calls"],
+                "avg_response_ms": round(row["duration"] / row["calls"], 2) if row["calls"] > 0 else 0.0,
+                "error_rate": round(row["errors"] / row["calls"] * 100, 2) if row["calls"] > 0 else 0.0,
+                "errors": row["errors"] or 0,
+            })
         return {"period": period, "models": models}
 
     async def get_guild_stats(self, guild_id: str, period: str = "30d") -> dict[str, Any]:
         days = _period_to_days(period)
         cutoff = time.time() - (days * 86400)
 
-        async with aiosqlite.connect(self._db_path) as db:
-            db.row_factory = aiosqlite.Row
+        db = await self._connection()
             
-            cursor = await db.execute("SELECT COUNT(*) as cnt FROM message_events WHERE guild_id = ? AND timestamp >= ?", (guild_id, cutoff))
-            total_messages = (await cursor.fetchone())["cnt"]
+        cursor = await db.execute("SELECT COUNT(*) as cnt FROM message_events WHERE guild_id = ? AND timestamp >= ?", (guild_id, cutoff))
+        total_messages = (await cursor.fetchone())["cnt"]
 
-            cursor = await db.execute("SELECT COUNT(DISTINCT user_id) as cnt FROM message_events WHERE guild_id = ? AND timestamp >= ?", (guild_id, cutoff))
-            active_users = (await cursor.fetchone())["cnt"]
+        first_day = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        active_users = await self.count_active_users(guild_id, start_day=first_day)
 
-            cursor = await db.execute("SELECT COUNT(*) as cnt, AVG(duration_ms) as avg_ms FROM llm_call_events WHERE guild_id = ? AND timestamp >= ?", (guild_id, cutoff))
-            row = await cursor.fetchone()
-            llm_calls = row["cnt"] or 0
-            avg_ms = round(row["avg_ms"], 2) if row["avg_ms"] else 0.0
+        cursor = await db.execute("SELECT COUNT(*) as cnt, AVG(duration_ms) as avg_ms FROM llm_call_events WHERE guild_id = ? AND timestamp >= ?", (guild_id, cutoff))
+        row = await cursor.fetchone()
+        llm_calls = row["cnt"] or 0
+        avg_ms = round(row["avg_ms"], 2) if row["avg_ms"] else 0.0
 
-            cursor = await db.execute(
-                "SELECT date(timestamp, 'unixepoch', 'localtime') as day, COUNT(*) as cnt "
-                "FROM message_events WHERE guild_id = ? AND timestamp >= ? GROUP BY day ORDER BY day", (guild_id, cutoff)
-            )
-            daily = [{"date": r["day"], "count": r["cnt"]} async for r in cursor]
-            daily = _fill_missing_days(daily, days)
+        cursor = await db.execute(
+            "SELECT date(timestamp, 'unixepoch', 'localtime') as day, COUNT(*) as cnt "
+            "FROM message_events WHERE guild_id = ? AND timestamp >= ? GROUP BY day ORDER BY day", (guild_id, cutoff)
+        )
+        daily = [{"date": r["day"], "count": r["cnt"]} async for r in cursor]
+        daily = _fill_missing_days(daily, days)
 
         accurate_total = await self._get_accurate_total(guild_id)
 
@@ -232,6 +619,35 @@ class StatsCollector:
             "accurate_total_messages": accurate_total,
         }
 
+    async def count_active_users(
+        self,
+        guild_id: str,
+        channel_id: Optional[str] = None,
+        start_day: Optional[str] = None,
+        end_day: Optional[str] = None,
+    ) -> int:
+        """Estimate distinct posters in a guild, or one of its channels, over local days.
+
+        Args:
+            guild_id: Guild to count.
+            channel_id: Restrict to one channel; the whole guild if omitted.
+            start_day: First day (``YYYY-MM-DD``), inclusive; unbounded if omitted.
+            end_day: Last day (``YYYY-MM-DD``), inclusive; unbounded if omitted.
+        """
+        sql = "SELECT sketch FROM active_user_sketches WHERE guild_id = ? AND channel_id = ?"
+        params: list[Any] = [guild_id, channel_id or ""]
+        if start_day:
+            sql += " AND day >= ?"
+            params.append(start_day)
+        if end_day:
+            sql += " AND day <= ?"
+            params.append(end_day)
+
+        db = await self._connection()
+        async with db.execute(sql, params) as cursor:
+            sketches = [HyperLogLog.from_bytes(row["sketch"]) async for row in cursor]
+        return HyperLogLog.union(sketches, _SKETCH_PRECISION).count()
+
     async def _get_accurate_total(self, guild_id: Optional[str] = None) -> int:
         """Get accurate message count from procedural.db."""
         if not os.path.exists(_PROCEDURAL_DB):
@@ -267,23 +683,22 @@ class StatsCollector:
         days = _period_to_days(period)
         cutoff = time.time() - (days * 86400)
 
-        async with aiosqlite.connect(self._db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute("SELECT COUNT(*) as cnt FROM message_events WHERE user_id = ? AND timestamp >= ?", (user_id, cutoff))
-            total_messages = (await cursor.fetchone())["cnt"]
+        db = await self._connection()
+        cursor = await db.execute("SELECT COUNT(*) as cnt FROM message_events WHERE user_id = ? AND timestamp >= ?", (user_id, cutoff))
+        total_messages = (await cursor.fetchone())["cnt"]
 
-            cursor = await db.execute("SELECT COUNT(*) as cnt FROM command_events WHERE user_id = ? AND timestamp >= ?", (user_id, cutoff))
-            total_commands = (await cursor.fetchone())["cnt"]
+        cursor = await db.execute("SELECT COUNT(*) as cnt FROM command_events WHERE user_id = ? AND timestamp >= ?", (user_id, cutoff))
+        total_commands = (await cursor.fetchone())["cnt"]
 
-            cursor = await db.execute(
-                "SELECT guild_id, COUNT(*) as cnt FROM message_events WHERE user_id = ? AND timestamp >= ? GROUP BY guild_id ORDER BY cnt DESC", (user_id, cutoff)
-            )
-            guilds = [{"guild_id": r["guild_id"], "messages": r["cnt"]} async for r in cursor]
+        cursor = await db.execute(
+            "SELECT guild_id, COUNT(*) as cnt FROM message_events WHERE user_id = ? AND timestamp >= ? GROUP BY guild_id ORDER BY cnt DESC", (user_id, cutoff)
+        )
+        guilds = [{"guild_id": r["guild_id"], "messages": r["cnt"]} async for r in cursor]
 
-            cursor = await db.execute(
-                "SELECT channel_id, guild_id, COUNT(*) as cnt FROM message_events WHERE user_id = ? AND timestamp >= ? GROUP BY channel_id ORDER BY cnt DESC LIMIT 10", (user_id, cutoff)
-            )
-            channels = [{"channel_id": r["channel_id"], "guild_id": r["guild_id"], "messages": r["cnt"]} async for r in cursor]
+        cursor = await db.execute(
+            "SELECT channel_id, guild_id, COUNT(*) as cnt FROM message_events WHERE user_id = ? AND timestamp >= ? GROUP BY channel_id ORDER BY cnt DESC LIMIT 10", (user_id, cutoff)
+        )
+        channels = [{"channel_id": r["channel_id"], "guild_id": r["guild_id"], "messages": r["cnt"]} async for r in cursor]
 
         accurate_total = await self._get_user_accurate_total(user_id)
 
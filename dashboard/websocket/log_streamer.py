@@ -4,62 +4,209 @@ from __future__ import annotations
 
 import asyncio
 import json
+from collections import deque
 from typing import Any
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
 
-from addons.logging import get_logger
+from addons.logging import BackgroundWriter, get_logger
 from dashboard.auth.jwt_handler import verify_access_token
 
 log = get_logger(server_id="Bot", source=__name__)
 router = APIRouter()
 
 
+class _Client:
+    """One connected WebSocket with its own bounded send queue and sender task."""
+
+    def __init__(self, websocket: WebSocket, filters: dict[str, Any]) -> None:
+        self.websocket = websocket
+        self.filters = filters
+        self.queue: deque[str] = deque()
+        self.wakeup = asyncio.Event()
+        self.task: asyncio.Task | None = None
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+
+
 class LogStreamer:
-    """Manages WebSocket clients and broadcasts log records."""
+    """Manages WebSocket clients and broadcasts log records.
+
+    Each client gets a bounded queue drained by its own sender task, so a slow
+    browser tab only falls behind itself. When a client's queue is full the
+    ``overflow`` policy applies: ``drop_oldest`` discards its oldest pending
+    record, ``disconnect`` closes the connection. A send that takes longer
+    than ``send_timeout`` seconds also disconnects the client. Every record is
+    serialized once and the same payload string is queued for all clients.
+    """
 
     BUFFER_SIZE = 200
+    OVERFLOW_POLICIES = ("drop_oldest", "disconnect")
+
+    def __init__(
+        self,
+        buffer_size: int = BUFFER_SIZE,
+        queue_size: int = 1000,
+        overflow: str = "drop_oldest",
+        send_timeout: float = 10.0,
+    ) -> None:
+        self._clients: dict[int, _Client] = {}
+        # Recent (record, payload) pairs replayed to new clients.
+        self._buffer: deque[tuple[dict[str, Any], str]] = deque(maxlen=buffer_size)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.queue_size = 1000
+        self.overflow = "drop_oldest"
+        self.send_timeout = 10.0
+        self.lag_disconnects = 0
+        self.configure(queue_size=queue_size, overflow=overflow, send_timeout=send_timeout)
 
-    def __init__(self) -> None:
-        # Use list instead of set — tuples containing dicts are not hashable
-        self._clients: list[tuple[WebSocket, dict[str, Any]]] = []
-        self._buffer: list[dict[str, Any]] = []
-        self._lock = asyncio.Lock()
+    def configure(
+        self,
+        queue_size: int | None = None,
+        overflow: str | None = None,
+        send_timeout: float | None = None,
+    ) -> None:
+        """Update the per-client backpressure settings (``dashboard.log_stream``)."""
+        if queue_size is not None:
+            self.queue_size = max(1, int(queue_size))
+        if overflow is not None:
+            if overflow not in self.OVERFLOW_POLICIES:
+                raise ValueError(f"Unknown log stream overflow policy: {overflow!r}")
+            self.overflow = overflow
+        if send_timeout is not None:
+            self.send_timeout = float(send_timeout)
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Start receiving records from the background log writer on ``loop``."""
+        self._loop = loop
+        BackgroundWriter.get_instance().add_listener(self._on_written)
+
+    def _on_written(self, records: list[tuple[dict[str, Any], str]]) -> None:
+        """Writer-thread listener: hand a written batch over to the event loop."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._dispatch, records)
+
+    def _dispatch(self, records: list[tuple[dict[str, Any], str]]) -> None:
+        for record, line in records:
+            self.publish(record, line)
 
     async def connect(self, websocket: WebSocket, filters: dict[str, Any] | None = None) -> None:
         """Accept a new WebSocket client and replay recent logs."""
         await websocket.accept()
-        entry = (websocket, filters or {})
-        async with self._lock:
-            self._clients.append(entry)
-        for record in self._buffer:
-            if self._matches(record, filters or {}):
-                try:
-                    await websocket.send_text(json.dumps(record))
-                except Exception:
-                    break
+        client = _Client(websocket, filters if filters is not None else {})
+        self._clients[id(websocket)] = client
+        for record, payload in self._buffer:
+            if self._matches(record, client.filters):
+                self._enqueue(client, payload)
+        client.task = asyncio.create_task(self._sender(client), name="log-stream-sender")
 
     async def disconnect(self, websocket: WebSocket) -> None:
-        """Remove a disconnected WebSocket client."""
-        async with self._lock:
-            self._clients = [(ws, f) for ws, f in self._clients if ws is not websocket]
+        """Remove a disconnected WebSocket client and wait for its sender to stop."""
+        client = self._clients.pop(id(websocket), None)
+        if client is None:
+            return
+        task = self._stop(client)
+        if task is not None:
+            try:
+                await task
+            except asyncio.CancelledError:
+                # Our own cancellation must still propagate.
+                current = asyncio.current_task()
+                if current is not None and current.cancelling():
+                    raise
+
+    def publish(self, record: dict[str, Any], payload: str | None = None) -> None:
+        """Queue a log record for every matching client without waiting.
+
+        Args:
+            record: The log record as a dict, used for filtering.
+            payload: The record already serialized as JSON; built once here
+                if not given.
+        """
+        if payload is None:
+            payload = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+        self._buffer.append((record, payload))
+        for client in list(self._clients.values()):
+            if self._matches(record, client.filters):
+                self._enqueue(client, payload)
 
     async def broadcast(self, record: dict[str, Any]) -> None:
         """Broadcast a log record to all matching connected clients."""
-        self._buffer.append(record)
-        if len(self._buffer) > self.BUFFER_SIZE:
-            self._buffer = self._buffer[-self.BUFFER_SIZE:]
-        dead = []
-        msg = json.dumps(record)
-        for ws, filters in list(self._clients):
-            if not self._matches(record, filters):
+        self.publish(record)
+
+    def _enqueue(self, client: _Client, payload: str) -> None:
+        if client.closed:
+            return
+        if len(client.queue) >= self.queue_size:
+            if self.overflow == "disconnect":
+                self._drop_client(client, "queue full")
+                return
+            client.queue.popleft()
+            client.dropped += 1
+        client.queue.append(payload)
+        client.wakeup.set()
+
+    @staticmethod
+    def _stop(client: _Client) -> asyncio.Task | None:
+        """Mark ``client`` closed and cancel its sender; returns the task to await."""
+        client.closed = True
+        client.queue.clear()
+        client.wakeup.set()
+        task = client.task
+        if task is None or task.done() or task is asyncio.current_task():
+            return None
+        task.cancel()
+        return task
+
+    def _drop_client(self, client: _Client, reason: str) -> None:
+        """Disconnect a client that cannot keep up."""
+        if self._clients.pop(id(client.websocket), None) is None:
+            return
+        self.lag_disconnects += 1
+        log.warning(f"Disconnecting lagging log stream client ({reason}, {len(client.queue)} pending)")
+        self._stop(client)
+        # Closing ends the endpoint's receive loop, which then cleans up.
+        asyncio.create_task(self._close(client.websocket))
+
+    @staticmethod
+    async def _close(websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=1013, reason="Log stream client too slow")
+        except Exception:
+            pass
+
+    async def _sender(self, client: _Client) -> None:
+        """Drain one client's queue until it is closed."""
+        while not client.closed:
+            if not client.queue:
+                client.wakeup.clear()
+                await client.wakeup.wait()
                 continue
+            payload = client.queue.popleft()
             try:
-                await ws.send_text(msg)
+                async with asyncio.timeout(self.send_timeout):
+                    await client.websocket.send_text(payload)
+            except TimeoutError:
+                self._drop_client(client, f"send took over {self.send_timeout:g}s")
+                return
             except Exception:
-                dead.append(ws)
-        for ws in dead:
-            await self.disconnect(ws)
+                self._clients.pop(id(client.websocket), None)
+                client.closed = True
+                return
+            client.sent += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Connected clients, pending and dropped records."""
+        clients = list(self._clients.values())
+        return {
+            "clients": len(clients),
+            "pending": sum(len(c.queue) for c in clients),
+            "dropped": sum(c.dropped for c in clients),
+            "lag_disconnects": self.lag_disconnects,
+        }
 
     @staticmethod
     def _matches(record: dict[str, Any], filters: dict[str, Any]) -> bool:
@@ -7,7 +7,7 @@ from __future__ import annotations
 
 import asyncio
 import time
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from cogs.memory.db.knowledge_storage import KnowledgeStorage
 from function import func
@@ -37,6 +37,9 @@ class KnowledgeMemoryProvider:
 
     async def get(self, guild_id: Optional[str], channel_id: str) -> KnowledgeMemory:
         """Fetch knowledge for the current guild and channel.
+
+        Both scopes are served from the cache when fresh; otherwise they are
+        loaded together with a single storage query.
         
         Args:
             guild_id: Discord guild ID.
@@ -45,70 +48,115 @@ class KnowledgeMemoryProvider:
         Returns:
             KnowledgeMemory object containing both levels of knowledge.
         """
-        guild_knowledge = None
+        keys: List[Tuple[str, str]] = [("channel", channel_id)]
         if guild_id:
-            guild_knowledge = await self._get_single("guild", guild_id)
-            
-        channel_knowledge = await self._get_single("channel", channel_id)
-        
+            keys.append(("guild", guild_id))
+
+        values = await self._get_many(keys, guild_id, channel_id)
         return KnowledgeMemory(
-            guild_knowledge=guild_knowledge,
-            channel_knowledge=channel_knowledge
+            guild_knowledge=values.get(("guild", guild_id)) if guild_id else None,
+            channel_knowledge=values.get(("channel", channel_id)),
         )
 
-    async def _get_single(self, target_type: str, target_id: str) -> Optional[str]:
+    async def _get_many(
+        self,
+        keys: List[Tuple[str, str]],
+        guild_id: Optional[str],
+        channel_id: str,
+    ) -> Dict[Tuple[str, str], Optional[str]]:
         """Internal helper with TTL cache and thundering herd protection."""
-        cache_key = (target_type, target_id)
+        result: Dict[Tuple[str, str], Optional[str]] = {}
         attempted = False
 
         while True:
             now = time.monotonic()
-
-            if cache_key in self._pending_queries:
-                await self._pending_queries[cache_key].wait()
+            missing: List[Tuple[str, str]] = []
+            pending: List[asyncio.Event] = []
+
+            for key in keys:
+                if key in result:
+                    continue
+                if key in self._pending_queries:
+                    pending.append(self._pending_queries[key])
+                    continue
+                entry = self._cache.get(key)
+                if entry is not None and entry[1] > now:
+                    result[key] = entry[0]
+                elif attempted:
+                    result[key] = None
+                else:
+                    missing.append(key)
+
+            if pending:
+                await asyncio.gather(*(event.wait() for event in pending))
                 continue
+            if not missing:
+                return result
 
-            entry = self._cache.get(cache_key)
-            if entry is not None and entry[1] > now:
-                return entry[0]
-
-            if attempted:
-                return None
-
-            event = asyncio.Event()
-            self._pending_queries[cache_key] = event
             attempted = True
-            
+            await self._fetch(missing, guild_id, channel_id, result)
+
+    async def _fetch(
+        self,
+        missing: List[Tuple[str, str]],
+        guild_id: Optional[str],
+        channel_id: str,
+        result: Dict[Tuple[str, str], Optional[str]],
+    ) -> None:
+        for key in missing:
+            self._pending_queries[key] = asyncio.Event()
+        # A write-through put() during the query replaces the entry object;
+        # in that case the freshly written value wins over what we read.
+        before = {key: self._cache.get(key) for key in missing}
+
+        try:
             try:
-                error_occurred = False
-                try:
-                    content = await self.storage.get_knowledge(target_type, target_id)
-                except asyncio.CancelledError:
-                    raise
-                except Exception as e:
-                    await func.report_error(e, f"KnowledgeMemoryProvider fetch failed ({target_type}:{target_id})")
-                    content = None
-                    error_occurred = True
-                    
-                now_insert = time.monotonic()
-                expire_at = now_insert + getattr(memory_config, "knowledge_cache_ttl", 300) # Default 5 mins
-
-                if not error_occurred or content is not None:
-                    self._cache[cache_key] = (content, expire_at)
-
-                # Prune cache if needed
-                if len(self._cache) > self.max_cache_size:
-                    self._cache = {k: v for k, v in self._cache.items() if v[1] > now_insert}
-                    while len(self._cache) > self.max_cache_size:
-                        oldest_key = next(iter(self._cache))
-                        self._cache.pop(oldest_key, None)
-
-                return content
-            finally:
-                event = self._pending_queries.pop(cache_key, None)
+                fetched = await self.storage.get_context_knowledge(guild_id, channel_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await func.report_error(e, f"KnowledgeMemoryProvider fetch failed (guild:{guild_id}, channel:{channel_id})")
+                for key in missing:
+                    result[key] = None  # Do not cache on error
+                return
+
+            expire_at = time.monotonic() + getattr(memory_config, "knowledge_cache_ttl", 300) # Default 5 mins
+            for key in missing:
+                content = fetched.get(key)
+                current = self._cache.get(key)
+                if current is before[key]:
+                    self._store(key, content, expire_at)
+                    result[key] = content
+                else:
+                    result[key] = current[0] if current is not None else content
+        finally:
+            for key in missing:
+                event = self._pending_queries.pop(key, None)
                 if event:
                     event.set()
 
+    def _store(self, cache_key: Tuple[str, str], content: Optional[str], expire_at: float) -> None:
+        self._cache.pop(cache_key, None)
+        self._cache[cache_key] = (content, expire_at)
+
+        # Prune cache if needed
+        if len(self._cache) > self.max_cache_size:
+            now = time.monotonic()
+            self._cache = {k: v for k, v in self._cache.items() if v[1] > now}
+            while len(self._cache) > self.max_cache_size:
+                oldest_key = next(iter(self._cache))
+                self._cache.pop(oldest_key, None)
+
+    async def put(self, target_type: str, target_id: str, content: Optional[str]) -> None:
+        """Write-through update after a successful save or clear.
+
+        Replaces the cached value in place so the next message sees the new
+        knowledge immediately instead of after TTL expiry. Pass None after a
+        clear to cache the now-empty scope.
+        """
+        expire_at = time.monotonic() + getattr(memory_config, "knowledge_cache_ttl", 300)
+        self._store((target_type, target_id), content, expire_at)
+
     async def invalidate(self, target_type: str, target_id: str) -> None:
         """Invalidate cache for a specific target."""
         cache_key = (target_type, target_id)
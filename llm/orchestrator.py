@@ -1,5 +1,6 @@
 from __future__ import annotations
 import asyncio
+import contextlib
 import time
 from typing import Any, List, MutableMapping, Optional
 import re
@@ -439,11 +440,9 @@ Focus on understanding what the user actually needs and prepare a clear analysis
         guild_id = str(message.guild.id) if message.guild else "0"
 
         # Provide feedback to the user that the bot is processing
-        async with SafeTyping(message.channel):
-            # Interrupt any active background memory tasks to prioritize this conversation
-            if hasattr(bot, "message_tracker") and bot.message_tracker:
-                bot.message_tracker.interrupt_all()
-
+        # Background memory jobs pause at their checkpoints while this conversation runs
+        tracker = getattr(bot, "message_tracker", None)
+        async with SafeTyping(message.channel), (tracker.foreground() if tracker else contextlib.nullcontext()):
             # Create a shared image cache for this entire message processing cycle
             # This prevents re-downloading identical image URLs across multiple model fallback attempts
             # in both the info_agent and message_agent phases.
@@ -33,10 +33,12 @@ from typing import Optional, TYPE_CHECKING
 import aiohttp
 import base64
 import discord
-from PIL import Image
 from langchain_core.tools import tool
 
 from function import func
+from addons.lazy_import import lazy_import
+
+Image = lazy_import("PIL.Image")
 
 if TYPE_CHECKING:
     from cogs.gen_img import ImageGenerationCog
@@ -219,14 +219,13 @@ def _extract_tools_from_module(mod: Any, runtime: "OrchestratorRequest") -> List
     return tools
 
 
-def _get_user_permissions(user: discord.Member, guid: discord.Guild) -> dict:
+def _get_user_permissions(bot: Any, user: discord.Member, guid: discord.Guild) -> dict:
     """Retrieve Discord user permission info from the project's PermissionValidator.
     
     Tries to import `cogs.system_prompt.permissions` and validate the user.
     Falls back to a conservative default (non-admin, non-moderator) if it fails.
     """
     try:
-        from main import bot
         from cogs.system_prompt.permissions import PermissionValidator
         permissions = PermissionValidator(bot)  # type: ignore
 
@@ -310,7 +309,7 @@ def get_tools(
         collected.extend(_extract_tools_from_module(mod, runtime))
 
     # Filter based on user permissions
-    perms = _get_user_permissions(user, guid)
+    perms = _get_user_permissions(runtime.bot, user, guid)
     result: List[Any] = []
 
     for t in collected:
@@ -17,16 +17,18 @@ import io
 from typing import TYPE_CHECKING
 
 import aiohttp
-from PIL import Image
 
 from addons.settings import attachment_config
 from addons.logging import get_logger
+from addons.lazy_import import lazy_import
 
 if TYPE_CHECKING:
     import discord
 
 log = get_logger(source=__name__, server_id="system")
 
+Image = lazy_import("PIL.Image")
+
 _DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=15.0)
 
 
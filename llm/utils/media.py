@@ -1,12 +1,16 @@
 import io
 from addons.logging import get_logger
-from PIL import Image
-from pdf2image import convert_from_bytes
-from decord import VideoReader, cpu
+from addons.lazy_import import lazy_attr, lazy_import
 import aiohttp
 import base64
 import asyncio
 from function import func
+# Image/PDF/video decoders are only loaded when an attachment needs them.
+Image = lazy_import("PIL.Image")
+convert_from_bytes = lazy_attr("pdf2image", "convert_from_bytes")
+VideoReader = lazy_attr("decord", "VideoReader")
+cpu = lazy_attr("decord", "cpu")
+
 MAX_NUM_FRAMES = 16  # if cuda OOM set a smaller number
 TARGET_IMAGE_SIZE = (224, 224)  # 設置目標圖像大小
 
@@ -206,6 +206,22 @@ def _get_processing_message(
         return default_messages.get(message_type, '處理中...')
 
 
+def _index_reply(reply_index: Optional[Any], message: discord.Message, reply: Optional[discord.Message]) -> None:
+    """Records reply as part of the answer to message so edits can find it.
+    
+    Args:
+        reply_index: The bot's ReplyIndexStorage, or None when unavailable.
+        message: Original user message.
+        reply: Bot message posted in answer to it.
+    """
+    if reply_index is None or message is None or reply is None:
+        return
+    try:
+        reply_index.add_reply(message.id, reply.id, message.channel.id)
+    except Exception as exc:
+        _logger.warning(f'Failed to index reply {reply.id} to message {message.id}: {exc}')
+
+
 async def _process_token_stream(
     streamer: AsyncIterator,
     converter: Optional[opencc.OpenCC],
@@ -215,7 +231,8 @@ async def _process_token_stream(
     lang_manager,
     update_interval: float = _UPDATE_INTERVAL,
     tools: Optional[List[Any]] = None,
-    inactivity_timeout: float = 15.0  # Default inactivity timeout
+    inactivity_timeout: float = 15.0,  # Default inactivity timeout
+    reply_index: Optional[Any] = None
 ) -> Tuple[str, discord.Message]:
     """Processes token stream and updates Discord messages based on time interval.
     
@@ -229,6 +246,7 @@ async def _process_token_stream(
         update_interval: Time interval (seconds) between message updates.
         tools: Optional tools list.
         inactivity_timeout: Max seconds to wait between tokens before raising TimeoutError.
+        reply_index: Optional ReplyIndexStorage that records continuation messages.
         
     Returns:
         Tuple of (full message result with markers, final Discord message).
@@ -369,6 +387,7 @@ async def _process_token_stream(
                 current_message = await _safe_send_message(
                     channel, processing_msg
                 )
+                _index_reply(reply_index, message, current_message)
                 current_block = pending_content  # Start new block with pending content
                 converted = (converter.convert(current_block)
                             if converter else current_block)
@@ -666,6 +685,8 @@ async def send_message(
     This function processes tokens from the stream and updates Discord messages
     at regular intervals to avoid rate limiting. When the message grows beyond
     the Discord character limit, it creates a new continuation message.
+    Every bot message posted for the answer is recorded in ``bot.reply_index``
+    (when present) so ``on_message_edit`` can replace it later.
     
     Args:
         bot: Discord bot instance.
@@ -679,6 +700,7 @@ async def send_message(
         Full message result string.
     """
     channel = message.channel
+    reply_index = getattr(bot, 'reply_index', None)
     
     # Get language converter for this server
     converter = None
@@ -702,6 +724,7 @@ async def send_message(
             'processing'
         )
         current_message = await _safe_send_message(channel, processing_message)
+    _index_reply(reply_index, message, current_message)
     
     try:
         # Process token stream with time-based updates
@@ -714,7 +737,8 @@ async def send_message(
             lang_manager,
             update_interval,
             tools,
-            inactivity_timeout
+            inactivity_timeout,
+            reply_index
         )
 
         return message_result
@@ -733,11 +757,11 @@ async def send_message(
                 try:
                     success = await safe_edit_message(message_to_edit, error_message)
                     if not success:
-                        await _safe_send_message(channel, error_message)
+                        _index_reply(reply_index, message, await _safe_send_message(channel, error_message))
                 except discord.errors.NotFound:
-                    await _safe_send_message(channel, error_message)
+                    _index_reply(reply_index, message, await _safe_send_message(channel, error_message))
             else:
-                await _safe_send_message(channel, error_message)
+                _index_reply(reply_index, message, await _safe_send_message(channel, error_message))
         except Exception as send_exc:
             _logger.error(f'Failed to send error message: {send_exc}')
 
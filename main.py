@@ -19,46 +19,83 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-import discord
-import asyncio
-import threading
-from function import func
-from bot import PigPig
-from addons import base_config, tokens
-from addons.update import VersionChecker
-from addons.settings import update_config
-from addons.logging import get_logger
-from dotenv import load_dotenv
-
-load_dotenv()
-
-class CommandCheck(discord.app_commands.CommandTree):
-    async def interaction_check(self, interaction: discord.Interaction, /) -> bool:
-        if not interaction.guild:
-            await interaction.response.send_message("This command can only be used in servers!")
-            return False
-
-        return await super().interaction_check(interaction)
-
-# Setup the bot object
-intents = discord.Intents.default()
-intents.message_content = True if base_config.prefix else False
-intents.members = True
-intents.presences = True
-member_cache = discord.MemberCacheFlags.from_intents(intents)
-
-bot = PigPig(
-    command_prefix=base_config.prefix,
-    help_command=None,
-    tree_cls=CommandCheck,
-    chunk_guilds_at_startup=True,
-    member_cache_flags=member_cache,
-    activity=discord.Activity(type=discord.ActivityType.playing, name="Starting..."),
-    case_insensitive=True,
-    intents=intents
-)
+import time
+
+_process_start = time.perf_counter()
+
+
+def _create_bot():
+    """Build the bot. Kept out of module scope: multiprocessing spawn workers
+    (the log migration pool) re-import this file as ``__mp_main__``."""
+    import discord
+    from bot import PigPig
+    from addons import base_config
+
+    class CommandCheck(discord.app_commands.CommandTree):
+        async def interaction_check(self, interaction: discord.Interaction, /) -> bool:
+            if not interaction.guild:
+                await interaction.response.send_message("This command can only be used in servers!")
+                return False
+
+            return await super().interaction_check(interaction)
+
+    # Setup the bot object
+    intents = discord.Intents.default()
+    intents.message_content = True if base_config.prefix else False
+    intents.members = True
+    intents.presences = True
+    member_cache = discord.MemberCacheFlags.from_intents(intents)
+
+    return PigPig(
+        command_prefix=base_config.prefix,
+        help_command=None,
+        tree_cls=CommandCheck,
+        chunk_guilds_at_startup=True,
+        member_cache_flags=member_cache,
+        activity=discord.Activity(type=discord.ActivityType.playing, name="Starting..."),
+        case_insensitive=True,
+        intents=intents
+    )
+
+
+def main():
+    from addons.lazy_import import ImportTimeProfiler
+
+    # Must start before the heavy imports below to see them.
+    import_profiler = ImportTimeProfiler.from_env()
+
+    import asyncio
+    import threading
+    from function import func
+    from addons import tokens
+    from addons.update import VersionChecker
+    from addons.settings import update_config
+    from addons.logging import get_logger
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    bot = _create_bot()
+
+    async def _report_startup_profile():
+        """Log the import profile, time-to-ready and RSS once, on the first on_ready."""
+        nonlocal import_profiler
+        profiler, import_profiler = import_profiler, None
+        if profiler is None:
+            return
+        profiler.stop()
+        log = get_logger(server_id="Bot", source=__name__)
+        try:
+            import psutil
+            rss = f"{psutil.Process().memory_info().rss / (1024 * 1024):.1f} MiB"
+        except Exception:
+            rss = "unknown"
+        log.info(f"Time to ready: {time.perf_counter() - _process_start:.2f}s, RSS: {rss}")
+        log.info("Startup import profile:\n" + profiler.format_report())
+
+    if import_profiler is not None:
+        bot.add_listener(_report_startup_profile, "on_ready")
 
-if __name__ == "__main__":
     # Background version check using new architecture
     def check_version_background():
         """Background version check that doesn't block startup"""
@@ -133,3 +170,7 @@ if __name__ == "__main__":
                 asyncio.create_task(func.report_error(e, "main.py/finally"))
             except Exception:
                 pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Rebuild the dashboard statistics rollups from the raw event tables.
+
+``StatsCollector`` backfills ``stats_hourly``, ``stats_daily`` and the
+``active_user_sketches`` once on first start and keeps them current as
+events are flushed. Run this after
+changing the event tables outside the collector (for example after
+``reconstruct_stats.py`` or a manual import) to recompute them. It is safe
+to run while the bot is up: each rebuild is one transaction.
+
+Usage:
+    python scripts/backfill_stats_rollups.py [--db data/stats/stats.db]
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from dashboard.services.stats_collector import (
+    _DB_PATH,
+    _SCHEMA_SQL,
+    ROLLUP_BACKFILL_SQL,
+    rebuild_active_user_sketches,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=_DB_PATH, help="path to stats.db")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        sys.exit(f"{args.db} does not exist")
+    conn = sqlite3.connect(args.db, timeout=30, isolation_level=None)
+    try:
+        conn.executescript(_SCHEMA_SQL)
+        start = time.perf_counter()
+        conn.executescript(ROLLUP_BACKFILL_SQL)
+        hourly = conn.execute("SELECT COUNT(*) FROM stats_hourly").fetchone()[0]
+        daily = conn.execute("SELECT COUNT(*) FROM stats_daily").fetchone()[0]
+        sketches = rebuild_active_user_sketches(conn)
+    finally:
+        conn.close()
+    print(
+        f"Rebuilt {hourly} hourly and {daily} daily rollup rows and {sketches} "
+        f"active-user sketches in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Benchmark distinct active-user counts from HyperLogLog sketches against SQL.
+
+Fills a stats database with ``--events`` message events over ``--days``
+days, ``--guilds`` guilds of 30 channels each, and a skewed population of
+``--users`` users per guild, builds the daily sketches the way the
+first-start backfill does, then times the same questions both ways:
+
+- ``exact``: ``COUNT(DISTINCT user_id)`` over ``message_events``, which
+  ``get_guild_stats`` ran before the sketches;
+- ``sketch``: ``StatsCollector.count_active_users``, merging daily sketches.
+
+Usage:
+    python scripts/benchmarks/bench_active_users.py --events 5000000 [--keep DIR]
+"""
+import argparse
+import asyncio
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from dashboard.services.stats_collector import _INSERT_SQL, _SCHEMA_SQL, StatsCollector
+
+CHANNELS = 30
+
+
+def generate(db_path: Path, events: int, days: int, guilds: int, users: int) -> None:
+    rng = random.Random(11)
+    now = time.time()
+    conn = sqlite3.connect(db_path)
+    conn.executescript(_SCHEMA_SQL)
+    batch = []
+    for _ in range(events):
+        guild = rng.randrange(guilds)
+        # Skewed activity: a core of regulars and a long tail of occasional posters.
+        user = int(users * rng.random() ** 3)
+        batch.append((
+            f"guild-{guild}", f"user-{guild}-{user}", f"channel-{guild}-{rng.randrange(CHANNELS)}",
+            now - rng.random() * days * 86400,
+        ))
+        if len(batch) == 100_000:
+            conn.executemany(_INSERT_SQL["message_events"], batch)
+            batch.clear()
+    conn.executemany(_INSERT_SQL["message_events"], batch)
+    conn.commit()
+    conn.close()
+
+
+def exact(db_path: Path, guild, channel, start, end) -> int:
+    sql = "SELECT COUNT(DISTINCT user_id) FROM message_events WHERE guild_id = ? AND timestamp >= ? AND timestamp < ?"
+    params = [guild, start, end]
+    if channel:
+        sql += " AND channel_id = ?"
+        params.append(channel)
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(sql, params).fetchone()[0]
+
+
+def timed(fn, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5_000_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--guilds", type=int, default=20)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--keep", help="use (and keep) this directory instead of a temp dir")
+    args = parser.parse_args()
+
+    root = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="bench_active_users_"))
+    db_path = root / "stats.db"
+    try:
+        if not db_path.exists():
+            root.mkdir(parents=True, exist_ok=True)
+            t0 = time.perf_counter()
+            generate(db_path, args.events, args.days, args.guilds, args.users)
+            print(f"generated {args.events:,} message events in {time.perf_counter() - t0:.1f}s")
+
+        async def run() -> None:
+            collector = StatsCollector(str(db_path), read_your_writes=False)
+            t0 = time.perf_counter()
+            await collector.initialize()
+            if collector._backfill_task is not None:
+                await collector._backfill_task
+            print(f"first start (rollups + sketch backfill): {time.perf_counter() - t0:.1f}s")
+            with sqlite3.connect(db_path) as conn:
+                count, size = conn.execute(
+                    "SELECT COUNT(*), SUM(length(sketch)) FROM active_user_sketches"
+                ).fetchone()
+            print(f"{count:,} sketches, {size / 1e6:.1f} MB")
+
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            tomorrow = (today + timedelta(days=1)).timestamp()
+
+            def window(n_days):
+                first = today - timedelta(days=n_days - 1)
+                return first.strftime("%Y-%m-%d"), first.timestamp()
+
+            guild, channel = "guild-3", "channel-3-7"
+            queries = [(f"guild, {n_days}d", None, n_days) for n_days in (1, 7, 30, args.days)]
+            queries.append((f"channel, {args.days}d", channel, args.days))
+            for name, chan, n_days in queries:
+                first_day, first_ts = window(n_days)
+                exact_s, truth = timed(lambda: exact(db_path, guild, chan, first_ts, tomorrow))
+                sketch_s = None
+                for _ in range(3):
+                    t0 = time.perf_counter()
+                    estimate = await collector.count_active_users(guild, channel_id=chan, start_day=first_day)
+                    elapsed = time.perf_counter() - t0
+                    sketch_s = elapsed if sketch_s is None else min(sketch_s, elapsed)
+                error = (estimate - truth) / truth * 100 if truth else 0.0
+                print(
+                    f"{name:>14}: exact {exact_s * 1000:8.1f} ms ({truth:,})   "
+                    f"sketch {sketch_s * 1000:7.1f} ms ({estimate:,}, {error:+.2f}%)"
+                )
+            await collector.close()
+
+        asyncio.run(run())
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Benchmark channel_memory_state write volume: per-batch updates against in-memory counters.
+
+Replays ``--seconds`` of virtual time at ``--rate`` messages per second
+spread over ``--channels`` channels, delivered the way the message bus
+hands them to the tracker (one batch every ``--batch-interval`` seconds),
+against a real ``EpisodicStorage`` two ways:
+
+- ``per-batch``: what ``MessageTracker.track_messages`` did before, one
+  state read and one state write per channel in every batch;
+- ``counters``: ``MessageTracker`` as it is now, with ``flush_counters``
+  called every ``--flush-interval`` virtual seconds.
+
+The message threshold is set out of reach so no summarization runs. Bytes
+are ``wchar`` from /proc/self/io (Linux only); nothing in the measured
+loop logs, so they are the SQLite page and WAL writes.
+
+Usage:
+    python scripts/benchmarks/bench_channel_counters.py --rate 100 --seconds 600
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from cogs.memory.db.connection import DatabaseConnection
+from cogs.memory.db.episodic_storage import EpisodicStorage
+from cogs.memory.services.message_tracker import MessageTracker
+
+
+def written_bytes():
+    with open("/proc/self/io") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("wchar:"))
+
+
+def make_batches(rate, seconds, channels, batch_interval):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    per_batch = max(1, round(rate * batch_interval))
+    channel_objs = [SimpleNamespace(id=500 + c) for c in range(channels)]
+    author = SimpleNamespace(id=1, bot=False)
+    message_id = 10**6
+    for b in range(int(seconds / batch_interval)):
+        now = start + timedelta(seconds=b * batch_interval)
+        batch = []
+        for _ in range(per_batch):
+            message_id += 1
+            batch.append(SimpleNamespace(
+                id=message_id, author=author, created_at=now,
+                channel=channel_objs[message_id % channels],
+            ))
+        yield b * batch_interval, batch
+
+
+async def per_batch(storage, messages):
+    by_channel = {}
+    for message in messages:
+        by_channel.setdefault(message.channel.id, []).append(message)
+    for channel_id, channel_messages in by_channel.items():
+        state = await storage.get_channel_memory_state(channel_id)
+        if state is None:
+            await storage.update_channel_memory_state(
+                channel_id, len(channel_messages), channel_messages[0].id,
+                last_summary_timestamp=channel_messages[0].created_at.timestamp(),
+            )
+        else:
+            await storage.update_channel_memory_state(
+                channel_id, state["message_count"] + len(channel_messages), state["start_message_id"]
+            )
+
+
+async def run(mode, db_path, args):
+    db = DatabaseConnection(db_path)
+    storage = EpisodicStorage(db)
+    await db.write(lambda conn: None)  # schema and writer thread up before measuring
+    writes = 0
+    write = db.write
+
+    def counted(fn, *fn_args):
+        nonlocal writes
+        writes += 1
+        return write(fn, *fn_args)
+
+    db.write = counted
+    settings = SimpleNamespace(message_threshold=10**9, time_threshold=10**9, counter_flush_interval=10**9)
+    tracker = MessageTracker(bot=None, storage=storage, settings=settings)
+    next_flush = args.flush_interval
+
+    bytes0, t0 = written_bytes(), time.perf_counter()
+    for at, batch in make_batches(args.rate, args.seconds, args.channels, args.batch_interval):
+        if mode == "per-batch":
+            await per_batch(storage, batch)
+        else:
+            await tracker.track_messages(batch)
+            if at >= next_flush:
+                await tracker.flush_counters()
+                next_flush += args.flush_interval
+    if mode == "counters":
+        await tracker.close()
+    await write(lambda conn: None)  # wait for queued writes
+    elapsed, written = time.perf_counter() - t0, written_bytes() - bytes0
+
+    with db.get_connection() as conn:
+        total = conn.execute("SELECT SUM(message_count) FROM channel_memory_state").fetchone()[0]
+    db.close_connections()
+    return writes, written, elapsed, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=100.0, help="messages per virtual second")
+    parser.add_argument("--seconds", type=float, default=600.0)
+    parser.add_argument("--channels", type=int, default=20)
+    parser.add_argument("--batch-interval", type=float, default=0.2)
+    parser.add_argument("--flush-interval", type=float, default=30.0)
+    args = parser.parse_args()
+
+    for mode in ("per-batch", "counters"):
+        with tempfile.TemporaryDirectory() as tmp:
+            writes, written, elapsed, total = asyncio.run(run(mode, Path(tmp) / "episodic.db", args))
+        print(
+            f"{mode:>9}: {writes:7,} db writes  {written / 1024:10,.0f} KiB written  "
+            f"{elapsed:6.2f} s  ({total:,} messages counted)",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Startup benchmark for sequential vs dependency-aware concurrent cog loading.
+
+Generates a package of stub cogs whose ``cog_load`` awaits simulated I/O
+(database setup, HTTP warm-up) and burns a little CPU, then loads them with a
+real ``commands.Bot`` both ways.
+
+Usage:
+    python scripts/benchmarks/bench_cog_loading.py --cogs 18 --io-ms 150 --cpu-ms 5
+"""
+import argparse
+import asyncio
+import importlib
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import discord
+from discord.ext import commands
+
+from addons.cog_loader import load_cogs
+
+STUB_COG = '''
+import asyncio
+import time
+from discord.ext import commands
+
+
+class {cls}(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        deadline = time.perf_counter() + {cpu}
+        while time.perf_counter() < deadline:
+            pass
+        await asyncio.sleep({io})
+
+
+async def setup(bot):
+    await bot.add_cog({cls}(bot))
+'''
+
+
+def make_package(root: Path, package: str, count: int, io: float, cpu: float) -> list:
+    pkg = root / package
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("")
+    names = ["language_manager"] + [f"cog_{i:02d}" for i in range(count - 1)]
+    for name in names:
+        cls = "".join(part.title() for part in name.split("_"))
+        (pkg / f"{name}.py").write_text(STUB_COG.format(cls=cls, io=io, cpu=cpu))
+    return names
+
+
+async def sequential(bot, package, names) -> float:
+    start = time.perf_counter()
+    for name in names:
+        await bot.load_extension(f"{package}.{name}")
+    return time.perf_counter() - start
+
+
+async def concurrent(bot, package, names, deps) -> float:
+    start = time.perf_counter()
+    results = await load_cogs(bot, names, deps, package=package)
+    elapsed = time.perf_counter() - start
+    assert all(r.ok for r in results.values())
+    return elapsed
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        sys.path.insert(0, tmp)
+        names = make_package(Path(tmp), "bench_cogs", args.cogs, args.io_ms / 1000, args.cpu_ms / 1000)
+        importlib.invalidate_caches()
+        deps = {name: ("language_manager",) for name in names[1:]}
+
+        bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+        seq = await sequential(bot, "bench_cogs", names)
+        for name in names:
+            await bot.unload_extension(f"bench_cogs.{name}")
+
+        bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+        par = await concurrent(bot, "bench_cogs", names, deps)
+
+    print(f"cogs={len(names)} io={args.io_ms}ms cpu={args.cpu_ms}ms")
+    print(f"sequential: {seq * 1000:8.1f} ms")
+    print(f"concurrent: {par * 1000:8.1f} ms  ({seq / par:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cogs", type=int, default=18)
+    parser.add_argument("--io-ms", type=float, default=150.0)
+    parser.add_argument("--cpu-ms", type=float, default=5.0)
+    asyncio.run(main(parser.parse_args()))
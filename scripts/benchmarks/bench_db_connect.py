@@ -0,0 +1,80 @@
+"""Benchmark memory database connection setup: DDL on every connection against a version check.
+
+Opens ``--connections`` connections to one up-to-date database, with the
+PRAGMAs ``DatabaseConnection`` sets, two ways:
+
+- ``ddl``: what every new per-thread connection did before the migration
+  runner. It ran every CREATE TABLE IF NOT EXISTS, the PRAGMA table_info
+  probes of the old in-place migrations, a commit, and the debug listing
+  of sqlite_master;
+- ``version``: ``DatabaseConnection._open_connection`` as it is now, which
+  reads one row from schema_version.
+
+``pragmas`` (connect and PRAGMAs only) is the floor both share.
+
+Usage:
+    python scripts/benchmarks/bench_db_connect.py --connections 2000
+"""
+import argparse
+import logging
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from cogs.memory.db import schema
+from cogs.memory.db.connection import DatabaseConnection
+
+
+def open_bare(db_path):
+    conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30.0)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+
+def open_with_ddl(db_path):
+    conn = open_bare(db_path)
+    for step in schema.MIGRATIONS:
+        step(conn)
+    conn.commit()
+    conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseConnection(Path(tmp) / "procedural.db")
+        db._open_connection().close()
+        openers = (
+            ("pragmas", lambda: open_bare(db.db_path)),
+            ("ddl", lambda: open_with_ddl(db.db_path)),
+            ("version", db._open_connection),
+        )
+        for name, opener in openers:
+            samples = []
+            for _ in range(args.connections):
+                t0 = time.perf_counter()
+                conn = opener()
+                samples.append(time.perf_counter() - t0)
+                conn.close()
+            samples.sort()
+            print(
+                f"{name:>8}: mean {sum(samples) / len(samples) * 1e6:7.0f} us  "
+                f"p50 {samples[len(samples) // 2] * 1e6:7.0f} us  "
+                f"p99 {samples[int(len(samples) * 0.99)] * 1e6:7.0f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark mixed read/write traffic: per-call commits against the group-commit writer.
+
+``--clients`` concurrent tasks each run ``--ops`` operations against one
+database, ``--write-share`` of them small writes (an upsert of one row, as
+``set_config`` or ``update_user_activity`` do) and the rest point reads.
+Reads always run in worker threads on per-thread connections, as the
+storage classes do. Writes run two ways:
+
+- ``per-call``: ``asyncio.to_thread`` on a per-thread connection with its
+  own commit, which is what every storage module did before;
+- ``writer``: ``DatabaseConnection.write``, one writer thread committing
+  whatever writes are queued in one transaction.
+
+Usage:
+    python scripts/benchmarks/bench_db_writer.py --clients 64 --ops 200 --write-share 0.2
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from cogs.memory.db.connection import DatabaseConnection
+
+KEYS = 5000
+
+
+def _write(conn, key, value):
+    conn.execute("INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", (key, value))
+
+
+def _per_call_write(db, key, value):
+    with db.get_connection() as conn:
+        _write(conn, key, value)
+        conn.commit()
+
+
+def _read(db, key):
+    with db.get_connection() as conn:
+        return conn.execute("SELECT value FROM config WHERE key = ?", (key,)).fetchone()
+
+
+async def run(mode, db_path, clients, ops, write_share, seed):
+    db = DatabaseConnection(db_path)
+    with db.get_connection() as conn:
+        conn.executemany("INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)",
+                         [(f"k{i}", "0") for i in range(KEYS)])
+        conn.commit()
+    read_lat, write_lat = [], []
+
+    async def client(n):
+        rng = random.Random(seed * 1000 + n)
+        for i in range(ops):
+            key = f"k{rng.randrange(KEYS)}"
+            t0 = time.perf_counter()
+            if rng.random() < write_share:
+                if mode == "writer":
+                    await db.write(_write, key, str(i))
+                else:
+                    await asyncio.to_thread(_per_call_write, db, key, str(i))
+                write_lat.append(time.perf_counter() - t0)
+            else:
+                await asyncio.to_thread(_read, db, key)
+                read_lat.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in range(clients)))
+    elapsed = time.perf_counter() - t0
+    db.close_connections()
+    return elapsed, read_lat, write_lat
+
+
+def pct(values, q):
+    if not values:
+        return 0.0
+    return statistics.quantiles(values, n=100)[q - 1] * 1000 if len(values) > 1 else values[0] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--write-share", type=float, nargs="+", default=[0.05, 0.2, 0.5])
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    for share in args.write_share:
+        for mode in ("per-call", "writer"):
+            with tempfile.TemporaryDirectory() as tmp:
+                elapsed, reads, writes = asyncio.run(
+                    run(mode, Path(tmp) / "bench.db", args.clients, args.ops, share, args.seed)
+                )
+            total = len(reads) + len(writes)
+            print(
+                f"writes {share:4.0%} {mode:>8}: {total / elapsed:8,.0f} ops/s  "
+                f"write p50 {pct(writes, 50):6.1f} ms p99 {pct(writes, 99):6.1f} ms  "
+                f"read p99 {pct(reads, 99):6.1f} ms",
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Benchmark event summarization: one LLM call per batch against concurrent per-segment calls.
+
+Builds a channel batch of ``--messages`` messages from several
+conversations, each on its own topic (Chinese and English), some separated
+by silences longer than ``segment_max_gap`` and some following each other
+directly, with replies inside each conversation. ``EventSummarizationService.summarize_events``
+then runs end to end except for the LLM, which a fake model replaces: it
+builds the real prompts, counts their tokens (tiktoken ``cl100k_base`` when
+available, otherwise 4 characters per token) and answers after
+
+    --call-latency + prompt tokens * --prefill-ms + fragments * --fragment-tokens * --decode-ms
+
+with one fragment per ``--messages-per-fragment`` messages.
+
+- ``single``: ``_group_messages`` as it was, the whole batch in one call;
+- ``segmented``: the segmenter, with ``--concurrency`` calls at a time.
+
+Times are in scaled wall time (``--scale``) and reported unscaled.
+
+Usage:
+    python scripts/benchmarks/bench_event_segmentation.py --messages 200 --concurrency 3
+"""
+import argparse
+import asyncio
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from cogs.memory.services import event_summarization_service as service_module
+from cogs.memory.services.event_summarization_service import EventSummarizationService
+
+TOPICS = [
+    ["副本", "裝備", "補師", "組隊", "王", "強化", "掉寶", "公會"],
+    ["晚餐", "拉麵", "火鍋", "餐廳", "訂位", "排隊", "甜點", "宵夜"],
+    ["deploy", "server", "database", "migration", "rollback", "latency", "logs", "outage"],
+    ["考試", "作業", "報告", "教授", "期末", "筆記", "圖書館", "複習"],
+    ["movie", "trailer", "director", "cinema", "tickets", "sequel", "soundtrack", "review"],
+    ["颱風", "下雨", "停班", "停課", "氣象", "雨傘", "淹水", "放假"],
+]
+FILLER = ["我覺得", "真的", "等等", "好像", "I think", "maybe", "lol", "對啊", "然後"]
+
+
+def make_messages(args, rng):
+    channel = SimpleNamespace(id=500)
+    guild = SimpleNamespace(id=1)
+    users = [SimpleNamespace(id=i, name=f"user{i}", display_name=f"User {i}", bot=False) for i in range(6)]
+    at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    messages, topic = [], 0
+    while len(messages) < args.messages:
+        words = TOPICS[topic % len(TOPICS)]
+        topic += 1
+        first = len(messages)
+        for _ in range(rng.randint(15, 45)):
+            at += timedelta(seconds=rng.randint(5, 90))
+            text = " ".join(rng.sample(words, 3) + rng.sample(FILLER, 2))
+            reference = None
+            if len(messages) > first and rng.random() < 0.2:
+                reference = SimpleNamespace(message_id=messages[rng.randrange(first, len(messages))].id)
+            messages.append(SimpleNamespace(
+                id=10**6 + len(messages), content=text, created_at=at, author=rng.choice(users),
+                channel=channel, guild=guild, reactions=[], reference=reference,
+            ))
+        # Half the conversations end in a long silence, the others run into the next topic.
+        at += timedelta(hours=2) if rng.random() < 0.5 else timedelta(seconds=30)
+    return messages[:args.messages]
+
+
+def token_counter():
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception:  # not installed, or the encoding cannot be downloaded
+        return lambda text: math.ceil(len(text) / 4)
+    return lambda text: len(encoding.encode(text))
+
+
+class FakeModel:
+    def __init__(self, service, args):
+        self.service = service
+        self.args = args
+        self.count = token_counter()
+        self.system_tokens = self.count(service._get_system_prompt())
+        self.prompt_tokens = []
+
+    async def __call__(self, message_data, previous_summary=""):
+        args = self.args
+        tokens = self.system_tokens + self.count(
+            self.service._get_user_prompt_with_messages(message_data, previous_summary)
+        )
+        self.prompt_tokens.append(tokens)
+        fragments = max(1, math.ceil(len(message_data) / args.messages_per_fragment))
+        seconds = args.call_latency + tokens * args.prefill_ms / 1000 + fragments * args.fragment_tokens * args.decode_ms / 1000
+        await asyncio.sleep(seconds * args.scale)
+        step = math.ceil(len(message_data) / fragments)
+        return service_module.MemoryFragmentList(fragments=[
+            service_module.MemoryFragment(
+                query_key=f"event {start}", query_keywords=["bench"], query_value="summary",
+                start_message_id=start, end_message_id=min(start + step - 1, len(message_data)),
+            )
+            for start in range(1, len(message_data) + 1, step)
+        ])
+
+
+async def run(mode, messages, args):
+    settings = SimpleNamespace(
+        summarization_concurrency=args.concurrency, segment_max_gap=args.max_gap, segment_max_messages=args.max_segment,
+    )
+    service = EventSummarizationService(bot=None, settings=settings)
+    model = FakeModel(service, args)
+    service._get_llm_summary = model
+    if mode == "single":
+        async def single_group(messages):
+            return [messages]
+
+        service._group_messages = single_group
+    await service._group_messages(messages[:1])  # load jieba before timing
+    t0 = time.perf_counter()
+    summaries = await service.summarize_events(messages, previous_summary=args.previous_summary)
+    return (time.perf_counter() - t0) / args.scale, model.prompt_tokens, summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=3)
+    parser.add_argument("--max-gap", type=float, default=1800.0)
+    parser.add_argument("--max-segment", type=int, default=60)
+    parser.add_argument("--call-latency", type=float, default=1.0, help="seconds per call")
+    parser.add_argument("--prefill-ms", type=float, default=0.2, help="ms per prompt token")
+    parser.add_argument("--decode-ms", type=float, default=20.0, help="ms per output token")
+    parser.add_argument("--fragment-tokens", type=int, default=150)
+    parser.add_argument("--messages-per-fragment", type=int, default=15)
+    parser.add_argument("--previous-summary", default="上次大家在討論週末要去哪裡玩，最後決定去海邊。" * 3)
+    parser.add_argument("--scale", type=float, default=0.01, help="wall seconds per simulated second")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    messages = make_messages(args, random.Random(args.seed))
+    for mode in ("single", "segmented"):
+        elapsed, prompt_tokens, summaries = asyncio.run(run(mode, messages, args))
+        print(
+            f"{mode:>9}: {len(prompt_tokens):3d} LLM calls  wall {elapsed:6.1f} s  "
+            f"prompt tokens {sum(prompt_tokens):7,} total  {max(prompt_tokens):6,} largest  "
+            f"{len(summaries):3d} events",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
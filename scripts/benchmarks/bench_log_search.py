@@ -0,0 +1,160 @@
+"""Benchmark filtered log queries through LogIndex against a full scan.
+
+Generates a synthetic log tree of roughly ``--size-gb`` gigabytes spread over
+``--servers`` guilds, ``--days`` days and four levels, builds the index, then
+times a few dashboard-style queries (first page of 100, newest first):
+
+- one user in one guild;
+- one guild's WARNING and ERROR records within one hour;
+- one source across all guilds.
+
+``scan`` answers the same queries by reading every file that could match,
+which is what grepping the raw JSONL amounted to.
+
+Usage:
+    python scripts/benchmarks/bench_log_search.py --size-gb 2 [--keep DIR]
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from addons.log_index import LogIndex
+
+START = datetime(2024, 3, 1, tzinfo=timezone.utc)
+LEVELS = (("INFO", 0.85), ("DEBUG", 0.1), ("WARNING", 0.04), ("ERROR", 0.01))
+SOURCES = [f"cogs.module_{i}" for i in range(40)]
+
+
+def generate(base: Path, size_gb: float, servers: int, days: int) -> int:
+    """Write the tree; returns the number of records."""
+    line_size = 330
+    per_file = int(size_gb * 1e9 / line_size / (servers * days))
+    total = 0
+    for s in range(servers):
+        server = str(100000 + s)
+        for d in range(days):
+            day = START + timedelta(days=d)
+            day_dir = base / server / day.strftime("%Y%m%d")
+            day_dir.mkdir(parents=True, exist_ok=True)
+            for level, share in LEVELS:
+                count = max(1, int(per_file * share))
+                step = 86400 / count
+                with open(day_dir / f"{level.lower()}.jsonl", "w", encoding="utf-8") as fh:
+                    for i in range(count):
+                        ts = day + timedelta(seconds=i * step)
+                        fh.write(json.dumps({
+                            "timestamp": ts.isoformat().replace("+00:00", "Z"),
+                            "level": level,
+                            "source": SOURCES[(i * 7 + s) % len(SOURCES)],
+                            "server_id": server,
+                            "channel_or_file": f"channel-{i % 20}",
+                            "user_id": str(1000 + (i * 31 + d) % 5000),
+                            "action": "receive_message",
+                            "message": f"synthetic message {i} " + "lorem ipsum " * 12,
+                            "trace_id": None,
+                            "extra": {"channel_id": i % 20},
+                        }, separators=(",", ":")) + "\n")
+                total += count
+    return total
+
+
+def scan(base: Path, guild_id=None, levels=None, source=None, user_id=None, start=None, end=None, limit=100):
+    """Full scan of every candidate file, keeping the newest ``limit`` matches."""
+    matches = []
+    for server_dir in base.iterdir():
+        if guild_id and server_dir.name != guild_id:
+            continue
+        for day_dir in server_dir.iterdir():
+            for path in day_dir.glob("*.jsonl"):
+                if levels and path.name.split(".")[0].upper() not in levels:
+                    continue
+                with open(path, "rb") as fh:
+                    for line in fh:
+                        record = json.loads(line)
+                        ts = record["timestamp"]
+                        if start and ts < start or end and ts > end:
+                            continue
+                        if source and record["source"] != source:
+                            continue
+                        if user_id and record["user_id"] != user_id:
+                            continue
+                        matches.append(record)
+    matches.sort(key=lambda r: r["timestamp"], reverse=True)
+    return matches[:limit]
+
+
+def timed(fn, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-gb", type=float, default=2.0)
+    parser.add_argument("--servers", type=int, default=20)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024)
+    parser.add_argument("--keep", help="use (and keep) this directory instead of a temp dir")
+    parser.add_argument("--no-scan", action="store_true", help="skip the full-scan baseline")
+    args = parser.parse_args()
+
+    root = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="bench_log_search_"))
+    base = root / "logs"
+    try:
+        if not base.exists():
+            t0 = time.perf_counter()
+            records = generate(base, args.size_gb, args.servers, args.days)
+            size = sum(p.stat().st_size for p in base.rglob("*.jsonl"))
+            print(f"generated {records:,} records, {size / 1e9:.2f} GB in {time.perf_counter() - t0:.1f}s")
+
+        index = LogIndex(root / "index.db", base, chunk_size=args.chunk_size)
+        t0 = time.perf_counter()
+        stats = index.refresh(full=True)
+        print(
+            f"index build: {time.perf_counter() - t0:.1f}s, {stats.chunks:,} chunks, "
+            f"index {(root / 'index.db').stat().st_size / 1e6:.1f} MB"
+        )
+        t0 = time.perf_counter()
+        index.refresh(full=True)
+        print(f"no-op rescan: {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+        guild = "100003"
+        hour = (START + timedelta(days=args.days // 2, hours=13)).isoformat().replace("+00:00", "Z")
+        hour_end = (START + timedelta(days=args.days // 2, hours=14)).isoformat().replace("+00:00", "Z")
+        queries = {
+            "user in guild": dict(guild_id=guild, user_id="1234"),
+            "guild WARNING+, 1 hour": dict(guild_id=guild, levels=["WARNING", "ERROR"], start=hour, end=hour_end),
+            "source, all guilds": dict(source=SOURCES[5]),
+        }
+        for name, query in queries.items():
+            elapsed, page = timed(lambda: index.search(limit=100, **query))
+            line = f"{name:>22}: index {elapsed * 1000:8.1f} ms ({page.chunks_read} chunks, {len(page.records)} hits)"
+            if not args.no_scan:
+                scan_elapsed, expected = timed(lambda: scan(base, limit=100, **query), repeat=1)
+                assert [r["timestamp"] for r in page.records] == [r["timestamp"] for r in expected]
+                line += f"   scan {scan_elapsed * 1000:10.1f} ms"
+            print(line)
+            if page.next_cursor:
+                elapsed, _ = timed(lambda: index.search(limit=100, cursor=page.next_cursor, **query))
+                print(f"{'':>22}  next page {elapsed * 1000:6.1f} ms")
+        index.close()
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark time-range reads on plain vs compacted day logs.
+
+Writes one synthetic day of INFO records, then reads a one-hour window by
+scanning the plain NDJSON file (what the stats migration did before) and
+through the block index of the compacted segment.
+
+Usage:
+    python scripts/benchmarks/bench_log_segments.py --records 200000 [--block-size 262144] [--window 3600]
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from addons.log_segments import compact_file, iter_segment, segment_paths
+
+DAY = datetime(2024, 3, 5, tzinfo=timezone.utc)
+
+
+def write_day(path: Path, records: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    step = 86400 / records
+    with open(path, "w", encoding="utf-8") as fh:
+        for i in range(records):
+            ts = DAY + timedelta(seconds=i * step)
+            fh.write(json.dumps({
+                "timestamp": ts.isoformat().replace("+00:00", "Z"),
+                "level": "INFO",
+                "source": "bot",
+                "server_id": "42",
+                "channel_or_file": f"channel-{i % 20}",
+                "user_id": str(1000 + i % 500),
+                "action": "receive_message",
+                "message": f"synthetic message {i} " + "lorem ipsum " * 8,
+                "trace_id": None,
+                "extra": {"channel_id": i % 20},
+            }, separators=(",", ":")) + "\n")
+
+
+def scan_plain(path: Path, start: float, end: float) -> int:
+    count = 0
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            record = json.loads(line)
+            ts = datetime.fromisoformat(record["timestamp"].replace("Z", "+00:00")).timestamp()
+            if start <= ts <= end:
+                count += 1
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--block-size", type=int, default=256 * 1024)
+    parser.add_argument("--window", type=float, default=3600.0, help="range length in seconds")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="bench_log_segments_"))
+    try:
+        plain = root / "plain" / "info.jsonl"
+        packed = root / "packed" / "info.jsonl"
+        write_day(plain, args.records)
+        packed.parent.mkdir(parents=True)
+        shutil.copy(plain, packed)
+
+        t0 = time.perf_counter()
+        index = compact_file(packed, block_size=args.block_size)
+        compact_s = time.perf_counter() - t0
+        gz_size = segment_paths(packed)[0].stat().st_size
+        plain_size = plain.stat().st_size
+
+        start = DAY.timestamp() + 12 * 3600
+        end = start + args.window
+
+        t0 = time.perf_counter()
+        plain_hits = scan_plain(plain, start, end)
+        plain_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        packed_hits = sum(1 for _ in iter_segment(packed, start, end))
+        packed_s = time.perf_counter() - t0
+
+        touched = sum(1 for b in index.blocks if b.overlaps(start, end))
+        print(f"records:            {args.records}")
+        print(f"plain size:         {plain_size / 1e6:.1f} MB")
+        print(f"compacted size:     {gz_size / 1e6:.1f} MB ({plain_size / gz_size:.1f}x), {len(index.blocks)} blocks")
+        print(f"compaction time:    {compact_s:.2f} s")
+        print(f"range ({args.window:.0f}s) plain scan:   {plain_s * 1000:8.1f} ms  ({plain_hits} records)")
+        print(f"range ({args.window:.0f}s) indexed read: {packed_s * 1000:8.1f} ms  ({packed_hits} records, {touched} blocks)")
+        if plain_hits != packed_hits:
+            print("MISMATCH between plain and indexed results")
+            sys.exit(1)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
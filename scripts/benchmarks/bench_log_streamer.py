@@ -0,0 +1,137 @@
+"""Load-test LogStreamer fan-out with many fake WebSocket clients.
+
+Some of the clients are slow: every ``send_text`` sleeps ``--slow-delay``
+seconds. Records are published at a steady rate, and the script measures how
+long a fast client waits for each record. ``queued`` is the current
+per-client queue design. ``sequential`` replays the old fan-out, where each
+record was sent to each client in turn with an awaited ``send_text``, so a
+slow client delays every client behind it.
+
+Usage:
+    python scripts/benchmarks/bench_log_streamer.py --clients 500 --slow 50 --records 200
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from dashboard.websocket.log_streamer import LogStreamer
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.received: list[float] = []
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        else:
+            await asyncio.sleep(0)
+        self.received.append(time.perf_counter())
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        pass
+
+
+class SequentialStreamer:
+    """The old fan-out: serialize per call, await each client in turn."""
+
+    def __init__(self) -> None:
+        self.clients: list[FakeWebSocket] = []
+
+    async def connect(self, websocket: FakeWebSocket) -> None:
+        self.clients.append(websocket)
+
+    async def broadcast(self, record: dict) -> None:
+        msg = json.dumps(record)
+        for ws in list(self.clients):
+            await ws.send_text(msg)
+
+
+def _record(i: int) -> dict:
+    return {"timestamp": f"t{i}", "level": "INFO", "server_id": "1", "message": f"record {i}"}
+
+
+async def run_queued(args, fast, slow):
+    streamer = LogStreamer(queue_size=args.queue_size, send_timeout=60.0)
+    # Slow clients connect first, so they sit in front of the fast ones.
+    for ws in slow + fast:
+        await streamer.connect(ws)
+    published = []
+    publish_cost = []
+    for i in range(args.records):
+        published.append(time.perf_counter())
+        streamer.publish(_record(i))
+        publish_cost.append(time.perf_counter() - published[-1])
+        await asyncio.sleep(args.interval)
+    while any(len(ws.received) < args.records for ws in fast):
+        await asyncio.sleep(0.001)
+    stats = streamer.stats()
+    for ws in slow + fast:
+        await streamer.disconnect(ws)
+    return published, publish_cost, stats
+
+
+async def run_sequential(args, fast, slow):
+    streamer = SequentialStreamer()
+    for ws in slow + fast:
+        await streamer.connect(ws)
+    published = []
+    # The old _dispatch created one broadcast task per record.
+    tasks = []
+    for i in range(args.records):
+        published.append(time.perf_counter())
+        tasks.append(asyncio.create_task(streamer.broadcast(_record(i))))
+        await asyncio.sleep(args.interval)
+    await asyncio.gather(*tasks)
+    return published, None, None
+
+
+def report(name, published, publish_cost, fast):
+    latencies = [
+        ws.received[i] - published[i]
+        for ws in fast
+        for i in range(min(len(ws.received), len(published)))
+    ]
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    line = (
+        f"{name:>10}: fast-client latency p50 {statistics.median(latencies) * 1000:8.2f} ms, "
+        f"p99 {p99 * 1000:8.2f} ms, max {latencies[-1] * 1000:8.2f} ms"
+    )
+    if publish_cost:
+        # Time publish() holds the event loop: serialize once, queue for every client.
+        line += f"; publish {statistics.mean(publish_cost) * 1e6:.1f} us/record"
+    print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=500, help="total clients")
+    parser.add_argument("--slow", type=int, default=50, help="how many of them are slow")
+    parser.add_argument("--slow-delay", type=float, default=0.02, help="seconds per send on a slow client")
+    parser.add_argument("--records", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.005, help="seconds between records")
+    parser.add_argument("--queue-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    for name, runner in (("queued", run_queued), ("sequential", run_sequential)):
+        fast = [FakeWebSocket(0.0) for _ in range(args.clients - args.slow)]
+        slow = [FakeWebSocket(args.slow_delay) for _ in range(args.slow)]
+        published, publish_cost, stats = asyncio.run(runner(args, fast, slow))
+        report(name, published, publish_cost, fast)
+        if stats:
+            print(f"{'':>10}  streamer stats: {stats}")
+
+
+if __name__ == "__main__":
+    main()
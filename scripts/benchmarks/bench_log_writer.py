@@ -0,0 +1,78 @@
+"""Benchmark BackgroundWriter throughput with many distinct guild logs.
+
+Compares the pooled append handles against the previous behaviour of opening
+and closing every server/date/level file once per batch.
+
+Usage:
+    python scripts/benchmarks/bench_log_writer.py --guilds 500 --records 200000 [--max-open 1024] [--fsync batch]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import addons.logging as logging_module
+from addons.logging import BackgroundWriter, _build_records, _record_date
+
+
+class ReopeningWriter(BackgroundWriter):
+    """The pre-pool write path: one open/append/close per file per batch."""
+
+    def _write_batch(self, batch, max_retries=3):
+        grouped = {}
+        for entry in batch:
+            for record in _build_records(entry):
+                key = (record.server_id, _record_date(record.timestamp), record.level)
+                grouped.setdefault(key, []).append(record.to_json_line())
+        base = logging_module.CONFIG.get("log_base_path", "logs")
+        for (server, date_str, level), lines in grouped.items():
+            log_dir = os.path.join(base, server, date_str)
+            os.makedirs(log_dir, exist_ok=True)
+            with open(os.path.join(log_dir, f"{level.lower()}.jsonl"), "a", encoding="utf-8") as fh:
+                fh.write("\n".join(lines) + "\n")
+                fh.flush()
+                if self._pool.fsync_policy != "never":
+                    os.fsync(fh.fileno())
+
+
+def run(writer_cls, guilds, records, fsync, max_open):
+    with tempfile.TemporaryDirectory() as tmp:
+        logging_module.CONFIG["log_base_path"] = tmp
+        logging_module.CONFIG["files"] = {"max_open": max_open, "fsync": fsync, "fsync_interval": 1.0}
+        writer = writer_cls()
+        rng = random.Random(0)
+        message = "x" * 160
+        start = time.perf_counter()
+        for _ in range(records):
+            while writer._queue.full():
+                time.sleep(0.0005)
+            writer.submit((1709632800.0, rng.choice(("INFO", "INFO", "INFO", "WARNING")), "bench",
+                           f"guild{rng.randrange(guilds)}", "", {}, {}, message, None))
+        writer.stop(timeout=600)
+        elapsed = time.perf_counter() - start
+        opens = getattr(writer._pool, "metrics", {}).get("opens") if writer_cls is BackgroundWriter else None
+    return records / elapsed, opens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=500)
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--fsync", default="never", choices=("never", "batch", "interval"))
+    parser.add_argument("--max-open", type=int, default=1024)
+    args = parser.parse_args()
+
+    logging_module.CONFIG["console"] = {**logging_module.CONFIG.get("console", {}), "enabled": False}
+    for label, cls in (("reopen per batch", ReopeningWriter), ("handle pool", BackgroundWriter)):
+        rate, opens = run(cls, args.guilds, args.records, args.fsync, args.max_open)
+        extra = f"   file opens {opens}" if opens is not None else ""
+        print(f"{label:<17} {rate:10.0f} records/s{extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Measure the per-call cost of ``logger.info`` on the asyncio event loop.
+
+``deferred`` is the current path: the caller only submits a tuple. ``inline``
+replays what ``_emit`` used to do on the calling thread for every call:
+merge context, build the record, ``json.dumps`` it, format the console line
+and build the dashboard broadcast dict. The background writer runs in both
+cases with console output disabled, so only caller-side cost differs; records
+that reach the console are still built and rendered by the caller.
+
+Usage:
+    python scripts/benchmarks/bench_logger_emit.py --calls 50000
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import addons.logging as logging_module
+from addons.logging import LoggerAdapter, _build_records, get_logger
+
+
+class InlineAdapter(LoggerAdapter):
+    """LoggerAdapter that serializes on the calling thread, as before."""
+
+    def _emit(self, level, message, exception, **event_fields):
+        entry = (time.time(), level, self.source, self.server_id, self.channel,
+                 self.bound_context, event_fields, message, exception)
+        record = _build_records(entry)[0]
+        record.to_json_line()
+        self._format_console_line(record)
+        record.to_dict()  # dashboard broadcast payload
+        self._writer.submit(entry)
+
+
+async def measure(logger, calls, rounds):
+    per_call = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for i in range(calls):
+            logger.info("handled message", action="receive_message", channel_or_file="general", n=i)
+        per_call.append((time.perf_counter() - start) / calls)
+        # Let the writer catch up so queue-full drops do not skew the next round.
+        while not logger._writer._queue.empty():
+            await asyncio.sleep(0.01)
+    return statistics.median(per_call)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logging_module.CONFIG["log_base_path"] = tmp
+        logging_module.CONFIG["console"] = {**logging_module.CONFIG.get("console", {}), "enabled": False}
+        deferred = get_logger(server_id="123", source="bench").bind(user_id="42")
+        inline = InlineAdapter("123", source="bench", bound={"user_id": "42"})
+        for label, logger in (("inline", inline), ("deferred", deferred)):
+            cost = await measure(logger, args.calls, args.rounds)
+            print(f"{label:<9} logger.info on the event loop: {cost * 1e6:7.2f} us/call")
+        print(f"dropped: {logger._writer.metrics()['dropped']}")
+        logging_module.BackgroundWriter.get_instance().stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
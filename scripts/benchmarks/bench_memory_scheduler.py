@@ -0,0 +1,136 @@
+"""Benchmark background memory jobs under constant reply traffic: cancel-on-reply against the scheduler.
+
+Replies arrive as a Poisson process at ``--reply-rate`` per second and run
+for ``--reply-seconds`` each. A memory job is ``--steps`` LLM calls of
+``--step-seconds`` each; a new job starts as soon as the previous one ends.
+Everything runs in scaled time (``--scale``), so a 10-minute simulation takes
+seconds.
+
+- ``cancel``: what ``MessageTracker.interrupt_all`` did. Every reply cancels
+  the running job, which loses the LLM call in flight and its finished
+  steps, and starts over once no reply is running;
+- ``scheduler``: ``BackgroundScheduler`` with ``--min-share`` and ``--window``. Jobs pause at
+  checkpoints between LLM calls and keep what they have done.
+
+Usage:
+    python scripts/benchmarks/bench_memory_scheduler.py --reply-rate 0.5 --seconds 600
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from cogs.memory.services.background_scheduler import BackgroundScheduler
+
+
+class Workload:
+    def __init__(self, args):
+        self.args = args
+        self.scale = args.scale
+        self.replies_running = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.reply_started = asyncio.Event()
+        self.completed = []
+        self.wasted = 0.0
+
+    async def replies(self, scheduler, rng, until):
+        loop = asyncio.get_running_loop()
+        tasks = []
+
+        async def reply():
+            self.replies_running += 1
+            self.idle.clear()
+            self.reply_started.set()
+            try:
+                if scheduler is None:
+                    await asyncio.sleep(self.args.reply_seconds * self.scale)
+                else:
+                    async with scheduler.foreground():
+                        await asyncio.sleep(self.args.reply_seconds * self.scale)
+            finally:
+                self.replies_running -= 1
+                if not self.replies_running:
+                    self.idle.set()
+
+        while loop.time() < until:
+            await asyncio.sleep(rng.expovariate(self.args.reply_rate) * self.scale)
+            tasks.append(asyncio.create_task(reply()))
+        await asyncio.gather(*tasks)
+
+    async def cancel_jobs(self, until):
+        loop = asyncio.get_running_loop()
+        while loop.time() < until:
+            await self.idle.wait()
+            started = loop.time()
+            self.reply_started.clear()
+            job = asyncio.create_task(asyncio.sleep(self.args.steps * self.args.step_seconds * self.scale))
+            interrupt = asyncio.create_task(self.reply_started.wait())
+            await asyncio.wait({job, interrupt}, return_when=asyncio.FIRST_COMPLETED)
+            interrupt.cancel()
+            if job.done():
+                self.completed.append((loop.time() - started) / self.scale)
+            else:
+                job.cancel()
+                self.wasted += (loop.time() - started) / self.scale
+
+    async def scheduled_jobs(self, scheduler, until):
+        loop = asyncio.get_running_loop()
+        while loop.time() < until:
+            started = loop.time()
+            async with scheduler.background_job("bench"):
+                for _ in range(self.args.steps):
+                    await scheduler.checkpoint()
+                    await asyncio.sleep(self.args.step_seconds * self.scale)
+            self.completed.append((loop.time() - started) / self.scale)
+
+
+async def run(mode, args):
+    workload = Workload(args)
+    rng = random.Random(args.seed)
+    loop = asyncio.get_running_loop()
+    until = loop.time() + args.seconds * args.scale
+    if mode == "cancel":
+        await asyncio.gather(workload.replies(None, rng, until), workload.cancel_jobs(until))
+        return workload, None
+    scheduler = BackgroundScheduler(min_share=args.min_share, window=args.window * args.scale)
+    await asyncio.gather(workload.replies(scheduler, rng, until), workload.scheduled_jobs(scheduler, until))
+    return workload, scheduler.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=600.0, help="simulated seconds")
+    parser.add_argument("--reply-rate", type=float, nargs="+", default=[0.1, 0.3, 0.5])
+    parser.add_argument("--reply-seconds", type=float, default=3.0)
+    parser.add_argument("--steps", type=int, default=3)
+    parser.add_argument("--step-seconds", type=float, default=4.0)
+    parser.add_argument("--min-share", type=float, default=0.2)
+    parser.add_argument("--window", type=float, default=60.0, help="simulated seconds")
+    parser.add_argument("--scale", type=float, default=0.01, help="wall seconds per simulated second")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    rates = args.reply_rate
+    for rate in rates:
+        args.reply_rate = rate
+        for mode in ("cancel", "scheduler"):
+            workload, stats = asyncio.run(run(mode, args))
+            done = workload.completed
+            line = (
+                f"replies {rate:.1f}/s {mode:>9}: {len(done):4d} jobs done  "
+                f"job time p50 {statistics.median(done) if done else float('nan'):6.1f} s  "
+                f"max {max(done) if done else float('nan'):6.1f} s  "
+                f"LLM time thrown away {workload.wasted:6.1f} s"
+            )
+            if stats is not None:
+                line += f"  forced resumes {stats.forced_resumes}"
+            print(line, flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Benchmark how memory processing gets its messages: channel history over REST against the local spool.
+
+For each of ``--cycles`` channels, ``MessageTracker`` tracks
+``--threshold`` messages (one bus batch of ``--batch`` at a time, a bot
+reply after every fifth message) against a real ``EpisodicStorage``, then
+``_process_channel_memory`` runs up to the summarization call, which a
+fake service records and answers with no events. The channel fakes the
+Discord REST API: every request sleeps ``--rest-latency`` seconds, and
+history is paged at 100 messages per request, as discord.py does.
+
+- ``rest``: the spool is emptied first, so processing fetches the start
+  message and the history after it, which is what it always did before;
+- ``spool``: everything tracked is read back from the spool;
+- ``gap``: ``--gap`` spooled messages in the middle are dropped, as if
+  their flush was lost, and only they are fetched.
+
+Latency is from the start of processing to the summarization call.
+
+Usage:
+    python scripts/benchmarks/bench_message_spool.py --cycles 20 --rest-latency 0.15
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from cogs.memory.db.connection import DatabaseConnection
+from cogs.memory.db.episodic_storage import EpisodicStorage
+from cogs.memory.services import message_tracker
+from cogs.memory.services.message_tracker import MessageTracker
+
+PAGE = 100
+
+
+class FakeChannel:
+    def __init__(self, channel_id, latency):
+        self.id = channel_id
+        self.guild = SimpleNamespace(id=1)
+        self.latency = latency
+        self.messages = []
+        self.requests = 0
+
+    async def _request(self):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+
+    async def fetch_message(self, message_id):
+        await self._request()
+        return next(m for m in self.messages if m.id == message_id)
+
+    async def history(self, after, before=None, limit=100):
+        def newer(m):
+            return m.created_at > after if isinstance(after, datetime) else m.id > after.id
+
+        matching = [m for m in self.messages if newer(m) and (before is None or m.id < before.id)][:limit]
+        for start in range(0, max(len(matching), 1), PAGE):
+            await self._request()
+            for message in matching[start:start + PAGE]:
+                yield message
+
+
+class FakeSummarizer:
+    called_at = 0.0
+
+    def __init__(self, bot, settings):
+        pass
+
+    async def summarize_events(self, messages, previous_summary="", checkpoint=None):
+        FakeSummarizer.called_at = time.perf_counter()
+        return []
+
+
+def make_messages(channel, count, start_id):
+    users = [SimpleNamespace(id=i, name=f"user{i}", display_name=f"User {i}", bot=False) for i in range(5)]
+    bot = SimpleNamespace(id=99, name="bot", display_name="Bot", bot=True)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    messages = []
+    for i in range(count):
+        author = bot if i % 5 == 4 else users[i % 5]
+        messages.append(SimpleNamespace(
+            id=start_id + i, author=author, content=f"message {i} " + "lorem ipsum " * 8,
+            created_at=start + timedelta(seconds=i), channel=channel, guild=channel.guild, reactions=[],
+        ))
+    return messages
+
+
+async def run(mode, db_path, args):
+    db = DatabaseConnection(db_path)
+    storage = EpisodicStorage(db)
+    settings = SimpleNamespace(
+        message_threshold=args.threshold, time_threshold=10**9, counter_flush_interval=10**9
+    )
+    tracker = MessageTracker(bot=None, storage=storage, settings=settings)
+    latencies, requests = [], []
+    for cycle in range(args.cycles):
+        channel = FakeChannel(500 + cycle, args.rest_latency)
+        channel.messages = make_messages(channel, args.threshold, 10**6 * (cycle + 1))
+        for i in range(0, len(channel.messages), args.batch):
+            await tracker.track_messages(channel.messages[i:i + args.batch])
+        await tracker.flush_counters()
+        if mode == "rest":
+            await db.write(lambda conn: conn.execute("DELETE FROM channel_message_spool"))
+        elif mode == "gap":
+            middle = channel.messages[len(channel.messages) // 2].id
+            await db.write(lambda conn: conn.execute(
+                "DELETE FROM channel_message_spool WHERE message_id >= ? AND message_id < ?",
+                (middle, middle + args.gap),
+            ))
+        t0 = time.perf_counter()
+        await tracker._process_channel_memory(channel)
+        latencies.append(FakeSummarizer.called_at - t0)
+        requests.append(channel.requests)
+    await tracker.close()
+    db.close_connections()
+    return latencies, requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--threshold", type=int, default=100)
+    parser.add_argument("--batch", type=int, default=20)
+    parser.add_argument("--gap", type=int, default=10)
+    parser.add_argument("--rest-latency", type=float, default=0.15, help="seconds per REST request")
+    args = parser.parse_args()
+    message_tracker.EventSummarizationService = FakeSummarizer
+
+    for mode in ("rest", "spool", "gap"):
+        with tempfile.TemporaryDirectory() as tmp:
+            latencies, requests = asyncio.run(run(mode, Path(tmp) / "episodic.db", args))
+        print(
+            f"{mode:>5}: {statistics.mean(requests):4.1f} REST requests/cycle  "
+            f"latency p50 {statistics.median(latencies) * 1000:7.1f} ms  max {max(latencies) * 1000:7.1f} ms",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
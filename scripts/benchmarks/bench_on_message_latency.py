@@ -0,0 +1,145 @@
+"""Benchmark receive-to-first-reply latency of on_message bookkeeping.
+
+Before the message bus, ``on_message`` awaited the episodic tracker (a state
+read and a state write), the dashboard ``StatsCollector`` insert, and
+``StatsCog`` awaited the per-user stats upsert, all before the placeholder
+reply could be sent. This replays a burst of messages against the real
+storage classes on temporary SQLite files and reports the latency up to the
+point where the reply would be sent, then how long the bus needs to drain.
+
+Usage:
+    python scripts/benchmarks/bench_on_message_latency.py --messages 2000 --channels 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from addons.message_bus import MessageBus
+from cogs.memory.db.connection import DatabaseConnection
+from cogs.memory.db.episodic_storage import EpisodicStorage
+from cogs.memory.db.stats_storage import StatsStorage
+from dashboard.services.stats_collector import StatsCollector
+
+
+def make_messages(count, channels):
+    start = datetime.now(timezone.utc)
+    return [
+        SimpleNamespace(
+            id=10**17 + i,
+            content=f"hello world {i} :)",
+            author=SimpleNamespace(id=1000 + i % 50, bot=False),
+            channel=SimpleNamespace(id=500 + i % channels),
+            guild=SimpleNamespace(id=1),
+            created_at=start + timedelta(milliseconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+async def track(storage, messages):
+    """The per-channel state update that MessageTracker performs."""
+    by_channel = {}
+    for m in messages:
+        by_channel.setdefault(m.channel.id, []).append(m)
+    for channel_id, batch in by_channel.items():
+        state = await storage.get_channel_memory_state(channel_id)
+        if state is None:
+            await storage.update_channel_memory_state(
+                channel_id, len(batch), batch[0].id, last_summary_timestamp=batch[0].created_at.timestamp()
+            )
+        else:
+            await storage.update_channel_memory_state(
+                channel_id, state["message_count"] + len(batch), state["start_message_id"]
+            )
+
+
+def user_stats_record(m):
+    return {
+        "user_id": str(m.author.id),
+        "guild_id": str(m.guild.id),
+        "message_content": m.content,
+        "channel_id": str(m.channel.id),
+        "timestamp": m.created_at.isoformat(),
+    }
+
+
+async def run_inline(messages, episodic, stats_storage, collector):
+    latencies = []
+    for m in messages:
+        start = time.perf_counter()
+        await track(episodic, [m])
+        await collector.record_message(str(m.guild.id), str(m.author.id), str(m.channel.id))
+        await stats_storage.upsert_user_stats(**user_stats_record(m))
+        latencies.append(time.perf_counter() - start)
+    return latencies, 0.0
+
+
+async def run_bus(messages, episodic, stats_storage, collector):
+    bus = MessageBus()
+
+    async def on_track(events):
+        await track(episodic, [e.message for e in events])
+
+    async def on_stats(events):
+        await collector.bulk_record_messages([
+            (str(e.message.guild.id), str(e.message.author.id), str(e.message.channel.id), e.received_at)
+            for e in events
+        ])
+
+    async def on_user_stats(events):
+        await stats_storage.bulk_upsert_user_stats([user_stats_record(e.message) for e in events])
+
+    bus.subscribe("message_tracker", on_track, batch_size=50, flush_interval=0.2)
+    bus.subscribe("stats_collector", on_stats, batch_size=200, flush_interval=1.0)
+    bus.subscribe("user_stats", on_user_stats, batch_size=200, flush_interval=1.0)
+
+    latencies = []
+    for m in messages:
+        start = time.perf_counter()
+        bus.publish(m)
+        latencies.append(time.perf_counter() - start)
+        # Yield like a real gateway loop does between events.
+        await asyncio.sleep(0)
+
+    drain_start = time.perf_counter()
+    await bus.close(timeout=600)
+    return latencies, time.perf_counter() - drain_start
+
+
+def report(label, latencies, drain):
+    ordered = sorted(latencies)
+    p50 = statistics.median(ordered) * 1000
+    p99 = ordered[int(len(ordered) * 0.99) - 1] * 1000
+    print(f"{label:<8} pre-reply p50 {p50:8.3f} ms   p99 {p99:8.3f} ms   background drain {drain:6.2f} s")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--channels", type=int, default=20)
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages, args.channels)
+    for label, runner in (("inline", run_inline), ("bus", run_bus)):
+        with tempfile.TemporaryDirectory() as tmp:
+            episodic = EpisodicStorage(DatabaseConnection(os.path.join(tmp, "episodic.db")))
+            await episodic.initialize_channel_memory_state()
+            stats_storage = StatsStorage(DatabaseConnection(os.path.join(tmp, "procedural.db")))
+            collector = StatsCollector(os.path.join(tmp, "stats.db"))
+            await collector.initialize()
+            latencies, drain = await runner(messages, episodic, stats_storage, collector)
+            await collector.close()
+            report(label, latencies, drain)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""Benchmark ProceduralStorage user lookups with thousands of users.
+
+Compares the batched loader against one ``to_thread`` query per user (the
+pre-loader behaviour of ``get_user_info``) and reports wall time, query count
+and worst event-loop lag.
+
+Usage:
+    python scripts/benchmarks/bench_procedural_loader.py --users 5000 --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from cogs.memory.db.connection import DatabaseConnection
+from cogs.memory.db.procedural_storage import ProceduralStorage
+
+
+class CountingConnection(DatabaseConnection):
+    def __init__(self, db_path):
+        super().__init__(db_path)
+        self.checkouts = 0
+
+    def get_connection(self):
+        self.checkouts += 1
+        return super().get_connection()
+
+
+def seed(db: DatabaseConnection, users: int) -> None:
+    with db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (discord_id, discord_name, display_names, created_at) VALUES (?, ?, ?, ?)",
+            [(str(i), f"user{i}", "[]", "2024-01-01T00:00:00") for i in range(users)],
+        )
+        conn.commit()
+
+
+async def measure(label: str, lookup, ids, concurrency: int, db: CountingConnection) -> None:
+    max_lag = 0.0
+    stop = asyncio.Event()
+
+    async def ticker():
+        nonlocal max_lag
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            max_lag = max(max_lag, time.perf_counter() - start - 0.001)
+
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(uid):
+        async with sem:
+            await lookup(uid)
+
+    db.checkouts = 0
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*[one(uid) for uid in ids])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    print(
+        f"{label:<12} {len(ids) / elapsed:>10.0f} lookups/s  "
+        f"queries={db.checkouts:<6} max_loop_lag={max_lag * 1000:.1f}ms"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = CountingConnection(os.path.join(tmp, "procedural.db"))
+        seed(db, args.users)
+        rng = random.Random(0)
+        ids = [str(rng.randrange(args.users * 2)) for _ in range(args.requests)]
+
+        naive = ProceduralStorage(db, cache_size_limit=0)
+
+        async def per_user(uid):
+            return await asyncio.to_thread(naive._get_users_info_sync, [uid])
+
+        await measure("per-user", per_user, ids, args.concurrency, db)
+
+        batched = ProceduralStorage(db, cache_size_limit=0)
+        await measure("batched", batched.get_user_info, ids, args.concurrency, db)
+
+        cached = ProceduralStorage(db, cache_size_limit=args.users)
+        await measure("batched+lru", cached.get_user_info, ids, args.concurrency, db)
+        db.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
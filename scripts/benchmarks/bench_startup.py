@@ -0,0 +1,100 @@
+"""Startup import benchmark: bot + cog modules, with and without heavy deps.
+
+Each run imports ``bot`` and every module under ``cogs/`` in a fresh
+interpreter and reports wall time and peak RSS. The ``eager`` variant also
+imports the dependencies that are now loaded lazily (sympy, yt_dlp, selenium,
+PIL, ...) to show what startup used to pay. A real time-to-ready needs a bot
+token; run the bot with ``PIGPIG_PROFILE_IMPORTS=1`` for that, and the
+on_ready log line reports it together with the import profile.
+
+Usage:
+    python scripts/benchmarks/bench_startup.py --runs 3 [--profile]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+HEAVY = [
+    "sympy",
+    "sympy.parsing.sympy_parser",
+    "yt_dlp",
+    "selenium.webdriver",
+    "PIL.Image",
+    "pdf2image",
+    "decord",
+    "jieba",
+    "langchain_qdrant",
+]
+
+CHILD = r'''
+import importlib, json, os, pkgutil, resource, sys, time
+start = time.perf_counter()
+from addons.lazy_import import ImportTimeProfiler
+profiler = ImportTimeProfiler().start() if os.environ.get("BENCH_PROFILE") else None
+failed = []
+for name in json.loads(os.environ["BENCH_EAGER"]):
+    try:
+        importlib.import_module(name)
+    except Exception:
+        failed.append(name)
+import cogs
+for name in ["bot"] + [f"cogs.{info.name}" for info in pkgutil.iter_modules(cogs.__path__)]:
+    try:
+        importlib.import_module(name)
+    except Exception:
+        failed.append(name)
+elapsed = time.perf_counter() - start
+if profiler is not None:
+    profiler.stop()
+    print(profiler.format_report(15), file=sys.stderr)
+rss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": elapsed, "rss_mib": rss_kib / 1024, "failed": failed}))
+'''
+
+
+def run_once(eager, profile):
+    env = dict(os.environ)
+    # addons.tokens exits if required settings are missing.
+    for key, value in (("TOKEN", "bench"), ("CLIENT_ID", "1"), ("CLIENT_SECRET_ID", "bench"),
+                       ("DASHBOARD_SECRET_KEY", "bench"), ("BUG_REPORT_CHANNEL_ID", "1"),
+                       ("BOT_OWNER_ID", "1")):
+        env.setdefault(key, value)
+    env["BENCH_EAGER"] = json.dumps(HEAVY if eager else [])
+    if profile:
+        env["BENCH_PROFILE"] = "1"
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    if profile:
+        print(proc.stderr.strip())
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--profile", action="store_true", help="print the slowest imports of the lazy run")
+    args = parser.parse_args()
+
+    for label, eager in (("eager heavy deps", True), ("lazy heavy deps", False)):
+        samples = [run_once(eager, args.profile and not eager and i == 0) for i in range(args.runs)]
+        seconds = statistics.median(s["seconds"] for s in samples)
+        rss = statistics.median(s["rss_mib"] for s in samples)
+        print(f"{label:<18} import {seconds * 1000:8.0f} ms   peak RSS {rss:7.1f} MiB")
+        if samples[0]["failed"]:
+            print(f"  (not importable here: {', '.join(samples[0]['failed'])})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark sustained stats event throughput of StatsCollector.
+
+``per-row`` replays what ``StatsCollector`` did before write-behind: every
+``record_*`` call opened a connection, inserted one row and committed.
+``write-behind`` is the current collector: events are buffered and flushed
+in batches over one long-lived connection.
+
+``--producers`` tasks record a mix of message (90%), LLM call (8%) and
+command (2%) events as fast as the collector accepts them; throughput counts
+events until all of them are committed. Also reports how long a single
+``record_*`` call holds up its caller.
+
+Usage:
+    python scripts/benchmarks/bench_stats_collector.py --events 20000 --producers 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiosqlite
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from dashboard.services.stats_collector import _INSERT_SQL, StatsCollector
+
+
+class PerRowCollector(StatsCollector):
+    """The pre-write-behind collector: one connection and commit per event."""
+
+    def _enqueue(self, table, rows):
+        raise NotImplementedError
+
+    async def _insert(self, table, row):
+        async with aiosqlite.connect(self._db_path) as db:
+            await db.execute(_INSERT_SQL[table], row)
+            await db.commit()
+
+    async def record_message(self, guild_id, user_id, channel_id, timestamp=None):
+        await self._insert("message_events", (guild_id, user_id, channel_id, timestamp or time.time()))
+
+    async def record_llm_call(self, guild_id, model_name, duration_ms, success=True, timestamp=None):
+        await self._insert("llm_call_events", (guild_id, model_name, timestamp or time.time(), duration_ms, int(success)))
+
+    async def record_command(self, guild_id, user_id, command_name, timestamp=None):
+        await self._insert("command_events", (guild_id, user_id, command_name, timestamp or time.time()))
+
+
+async def produce(collector, start, count, latencies):
+    for i in range(start, start + count):
+        guild = str(100 + i % 10)
+        user = str(1000 + i % 500)
+        t0 = time.perf_counter()
+        if i % 50 == 0:
+            await collector.record_command(guild, user, "help")
+        elif i % 50 < 5:
+            await collector.record_llm_call(guild, "model-a", 850.0, success=i % 7 != 0)
+        else:
+            await collector.record_message(guild, user, str(500 + i % 40))
+        latencies.append(time.perf_counter() - t0)
+        if i % 64 == 0:
+            # Let the flush task (and other producers) run, as a live loop would.
+            await asyncio.sleep(0)
+
+
+async def run(label, collector, events, producers):
+    await collector.initialize()
+    latencies = []
+    per_producer = events // producers
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        produce(collector, p * per_producer, per_producer, latencies) for p in range(producers)
+    ))
+    await collector.flush()
+    elapsed = time.perf_counter() - t0
+    await collector.close()
+
+    async with aiosqlite.connect(collector._db_path) as db:
+        written = 0
+        for table in _INSERT_SQL:
+            async with db.execute(f"SELECT COUNT(*) FROM {table}") as cursor:
+                written += (await cursor.fetchone())[0]
+    assert written == per_producer * producers, (written, per_producer * producers)
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+    print(
+        f"{label:>12}: {written / elapsed:10,.0f} events/s   "
+        f"record p50 {statistics.median(latencies) * 1e6:8.1f} us  p99 {p99:8.1f} us"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--producers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        await run("per-row", PerRowCollector(os.path.join(tmp, "per_row.db")), args.events, args.producers)
+        await run(
+            "write-behind",
+            StatsCollector(os.path.join(tmp, "write_behind.db"), batch_size=args.batch_size),
+            args.events,
+            args.producers,
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
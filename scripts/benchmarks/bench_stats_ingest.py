@@ -0,0 +1,105 @@
+"""Benchmark historical log ingestion into user_stats.
+
+Builds a synthetic log of ``--messages`` messages in time order (the record
+shape ``StatsCog`` produces while migrating logs), spread over
+``--days`` days, three guilds and ``--users`` users with skewed activity,
+then ingests it in batches two ways:
+
+- ``per-record``: the previous bulk path, which applied every record on its
+  own (streak read, user_stats upsert, hour upsert and a summary merge per
+  channel, emoji and word set) inside the batch transaction;
+- ``aggregated``: ``StatsStorage.bulk_upsert_user_stats`` as it is now.
+
+Both run the same emoji extraction and word segmentation; ``--no-words``
+swaps jieba for a whitespace split to isolate the database work.
+
+Usage:
+    python scripts/benchmarks/bench_stats_ingest.py --messages 1000000 [--no-words]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from cogs.memory.db import stats_storage
+from cogs.memory.db.connection import DatabaseConnection
+from cogs.memory.db.stats_storage import StatsStorage, _apply_batch
+
+VOCAB = [f"word{i}" for i in range(5000)] + ["今天", "天氣", "不錯", "我們", "一起", "吃飯", "遊戲", "音樂"]
+EMOJIS = ["😀", "😂", "👍", "🎉", "<:pig:1234567890>"]
+
+
+def make_log(count, users, days, seed=9):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    step = days * 86400 / count
+    records = []
+    for i in range(count):
+        text = " ".join(VOCAB[int(len(VOCAB) * rng.random() ** 2)] for _ in range(rng.randint(3, 15)))
+        if rng.random() < 0.3:
+            text += " " + rng.choice(EMOJIS)
+        user = int(users * rng.random() ** 3)
+        records.append({
+            "user_id": str(1000 + user),
+            "guild_id": str(100 + user % 3),
+            "message_content": text,
+            "channel_id": str(500 + rng.randrange(40)),
+            "timestamp": (start + timedelta(seconds=i * step)).isoformat(),
+        })
+    return records
+
+
+def per_record(storage, batch):
+    with storage.db.get_connection() as conn:
+        for rec in batch:
+            _apply_batch(conn, [rec])
+        conn.commit()
+
+
+def aggregated(storage, batch):
+    # What StatsStorage.bulk_upsert_user_stats runs on the writer thread.
+    with storage.db.get_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        _apply_batch(conn, batch)
+        conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--batch", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--no-words", action="store_true", help="replace jieba with a whitespace split")
+    args = parser.parse_args()
+
+    if args.no_words:
+        stats_storage.segment_words = lambda text: [w for w in text.split() if len(w) > 1]
+    else:
+        stats_storage.segment_words("warm up jieba 今天天氣不錯")
+    t0 = time.perf_counter()
+    records = make_log(args.messages, args.users, args.days)
+    print(f"generated {len(records):,} messages in {time.perf_counter() - t0:.1f}s")
+
+    for batch in args.batch:
+        line = f"batch {batch:>5}:"
+        for name, ingest in (("per-record", per_record), ("aggregated", aggregated)):
+            with tempfile.TemporaryDirectory() as tmp:
+                storage = StatsStorage(DatabaseConnection(os.path.join(tmp, "procedural.db")))
+                t0 = time.perf_counter()
+                for i in range(0, len(records), batch):
+                    ingest(storage, records[i:i + batch])
+                elapsed = time.perf_counter() - t0
+                storage.db.close_connections()
+            line += f"  {name} {len(records) / elapsed:9,.0f} msg/s"
+        print(line, flush=True)
+
+
+if __name__ == "__main__":
+    main()
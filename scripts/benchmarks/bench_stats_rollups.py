@@ -0,0 +1,159 @@
+"""Benchmark the dashboard stats endpoints on rollups against raw event scans.
+
+Fills a stats database with ``--events`` raw events (90% messages, 8% LLM
+calls, 2% commands) spread over a year, ``--guilds`` guilds and five models,
+then times ``get_global_stats`` and ``get_model_stats`` for the 7d, 30d and
+all periods. ``raw`` runs the COUNT/GROUP BY queries the collector used
+before rollups; ``rollup`` is the current collector. Also reports the
+one-time backfill that runs on the first start after upgrading.
+
+Usage:
+    python scripts/benchmarks/bench_stats_rollups.py --events 10000000 [--keep DIR]
+"""
+import argparse
+import asyncio
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from dashboard.services.stats_collector import (
+    _INSERT_SQL,
+    _SCHEMA_SQL,
+    StatsCollector,
+    _fill_missing_days,
+    _period_to_days,
+)
+
+MODELS = ["model-a", "model-b", "model-c", "model-d", "model-e"]
+
+
+class RawCollector(StatsCollector):
+    """The pre-rollup queries over the event tables."""
+
+    async def get_global_stats(self, period="30d"):
+        days = _period_to_days(period)
+        cutoff = time.time() - (days * 86400)
+        db = await self._connection()
+        cursor = await db.execute("SELECT COUNT(*) as cnt FROM message_events WHERE timestamp >= ?", (cutoff,))
+        total_messages = (await cursor.fetchone())["cnt"]
+        cursor = await db.execute(
+            "SELECT COUNT(*) as cnt, SUM(CASE WHEN success = 0 THEN 1 ELSE 0 END) as errors, AVG(duration_ms) as avg_ms "
+            "FROM llm_call_events WHERE timestamp >= ?", (cutoff,)
+        )
+        row = await cursor.fetchone()
+        cursor = await db.execute(
+            "SELECT date(timestamp, 'unixepoch', 'localtime') as day, COUNT(*) as cnt "
+            "FROM message_events WHERE timestamp >= ? GROUP BY day ORDER BY day", (cutoff,)
+        )
+        daily = _fill_missing_days([{"date": r["day"], "count": r["cnt"]} async for r in cursor], days)
+        cursor = await db.execute("SELECT COUNT(*) as cnt FROM command_events WHERE timestamp >= ?", (cutoff,))
+        total_commands = (await cursor.fetchone())["cnt"]
+        await self._get_accurate_total()
+        return {
+            "total_messages": total_messages,
+            "total_llm_calls": row["cnt"],
+            "total_commands": total_commands,
+            "daily_messages": daily,
+        }
+
+    async def get_model_stats(self, period="30d"):
+        cutoff = time.time() - (_period_to_days(period) * 86400)
+        db = await self._connection()
+        cursor = await db.execute(
+            "SELECT model_name, COUNT(*) as calls, AVG(duration_ms) as avg_ms, "
+            "SUM(CASE WHEN success = 0 THEN 1 ELSE 0 END) as errors "
+            "FROM llm_call_events WHERE timestamp >= ? GROUP BY model_name ORDER BY calls DESC", (cutoff,)
+        )
+        return {"models": [{"model": r["model_name"], "calls": r["calls"]} async for r in cursor]}
+
+
+def generate(db_path: Path, events: int, guilds: int) -> None:
+    """Write raw events only, as a database from before rollups would have."""
+    rng = random.Random(7)
+    now = time.time()
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA_SQL.split("-- Rollups")[0])
+    batch = {table: [] for table in _INSERT_SQL}
+    for i in range(events):
+        ts = now - rng.random() * 365 * 86400
+        guild = str(100 + rng.randrange(guilds))
+        kind = i % 50
+        if kind == 0:
+            batch["command_events"].append((guild, str(rng.randrange(5000)), "help", ts))
+        elif kind < 5:
+            batch["llm_call_events"].append((guild, MODELS[i % len(MODELS)], ts, rng.uniform(200, 3000), int(i % 13 != 0)))
+        else:
+            batch["message_events"].append((guild, str(rng.randrange(5000)), str(rng.randrange(200)), ts))
+        if i % 200_000 == 199_999 or i == events - 1:
+            for table, rows in batch.items():
+                conn.executemany(_INSERT_SQL[table], rows)
+                rows.clear()
+            conn.commit()
+    conn.close()
+
+
+async def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=10_000_000)
+    parser.add_argument("--guilds", type=int, default=200)
+    parser.add_argument("--keep", help="use (and keep) this directory instead of a temp dir")
+    args = parser.parse_args()
+
+    root = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="bench_stats_rollups_"))
+    db_path = root / "stats.db"
+    try:
+        if not db_path.exists():
+            root.mkdir(parents=True, exist_ok=True)
+            t0 = time.perf_counter()
+            generate(db_path, args.events, args.guilds)
+            print(f"generated {args.events:,} events in {time.perf_counter() - t0:.1f}s")
+
+        rollup = StatsCollector(str(db_path))
+        t0 = time.perf_counter()
+        await rollup.initialize()
+        print(f"first start (schema + backfill): {time.perf_counter() - t0:.1f}s")
+        raw = RawCollector(str(db_path))
+        await raw.initialize()
+
+        for period in ("7d", "30d", "all"):
+            for name in ("get_global_stats", "get_model_stats"):
+                raw_s, raw_result = await timed(lambda: getattr(raw, name)(period))
+                rollup_s, rollup_result = await timed(lambda: getattr(rollup, name)(period))
+                if name == "get_model_stats":
+                    # Rollups count whole hours, so the edge of the window can differ slightly.
+                    drift = max(
+                        abs(a["calls"] - b["calls"])
+                        for a, b in zip(raw_result["models"], rollup_result["models"])
+                    )
+                else:
+                    drift = abs(raw_result["total_llm_calls"] - rollup_result["total_llm_calls"])
+                print(
+                    f"{name:>16} {period:>3}: raw {raw_s * 1000:9.1f} ms   "
+                    f"rollup {rollup_s * 1000:7.2f} ms   (llm call drift {drift})"
+                )
+        await raw.close()
+        await rollup.close()
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+"""Benchmark user_stats upserts: JSON blob columns against counter tables.
+
+``json`` replays the pre-counter-table update: SELECT the row, ``json.loads``
+four JSON columns, bump the counters in Python, ``json.dumps`` them back and
+UPDATE (trimming top_words to 200). ``counters`` is the current
+``StatsStorage``: one upsert on user_stats, an hour counter upsert, and a
+Space-Saving merge per channel/emoji/word summary in user_stat_counts.
+
+Both run the same emoji extraction and jieba segmentation, so
+``--no-words`` is offered to isolate the database work. Rows grow as the run
+goes on, which is where rewriting the blobs gets expensive.
+
+Usage:
+    python scripts/benchmarks/bench_user_stats_upsert.py --messages 20000 --users 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from cogs.memory.db import stats_storage
+from cogs.memory.db.connection import DatabaseConnection
+from cogs.memory.db.stats_storage import StatsStorage, _apply_batch, _extract_emojis
+from cogs.memory.text import segment_words
+
+VOCAB = [f"word{i}" for i in range(3000)] + ["今天", "天氣", "不錯", "我們", "一起", "吃飯", "遊戲", "音樂"]
+EMOJIS = ["😀", "😂", "👍", "🎉", "<:pig:1234567890>"]
+
+_LEGACY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id TEXT NOT NULL,
+    guild_id TEXT NOT NULL,
+    total_messages INTEGER NOT NULL DEFAULT 0,
+    active_hours TEXT NOT NULL DEFAULT '{}',
+    top_channels TEXT NOT NULL DEFAULT '{}',
+    top_emojis TEXT NOT NULL DEFAULT '{}',
+    top_words TEXT NOT NULL DEFAULT '{}',
+    streak_days INTEGER NOT NULL DEFAULT 0,
+    streak_last_date TEXT,
+    last_active_at DATETIME,
+    first_message_at DATETIME,
+    PRIMARY KEY (user_id, guild_id)
+);
+"""
+
+
+def legacy_upsert(conn, rec):
+    """The JSON read-modify-write update (streak handling elided)."""
+    dt = datetime.fromisoformat(rec["timestamp"])
+    emojis = _extract_emojis(rec["message_content"])
+    words = segment_words(rec["message_content"])
+    row = conn.execute(
+        "SELECT * FROM user_stats WHERE user_id = ? AND guild_id = ?", (rec["user_id"], rec["guild_id"])
+    ).fetchone()
+    blobs = {col: json.loads(row[col]) if row else {} for col in ("active_hours", "top_channels", "top_emojis", "top_words")}
+    blobs["active_hours"][str(dt.hour)] = blobs["active_hours"].get(str(dt.hour), 0) + 1
+    blobs["top_channels"][rec["channel_id"]] = blobs["top_channels"].get(rec["channel_id"], 0) + 1
+    for em in emojis:
+        blobs["top_emojis"][em] = blobs["top_emojis"].get(em, 0) + 1
+    for w in words:
+        blobs["top_words"][w] = blobs["top_words"].get(w, 0) + 1
+    if len(blobs["top_words"]) > 200:
+        blobs["top_words"] = dict(sorted(blobs["top_words"].items(), key=lambda x: x[1], reverse=True)[:200])
+    values = [json.dumps(blobs[col], ensure_ascii=False) for col in ("active_hours", "top_channels", "top_emojis", "top_words")]
+    if row:
+        conn.execute(
+            "UPDATE user_stats SET total_messages = total_messages + 1, active_hours = ?, top_channels = ?, "
+            "top_emojis = ?, top_words = ?, last_active_at = ? WHERE user_id = ? AND guild_id = ?",
+            (*values, rec["timestamp"], rec["user_id"], rec["guild_id"]),
+        )
+    else:
+        conn.execute(
+            "INSERT INTO user_stats (user_id, guild_id, total_messages, active_hours, top_channels, top_emojis, "
+            "top_words, last_active_at, first_message_at) VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?)",
+            (rec["user_id"], rec["guild_id"], *values, rec["timestamp"], rec["timestamp"]),
+        )
+
+
+def make_records(count, users, seed=3):
+    rng = random.Random(seed)
+    start = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    records = []
+    for i in range(count):
+        text = " ".join(rng.choice(VOCAB) for _ in range(rng.randint(3, 15)))
+        if rng.random() < 0.3:
+            text += " " + rng.choice(EMOJIS)
+        records.append({
+            "user_id": str(1000 + rng.randrange(users)),
+            "guild_id": str(100 + rng.randrange(3)),
+            "message_content": text,
+            "channel_id": str(500 + rng.randrange(30)),
+            "timestamp": (start + timedelta(seconds=i * 20)).isoformat(),
+        })
+    return records
+
+
+def run_counters(path, records, batch):
+    storage = StatsStorage(DatabaseConnection(path))
+    t0 = time.perf_counter()
+    with storage.db.get_connection() as conn:
+        for i in range(0, len(records), batch):
+            # What StatsStorage.bulk_upsert_user_stats runs on the writer thread.
+            conn.execute("BEGIN IMMEDIATE")
+            _apply_batch(conn, records[i:i + batch])
+            conn.commit()
+    return time.perf_counter() - t0
+
+
+def run_json(path, records, batch):
+    db = DatabaseConnection(path)
+    with db.get_connection() as conn:
+        conn.execute("DROP TABLE IF EXISTS user_stats")
+        conn.executescript(_LEGACY_SCHEMA)
+        t0 = time.perf_counter()
+        for i in range(0, len(records), batch):
+            for rec in records[i:i + batch]:
+                legacy_upsert(conn, rec)
+            conn.commit()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--no-words", action="store_true", help="skip jieba segmentation in both paths")
+    args = parser.parse_args()
+
+    if args.no_words:
+        stats_storage.segment_words = lambda text: [w for w in text.split() if len(w) > 1]
+        globals()["segment_words"] = stats_storage.segment_words
+    else:
+        segment_words("warm up jieba 今天天氣不錯")
+    records = make_records(args.messages, args.users)
+
+    for batch in (1, 200):
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy = run_json(os.path.join(tmp, "json.db"), records, batch)
+            counters = run_counters(os.path.join(tmp, "counters.db"), records, batch)
+        print(
+            f"batch {batch:>3}:  json {len(records) / legacy:9,.0f} upserts/s   "
+            f"counters {len(records) / counters:9,.0f} upserts/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 import os
-import json
 import sqlite3
 import time
 from datetime import datetime, timezone
 from pathlib import Path
 import re
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from addons.log_segments import has_day_log, iter_day_records
 
 ROOT_DIR = "/media/ubuntu/4TB-HDD/ziyue/PigPig-discord-LLM-bot"
 STATS_DB = os.path.join(ROOT_DIR, "data", "stats", "stats.db")
@@ -75,23 +79,20 @@ def parse_logs():
         
         for date_dir in sorted(guild_dir.iterdir()):
             if not date_dir.is_dir(): continue
-            info_path = date_dir / "info.jsonl"
-            if not info_path.exists(): continue
+            if not has_day_log(date_dir, "info"): continue
             
             batch = []
-            with open(info_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    try:
-                        record = json.loads(line)
-                        if record.get("action") == "receive_message":
-                            user_id = record.get("user_id", "0")
-                            channel_id = str(record.get("extra", {}).get("channel_id", "0"))
-                            ts_str = record.get("timestamp")
-                            dt = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-                            ts = dt.timestamp()
-                            batch.append((guild_id, user_id, channel_id, ts))
-                    except Exception:
-                        continue
+            for record in iter_day_records(date_dir, "info"):
+                try:
+                    if record.get("action") == "receive_message":
+                        user_id = record.get("user_id", "0")
+                        channel_id = str(record.get("extra", {}).get("channel_id", "0"))
+                        ts_str = record.get("timestamp")
+                        dt = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
+                        ts = dt.timestamp()
+                        batch.append((guild_id, user_id, channel_id, ts))
+                except Exception:
+                    continue
             
             if batch:
                 cursor.executemany(
@@ -107,27 +108,24 @@ def parse_logs():
         print("Processing Bot logs for LLM calls...")
         for date_dir in sorted(bot_log_root.iterdir()):
             if not date_dir.is_dir(): continue
-            info_path = date_dir / "info.jsonl"
-            if not info_path.exists(): continue
+            if not has_day_log(date_dir, "info"): continue
             
             batch = []
-            with open(info_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    try:
-                        record = json.loads(line)
-                        # Pattern 1: llm.send_message with guild ID
-                        if record.get("source") == "llm.send_message":
-                            msg = record.get("message", "")
-                            match = GUILD_RE.search(msg)
-                            if match:
-                                guild_id = match.group(1)
-                                ts_str = record.get("timestamp")
-                                dt = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-                                ts = dt.timestamp()
-                                # Best effort: model name is unknown in old logs, use "historical"
-                                batch.append((guild_id, "historical", ts, 0, 1))
-                    except Exception:
-                        continue
+            for record in iter_day_records(date_dir, "info"):
+                try:
+                    # Pattern 1: llm.send_message with guild ID
+                    if record.get("source") == "llm.send_message":
+                        msg = record.get("message", "")
+                        match = GUILD_RE.search(msg)
+                        if match:
+                            guild_id = match.group(1)
+                            ts_str = record.get("timestamp")
+                            dt = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
+                            ts = dt.timestamp()
+                            # Best effort: model name is unknown in old logs, use "historical"
+                            batch.append((guild_id, "historical", ts, 0, 1))
+                except Exception:
+                    continue
             
             if batch:
                 cursor.executemany(
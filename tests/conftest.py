@@ -21,3 +21,64 @@ import addons.settings  # noqa: F401  — side-effect: caches real module
 import sys
 import discord
 sys.modules['discord'] = discord
+
+import importlib
+from pathlib import Path
+
+import pytest
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Some test modules (and tests/dashboard/conftest.py) replace these packages in
+# sys.modules with path-less stubs. Modules collected afterwards still need to
+# import real submodules, so the stubs are pointed back at the real package
+# directories before each test module is imported.
+_REAL_PACKAGE_DIRS = {
+    "addons": "addons",
+    "cogs": "cogs",
+    "cogs.memory": "cogs/memory",
+    "cogs.memory.db": "cogs/memory/db",
+    "cogs.memory.users": "cogs/memory/users",
+}
+
+
+def _restore_package_paths():
+    for name, rel_path in _REAL_PACKAGE_DIRS.items():
+        module = sys.modules.get(name)
+        if module is not None and not list(getattr(module, "__path__", None) or []):
+            module.__path__ = [str(_PROJECT_ROOT / rel_path)]
+
+
+def pytest_collectstart(collector):
+    _restore_package_paths()
+
+
+@pytest.fixture
+def logging_module(monkeypatch):
+    """The real addons.logging, even if another test installed a stub."""
+    mod = sys.modules.get("addons.logging")
+    if mod is None or not hasattr(mod, "_FileHandlePool"):
+        monkeypatch.delitem(sys.modules, "addons.logging", raising=False)
+        # Dashboard modules cached against the stub are imported again too.
+        for name in [m for m in sys.modules if m.startswith("dashboard.")]:
+            monkeypatch.delitem(sys.modules, name)
+        mod = importlib.import_module("addons.logging")
+    return mod
+
+
+@pytest.fixture
+def real_dashboard(monkeypatch, tmp_path, logging_module):
+    """Make the real ``dashboard`` package importable from tests.
+
+    tests/dashboard is itself a package named ``dashboard`` whose conftest
+    stubs addons.logging, and several test modules replace ``function`` with
+    a stub lacking ROOT_DIR. Both are patched back for the test's duration.
+    """
+    dashboard_pkg = importlib.import_module("dashboard")
+    real_dir = str(_PROJECT_ROOT / "dashboard")
+    if real_dir not in list(dashboard_pkg.__path__):
+        monkeypatch.setattr(dashboard_pkg, "__path__", list(dashboard_pkg.__path__) + [real_dir])
+    function_mod = sys.modules.get("function")
+    if function_mod is not None and not hasattr(function_mod, "ROOT_DIR"):
+        monkeypatch.setattr(function_mod, "ROOT_DIR", str(tmp_path), raising=False)
+    return dashboard_pkg
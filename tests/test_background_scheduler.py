@@ -0,0 +1,110 @@
+"""Tests for the scheduler between foreground replies and background memory jobs."""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from cogs.memory.services.background_scheduler import BackgroundScheduler
+
+
+async def _job(scheduler, slices, slice_seconds):
+    """A background job doing ``slices`` units of work with a checkpoint after each."""
+    async with scheduler.background_job("test"):
+        for _ in range(slices):
+            await asyncio.sleep(slice_seconds)
+            await scheduler.checkpoint()
+
+
+async def _constant_traffic(scheduler, stop, reply_seconds=0.03):
+    """Overlapping replies, so at least one is always running until stop is set."""
+
+    async def reply():
+        async with scheduler.foreground():
+            await asyncio.sleep(reply_seconds)
+
+    tasks = set()
+    while not stop.is_set():
+        task = asyncio.create_task(reply())
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        await asyncio.sleep(reply_seconds / 2)
+    await asyncio.gather(*tasks)
+
+
+def test_checkpoint_does_not_pause_without_replies():
+    async def scenario():
+        scheduler = BackgroundScheduler(min_share=0.0)
+        start = time.perf_counter()
+        await _job(scheduler, slices=20, slice_seconds=0)
+        return time.perf_counter() - start, scheduler.stats()
+
+    elapsed, stats = asyncio.run(scenario())
+    assert elapsed < 0.5
+    assert (stats.checkpoints, stats.pauses) == (20, 0)
+
+
+def test_checkpoint_outside_a_job_never_waits():
+    async def scenario():
+        scheduler = BackgroundScheduler(min_share=0.0)
+        async with scheduler.foreground():
+            await asyncio.wait_for(scheduler.checkpoint(), 1.0)
+        return scheduler.stats()
+
+    assert asyncio.run(scenario()).checkpoints == 0
+
+
+def test_paused_job_resumes_when_the_reply_ends():
+    async def scenario():
+        scheduler = BackgroundScheduler(min_share=0.0)
+        progress = []
+
+        async def job():
+            async with scheduler.background_job("test"):
+                progress.append("summarized")
+                await scheduler.checkpoint()
+                progress.append("vectorized")
+
+        async with scheduler.foreground():
+            task = asyncio.create_task(job())
+            await asyncio.sleep(0.1)
+            paused = list(progress)
+        await asyncio.wait_for(task, 1.0)
+        return paused, progress
+
+    paused, progress = asyncio.run(scenario())
+    assert paused == ["summarized"]
+    assert progress == ["summarized", "vectorized"]
+
+
+def test_minimum_share_bounds_starvation_under_constant_traffic():
+    slices, slice_seconds, share = 10, 0.02, 0.25
+
+    async def scenario(min_share, budget):
+        scheduler = BackgroundScheduler(min_share=min_share, window=0.16)
+        stop = asyncio.Event()
+        traffic = asyncio.create_task(_constant_traffic(scheduler, stop))
+        await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        job = asyncio.create_task(_job(scheduler, slices, slice_seconds))
+        done, _ = await asyncio.wait({job}, timeout=budget)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await traffic
+        await job
+        return bool(done), elapsed, scheduler.stats()
+
+    # The job needs 0.2 s of its own; at a 25% share that is 0.8 s of wall time:
+    # pauses of 0.12 s, each followed by 0.04 s in which it is not paused.
+    finished, elapsed, stats = asyncio.run(scenario(share, budget=3.0))
+    assert finished
+    assert 0.8 * slices * slice_seconds / share <= elapsed <= 2.5
+    assert stats.pauses >= slices // 2 and stats.forced_resumes > 0
+
+    # Without a minimum share the same job makes no progress while replies keep coming.
+    finished, _, stats = asyncio.run(scenario(0.0, budget=1.0))
+    assert not finished
+    assert stats.forced_resumes == 0
@@ -0,0 +1,106 @@
+"""Tests for the dependency-aware concurrent cog loader."""
+import asyncio
+import sys
+import time
+import types
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from addons.cog_loader import CogDependencyError, _third_party_imports, load_cogs, plan_load_order
+
+
+class _Logger:
+    def info(self, *args, **kwargs):
+        pass
+
+    def warning(self, *args, **kwargs):
+        pass
+
+    def error(self, *args, **kwargs):
+        pass
+
+
+class StubBot:
+    """Records load order and simulates async cog_load work."""
+
+    def __init__(self, delays=None, failing=()):
+        self.delays = delays or {}
+        self.failing = set(failing)
+        self.started = []
+        self.finished = []
+        self.active = 0
+        self.max_active = 0
+
+    async def load_extension(self, name):
+        cog = name.rsplit(".", 1)[-1]
+        self.started.append(cog)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delays.get(cog, 0.01))
+            if cog in self.failing:
+                raise RuntimeError(f"{cog} broke")
+        finally:
+            self.active -= 1
+        self.finished.append(cog)
+
+
+def _load(bot, cogs, deps):
+    return asyncio.run(load_cogs(bot, cogs, deps, warm_imports=False, logger=_Logger()))
+
+
+def test_plan_orders_dependencies_first():
+    levels = plan_load_order(
+        ["help", "language_manager", "story", "prompt"],
+        {"help": ["language_manager"], "story": ["prompt"], "prompt": ["language_manager"]},
+    )
+    assert levels == [["language_manager"], ["help", "prompt"], ["story"]]
+
+
+def test_plan_ignores_dependencies_that_are_not_loaded():
+    assert plan_load_order(["help"], {"help": ["language_manager"]}) == [["help"]]
+
+
+def test_cycle_fails_fast_without_loading_anything():
+    bot = StubBot()
+    with pytest.raises(CogDependencyError, match="a -> b -> c -> a"):
+        _load(bot, ["a", "b", "c", "d"], {"a": ["b"], "b": ["c"], "c": ["a"]})
+    assert bot.started == []
+
+
+def test_independent_cogs_load_concurrently():
+    bot = StubBot(delays={name: 0.05 for name in "abcdefgh"})
+    start = time.perf_counter()
+    results = _load(bot, list("abcdefgh"), {})
+    elapsed = time.perf_counter() - start
+
+    assert bot.max_active == 8
+    assert elapsed < 0.05 * 4
+    assert all(r.ok and r.duration >= 0.05 for r in results.values())
+
+
+def test_dependents_start_after_dependency_finishes():
+    bot = StubBot(delays={"language_manager": 0.05})
+    _load(bot, ["help", "math", "language_manager"], {"help": ["language_manager"], "math": ["language_manager"]})
+    assert bot.finished[0] == "language_manager"
+    assert bot.started.index("help") > bot.finished.index("language_manager")
+
+
+def test_failed_cog_is_reported_and_does_not_block_dependents():
+    bot = StubBot(failing={"language_manager"})
+    results = _load(bot, ["language_manager", "help"], {"help": ["language_manager"]})
+    assert not results["language_manager"].ok
+    assert isinstance(results["language_manager"].error, RuntimeError)
+    assert results["help"].ok
+
+
+def test_warming_skips_first_party_modules():
+    # cogs.math imports discord and sympy as well as addons/function modules.
+    targets = _third_party_imports(["cogs.math"])
+    assert "discord" in targets
+    assert not any(t.partition(".")[0] in ("addons", "cogs", "llm", "function") for t in targets)
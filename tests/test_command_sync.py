@@ -0,0 +1,102 @@
+"""Tests for command-tree fingerprinting and conditional sync."""
+import asyncio
+import json
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import discord
+from discord import app_commands
+
+from addons.command_sync import build_tree_payload, fingerprint_payload, sync_if_changed
+
+
+def _make_tree(description: str = "Play a song", extra: bool = False):
+    client = discord.Client(intents=discord.Intents.none())
+    tree = app_commands.CommandTree(client)
+
+    @tree.command(name="play", description=description)
+    @app_commands.describe(query="Song name or URL")
+    async def play(interaction: discord.Interaction, query: str, volume: int = 50):
+        pass
+
+    @tree.command(name="skip", description="Skip the current song")
+    async def skip(interaction: discord.Interaction):
+        pass
+
+    if extra:
+        @tree.command(name="stop", description="Stop playback")
+        async def stop(interaction: discord.Interaction):
+            pass
+
+    return tree
+
+
+def _fingerprint(tree) -> str:
+    return fingerprint_payload(asyncio.run(build_tree_payload(tree)), application_id=1)
+
+
+def test_fingerprint_ignores_key_and_command_order():
+    a = [
+        {"name": "play", "description": "Play", "options": [{"name": "q", "type": 3, "required": True}]},
+        {"name": "skip", "description": "Skip", "type": 1},
+    ]
+    b = [
+        {"type": 1, "description": "Skip", "name": "skip"},
+        {"options": [{"required": True, "type": 3, "name": "q"}], "description": "Play", "name": "play"},
+    ]
+    assert fingerprint_payload(a) == fingerprint_payload(b)
+
+
+def test_fingerprint_keeps_option_order():
+    first = [{"name": "x", "options": [{"name": "a"}, {"name": "b"}]}]
+    second = [{"name": "x", "options": [{"name": "b"}, {"name": "a"}]}]
+    assert fingerprint_payload(first) != fingerprint_payload(second)
+
+
+def test_fingerprint_detects_localization_changes():
+    base = {"name": "play", "description": "Play"}
+    localized = {**base, "description_localizations": {"zh-TW": "播放"}}
+    assert fingerprint_payload([base]) != fingerprint_payload([localized])
+
+
+def test_fingerprint_is_stable_for_identical_trees():
+    assert _fingerprint(_make_tree()) == _fingerprint(_make_tree())
+
+
+def test_fingerprint_changes_with_commands():
+    baseline = _fingerprint(_make_tree())
+    assert _fingerprint(_make_tree(description="Play music")) != baseline
+    assert _fingerprint(_make_tree(extra=True)) != baseline
+
+
+def test_sync_only_when_changed(tmp_path):
+    state = str(tmp_path / "fingerprint.json")
+
+    def run(tree, force=False):
+        tree.sync = AsyncMock(return_value=[])
+        synced = asyncio.run(sync_if_changed(tree, state, force=force))
+        assert synced == tree.sync.await_count
+        return synced
+
+    assert run(_make_tree()) is True
+    assert json.loads(Path(state).read_text())["fingerprint"]
+    assert run(_make_tree()) is False
+    assert run(_make_tree(), force=True) is True
+    assert run(_make_tree(extra=True)) is True
+    assert run(_make_tree(extra=True)) is False
+
+
+def test_failed_sync_does_not_store_fingerprint(tmp_path):
+    state = tmp_path / "fingerprint.json"
+    tree = _make_tree()
+    tree.sync = AsyncMock(side_effect=RuntimeError("rate limited"))
+    try:
+        asyncio.run(sync_if_changed(tree, str(state)))
+    except RuntimeError:
+        pass
+    assert not state.exists()
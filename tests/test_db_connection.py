@@ -0,0 +1,114 @@
+"""Tests for the group-commit writer of DatabaseConnection."""
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from cogs.memory.db.connection import DatabaseConnection
+from cogs.memory.exceptions import DatabaseError
+
+
+def _set(conn, key, value):
+    conn.execute("INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", (key, value))
+    return value
+
+
+def _append(conn, key, value):
+    row = conn.execute("SELECT value FROM config WHERE key = ?", (key,)).fetchone()
+    conn.execute(
+        "INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)",
+        (key, (row[0] + "," if row else "") + value),
+    )
+
+
+def _fail(conn, key):
+    _set(conn, key, "partial")
+    raise ValueError("boom")
+
+
+def _config(db_path):
+    reader = DatabaseConnection(db_path)
+    with reader.get_connection() as conn:
+        return dict(conn.execute("SELECT key, value FROM config").fetchall())
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseConnection(tmp_path / "procedural.db")
+    yield db
+    db.close_connections()
+
+
+def test_queued_writes_share_one_transaction(db, monkeypatch):
+    batches = []
+    commit_batch = db._commit_batch
+    monkeypatch.setattr(db, "_commit_batch", lambda conn, batch: batches.append(len(batch)) or commit_batch(conn, batch))
+    release = threading.Event()
+
+    def blocking(conn):
+        release.wait(5)
+
+    async def run():
+        first = db.write(blocking)
+        await asyncio.sleep(0.05)
+        writes = [db.write(_set, f"k{i}", str(i)) for i in range(50)]
+        release.set()
+        await first
+        return await asyncio.gather(*writes)
+
+    assert asyncio.run(run()) == [str(i) for i in range(50)]
+    assert batches == [1, 50]
+    assert len(_config(db.db_path)) == 50
+
+
+def test_failed_write_rolls_back_alone(db):
+    async def run():
+        ok = db.write(_set, "a", "1")
+        bad = db.write(_fail, "b")
+        later = db.write(_set, "c", "3")
+        results = await asyncio.gather(ok, bad, later, return_exceptions=True)
+        return results
+
+    ok, bad, later = asyncio.run(run())
+    assert (ok, later) == ("1", "3")
+    assert isinstance(bad, DatabaseError) and isinstance(bad.__cause__, ValueError)
+    assert _config(db.db_path) == {"a": "1", "c": "3"}
+
+
+def test_writes_apply_in_submission_order(db):
+    async def run():
+        futures = [db.write(_append, f"key{i % 3}", str(i)) for i in range(60)]
+        await asyncio.gather(*futures)
+
+    asyncio.run(run())
+    config = _config(db.db_path)
+    for k in range(3):
+        assert config[f"key{k}"] == ",".join(str(i) for i in range(k, 60, 3))
+
+
+def test_close_commits_pending_writes_and_writer_restarts(db):
+    async def submit():
+        return [db.write(_set, f"k{i}", "v") for i in range(20)]
+
+    loop = asyncio.new_event_loop()
+    try:
+        futures = loop.run_until_complete(submit())
+        db.close_connections()
+        loop.run_until_complete(asyncio.gather(*futures))
+    finally:
+        loop.close()
+    assert len(_config(db.db_path)) == 20
+
+    # The next write starts a new writer thread; a read right after sees it.
+    async def again():
+        await db.write(_set, "after", "close")
+        with db.get_connection() as conn:
+            return conn.execute("SELECT value FROM config WHERE key = 'after'").fetchone()[0]
+
+    assert asyncio.run(again()) == "close"
@@ -0,0 +1,126 @@
+"""Tests for the combined knowledge fetch and write-through cache."""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("TOKEN", "test-token")
+os.environ.setdefault("CLIENT_ID", "123")
+os.environ.setdefault("CLIENT_SECRET_ID", "secret")
+os.environ.setdefault("SERCET_KEY", "secret-key")
+os.environ.setdefault("BUG_REPORT_CHANNEL_ID", "1")
+os.environ.setdefault("BOT_OWNER_ID", "1")
+
+# Other test modules replace the knowledge storage module with a stub.
+_ks = sys.modules.get("cogs.memory.db.knowledge_storage")
+if _ks is not None and not hasattr(getattr(_ks, "KnowledgeStorage", None), "get_context_knowledge"):
+    del sys.modules["cogs.memory.db.knowledge_storage"]
+
+from cogs.memory.db.connection import DatabaseConnection
+from cogs.memory.db.knowledge_storage import KnowledgeStorage
+from llm.memory.knowledge import KnowledgeMemoryProvider
+
+
+class CountingConnection(DatabaseConnection):
+    """DatabaseConnection that counts how many times a connection is checked out."""
+
+    def __init__(self, db_path):
+        super().__init__(db_path)
+        self.checkouts = 0
+
+    def get_connection(self):
+        self.checkouts += 1
+        return super().get_connection()
+
+
+def _make_storage(tmp_path):
+    db = CountingConnection(tmp_path / "knowledge.db")
+    storage = KnowledgeStorage(db)
+    with db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO knowledge (target_type, target_id, content) VALUES (?, ?, ?)",
+            [("guild", "g1", "guild facts"), ("channel", "c1", "channel facts")],
+        )
+        conn.commit()
+    db.checkouts = 0
+    return storage
+
+
+def test_context_knowledge_returns_both_scopes(tmp_path):
+    storage = _make_storage(tmp_path)
+    result = asyncio.run(storage.get_context_knowledge("g1", "c1"))
+    assert result == {("guild", "g1"): "guild facts", ("channel", "c1"): "channel facts"}
+    assert storage.db.checkouts == 1
+
+
+def test_context_knowledge_marks_missing_scopes(tmp_path):
+    storage = _make_storage(tmp_path)
+    assert asyncio.run(storage.get_context_knowledge("g2", "c1")) == {
+        ("guild", "g2"): None,
+        ("channel", "c1"): "channel facts",
+    }
+    assert asyncio.run(storage.get_context_knowledge(None, "c9")) == {("channel", "c9"): None}
+
+
+def test_one_query_per_cold_message_and_none_when_warm(tmp_path):
+    storage = _make_storage(tmp_path)
+    provider = KnowledgeMemoryProvider(storage)
+
+    async def run():
+        first = await provider.get("g1", "c1")
+        assert (first.guild_knowledge, first.channel_knowledge) == ("guild facts", "channel facts")
+        assert storage.db.checkouts == 1
+
+        await provider.get("g1", "c1")
+        assert storage.db.checkouts == 1
+
+    asyncio.run(run())
+
+
+def test_concurrent_messages_share_one_query(tmp_path):
+    storage = _make_storage(tmp_path)
+    provider = KnowledgeMemoryProvider(storage)
+
+    async def run():
+        await asyncio.gather(*[provider.get("g1", "c1") for _ in range(20)])
+
+    asyncio.run(run())
+    assert storage.db.checkouts == 1
+
+
+def test_put_writes_through_without_refetch(tmp_path):
+    storage = _make_storage(tmp_path)
+    provider = KnowledgeMemoryProvider(storage)
+
+    async def run():
+        await provider.get("g1", "c1")
+        await provider.put("guild", "g1", "merged facts")
+        await provider.put("channel", "c1", None)
+        updated = await provider.get("g1", "c1")
+        assert updated.guild_knowledge == "merged facts"
+        assert updated.channel_knowledge is None
+
+    asyncio.run(run())
+    assert storage.db.checkouts == 1
+
+
+def test_put_during_fetch_is_not_overwritten():
+    class SlowStorage:
+        async def get_context_knowledge(self, guild_id, channel_id):
+            await asyncio.sleep(0.01)
+            return {("guild", guild_id): "stale", ("channel", channel_id): None}
+
+    provider = KnowledgeMemoryProvider(SlowStorage())
+
+    async def run():
+        fetch = asyncio.create_task(provider.get("g1", "c1"))
+        await asyncio.sleep(0)
+        await provider.put("guild", "g1", "fresh")
+        await fetch
+        assert (await provider.get("g1", "c1")).guild_knowledge == "fresh"
+
+    asyncio.run(run())
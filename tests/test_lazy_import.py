@@ -0,0 +1,106 @@
+"""Tests for lazy module proxies and the import-time profiler."""
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from addons.lazy_import import (
+    ImportTimeProfiler,
+    LazyModule,
+    lazy_attr,
+    lazy_import,
+    lazy_load_times,
+)
+
+
+@pytest.fixture
+def fake_package(tmp_path, monkeypatch):
+    """A throwaway package whose import is observable through a counter."""
+    pkg = tmp_path / "lazy_fake_pkg"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text(textwrap.dedent("""
+        import lazy_fake_pkg.heavy
+        IMPORT_COUNT = 1
+        def answer():
+            return 42
+    """))
+    (pkg / "heavy.py").write_text("VALUE = sum(range(1000))\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "lazy_fake_pkg"
+    for name in [m for m in sys.modules if m.startswith("lazy_fake_pkg")]:
+        del sys.modules[name]
+
+
+def test_lazy_import_defers_until_attribute_access(fake_package):
+    proxy = lazy_import(fake_package)
+    assert isinstance(proxy, LazyModule)
+    assert fake_package not in sys.modules
+    assert "not loaded" in repr(proxy)
+
+    assert proxy.answer() == 42
+    assert fake_package in sys.modules
+    assert proxy.IMPORT_COUNT == 1
+    assert fake_package in lazy_load_times()
+
+
+def test_lazy_import_returns_loaded_module_directly():
+    import json
+
+    assert lazy_import("json") is json
+    assert lazy_attr("json", "dumps") is json.dumps
+
+
+def test_lazy_attr_resolves_on_call(fake_package):
+    answer = lazy_attr(fake_package, "answer")
+    assert fake_package not in sys.modules
+    assert answer() == 42
+    assert answer.__name__ == "answer"
+
+
+def test_missing_module_raises_on_first_use():
+    proxy = lazy_import("lazy_module_that_does_not_exist")
+    with pytest.raises(ModuleNotFoundError):
+        proxy.anything
+
+
+def test_profiler_records_nested_imports(fake_package):
+    with ImportTimeProfiler() as profiler:
+        __import__(fake_package)
+
+    by_name = {r.name: r for r in profiler.records}
+    assert {fake_package, f"{fake_package}.heavy"} <= set(by_name)
+    parent, child = by_name[fake_package], by_name[f"{fake_package}.heavy"]
+    assert child.depth == parent.depth + 1
+    assert parent.cumulative >= child.cumulative
+    assert parent.self_time <= parent.cumulative
+    assert profiler.top(1)[0].name == fake_package
+
+    report = profiler.format_report()
+    assert report.splitlines()[0] == "import time: self [us] | cumulative | imported package"
+    assert fake_package in report
+
+
+def test_profiler_uninstalls_on_stop():
+    profiler = ImportTimeProfiler().start()
+    assert profiler._finder in sys.meta_path
+    profiler.stop()
+    assert profiler._finder not in sys.meta_path
+    profiler.stop()
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.delenv("PIGPIG_PROFILE_IMPORTS", raising=False)
+    assert ImportTimeProfiler.from_env() is None
+
+    monkeypatch.setenv("PIGPIG_PROFILE_IMPORTS", "1")
+    profiler = ImportTimeProfiler.from_env()
+    try:
+        assert profiler is not None
+        assert profiler._finder in sys.meta_path
+    finally:
+        profiler.stop()
@@ -0,0 +1,149 @@
+"""Tests for the incremental log search index."""
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from addons.log_index import LogIndex
+from addons.log_segments import compact_file
+
+DAY = datetime(2024, 3, 5, tzinfo=timezone.utc)
+
+
+def _record(i, server="1", level="INFO", source=None, user=None):
+    ts = DAY + timedelta(seconds=i * 10)
+    return {
+        "timestamp": ts.isoformat().replace("+00:00", "Z"),
+        "level": level,
+        "source": source or ("cogs.a" if i % 2 else "cogs.b"),
+        "server_id": server,
+        "user_id": user if user is not None else str(i % 7),
+        "message": f"message {i} " + "x" * 40,
+    }
+
+
+def _write(base, records, mode="a"):
+    for record in records:
+        path = base / record["server_id"] / "20240305" / f"{record['level'].lower()}.jsonl"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, mode, encoding="utf-8") as fh:
+            fh.write(json.dumps(record) + "\n")
+
+
+def _all_pages(index, **filters):
+    records, cursor = [], None
+    while True:
+        page = index.search(cursor=cursor, **filters)
+        records.extend(page.records)
+        cursor = page.next_cursor
+        if cursor is None:
+            return records
+
+
+def _messages(records):
+    return [r["message"] for r in records]
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = LogIndex(tmp_path / "index.db", tmp_path / "logs", chunk_size=2048, rescan_interval=3600)
+    yield idx
+    idx.close()
+
+
+def test_paginated_search_matches_a_full_scan(tmp_path, index):
+    records = [_record(i, server=str(i % 2)) for i in range(2000)]
+    records += [_record(i, server="1", level="ERROR") for i in range(0, 2000, 50)]
+    _write(tmp_path / "logs", records)
+    index.refresh(full=True)
+
+    expected = sorted(
+        (r for r in records if r["server_id"] == "1" and r["user_id"] == "3" and r["source"] == "cogs.a"),
+        key=lambda r: r["timestamp"],
+        reverse=True,
+    )
+    got = _all_pages(index, guild_id="1", user_id="3", source="cogs.a", limit=17)
+    # Records with equal timestamps (INFO and ERROR copies) may come in either order.
+    assert sorted(_messages(got)) == sorted(_messages(expected))
+    assert [r["timestamp"] for r in got] == [r["timestamp"] for r in expected]
+
+    errors = _all_pages(index, levels=["error"], start="2024-03-05T02:00:00Z", limit=10)
+    assert [r["timestamp"] for r in errors] == sorted(
+        (r["timestamp"] for r in records if r["level"] == "ERROR" and r["timestamp"] >= "2024-03-05T02:00:00Z"),
+        reverse=True,
+    )
+
+
+def test_postings_limit_the_chunks_read(tmp_path, index):
+    records = [_record(i, user="") for i in range(3000)]
+    records[1234] = _record(1234, user="42")
+    _write(tmp_path / "logs", records)
+    index.refresh(full=True)
+
+    page = index.search(user_id="42")
+    assert _messages(page.records) == ["message 1234 " + "x" * 40]
+    assert page.chunks_read == 1
+
+
+def test_refresh_indexes_only_appended_complete_lines(tmp_path, index, logging_module):
+    base = tmp_path / "logs"
+    _write(base, [_record(i) for i in range(100)])
+    index.refresh(full=True)
+
+    path = base / "1" / "20240305" / "info.jsonl"
+    size = path.stat().st_size
+    _write(base, [_record(i) for i in range(100, 110)])
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(_record(110))[:30])  # the writer is mid-line
+
+    index._on_written([(_record(100), "")])
+    stats = index.refresh(full=False)
+    assert stats.records == 10
+    assert stats.bytes_read == path.stat().st_size - size - 30
+    assert len(_all_pages(index)) == 110
+
+
+def test_compacted_days_are_searched_once(tmp_path, index):
+    base = tmp_path / "logs"
+    records = [_record(i) for i in range(500)]
+    _write(base, records)
+    index.refresh(full=True)
+
+    path = base / "1" / "20240305" / "info.jsonl"
+    compact_file(path, block_size=4096)
+    assert not path.exists()
+    index.refresh(full=True)
+    assert len(_all_pages(index, limit=100)) == 500
+
+    # A late record lands in a fresh plain file next to the segment.
+    _write(base, [_record(500)])
+    index.refresh(full=True)
+    got = index.search(limit=2).records
+    assert _messages(got) == _messages([_record(500), _record(499)])
+    assert len(_all_pages(index, limit=100)) == 501
+
+
+def test_search_does_not_wait_for_a_running_refresh(tmp_path, index, logging_module):
+    base = tmp_path / "logs"
+    _write(base, [_record(i) for i in range(10)])
+    index.refresh(full=True)
+    _write(base, [_record(i) for i in range(10, 20)])
+    index._on_written([(_record(10), "")])
+
+    pages = []
+    with index._refresh_lock:  # the initial build, in another thread
+        search = threading.Thread(target=lambda: pages.append(index.search()))
+        search.start()
+        search.join(timeout=10)
+        assert not search.is_alive()
+    assert len(pages[0].records) == 10
+
+    # The touched file is indexed by the next search.
+    assert len(index.search().records) == 20
+
+
+def test_invalid_cursor_is_rejected(index):
+    with pytest.raises(ValueError):
+        index.search(cursor="not-a-cursor")
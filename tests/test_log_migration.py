@@ -0,0 +1,191 @@
+"""Tests for the parallel, checkpointed log migration."""
+import asyncio
+import json
+import subprocess
+import sys
+import textwrap
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from addons.log_migration import LogMigration, parse_chunk, plan_day
+from addons.log_segments import compact_file
+from cogs.memory.db.connection import DatabaseConnection
+from cogs.memory.db.stats_storage import StatsStorage
+
+START = datetime(2024, 3, 5, tzinfo=timezone.utc)
+
+
+def _write_day(day_dir, count, offset=0):
+    day_dir.mkdir(parents=True, exist_ok=True)
+    with open(day_dir / "info.jsonl", "a", encoding="utf-8") as fh:
+        for i in range(offset, offset + count):
+            fh.write(json.dumps({
+                "timestamp": (START + timedelta(minutes=i)).isoformat().replace("+00:00", "Z"),
+                "level": "INFO",
+                "action": "receive_message" if i % 5 else "send_reply",
+                "user_id": f"u{i % 7}",
+                "message": f"message {i} hello world",
+                "extra": {"channel_id": i % 3},
+            }, ensure_ascii=False) + "\n")
+
+
+@pytest.fixture
+def logs(tmp_path):
+    root = tmp_path / "logs"
+    _write_day(root / "42" / "20240305", 300)
+    # A compacted day with late records in a plain tail.
+    _write_day(root / "42" / "20240306", 200, offset=300)
+    compact_file(root / "42" / "20240306" / "info.jsonl", block_size=4096)
+    _write_day(root / "42" / "20240306", 40, offset=500)
+    _write_day(root / "43" / "20240305", 120, offset=600)
+    return root
+
+
+class _Events:
+    def __init__(self):
+        self.events = []
+
+    async def bulk_record_messages(self, records):
+        self.events.extend(records)
+
+    async def flush(self):
+        return 0
+
+
+def _user_stats(db_path):
+    with DatabaseConnection(db_path).get_connection() as conn:
+        return (
+            [tuple(row) for row in conn.execute("SELECT * FROM user_stats ORDER BY 1, 2")],
+            [tuple(row) for row in conn.execute("SELECT * FROM user_stat_counts ORDER BY 1, 2, 3, 4")],
+        )
+
+
+def test_chunks_split_plain_files_on_line_boundaries(logs):
+    day = logs / "42" / "20240305"
+    whole = parse_chunk(plan_day("42", day, chunk_size=1 << 30)[0])
+    chunks = plan_day("42", day, chunk_size=1000)
+    assert len(chunks) > 10
+    parts = [record for chunk in chunks for record in parse_chunk(chunk).records]
+    assert parts == whole.records
+    assert len(whole.records) == 240
+
+    compacted = plan_day("42", logs / "42" / "20240306", chunk_size=1000)
+    assert compacted[0].compressed and not compacted[-1].compressed
+    assert sum(len(parse_chunk(c).records) for c in compacted) == 192
+
+    # Resuming inside a plain file re-cuts the chunk at the checkpoint.
+    resumed = plan_day("42", day, chunk_size=1000, checkpoint=("info.jsonl", chunks[3].end - 10))
+    assert resumed[0].start == chunks[3].end - 10 and resumed[1:] == chunks[4:]
+    assert plan_day("42", day, chunk_size=1000, checkpoint=("info.jsonl", chunks[-1].end)) == []
+    # A checkpoint that is not a block boundary means the files changed.
+    assert plan_day("42", logs / "42" / "20240306", checkpoint=("info.jsonl.gz", 7)) is None
+
+
+def test_resume_after_crash_counts_every_message_once(logs, tmp_path, monkeypatch):
+    reference = StatsStorage(DatabaseConnection(tmp_path / "reference.db"))
+    reference_events = _Events()
+    progress = asyncio.run(
+        LogMigration(logs, reference, reference_events, workers=2, cpu_share=1.0, chunk_size=2000).run()
+    )
+    assert progress.records == 240 + 192 + 96
+    assert progress.bytes_done == progress.bytes_total
+    assert progress.days_done == progress.days_total == 3
+
+    db_path = tmp_path / "procedural.db"
+    storage = StatsStorage(DatabaseConnection(db_path))
+    original = storage.apply_migration_batch
+    calls = 0
+
+    class Crash(Exception):
+        pass
+
+    async def crash_on_fifth(*args):
+        nonlocal calls
+        calls += 1
+        if calls == 5:
+            raise Crash()
+        return await original(*args)
+
+    monkeypatch.setattr(storage, "apply_migration_batch", crash_on_fifth)
+    events = _Events()
+    with pytest.raises(Crash):
+        asyncio.run(LogMigration(logs, storage, events, workers=2, cpu_share=1.0, chunk_size=2000).run())
+    date, file_name, offset = asyncio.run(storage.get_migration_checkpoint("42"))
+    assert (date, file_name) == ("20240305", "info.jsonl") and offset > 0
+
+    restarted = StatsStorage(DatabaseConnection(db_path))
+    asyncio.run(LogMigration(logs, restarted, events, workers=2, cpu_share=1.0, chunk_size=2000).run())
+
+    assert _user_stats(db_path) == _user_stats(tmp_path / "reference.db")
+    assert asyncio.run(restarted.get_migration_checkpoint("42")) is None
+    assert asyncio.run(restarted.get_migration_state("42")) == "20240306"
+    # Dashboard events of the chunk in flight at the crash may be recorded twice.
+    assert 0 <= len(events.events) - len(reference_events.events) <= 100
+
+    # Nothing is left to do on the next start.
+    again = asyncio.run(LogMigration(logs, restarted, events, workers=1).run())
+    assert again.days_total == 0
+
+
+@pytest.mark.parametrize("legacy_index", [False, True])
+def test_day_compacted_after_checkpoint_resumes_in_the_segment(logs, tmp_path, monkeypatch, legacy_index):
+    reference = StatsStorage(DatabaseConnection(tmp_path / "reference.db"))
+    asyncio.run(LogMigration(logs, reference, _Events(), workers=1, cpu_share=1.0, chunk_size=2000).run())
+
+    db_path = tmp_path / "procedural.db"
+    storage = StatsStorage(DatabaseConnection(db_path))
+    original = storage.apply_migration_batch
+    calls = 0
+
+    class Crash(Exception):
+        pass
+
+    async def crash_on_fifth(*args):
+        nonlocal calls
+        calls += 1
+        if calls == 5:
+            raise Crash()
+        return await original(*args)
+
+    monkeypatch.setattr(storage, "apply_migration_batch", crash_on_fifth)
+    with pytest.raises(Crash):
+        asyncio.run(LogMigration(logs, storage, _Events(), workers=1, cpu_share=1.0, chunk_size=2000).run())
+    date, file_name, offset = asyncio.run(storage.get_migration_checkpoint("42"))
+    assert (date, file_name) == ("20240305", "info.jsonl") and offset > 0
+
+    # The day is closed and compacted before the migration restarts; the
+    # checkpoint offset falls inside a block.
+    index = compact_file(logs / "42" / "20240305" / "info.jsonl", block_size=4096)
+    assert len(index.blocks) > 1
+    if legacy_index:
+        index_path = logs / "42" / "20240305" / "info.jsonl.idx"
+        data = json.loads(index_path.read_text())
+        data["compacted_from"] = {k: data["compacted_from"][k] for k in ("size", "sha1")}
+        index_path.write_text(json.dumps(data))
+
+    restarted = StatsStorage(DatabaseConnection(db_path))
+    asyncio.run(LogMigration(logs, restarted, _Events(), workers=1, cpu_share=1.0, chunk_size=2000).run())
+    assert _user_stats(db_path) == _user_stats(tmp_path / "reference.db")
+
+
+def test_spawned_workers_do_not_build_the_bot():
+    # spawn re-imports the parent's __main__ (main.py when the bot runs) in every worker.
+    driver = textwrap.dedent(f"""
+        import multiprocessing, sys
+        from concurrent.futures import ProcessPoolExecutor
+        sys.modules["__main__"].__file__ = {str(project_root / "main.py")!r}
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            probe = "sorted(m for m in ('bot', 'discord', '__mp_main__') if m in __import__('sys').modules)"
+            print(pool.submit(eval, probe).result())
+    """)
+    result = subprocess.run(
+        [sys.executable, "-c", driver], cwd=project_root, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "['__mp_main__']"
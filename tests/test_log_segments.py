@@ -0,0 +1,164 @@
+import gzip
+import importlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from addons.log_segments import (
+    compact_closed_days,
+    compact_file,
+    has_day_log,
+    iter_day_records,
+    iter_segment,
+    load_index,
+    read_range,
+    segment_paths,
+)
+
+DAY = datetime(2024, 3, 5, tzinfo=timezone.utc)
+
+
+def _record(i, level="INFO", start=DAY):
+    ts = start + timedelta(seconds=i * 10)
+    return {
+        "timestamp": ts.isoformat().replace("+00:00", "Z"),
+        "level": level,
+        "source": "test",
+        "server_id": "42",
+        "action": "receive_message",
+        "user_id": str(i % 7),
+        "message": f"message {i} " + "x" * 40,
+        "extra": {"channel_id": i % 3},
+    }
+
+
+def _write_day(path, records):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as fh:
+        for record in records:
+            fh.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def test_compaction_round_trip_and_blocks_decode_independently(tmp_path):
+    path = tmp_path / "42" / "20240305" / "info.jsonl"
+    records = [_record(i) for i in range(500)]
+    _write_day(path, records)
+
+    index = compact_file(path, block_size=4096)
+
+    assert index is not None and len(index.blocks) > 5
+    assert not path.exists()
+    gz_path, index_path = segment_paths(path)
+    assert load_index(index_path).records == 500
+    assert list(iter_segment(path)) == records
+
+    # The file is one valid gzip stream and each block is a gzip member.
+    assert len(gzip.decompress(gz_path.read_bytes()).splitlines()) == 500
+    block = index.blocks[3]
+    with open(gz_path, "rb") as fh:
+        fh.seek(block.offset)
+        lines = gzip.decompress(fh.read(block.length)).splitlines()
+    assert len(lines) == block.records
+    assert block.levels == {"INFO": block.records}
+
+
+def test_range_read_only_decodes_overlapping_blocks(tmp_path, monkeypatch):
+    path = tmp_path / "42" / "20240305" / "info.jsonl"
+    records = [_record(i) for i in range(1000)]
+    _write_day(path, records)
+    index = compact_file(path, block_size=4096)
+
+    decoded = []
+    real_decompress = gzip.decompress
+    monkeypatch.setattr(gzip, "decompress", lambda data: decoded.append(len(data)) or real_decompress(data))
+
+    start, end = DAY + timedelta(seconds=2000), DAY + timedelta(seconds=2990)
+    got = list(iter_segment(path, start, end))
+
+    assert [r["message"] for r in got] == [r["message"] for r in records[200:300]]
+    assert 0 < len(decoded) < len(index.blocks) / 2
+
+
+def test_late_records_append_blocks_and_leftover_is_not_duplicated(tmp_path):
+    path = tmp_path / "42" / "20240305" / "info.jsonl"
+    _write_day(path, [_record(i) for i in range(100)])
+    compact_file(path, block_size=2048)
+
+    # A late flush recreates the plain file; readers see both parts.
+    _write_day(path, [_record(i) for i in range(100, 120)])
+    assert len(list(iter_day_records(path.parent))) == 120
+
+    index = compact_file(path, block_size=2048)
+    assert index.records == 120
+    assert [r["message"] for r in iter_segment(path)] == [_record(i)["message"] for i in range(120)]
+
+    # Simulate a plain file whose deletion failed after it was compacted.
+    _write_day(path, [_record(i) for i in range(120, 130)])
+    index = compact_file(path, block_size=2048)
+    _write_day(path, [_record(i) for i in range(120, 130)])
+    os.utime(path)
+    assert index.compacted_from["size"] == path.stat().st_size
+    assert len(list(iter_segment(path))) == 130
+    assert compact_file(path).records == 130
+    assert not path.exists()
+
+
+def test_segment_without_index_is_ignored_and_rebuilt(tmp_path):
+    path = tmp_path / "42" / "20240305" / "info.jsonl"
+    records = [_record(i) for i in range(50)]
+    _write_day(path, records)
+    gz_path, _ = segment_paths(path)
+    gz_path.write_bytes(gzip.compress(b"partial\n"))
+
+    assert list(iter_segment(path)) == records
+    compact_file(path)
+    assert list(iter_segment(path)) == records
+
+
+def test_compact_closed_days_skips_today_and_recent_files(tmp_path):
+    old = tmp_path / "42" / "20240305" / "info.jsonl"
+    fresh = tmp_path / "42" / "20240306" / "info.jsonl"
+    today = tmp_path / "42" / "20240307" / "info.jsonl"
+    for path in (old, fresh, today):
+        _write_day(path, [_record(i) for i in range(10)])
+    hour_ago = time.time() - 7200
+    os.utime(old, (hour_ago, hour_ago))
+    os.utime(today, (hour_ago, hour_ago))
+
+    stats = compact_closed_days(tmp_path, today="20240307", grace_seconds=3600)
+
+    assert stats.files == 1 and stats.records == 10
+    assert not old.exists() and fresh.exists() and today.exists()
+    assert has_day_log(old.parent) and has_day_log(fresh.parent)
+
+
+def test_read_range_spans_days_and_levels(tmp_path):
+    first = tmp_path / "42" / "20240305"
+    second = tmp_path / "42" / "20240306"
+    _write_day(first / "info.jsonl", [_record(i) for i in range(8640 - 10, 8640)])
+    _write_day(first / "error.jsonl", [_record(8635, level="ERROR")])
+    _write_day(second / "info.jsonl", [_record(i) for i in range(8640, 8650)])
+    compact_file(first / "info.jsonl")
+
+    start, end = DAY + timedelta(seconds=86340), DAY + timedelta(seconds=86420)
+    info = list(read_range(tmp_path, "42", start, end))
+    both = list(read_range(tmp_path, "42", start, end, levels=("INFO", "ERROR")))
+
+    assert len(info) == 9
+    assert len(both) == 10
+    assert list(read_range(tmp_path, "missing", start, end)) == []
+
+
+def test_compaction_is_opt_in(tmp_path, monkeypatch):
+    settings = sys.modules.get("addons.settings")
+    if settings is None or not hasattr(settings, "BaseConfig"):
+        monkeypatch.delitem(sys.modules, "addons.settings", raising=False)
+        settings = importlib.import_module("addons.settings")
+    path = tmp_path / "base.yaml"
+    path.write_text("logging:\n  rotation:\n    compress: true\n")
+
+    rotation = settings.BaseConfig(str(path)).logging["rotation"]
+    assert rotation["compress"] is True
+    assert rotation["compact"] is False
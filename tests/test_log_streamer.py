@@ -0,0 +1,180 @@
+"""Tests for LogStreamer per-client queues and backpressure."""
+import asyncio
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+
+@pytest.fixture
+def streamer_module(real_dashboard):
+    return importlib.import_module("dashboard.websocket.log_streamer")
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0, block=False):
+        self.delay = delay
+        self.block = block
+        self.sent = []
+        self.closed = None
+        self.in_send = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.in_send.set()
+        if self.block:
+            await asyncio.Event().wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def close(self, code=1000, reason=""):
+        self.closed = code
+
+
+def _record(i, server="1", level="INFO"):
+    return {"timestamp": f"t{i}", "level": level, "server_id": server, "message": str(i)}
+
+
+async def _until(predicate, timeout=1.0):
+    """Yield to the loop until ``predicate()`` holds, failing after ``timeout`` seconds."""
+    async with asyncio.timeout(timeout):
+        while not predicate():
+            await asyncio.sleep(0.001)
+
+
+def test_slow_client_does_not_delay_fast_clients(streamer_module):
+    async def run():
+        streamer = streamer_module.LogStreamer(queue_size=50)
+        slow, fast = FakeWebSocket(delay=0.5), FakeWebSocket()
+        await streamer.connect(slow)
+        await streamer.connect(fast)
+
+        start = asyncio.get_running_loop().time()
+        for i in range(20):
+            streamer.publish(_record(i), f"payload-{i}")
+        await _until(lambda: len(fast.sent) == 20)
+        elapsed = asyncio.get_running_loop().time() - start
+
+        assert fast.sent == [f"payload-{i}" for i in range(20)]
+        assert slow.sent == []
+        assert elapsed < 0.2
+        await streamer.disconnect(slow)
+        await streamer.disconnect(fast)
+        assert streamer.stats()["clients"] == 0
+
+    asyncio.run(run())
+
+
+def test_payload_is_serialized_once_and_shared(streamer_module):
+    async def run():
+        streamer = streamer_module.LogStreamer()
+        clients = [FakeWebSocket() for _ in range(3)]
+        for ws in clients:
+            await streamer.connect(ws)
+        streamer.publish({"level": "INFO", "server_id": "1", "message": "héllo"})
+        await _until(lambda: all(ws.sent for ws in clients))
+        payloads = [ws.sent[0] for ws in clients]
+        assert payloads[0] == '{"level":"INFO","server_id":"1","message":"héllo"}'
+        assert all(p is payloads[0] for p in payloads)
+        for ws in clients:
+            await streamer.disconnect(ws)
+
+    asyncio.run(run())
+
+
+def test_drop_oldest_keeps_newest_records(streamer_module):
+    async def run():
+        streamer = streamer_module.LogStreamer(queue_size=5)
+        ws = FakeWebSocket(block=True)
+        await streamer.connect(ws)
+        streamer.publish(_record(0), "p0")
+        await asyncio.wait_for(ws.in_send.wait(), 1.0)  # p0 is now stuck in send_text
+        for i in range(1, 21):
+            streamer.publish(_record(i), f"p{i}")
+
+        client = streamer._clients[id(ws)]
+        assert list(client.queue) == [f"p{i}" for i in range(16, 21)]
+        assert streamer.stats()["dropped"] == 15
+        await streamer.disconnect(ws)
+
+    asyncio.run(run())
+
+
+def test_disconnect_policy_closes_lagging_client(streamer_module):
+    async def run():
+        streamer = streamer_module.LogStreamer(queue_size=3, overflow="disconnect")
+        lagging, healthy = FakeWebSocket(block=True), FakeWebSocket()
+        await streamer.connect(lagging)
+        await streamer.connect(healthy)
+        for i in range(10):
+            streamer.publish(_record(i), f"p{i}")
+            await _until(lambda: len(healthy.sent) == i + 1)
+        await _until(lambda: lagging.closed is not None)
+        assert lagging.closed == 1013
+        assert streamer.stats() == {"clients": 1, "pending": 0, "dropped": 0, "lag_disconnects": 1}
+        await streamer.disconnect(healthy)
+
+    asyncio.run(run())
+
+
+def test_send_timeout_disconnects_stalled_client(streamer_module):
+    async def run():
+        streamer = streamer_module.LogStreamer(send_timeout=0.05)
+        stalled = FakeWebSocket(block=True)
+        await streamer.connect(stalled)
+        streamer.publish(_record(0), "p0")
+        await _until(lambda: stalled.closed is not None)
+        assert stalled.closed == 1013
+        assert streamer.stats()["lag_disconnects"] == 1
+        assert streamer.stats()["clients"] == 0
+
+    asyncio.run(run())
+
+
+def test_disconnect_stops_a_sender_blocked_in_send(streamer_module):
+    async def run():
+        streamer = streamer_module.LogStreamer()
+        ws = FakeWebSocket(block=True)
+        await streamer.connect(ws)
+        task = streamer._clients[id(ws)].task
+        streamer.publish(_record(0), "p0")
+        await asyncio.wait_for(ws.in_send.wait(), 1.0)
+        await asyncio.wait_for(streamer.disconnect(ws), 1.0)
+        assert task.done()
+
+    asyncio.run(run())
+
+
+def test_replay_and_filters(streamer_module):
+    async def run():
+        streamer = streamer_module.LogStreamer(buffer_size=3)
+        for i in range(5):
+            streamer.publish(_record(i, server=str(i % 2)), f"p{i}")
+        ws = FakeWebSocket()
+        filters = {"guild_id": "0", "level": None}
+        await streamer.connect(ws, filters)
+        await _until(lambda: len(ws.sent) == 2)
+        assert ws.sent == ["p2", "p4"]
+
+        # Endpoints mutate the filters dict in place when the client asks.
+        filters["level"] = "error"
+        streamer.publish(_record(6, server="0"), "info")
+        streamer.publish(_record(8, server="0", level="ERROR"), "error")
+        await _until(lambda: len(ws.sent) == 3)
+        assert ws.sent[-1] == "error" and "info" not in ws.sent
+        await streamer.disconnect(ws)
+
+    asyncio.run(run())
+
+
+def test_invalid_overflow_policy_is_rejected(streamer_module):
+    with pytest.raises(ValueError):
+        streamer_module.LogStreamer(overflow="block")
@@ -0,0 +1,224 @@
+"""Tests for the BackgroundWriter file-handle pool."""
+import importlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+
+def _path(tmp_path, server, date_str, level="info"):
+    return str(tmp_path / server / date_str / f"{level}.jsonl")
+
+
+def test_pool_reuses_handles_and_evicts_lru(logging_module, tmp_path):
+    pool = logging_module._FileHandlePool(max_open=3)
+    for _ in range(5):
+        for server in ("a", "b", "c"):
+            pool.write(_path(tmp_path, server, "20240101"), "20240101", "x\n")
+    assert pool.metrics["opens"] == 3
+    assert pool.metrics["evictions"] == 0
+
+    # "a" is least recently used and is evicted by "d".
+    pool.write(_path(tmp_path, "d", "20240101"), "20240101", "x\n")
+    assert len(pool) == 3
+    assert pool.metrics["evictions"] == 1
+    pool.write(_path(tmp_path, "b", "20240101"), "20240101", "x\n")
+    assert pool.metrics["opens"] == 4
+
+    pool.close_all()
+    assert len(pool) == 0
+    with open(_path(tmp_path, "a", "20240101"), encoding="utf-8") as fh:
+        assert fh.read() == "x\n" * 5
+
+
+def test_pool_closes_previous_days_on_rollover(logging_module, tmp_path):
+    pool = logging_module._FileHandlePool(max_open=10)
+    pool.roll_over("20240101")
+    pool.write(_path(tmp_path, "a", "20240101"), "20240101", "old\n")
+    pool.write(_path(tmp_path, "a", "20240102"), "20240102", "new\n")
+
+    pool.roll_over("20240101")  # same day: nothing to do
+    assert len(pool) == 2
+    pool.roll_over("20240102")
+    assert len(pool) == 1
+    assert pool.metrics["rollover_closes"] == 1
+    pool.close_all()
+
+
+def test_pool_fsync_policies(logging_module, tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(logging_module.os, "fsync", lambda fd: synced.append(fd))
+
+    batch_pool = logging_module._FileHandlePool(fsync_policy="batch")
+    batch_pool.write(_path(tmp_path, "a", "20240101"), "20240101", "x\n")
+    batch_pool.write(_path(tmp_path, "b", "20240101"), "20240101", "x\n")
+    batch_pool.end_batch()
+    assert batch_pool.metrics["fsyncs"] == 2
+    batch_pool.close_all()
+
+    interval_pool = logging_module._FileHandlePool(fsync_policy="interval", fsync_interval=3600)
+    interval_pool.write(_path(tmp_path, "a", "20240101"), "20240101", "x\n")
+    interval_pool.end_batch()
+    assert interval_pool.metrics["fsyncs"] == 0
+    interval_pool.fsync_interval = 0
+    interval_pool.maybe_fsync()
+    assert interval_pool.metrics["fsyncs"] == 1
+    interval_pool.close_all()
+
+    never_pool = logging_module._FileHandlePool(fsync_policy="never")
+    synced.clear()
+    never_pool.write(_path(tmp_path, "a", "20240101"), "20240101", "x\n")
+    never_pool.end_batch()
+    never_pool.close_all()
+    assert synced == []
+
+
+def test_pool_respects_fd_limit(logging_module, monkeypatch):
+    monkeypatch.setattr(logging_module, "_fd_soft_limit", lambda: 40)
+    assert logging_module._FileHandlePool(max_open=1000).max_open == 10
+
+
+def _entry(server, i, level="INFO", unix_time=1709632800.0, **fields):
+    return (unix_time, level, "tests", server, "", {}, {"i": i, **fields}, f"message {i}", None)
+
+
+def _adapter(logging_module, writer):
+    adapter = logging_module.LoggerAdapter.__new__(logging_module.LoggerAdapter)
+    adapter.server_id, adapter.source, adapter.channel = "1", "tests", ""
+    adapter.bound_context = {"user_id": "9"}
+    adapter._writer = writer
+    return adapter
+
+
+def test_writer_flushes_everything_on_stop(logging_module, tmp_path, monkeypatch):
+    monkeypatch.setitem(logging_module.CONFIG, "log_base_path", str(tmp_path))
+    monkeypatch.setitem(logging_module.CONFIG, "async", {"batch_size": 50, "flush_interval": 0.05})
+    monkeypatch.setitem(logging_module.CONFIG, "files", {"max_open": 8, "fsync": "never"})
+    monkeypatch.setitem(logging_module.CONFIG, "console", {"enabled": False})
+    writer = logging_module.BackgroundWriter()
+
+    expected = {}
+    for i in range(150):
+        server = f"guild{i % 30}"
+        writer.submit(_entry(server, i))
+        expected.setdefault(server, []).append(i)
+    writer.stop()
+
+    assert len(writer._pool) == 0
+    for server, numbers in expected.items():
+        # 1709632800 is 2024-03-05T10:00:00Z
+        with open(os.path.join(tmp_path, server, "20240305", "info.jsonl"), encoding="utf-8") as fh:
+            assert [json.loads(line)["extra"]["i"] for line in fh] == numbers
+
+
+def test_build_records_merges_context_and_dumps_exceptions(logging_module):
+    try:
+        raise ValueError("boom")
+    except ValueError as e:
+        exc = e
+    entry = (1709632800.5, "error", "src", "42", "general", {"user_id": 7, "action": "bound"},
+             {"action": "call", "trace_id": 3, "k": "v"}, "failed", exc)
+
+    record, follow_up = logging_module._build_records(entry)
+    assert record.timestamp == "2024-03-05T10:00:00.500000Z"
+    assert (record.level, record.channel_or_file, record.user_id) == ("ERROR", "general", "7")
+    assert (record.action, record.trace_id, record.extra) == ("call", "3", {"k": "v"})
+    assert follow_up.action == "exception"
+    assert "ValueError: boom" in follow_up.extra["exception"]
+
+
+def test_emit_does_not_serialize_on_calling_thread(logging_module, monkeypatch):
+    submitted = []
+
+    class _Writer:
+        def submit(self, entry):
+            submitted.append(entry)
+
+    monkeypatch.setattr(logging_module.json, "dumps", lambda *a, **k: pytest.fail("serialized on caller"))
+    monkeypatch.setitem(logging_module.CONFIG, "console", {"enabled": True, "level": "WARNING"})
+    adapter = _adapter(logging_module, _Writer())
+
+    adapter.info("hello %s", "world", action="greet")
+    assert len(submitted) == 1
+    assert submitted[0][1] == "INFO"
+    assert submitted[0][6] == {"action": "greet"}
+    assert submitted[0][7] == "hello world"
+
+
+def test_console_lines_are_rendered_by_the_caller(logging_module, tmp_path, monkeypatch):
+    monkeypatch.setitem(logging_module.CONFIG, "log_base_path", str(tmp_path))
+    monkeypatch.setitem(logging_module.CONFIG, "async", {"batch_size": 2, "flush_interval": 0.05})
+    monkeypatch.setitem(logging_module.CONFIG, "console", {"enabled": True, "color": False, "level": "INFO"})
+    rendered = []
+    monkeypatch.setattr(
+        logging_module.BackgroundWriter, "_render_console",
+        staticmethod(lambda record, cfg: rendered.append(logging_module.LoggerAdapter._format_console_line(record))),
+    )
+    writer = logging_module.BackgroundWriter()
+    writer.stop()  # worker gone: nothing drains the queue
+    for i in range(writer.queue_maxsize):
+        writer.submit(_entry("g", i))
+    adapter = _adapter(logging_module, writer)
+
+    # Rendered at call time even though the full queue drops the record
+    adapter.info("queue full")
+    adapter.debug("below the console level")
+    assert len(rendered) == 1
+    assert rendered[0].endswith("queue full")
+    assert writer.metrics()["dropped"] == 2
+
+    writer._queue.get_nowait()
+    adapter.warning("built once", n=1)
+    queued = writer._queue.queue[-1]
+    assert [record.message for record in queued] == ["built once"]
+    seen = []
+    writer.add_listener(lambda records: seen.extend(obj["message"] for obj, _line in records))
+    writer._write_batch([queued])
+    writer._pool.close_all()
+    assert seen == ["built once", f"Logging queue full (maxsize={writer.queue_maxsize}); dropped 2 records (2 total)"]
+
+
+def test_full_queue_drops_and_reports_once(logging_module, tmp_path, monkeypatch):
+    monkeypatch.setitem(logging_module.CONFIG, "log_base_path", str(tmp_path))
+    monkeypatch.setitem(logging_module.CONFIG, "async", {"batch_size": 2, "flush_interval": 0.05})
+    monkeypatch.setitem(logging_module.CONFIG, "console", {"enabled": False})
+    writer = logging_module.BackgroundWriter()
+    writer.stop()  # worker gone: nothing drains the queue
+
+    for i in range(writer.queue_maxsize + 5):
+        writer.submit(_entry("g", i))
+    assert writer.metrics()["dropped"] == 5
+
+    seen = []
+    writer.add_listener(lambda records: seen.extend(records))
+    writer._write_batch([writer._queue.get_nowait()])
+    writer._pool.close_all()
+    assert [obj["action"] for obj, _line in seen] == ["", "log_dropped"]
+    assert seen[1][0]["extra"]["dropped"] == 5
+    assert json.loads(seen[0][1])["extra"]["i"] == 0
+
+
+@pytest.mark.parametrize(
+    "logging_yaml, expected",
+    [
+        ("fsync_on_flush: true\n", "batch"),
+        ("fsync_on_flush: false\n", "never"),
+        ("fsync_on_flush: true\nfiles:\n  fsync: interval\n", "interval"),
+        ("fsync_on_flush: true\nfiles:\n  max_open: 64\n", "batch"),
+    ],
+)
+def test_fsync_on_flush_maps_to_policy_unless_fsync_is_set(tmp_path, monkeypatch, logging_yaml, expected):
+    settings = sys.modules.get("addons.settings")
+    if settings is None or not hasattr(settings, "BaseConfig"):
+        monkeypatch.delitem(sys.modules, "addons.settings", raising=False)
+        settings = importlib.import_module("addons.settings")
+    path = tmp_path / "base.yaml"
+    path.write_text("logging:\n" + "".join(f"  {line}\n" for line in logging_yaml.splitlines()))
+
+    assert settings.BaseConfig(str(path)).logging["files"]["fsync"] == expected
@@ -0,0 +1,133 @@
+"""Tests for the background message event bus used by on_message."""
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from addons.message_bus import MessageBus
+
+
+def _message(i: int, channel_id: int = 10, bot: bool = False):
+    return SimpleNamespace(
+        id=1000 + i,
+        content=f"message {i}",
+        author=SimpleNamespace(id=i % 3, name=f"user{i % 3}", bot=bot),
+        channel=SimpleNamespace(id=channel_id),
+        guild=SimpleNamespace(id=1),
+        created_at=datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=i),
+    )
+
+
+def test_publish_does_not_wait_for_subscribers():
+    async def scenario():
+        bus = MessageBus()
+        release = asyncio.Event()
+        received = []
+
+        async def slow(events):
+            await release.wait()
+            received.extend(e.message.id for e in events)
+
+        bus.subscribe("slow", slow, batch_size=10, flush_interval=0.01)
+        start = time.perf_counter()
+        for i in range(50):
+            bus.publish(_message(i))
+        publish_time = time.perf_counter() - start
+
+        release.set()
+        await bus.close()
+        return publish_time, received
+
+    publish_time, received = asyncio.run(scenario())
+    assert publish_time < 0.05
+    assert received == [1000 + i for i in range(50)]
+
+
+def test_events_are_batched_per_subscriber():
+    async def scenario():
+        bus = MessageBus()
+        batches = {"a": [], "b": []}
+
+        async def handler_for(name):
+            async def handler(events):
+                batches[name].append(len(events))
+            return handler
+
+        bus.subscribe("a", await handler_for("a"), batch_size=25, flush_interval=0.05)
+        bus.subscribe("b", await handler_for("b"), batch_size=100, flush_interval=0.05)
+        for i in range(100):
+            bus.publish(_message(i))
+        await bus.close()
+        return batches, bus.stats()
+
+    batches, stats = asyncio.run(scenario())
+    assert batches["a"] == [25, 25, 25, 25]
+    assert batches["b"] == [100]
+    assert stats["a"].processed == stats["b"].processed == 100
+
+
+def test_full_queue_drops_and_counts():
+    async def scenario():
+        bus = MessageBus()
+        gate = asyncio.Event()
+
+        async def blocked(events):
+            await gate.wait()
+
+        bus.subscribe("blocked", blocked, max_queue=10, batch_size=1, flush_interval=0)
+        for i in range(30):
+            bus.publish(_message(i))
+        stats = bus.stats()["blocked"]
+        gate.set()
+        await bus.close()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats.queued == 10
+    assert stats.dropped == 20
+
+
+def test_failing_batch_does_not_stop_worker():
+    async def scenario():
+        bus = MessageBus()
+        seen = []
+
+        async def flaky(events):
+            if any(e.message.id == 1000 for e in events):
+                raise RuntimeError("boom")
+            seen.extend(e.message.id for e in events)
+
+        bus.subscribe("flaky", flaky, batch_size=1, flush_interval=0)
+        for i in range(3):
+            bus.publish(_message(i))
+        await bus.close()
+        return seen, bus.stats()["flaky"]
+
+    seen, stats = asyncio.run(scenario())
+    assert seen == [1001, 1002]
+    assert stats.errors == 1
+
+
+def test_close_drains_and_rejects_new_events():
+    async def scenario():
+        bus = MessageBus()
+        seen = []
+
+        async def handler(events):
+            await asyncio.sleep(0.01)
+            seen.extend(events)
+
+        bus.subscribe("h", handler, batch_size=5, flush_interval=1.0)
+        for i in range(12):
+            bus.publish(_message(i))
+        await bus.close(timeout=2.0)
+        bus.publish(_message(99))
+        return len(seen)
+
+    assert asyncio.run(scenario()) == 12
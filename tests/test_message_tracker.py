@@ -0,0 +1,412 @@
+"""Tests for MessageTracker: in-memory channel counters, the message spool
+and resumable background memory jobs."""
+import asyncio
+import importlib
+import sys
+import types
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+_TRACKER = "cogs.memory.services.message_tracker"
+
+
+@dataclass
+class _EventMetadata:
+    start_message_id: int
+    end_message_id: int
+    channel_id: int
+    guild_id: int
+    user_ids: List[int]
+    start_timestamp: float
+    end_timestamp: float
+    reaction_list: List[Dict[str, Any]]
+    event_type: Optional[str] = None
+
+
+@dataclass
+class _EventSummary:
+    query_key: str
+    query_keywords: List[str]
+    query_value: str
+    entities: List[Dict[str, str]]
+    metadata: _EventMetadata
+
+
+class _NoService:
+    def __init__(self, *args, **kwargs):
+        raise AssertionError("the test did not replace this service")
+
+
+def _use_real_module(monkeypatch, name: str, attribute: str) -> None:
+    """Re-imports ``name`` for this test if a stub without ``attribute`` replaced it."""
+    if hasattr(sys.modules.get(name), attribute):
+        return
+    for stub in [key for key in sys.modules if key == name or key.startswith(name + ".")]:
+        if getattr(sys.modules[stub], "__file__", None) is None:
+            monkeypatch.delitem(sys.modules, stub)
+    importlib.import_module(name)
+
+
+@pytest.fixture
+def tracker_module(monkeypatch):
+    """message_tracker imported against stubs of the LLM-backed services.
+
+    The summarization and vectorization services pull in langchain and the
+    vector store; the tests replace them with fakes anyway.
+    """
+    summarization = types.ModuleType("cogs.memory.services.event_summarization_service")
+    summarization.EventMetadata = _EventMetadata
+    summarization.EventSummary = _EventSummary
+    summarization.EventSummarizationService = _NoService
+    vectorization = types.ModuleType("cogs.memory.services.vectorization_service")
+    vectorization.VectorizationService = _NoService
+    monkeypatch.setitem(sys.modules, summarization.__name__, summarization)
+    monkeypatch.setitem(sys.modules, vectorization.__name__, vectorization)
+    # Other test modules replace these with stubs when they are collected.
+    _use_real_module(monkeypatch, "discord", "Message")
+    _use_real_module(monkeypatch, "addons.settings", "MemoryConfig")
+    monkeypatch.delitem(sys.modules, _TRACKER, raising=False)
+    yield importlib.import_module(_TRACKER)
+    sys.modules.pop(_TRACKER, None)
+
+
+def _message(i: int, channel_id: int = 10, bot: bool = False):
+    return SimpleNamespace(
+        id=1000 + i,
+        content=f"message {i}",
+        author=SimpleNamespace(id=i % 3, name=f"user{i % 3}", bot=bot),
+        channel=SimpleNamespace(id=channel_id),
+        guild=SimpleNamespace(id=1),
+        created_at=datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=i),
+    )
+
+
+class _FakeEpisodicStorage:
+    def __init__(self):
+        self.state = {}
+        self.spool = {}
+        self.progress = {}
+        self.reads = 0
+        self.writes = 0
+
+    async def get_channel_memory_state(self, channel_id):
+        self.reads += 1
+        return dict(self.state[channel_id]) if channel_id in self.state else None
+
+    async def update_channel_memory_state(self, channel_id, message_count, start_message_id,
+                                          last_summary_timestamp=None, last_summary_text=None,
+                                          last_message_id=None):
+        self.writes += 1
+        previous = self.state.get(channel_id, {})
+        self.state[channel_id] = {
+            "message_count": message_count,
+            "start_message_id": start_message_id,
+            "last_summary_timestamp": last_summary_timestamp
+            if last_summary_timestamp is not None else previous.get("last_summary_timestamp", 0.0),
+            "last_message_id": last_message_id
+            if last_message_id is not None else previous.get("last_message_id", 0),
+        }
+
+    async def save_channel_message_counts(self, counts, spooled=()):
+        self.writes += 1
+        for channel_id, message_count, last_message_id in counts:
+            self.state[channel_id].update(message_count=message_count, last_message_id=last_message_id)
+        await self.spool_messages(spooled)
+        return True
+
+    async def spool_messages(self, rows):
+        for row in rows:
+            self.spool[(row.channel_id, row.message_id)] = row
+        return True
+
+    async def get_spooled_messages(self, channel_id, from_message_id, limit):
+        rows = sorted(
+            (row for (cid, mid), row in self.spool.items() if cid == channel_id and mid >= from_message_id),
+            key=lambda row: row.message_id,
+        )
+        return rows[:limit]
+
+    async def trim_spooled_messages(self, channel_id, before_message_id):
+        for key in [key for key in self.spool if key[0] == channel_id and key[1] < before_message_id]:
+            del self.spool[key]
+
+    async def save_job_progress(self, channel_id, start_message_id, end_message_id, summaries):
+        self.progress[channel_id] = {
+            "start_message_id": start_message_id, "end_message_id": end_message_id, "summaries": summaries,
+        }
+
+    async def get_job_progress(self, channel_id):
+        return self.progress.get(channel_id)
+
+    async def clear_job_progress(self, channel_id):
+        self.progress.pop(channel_id, None)
+
+
+class _FakeChannel:
+    """A channel whose history() yields its messages oldest first, as Discord does with after=."""
+
+    def __init__(self, channel_id, history=()):
+        self.id = channel_id
+        self.messages = sorted(history, key=lambda m: m.id)
+        self.history_calls = 0
+
+    async def history(self, after, before, limit):
+        self.history_calls += 1
+        matching = [m for m in self.messages if after.id < m.id < before.id]
+        for message in matching[:limit]:
+            yield message
+
+
+def _message_in(channel, i, bot=False):
+    message = _message(i, channel_id=channel.id, bot=bot)
+    message.channel = channel
+    return message
+
+
+def test_tracker_keeps_counters_in_memory_until_flush(tracker_module):
+
+    async def scenario():
+        storage = _FakeEpisodicStorage()
+        settings = SimpleNamespace(message_threshold=1000, time_threshold=10**9, counter_flush_interval=3600)
+        tracker = tracker_module.MessageTracker(bot=None, storage=storage, settings=settings)
+        messages = [_message(i, channel_id=10 + i % 2) for i in range(20)]
+        messages.append(_message(99, channel_id=10, bot=True))
+        await tracker.track_messages(messages)
+        for i in range(20, 40):
+            await tracker.track_messages([_message(i, channel_id=10)])
+        before_flush = (storage.reads, storage.writes, storage.state[10]["message_count"])
+        await tracker.close()
+        return storage, before_flush
+
+    storage, before_flush = asyncio.run(scenario())
+    # One read and one new-state write per channel; the 20 later batches stay in memory.
+    assert before_flush == (2, 2, 10)
+    assert storage.state[10]["message_count"] == 30
+    assert storage.state[11]["message_count"] == 10
+    assert storage.state[10]["start_message_id"] == 1000
+    assert storage.state[11]["start_message_id"] == 1001
+    assert storage.state[10]["last_message_id"] == 1039
+    # close() flushed both channels in one write.
+    assert storage.writes == 3
+
+
+def test_tracker_flushes_when_a_channel_crosses_the_threshold(tracker_module):
+
+    async def scenario():
+        storage = _FakeEpisodicStorage()
+        settings = SimpleNamespace(message_threshold=5, time_threshold=10**9, counter_flush_interval=3600)
+        tracker = tracker_module.MessageTracker(bot=None, storage=storage, settings=settings)
+        for i in range(7):
+            await tracker.track_messages([_message(i)])
+        return storage
+
+    storage = asyncio.run(scenario())
+    # New state row, then one write at the crossing (count 5); counts 6 and 7 wait for the flush.
+    assert storage.writes == 2
+    assert storage.state[10]["message_count"] == 5
+
+
+def test_tracker_recounts_unflushed_messages_after_a_crash(tracker_module):
+    settings = SimpleNamespace(message_threshold=1000, time_threshold=10**9, counter_flush_interval=3600)
+    storage = _FakeEpisodicStorage()
+    channel = _FakeChannel(10)
+
+    async def before_crash():
+        tracker = tracker_module.MessageTracker(bot=None, storage=storage, settings=settings)
+        await tracker.track_messages([_message_in(channel, i) for i in range(5)])
+        await tracker.flush_counters()
+        # Tracked but never flushed: lost with the process.
+        for i in range(5, 12):
+            await tracker.track_messages([_message_in(channel, i)])
+        await tracker.track_messages([_message_in(channel, 12, bot=True)])
+
+    asyncio.run(before_crash())
+    assert storage.state[10]["message_count"] == 5
+    channel.messages = [_message_in(channel, i, bot=(i == 12)) for i in range(13)]
+
+    async def after_restart():
+        tracker = tracker_module.MessageTracker(bot=None, storage=storage, settings=settings)
+        await tracker.track_messages([_message_in(channel, 13)])
+        await tracker.track_messages([_message_in(channel, 14)])
+        await tracker.close()
+
+    asyncio.run(after_restart())
+    assert storage.state[10]["message_count"] == 14
+    assert storage.state[10]["last_message_id"] == 1014
+    assert channel.history_calls == 1
+
+
+def test_tracker_reads_tracked_messages_from_the_spool(tracker_module):
+    settings = SimpleNamespace(message_threshold=1000, time_threshold=10**9, counter_flush_interval=3600)
+    storage = _FakeEpisodicStorage()
+    channel = _FakeChannel(10)
+
+    async def scenario():
+        tracker = tracker_module.MessageTracker(bot=None, storage=storage, settings=settings)
+        await tracker.track_messages([_message_in(channel, i, bot=(i == 3)) for i in range(6)])
+        await tracker.track_messages([_message_in(channel, i) for i in range(6, 9)])
+        # Unflushed rows are written before they are read back.
+        await tracker.flush_counters()
+        return await tracker._collect_messages(channel, 1000, fetch_limit=5)
+
+    messages, after_start = asyncio.run(scenario())
+    assert [m.id for m in messages] == [1000, 1001, 1002, 1003, 1004, 1005]
+    assert after_start == 5
+    assert messages[3].author.bot and messages[1].author.display_name == "user1"
+    assert channel.history_calls == 0
+
+
+def test_tracker_backfills_only_the_gap_in_the_spool(tracker_module):
+    settings = SimpleNamespace(message_threshold=6, time_threshold=10**9, counter_flush_interval=3600)
+    storage = _FakeEpisodicStorage()
+    channel = _FakeChannel(10)
+
+    async def before_crash():
+        tracker = tracker_module.MessageTracker(bot=None, storage=storage, settings=settings)
+        await tracker.track_messages([_message_in(channel, i) for i in range(5)])
+        await tracker.flush_counters()
+        # 1005 reaches the threshold and is flushed; 1006-1009 are lost.
+        for i in range(5, 10):
+            await tracker.track_messages([_message_in(channel, i)])
+
+    asyncio.run(before_crash())
+    channel.messages = [_message_in(channel, i) for i in range(12)]
+
+    async def after_restart():
+        tracker = tracker_module.MessageTracker(bot=None, storage=storage, settings=settings)
+        # The stored count is already at the threshold, so nothing is recounted.
+        await tracker.track_messages([_message_in(channel, 10), _message_in(channel, 11)])
+        await tracker.flush_counters()
+        first = await tracker._collect_messages(channel, 1000, fetch_limit=20)
+        calls = channel.history_calls
+        second = await tracker._collect_messages(channel, 1000, fetch_limit=20)
+        return first, calls, second
+
+    (first, _), calls, (second, _) = asyncio.run(after_restart())
+    assert [m.id for m in first] == list(range(1000, 1012))
+    assert [m.id for m in second] == list(range(1000, 1012))
+    # One backfill of 1006-1009; the second read is local.
+    assert calls == 1
+    assert channel.history_calls == 1
+
+
+def test_interrupted_memory_job_resumes_from_stored_summaries(tracker_module, monkeypatch):
+    settings = SimpleNamespace(
+        message_threshold=1000, time_threshold=10**9, counter_flush_interval=3600, min_background_share=0.0,
+    )
+    storage = _FakeEpisodicStorage()
+    channel = _FakeChannel(10)
+    summarized, vectorized = [], []
+    summarizing, release = asyncio.Event, asyncio.Event
+
+    class FakeSummarizer:
+        def __init__(self, bot, settings):
+            pass
+
+        async def summarize_events(self, messages, previous_summary="", checkpoint=None):
+            summarized.append([m.id for m in messages])
+            summarizing.set()
+            await release.wait()
+            metadata = tracker_module.EventMetadata(
+                start_message_id=messages[0].id, end_message_id=messages[-1].id, channel_id=10, guild_id=1,
+                user_ids=[0, 1], start_timestamp=0.0, end_timestamp=1.0, reaction_list=[],
+            )
+            return [tracker_module.EventSummary("key", ["kw"], "value", [], metadata)]
+
+    class FakeVectorizer:
+        def __init__(self, **kwargs):
+            pass
+
+        async def process_event_summaries(self, summaries):
+            vectorized.append(summaries)
+
+    monkeypatch.setattr(tracker_module, "EventSummarizationService", FakeSummarizer)
+    monkeypatch.setattr(tracker_module, "VectorizationService", FakeVectorizer)
+
+    async def interrupted():
+        nonlocal summarizing, release
+        summarizing, release = asyncio.Event(), asyncio.Event()
+        tracker = tracker_module.MessageTracker(bot=None, storage=storage, settings=settings)
+        await tracker.track_messages([_message_in(channel, i) for i in range(5)])
+        job = asyncio.create_task(tracker._process_channel_memory(channel))
+        await summarizing.wait()
+        async with tracker.foreground():
+            release.set()
+            # The job stores its summaries, then pauses before vectorizing; shutdown cancels it.
+            await asyncio.sleep(0.05)
+            job.cancel()
+            await job
+
+    async def restarted():
+        tracker = tracker_module.MessageTracker(bot=None, storage=storage, settings=settings)
+        release.set()
+        await tracker._process_channel_memory(channel)
+
+    asyncio.run(interrupted())
+    assert vectorized == []
+    assert storage.progress[10]["end_message_id"] == 1004
+
+    asyncio.run(restarted())
+    assert summarized == [[1000, 1001, 1002, 1003, 1004]]
+    assert [s.query_key for s in vectorized[0]] == ["key"]
+    assert vectorized[0][0].metadata.user_ids == [0, 1]
+    assert storage.state[10]["start_message_id"] == 1004
+    assert storage.state[10]["message_count"] == 0
+    assert storage.progress == {}
+
+
+def test_backlog_larger_than_one_batch_is_drained(tracker_module, monkeypatch):
+    # fetch_limit is twice the threshold: each job takes its start message and four more.
+    settings = SimpleNamespace(
+        message_threshold=2, time_threshold=10**9, counter_flush_interval=3600,
+        processing_delay=0, min_background_share=0.0,
+    )
+    storage = _FakeEpisodicStorage()
+    channel = _FakeChannel(10)
+    summarized = []
+
+    class FakeSummarizer:
+        def __init__(self, bot, settings):
+            pass
+
+        async def summarize_events(self, messages, previous_summary="", checkpoint=None):
+            summarized.append([m.id - 1000 for m in messages])
+            metadata = tracker_module.EventMetadata(
+                start_message_id=messages[0].id, end_message_id=messages[-1].id, channel_id=10, guild_id=1,
+                user_ids=[0], start_timestamp=0.0, end_timestamp=1.0, reaction_list=[],
+            )
+            return [tracker_module.EventSummary("key", ["kw"], "value", [], metadata)]
+
+    class FakeVectorizer:
+        def __init__(self, **kwargs):
+            pass
+
+        async def process_event_summaries(self, summaries):
+            pass
+
+    monkeypatch.setattr(tracker_module, "EventSummarizationService", FakeSummarizer)
+    monkeypatch.setattr(tracker_module, "VectorizationService", FakeVectorizer)
+
+    async def scenario():
+        tracker = tracker_module.MessageTracker(bot=None, storage=storage, settings=settings)
+        await tracker.track_messages([_message_in(channel, i) for i in range(11)])
+        tracker._schedule_processing(channel)
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            task = tracker._processing_tasks.get(10)
+            if task is not None and task.done():
+                break
+        await tracker.close()
+
+    asyncio.run(scenario())
+    assert summarized == [[0, 1, 2, 3, 4], [4, 5, 6, 7, 8], [8, 9, 10]]
+    assert storage.state[10]["start_message_id"] == 1010
@@ -0,0 +1,152 @@
+"""Tests for the batched, bounded user loader in ProceduralStorage."""
+import asyncio
+import gc
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("TOKEN", "test-token")
+os.environ.setdefault("CLIENT_ID", "123")
+os.environ.setdefault("CLIENT_SECRET_ID", "secret")
+os.environ.setdefault("SERCET_KEY", "secret-key")
+os.environ.setdefault("BUG_REPORT_CHANNEL_ID", "1")
+os.environ.setdefault("BOT_OWNER_ID", "1")
+
+from cogs.memory.db.connection import DatabaseConnection
+from cogs.memory.db.procedural_storage import ProceduralStorage
+
+
+class CountingConnection(DatabaseConnection):
+    """DatabaseConnection that counts how many times a connection is checked out."""
+
+    def __init__(self, db_path):
+        super().__init__(db_path)
+        self.checkouts = 0
+
+    def get_connection(self):
+        self.checkouts += 1
+        return super().get_connection()
+
+
+def _make_storage(tmp_path, users: int, **kwargs):
+    db = CountingConnection(tmp_path / "procedural.db")
+    with db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (discord_id, discord_name, display_names, created_at) VALUES (?, ?, ?, ?)",
+            [(str(i), f"user{i}", "[]", "2024-01-01T00:00:00") for i in range(users)],
+        )
+        conn.commit()
+    db.checkouts = 0
+    return ProceduralStorage(db, **kwargs)
+
+
+def test_concurrent_lookups_share_one_query(tmp_path):
+    storage = _make_storage(tmp_path, users=50)
+
+    async def run():
+        return await asyncio.gather(*[storage.get_user_info(str(i)) for i in range(50)])
+
+    infos = asyncio.run(run())
+    assert [info.discord_id for info in infos] == [str(i) for i in range(50)]
+    assert storage.db.checkouts == 1
+
+
+def test_missing_users_are_negatively_cached(tmp_path):
+    storage = _make_storage(tmp_path, users=1)
+
+    async def run():
+        assert await storage.get_user_info("404") is None
+        assert await storage.get_user_info("404") is None
+
+    asyncio.run(run())
+    assert storage.db.checkouts == 1
+
+
+def test_write_invalidates_negative_entry(tmp_path):
+    storage = _make_storage(tmp_path, users=0)
+
+    async def run():
+        assert await storage.get_user_info("7") is None
+        await storage.update_user_activity("7", "seven")
+        info = await storage.get_user_info("7")
+        assert info is not None and info.discord_name == "seven"
+
+    asyncio.run(run())
+
+
+def test_cache_is_bounded_lru(tmp_path):
+    storage = _make_storage(tmp_path, users=10, cache_size_limit=3)
+
+    async def run():
+        for i in range(10):
+            await storage.get_user_info(str(i))
+        # Touch "7" so that "8" becomes the eviction candidate.
+        await storage.get_user_info("7")
+        await storage.get_user_info("0")
+
+    asyncio.run(run())
+    assert list(storage._user_cache) == ["9", "7", "0"]
+
+
+def test_negative_cache_size_raises(tmp_path):
+    with pytest.raises(ValueError, match="cache_size_limit"):
+        ProceduralStorage(CountingConnection(tmp_path / "p.db"), cache_size_limit=-1)
+
+
+def test_lookups_do_not_block_event_loop(tmp_path):
+    """Loading thousands of users must not stall the loop for the duration of the query."""
+    storage = _make_storage(tmp_path, users=5000)
+    max_lag = 0.0
+
+    async def ticker(stop: asyncio.Event):
+        nonlocal max_lag
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            max_lag = max(max_lag, time.perf_counter() - start - 0.001)
+
+    async def run():
+        stop = asyncio.Event()
+        tick = asyncio.create_task(ticker(stop))
+        await asyncio.sleep(0.005)
+        results = await asyncio.gather(
+            *[storage.get_users_info([str(j) for j in range(i, 5000, 20)]) for i in range(20)]
+        )
+        stop.set()
+        await tick
+        return results
+
+    # Objects left behind by earlier test modules would otherwise make any
+    # full collection during the run a stall that is not the loader's doing.
+    gc.collect()
+    gc.freeze()
+    try:
+        results = asyncio.run(run())
+    finally:
+        gc.unfreeze()
+    assert sum(len(r) for r in results) == 5000
+    assert max_lag < 0.05
+
+
+def test_cancelled_caller_does_not_cancel_shared_lookup(tmp_path):
+    storage = _make_storage(tmp_path, users=2)
+
+    async def run():
+        first = asyncio.create_task(storage.get_user_info("1"))
+        second = asyncio.create_task(storage.get_user_info("1"))
+        await asyncio.sleep(0)
+        first.cancel()
+        info = await second
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return info
+
+    info = asyncio.run(run())
+    assert info is not None and info.discord_id == "1"
@@ -0,0 +1,147 @@
+"""Tests for the reply index used by on_message_edit."""
+import asyncio
+import itertools
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from cogs.memory.db.reply_index import ReplyIndexStorage
+
+
+def test_multi_part_replies_keep_posting_order():
+    index = ReplyIndexStorage(":memory:")
+    for reply_id in (503, 501, 502):
+        index.add_reply(100, reply_id, channel_id=9)
+    index.add_reply(200, 600, channel_id=9)
+
+    assert asyncio.run(index.get_replies(100)) == [503, 501, 502]
+    assert asyncio.run(index.get_replies(200)) == [600]
+    assert asyncio.run(index.get_replies(300)) == []
+
+
+def test_adding_the_same_reply_twice_is_a_noop():
+    index = ReplyIndexStorage(":memory:")
+    index.add_reply(100, 501, channel_id=9)
+    index.add_reply(100, 501, channel_id=9)
+    index.add_reply(100, 502, channel_id=9)
+
+    assert asyncio.run(index.get_replies(100)) == [501, 502]
+
+
+def test_add_reply_on_the_loop_queues_without_writing():
+    index = ReplyIndexStorage(":memory:")
+    writes = []
+    real_write = index._add_replies_sync
+    index._add_replies_sync = lambda rows: writes.append(len(rows)) or real_write(rows)
+
+    async def scenario():
+        for reply_id in (501, 502, 503):
+            index.add_reply(100, reply_id, channel_id=9)
+        assert writes == [] and len(index._pending) == 3
+        return await index.get_replies(100)
+
+    assert asyncio.run(scenario()) == [501, 502, 503]
+    assert writes == [3]
+
+
+def test_remove_replies():
+    index = ReplyIndexStorage(":memory:")
+
+    async def scenario():
+        index.add_reply(100, 501, channel_id=9)
+        index.add_reply(100, 502, channel_id=9)
+        await index.remove_replies(100)
+        assert await index.get_replies(100) == []
+        index.add_reply(100, 503, channel_id=9)
+        assert await index.get_replies(100) == [503]
+
+    asyncio.run(scenario())
+
+
+def test_prune_by_age():
+    index = ReplyIndexStorage(":memory:", max_age=3600)
+    index.add_reply(100, 501, channel_id=9, created_at=1000.0)
+    index.add_reply(100, 502, channel_id=9, created_at=1001.0)
+    index.add_reply(200, 601, channel_id=9, created_at=5000.0)
+
+    assert asyncio.run(index.prune(now=5000.0)) == 2
+    assert asyncio.run(index.get_replies(100)) == []
+    assert asyncio.run(index.get_replies(200)) == [601]
+
+
+def test_index_survives_restart(tmp_path):
+    db_path = tmp_path / "pigpig.db"
+    ReplyIndexStorage(db_path).add_reply(100, 501, channel_id=9)
+
+    assert asyncio.run(ReplyIndexStorage(db_path).get_replies(100)) == [501]
+
+
+def test_reply_table_is_not_in_the_memory_schema(tmp_path):
+    import sqlite3
+    from cogs.memory.db import schema
+
+    conn = sqlite3.connect(":memory:")
+    schema.create_tables(conn)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "message_replies" not in tables
+
+    index = ReplyIndexStorage(tmp_path / "version.db")
+    tables = {row[0] for row in index._open_connection().execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert tables == {"message_replies"}
+
+
+class _FakeMessage:
+    _ids = itertools.count(1000)
+
+    def __init__(self, channel, content=""):
+        self.id = next(self._ids)
+        self.channel = channel
+        self.content = content
+
+    async def edit(self, content, **kwargs):
+        self.content = content
+
+
+class _FakeChannel:
+    def __init__(self):
+        self.id = 9
+        self.sent = []
+
+    async def send(self, content, **kwargs):
+        msg = _FakeMessage(self, content)
+        self.sent.append(msg)
+        return msg
+
+
+def test_send_message_indexes_placeholder_and_continuations(monkeypatch):
+    # Other test modules install langchain_core stubs; use the real package here.
+    for name in [m for m in sys.modules if m == "langchain_core" or m.startswith("langchain_core.")]:
+        if getattr(sys.modules[name], "__file__", None) is None:
+            monkeypatch.delitem(sys.modules, name)
+    send_module = pytest.importorskip("llm.utils.send_message", exc_type=ImportError)
+    from langchain_core.messages import AIMessageChunk
+
+    async def scenario():
+        channel = _FakeChannel()
+        prompt = SimpleNamespace(id=42, channel=channel, guild=None)
+        placeholder = _FakeMessage(channel, "...")
+        bot = SimpleNamespace(reply_index=ReplyIndexStorage(":memory:"))
+
+        async def stream():
+            yield AIMessageChunk(content="<som>")
+            for _ in range(5):
+                yield AIMessageChunk(content="x" * 900)
+            yield AIMessageChunk(content="<eom>")
+
+        await send_module.send_message(bot, placeholder, prompt, stream(), update_interval=0)
+        return await bot.reply_index.get_replies(42), placeholder, channel
+
+    replies, placeholder, channel = asyncio.run(scenario())
+    assert len(channel.sent) >= 2
+    assert replies == [placeholder.id] + [m.id for m in channel.sent]
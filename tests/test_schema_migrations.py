@@ -0,0 +1,168 @@
+"""Tests for the memory database schema migration runner."""
+import json
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from cogs.memory.db import schema
+from cogs.memory.db.connection import DatabaseConnection
+
+# user_stats before the counter table (the original schema).
+_BLOB_USER_STATS = """
+CREATE TABLE user_stats (
+    user_id TEXT NOT NULL,
+    guild_id TEXT NOT NULL,
+    total_messages INTEGER NOT NULL DEFAULT 0,
+    active_hours TEXT NOT NULL DEFAULT '{}',
+    top_channels TEXT NOT NULL DEFAULT '{}',
+    top_emojis TEXT NOT NULL DEFAULT '{}',
+    top_words TEXT NOT NULL DEFAULT '{}',
+    streak_days INTEGER NOT NULL DEFAULT 0,
+    streak_last_date TEXT,
+    last_active_at DATETIME,
+    first_message_at DATETIME,
+    PRIMARY KEY (user_id, guild_id)
+)
+"""
+
+
+def _blob_schema(conn):
+    conn.execute(_BLOB_USER_STATS)
+    schema.MIGRATIONS[0](conn)
+    conn.execute(
+        "INSERT INTO user_stats (user_id, guild_id, total_messages, active_hours, top_words) VALUES (?, ?, ?, ?, ?)",
+        ("u1", "g1", 3, json.dumps({"10": 2, "11": 1}), json.dumps({"hello": 3})),
+    )
+
+
+def _steps(count):
+    def build(conn):
+        for step in schema.MIGRATIONS[:count]:
+            step(conn)
+        conn.execute("INSERT INTO user_stats (user_id, guild_id, total_messages) VALUES ('u1', 'g1', 3)")
+        conn.execute("INSERT INTO user_stat_counts (user_id, guild_id, kind, key, count) VALUES ('u1', 'g1', 'word', 'hello', 3)")
+    return build
+
+
+# Every shape a database written by an earlier release can have; none has schema_version.
+HISTORICAL_SHAPES = {
+    "empty": lambda conn: None,
+    "json-blob-counters": _blob_schema,
+    "counter-table": _steps(2),
+    "space-saving-counters": _steps(3),
+    "migration-checkpoint": _steps(4),
+    "channel-counters": _steps(5),
+    "message-spool": _steps(6),
+    "job-progress": _steps(7),
+}
+
+
+def _layout(conn):
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"
+    )]
+    return {table: [row[1:] for row in conn.execute(f"PRAGMA table_info({table})")] for table in tables}
+
+
+@pytest.fixture
+def fresh_layout():
+    conn = sqlite3.connect(":memory:")
+    schema.create_tables(conn)
+    return _layout(conn)
+
+
+@pytest.mark.parametrize("shape", list(HISTORICAL_SHAPES))
+def test_historical_shapes_upgrade_to_the_current_schema(shape, tmp_path, fresh_layout):
+    db_path = tmp_path / "procedural.db"
+    conn = sqlite3.connect(db_path)
+    HISTORICAL_SHAPES[shape](conn)
+    conn.commit()
+    conn.close()
+
+    db = DatabaseConnection(db_path)
+    with db.get_connection() as conn:
+        assert schema.schema_version(conn) == schema.SCHEMA_VERSION
+        assert _layout(conn) == fresh_layout
+        if shape != "empty":
+            assert conn.execute("SELECT total_messages FROM user_stats").fetchone()[0] == 3
+            words = conn.execute(
+                "SELECT key, count, error FROM user_stat_counts WHERE kind = 'word'"
+            ).fetchall()
+            assert [tuple(row) for row in words] == [("hello", 3, 0)]
+        if shape == "json-blob-counters":
+            hours = conn.execute(
+                "SELECT key, count FROM user_stat_counts WHERE kind = 'hour' ORDER BY key"
+            ).fetchall()
+            assert [tuple(row) for row in hours] == [("10", 2), ("11", 1)]
+    db.close_connections()
+
+
+def test_current_database_only_checks_the_version(tmp_path, monkeypatch):
+    db_path = tmp_path / "procedural.db"
+    conn = sqlite3.connect(db_path)
+    schema.create_tables(conn)
+
+    def fail(conn):
+        raise AssertionError("migration step ran on a current database")
+
+    monkeypatch.setattr(schema, "MIGRATIONS", [fail] * schema.SCHEMA_VERSION)
+    statements = []
+    conn.set_trace_callback(statements.append)
+    schema.create_tables(conn)
+    assert statements == ["SELECT version FROM schema_version"]
+    assert not conn.in_transaction
+
+
+def test_pending_steps_run_once_across_concurrent_connections(tmp_path, monkeypatch):
+    calls = []
+    steps = list(schema.MIGRATIONS)
+
+    def counted(step):
+        def run(conn):
+            calls.append(step.__name__)
+            step(conn)
+        return run
+
+    monkeypatch.setattr(schema, "MIGRATIONS", [counted(step) for step in steps])
+    db = DatabaseConnection(tmp_path / "procedural.db")
+    start = threading.Barrier(8)
+
+    def connect():
+        start.wait()
+        with db.get_connection() as conn:
+            conn.execute("SELECT 1 FROM user_stats").fetchall()
+
+    threads = [threading.Thread(target=connect) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    db.close_connections()
+    assert calls == [step.__name__ for step in steps]
+
+
+def test_failed_step_leaves_the_database_untouched(tmp_path, monkeypatch):
+    db_path = tmp_path / "procedural.db"
+    conn = sqlite3.connect(db_path)
+    _blob_schema(conn)
+    conn.commit()
+
+    def broken(conn):
+        raise sqlite3.OperationalError("disk on fire")
+
+    monkeypatch.setattr(schema, "MIGRATIONS", schema.MIGRATIONS[:2] + [broken] + schema.MIGRATIONS[3:])
+    with pytest.raises(sqlite3.OperationalError):
+        schema.create_tables(conn)
+    assert schema.schema_version(conn) == 0
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(user_stats)")}
+    assert "active_hours" in columns
+    assert conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE name = 'user_stat_counts'"
+    ).fetchone()[0] == 0
@@ -0,0 +1,143 @@
+"""Tests for splitting message batches into conversation segments."""
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from cogs.memory.services.segmentation import segment_messages, summarize_segments
+
+GAMING = [
+    "今晚要不要一起打副本",
+    "副本的王好難打，裝備不夠",
+    "我的裝備強化到加十了",
+    "那我們今晚副本組隊",
+    "副本隊伍還缺一個補師",
+    "我可以當補師，裝備也夠",
+]
+DINNER = [
+    "晚餐想吃拉麵還是火鍋",
+    "巷口新開的拉麵店評價不錯",
+    "拉麵店要排隊嗎",
+    "火鍋店也可以，晚餐訂位看看",
+    "那晚餐就吃拉麵吧",
+    "拉麵店七點見",
+]
+
+
+def _messages(texts, gaps=None, replies=None):
+    """Messages one minute apart; ``gaps`` maps an index to extra seconds before it."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    at, messages = start, []
+    for i, text in enumerate(texts):
+        at += timedelta(seconds=60 + (gaps or {}).get(i, 0))
+        reply_to = (replies or {}).get(i)
+        messages.append(SimpleNamespace(
+            id=1000 + i,
+            content=text,
+            created_at=at,
+            reference=SimpleNamespace(message_id=1000 + reply_to) if reply_to is not None else None,
+        ))
+    return messages
+
+
+def _sizes(segments):
+    return [len(segment) for segment in segments]
+
+
+def test_time_gap_always_splits():
+    messages = _messages(GAMING[:3] + GAMING[3:], gaps={3: 3600})
+    segments = segment_messages(messages, max_gap=1800, min_size=5)
+    assert _sizes(segments) == [3, 3]
+    assert [m for segment in segments for m in segment] == messages
+
+
+def test_topic_shift_splits_chinese_conversation():
+    segments = segment_messages(_messages(GAMING + DINNER), min_size=3)
+    assert _sizes(segments) == [6, 6]
+
+
+def test_reply_across_the_topic_shift_keeps_one_segment():
+    # The last message answers the first one, so the conversation is still going on.
+    segments = segment_messages(_messages(GAMING + DINNER, replies={11: 0}), min_size=3)
+    assert _sizes(segments) == [12]
+
+
+def test_same_topic_is_not_split():
+    segments = segment_messages(_messages(GAMING + GAMING), min_size=3)
+    assert _sizes(segments) == [12]
+
+
+def test_max_size_caps_segments():
+    segments = segment_messages(_messages(GAMING * 4), max_size=10)
+    assert _sizes(segments) == [10, 10, 4]
+
+
+def test_one_failed_segment_fails_the_batch():
+    started = []
+
+    async def summarize(segment):
+        started.append(segment[0])
+        if segment[0] == 2:
+            return None
+        await asyncio.sleep(0.05)
+        return [segment[0]]
+
+    async def scenario():
+        ok = await summarize_segments([[1], [3]], summarize, concurrency=2)
+        failed = await summarize_segments([[1], [2], [3], [4]], summarize, concurrency=2)
+        return ok, failed
+
+    ok, failed = asyncio.run(scenario())
+    assert ok == [[1], [3]]
+    assert failed is None
+    # The segments still waiting for a slot are not summarized.
+    assert started == [1, 3, 1, 2]
+
+
+def test_summarize_events_runs_segments_concurrently_and_keeps_order():
+    service_module = pytest.importorskip(
+        "cogs.memory.services.event_summarization_service", exc_type=ImportError
+    )
+    service = service_module.EventSummarizationService.__new__(service_module.EventSummarizationService)
+    service.settings = SimpleNamespace(summarization_concurrency=2, segment_max_gap=1800, segment_max_messages=3)
+    running, peak, checkpoints = 0, 0, []
+
+    async def process(group, previous_summary=""):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return [group[0].id]
+
+    async def checkpoint():
+        checkpoints.append(running)
+
+    service._process_message_group = process
+    messages = _messages(GAMING + GAMING)
+    result = asyncio.run(service.summarize_events(messages, checkpoint=checkpoint))
+    assert result == [1000, 1003, 1006, 1009]
+    assert peak == 2
+    assert len(checkpoints) == 4
+
+
+def test_summarize_events_returns_nothing_when_a_segment_fails():
+    service_module = pytest.importorskip(
+        "cogs.memory.services.event_summarization_service", exc_type=ImportError
+    )
+    service = service_module.EventSummarizationService.__new__(service_module.EventSummarizationService)
+    service.settings = SimpleNamespace(summarization_concurrency=2, segment_max_gap=1800, segment_max_messages=3)
+
+    async def process(group, previous_summary=""):
+        return None if group[0].id == 1003 else [group[0].id]
+
+    service._process_message_group = process
+    # The tracker then keeps its start message and retries the whole batch.
+    assert asyncio.run(service.summarize_events(_messages(GAMING + GAMING))) == []
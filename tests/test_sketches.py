@@ -0,0 +1,155 @@
+"""Tests for the Space-Saving and HyperLogLog summaries."""
+import random
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from addons.sketches import HyperLogLog, SpaceSaving
+
+
+def _zipf_stream(n, vocabulary, s=1.1, seed=0):
+    rng = random.Random(seed)
+    weights = [1 / (rank ** s) for rank in range(1, vocabulary + 1)]
+    keys = [f"w{rank}" for rank in range(1, vocabulary + 1)]
+    return rng.choices(keys, weights=weights, k=n)
+
+
+def _check_guarantees(sketch, exact, n):
+    assert len(sketch) <= sketch.capacity
+    assert sketch.total == n
+    assert sketch.min_count <= n / sketch.capacity
+    for key, count, error in sketch.top():
+        assert count - error <= exact[key] <= count
+        assert error <= sketch.min_count
+    for key, true in exact.items():
+        lower, upper = sketch.bounds(key)
+        assert lower <= true <= upper
+        if true > n / sketch.capacity:
+            assert key in sketch
+
+
+@pytest.mark.parametrize("s", [0.8, 1.1, 1.5])
+def test_unit_updates_on_zipf_stream(s):
+    stream = _zipf_stream(50_000, 5_000, s=s)
+    exact = Counter(stream)
+    sketch = SpaceSaving(200)
+    for key in stream:
+        sketch.update(key)
+
+    _check_guarantees(sketch, exact, len(stream))
+    true_top = [key for key, _ in exact.most_common(20)]
+    found = {key for key, _, _ in sketch.top(20)}
+    assert len(found & set(true_top)) >= 18
+
+
+def test_batch_merges_on_zipf_stream():
+    stream = _zipf_stream(50_000, 5_000, seed=1)
+    exact = Counter(stream)
+    sketch = SpaceSaving(200)
+    for i in range(0, len(stream), 37):
+        sketch.merge(Counter(stream[i:i + 37]))
+
+    _check_guarantees(sketch, exact, len(stream))
+    top = [key for key, _ in exact.most_common(10)]
+    assert [key for key, _, _ in sketch.top(10)] == top
+
+
+def test_merging_summaries():
+    left, right = _zipf_stream(20_000, 2_000, seed=2), _zipf_stream(20_000, 2_000, seed=3)
+    a, b = SpaceSaving(100), SpaceSaving(100)
+    for key in left:
+        a.update(key)
+    for key in right:
+        b.update(key)
+    a.merge(b)
+    _check_guarantees(a, Counter(left) + Counter(right), len(left) + len(right))
+
+
+def test_exact_until_full_and_weighted_updates():
+    sketch = SpaceSaving(3)
+    sketch.update("a", 5)
+    sketch.update("b", 2)
+    sketch.update("c")
+    assert sketch.top() == [("a", 5, 0), ("b", 2, 0), ("c", 1, 0)]
+    assert sketch.min_count == 1
+
+    sketch.update("d", 3)  # evicts c (count 1)
+    assert sketch.top() == [("a", 5, 0), ("d", 4, 1), ("b", 2, 0)]
+    assert sketch.bounds("c") == (0, 2)
+    assert sketch.bounds("d") == (3, 4)
+
+    dropped = sketch.merge({"e": 1, "a": 1})
+    assert dropped == ["b"]
+    assert sketch.top() == [("a", 6, 0), ("d", 4, 1), ("e", 3, 2)]
+
+
+def test_serialization_round_trip():
+    sketch = SpaceSaving(64)
+    for key in _zipf_stream(5_000, 500, seed=4) + ["😀", "你好"]:
+        sketch.update(key)
+    data = sketch.to_bytes()
+    restored = SpaceSaving.from_bytes(data)
+
+    assert restored.top() == sketch.top()
+    assert (restored.capacity, restored.total, restored.min_count) == (64, sketch.total, sketch.min_count)
+    assert len(data) < 64 * 10
+    with pytest.raises(ValueError):
+        SpaceSaving.from_bytes(data[:-3])
+    with pytest.raises(ValueError):
+        SpaceSaving.from_bytes(b"\x09" + data[1:])
+
+
+@pytest.mark.parametrize("n", [1, 50, 1_000, 20_000, 200_000])
+def test_hyperloglog_accuracy(n):
+    sketch = HyperLogLog(11)
+    sketch.update(f"user-{i}" for i in range(n))
+    # Duplicates never move the estimate.
+    assert not sketch.update(f"user-{i}" for i in range(0, n, 7))
+    # Four standard errors (1.04 / sqrt(2048) ~ 2.3%); linear counting is tighter.
+    assert abs(sketch.count() - n) <= max(1, 0.092 * n)
+    if n <= 50:
+        assert abs(sketch.count() - n) <= 1
+
+
+def test_hyperloglog_union_of_overlapping_days():
+    rng = random.Random(7)
+    days = [{str(rng.randrange(30_000)) for _ in range(4_000)} for _ in range(30)]
+    sketches = []
+    for users in days:
+        sketch = HyperLogLog()
+        sketch.update(users)
+        sketches.append(sketch)
+    exact = len(set().union(*days))
+
+    merged = HyperLogLog()
+    for sketch in sketches:
+        merged.merge(sketch)
+    union = HyperLogLog.union(sketches)
+    assert union.registers == merged.registers
+    assert abs(union.count() - exact) <= 0.07 * exact
+    assert HyperLogLog.union([]).count() == 0
+    with pytest.raises(ValueError):
+        merged.merge(HyperLogLog(10))
+
+
+def test_hyperloglog_serialization():
+    small = HyperLogLog()
+    small.update(["a", "b", "c"])
+    data = small.to_bytes()
+    assert len(data) == 2 + 3 * 3
+    assert HyperLogLog.from_bytes(data).registers == small.registers
+
+    large = HyperLogLog()
+    large.update(str(i) for i in range(10_000))
+    data = large.to_bytes()
+    assert len(data) == 2 + 2048
+    assert HyperLogLog.from_bytes(data).registers == large.registers
+    for bad in (b"", b"\x07\x0b", data[:-1], b"\x02\x0b\x09\x00\x01"):
+        with pytest.raises(ValueError):
+            HyperLogLog.from_bytes(bad)
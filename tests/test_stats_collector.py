@@ -0,0 +1,218 @@
+"""Tests for StatsCollector write-behind batching."""
+import asyncio
+import importlib
+import sqlite3
+import time
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+
+@pytest.fixture
+def collector_module(real_dashboard):
+    return importlib.import_module("dashboard.services.stats_collector")
+
+
+def _count(db_path, table):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_events_are_buffered_until_batch_size(collector_module, tmp_path):
+    db_path = str(tmp_path / "stats.db")
+
+    async def run():
+        collector = collector_module.StatsCollector(db_path, batch_size=3, flush_interval=60)
+        await collector.initialize()
+        await collector.record_message("g", "u", "c")
+        await collector.record_llm_call("g", "model", 12.5)
+        assert collector.pending == 2
+        assert _count(db_path, "message_events") == 0
+
+        await collector.record_command("g", "u", "help")
+        for _ in range(100):
+            if collector.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert collector.pending == 0
+        assert _count(db_path, "message_events") == 1
+        assert _count(db_path, "llm_call_events") == 1
+        assert _count(db_path, "command_events") == 1
+        await collector.close()
+
+    asyncio.run(run())
+
+
+def test_interval_flush_and_close_write_pending_events(collector_module, tmp_path):
+    db_path = str(tmp_path / "stats.db")
+
+    async def run():
+        collector = collector_module.StatsCollector(db_path, batch_size=1000, flush_interval=0.05)
+        await collector.initialize()
+        await collector.bulk_record_messages([("g", "u", "c", 1.0)] * 5)
+        for _ in range(100):
+            if collector.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert _count(db_path, "message_events") == 5
+
+        await collector.record_message("g", "u", "c")
+        await collector.close()
+        assert _count(db_path, "message_events") == 6
+
+    asyncio.run(run())
+
+
+def test_read_your_writes_flushes_before_queries(collector_module, tmp_path):
+    db_path = str(tmp_path / "stats.db")
+
+    async def run(guild_id, read_your_writes):
+        collector = collector_module.StatsCollector(
+            db_path, batch_size=1000, flush_interval=60, read_your_writes=read_your_writes
+        )
+        await collector.initialize()
+        await collector.record_message(guild_id, "u1", "c1")
+        stats = await collector.get_guild_stats(guild_id, "7d")
+        await collector.close()
+        return stats
+
+    assert asyncio.run(run("g1", True))["active_users"] == 1
+    # Without read-your-writes the query sees only what was flushed before it.
+    assert asyncio.run(run("g2", False))["active_users"] == 0
+    assert _count(db_path, "message_events") == 2
+
+
+def test_failed_flush_keeps_events(collector_module, tmp_path):
+    db_path = str(tmp_path / "stats.db")
+
+    async def run():
+        collector = collector_module.StatsCollector(db_path, batch_size=1000, flush_interval=60)
+        await collector.initialize()
+        await collector.record_message("g", "u", "c")
+        await collector.record_command("g", "u", None)  # violates NOT NULL
+        assert await collector.flush() == 0
+        assert collector.pending == 2
+        assert _count(db_path, "message_events") == 0
+        await collector.close()
+
+    asyncio.run(run())
+
+
+def _rollup(db_path, table):
+    with sqlite3.connect(db_path) as conn:
+        return sorted(conn.execute(f"SELECT * FROM {table}").fetchall())
+
+
+def test_rollups_track_flushed_events(collector_module, tmp_path):
+    db_path = str(tmp_path / "stats.db")
+    now = time.time()
+
+    async def run():
+        collector = collector_module.StatsCollector(db_path, batch_size=1000, flush_interval=60)
+        await collector.initialize()
+        await collector.bulk_record_messages([("g1", "u1", "c1", now), ("g1", "u2", "c1", now), ("g2", "u1", "c2", now)])
+        await collector.record_llm_call("g1", "model-a", 100.0, timestamp=now)
+        await collector.record_llm_call("g1", "model-a", 300.0, success=False, timestamp=now)
+        await collector.record_llm_call("g2", "model-b", 50.0, timestamp=now)
+        await collector.record_command("g1", "u1", "help", timestamp=now)
+        await collector.flush()
+        await collector.record_message("g1", "u3", "c1", timestamp=now)
+
+        global_stats = await collector.get_global_stats("7d")
+        model_stats = await collector.get_model_stats("7d")
+        await collector.close()
+        return global_stats, model_stats
+
+    global_stats, model_stats = asyncio.run(run())
+    assert global_stats["total_messages"] == 4
+    assert global_stats["total_llm_calls"] == 3
+    assert global_stats["total_commands"] == 1
+    assert global_stats["avg_response_ms"] == 150.0
+    assert global_stats["error_rate"] == 33.33
+    assert global_stats["daily_messages"][-1]["count"] == 4
+    assert model_stats["models"][0] == {
+        "model": "model-a", "calls": 2, "avg_response_ms": 200.0, "error_rate": 50.0, "errors": 1,
+    }
+
+    # Incremental rollups match a rebuild from the raw events.
+    hourly, daily = _rollup(db_path, "stats_hourly"), _rollup(db_path, "stats_daily")
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(collector_module.ROLLUP_BACKFILL_SQL)
+    assert _rollup(db_path, "stats_hourly") == hourly
+    assert _rollup(db_path, "stats_daily") == daily
+
+
+def test_existing_events_are_backfilled_once(collector_module, tmp_path):
+    db_path = str(tmp_path / "stats.db")
+    now = time.time()
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(collector_module._SCHEMA_SQL.split("-- Rollups")[0])
+        conn.executemany(
+            collector_module._INSERT_SQL["message_events"],
+            [("g1", "u1", "c1", now - 3600 * i) for i in range(10)],
+        )
+
+    async def run():
+        collector = collector_module.StatsCollector(db_path)
+        await collector.initialize()
+        stats = await collector.get_global_stats("7d")
+        await collector.close()
+        return stats
+
+    assert asyncio.run(run())["total_messages"] == 10
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript("DELETE FROM stats_hourly; DELETE FROM stats_daily;")
+    # The backfill marker is set, so a restart does not rebuild.
+    assert asyncio.run(run())["total_messages"] == 0
+
+
+def test_active_users_from_sketches(collector_module, tmp_path):
+    db_path = str(tmp_path / "stats.db")
+    now = time.time()
+    records = [
+        ("g1", f"u{(i * 7) % 300}", f"c{i % 3}", now - 86400 * (i % 5))
+        for i in range(3_000)
+    ]
+    records += [("g2", "u1", "c0", now)]
+
+    async def run():
+        collector = collector_module.StatsCollector(db_path, batch_size=250)
+        await collector.initialize()
+        await collector.bulk_record_messages(records)
+        stats = await collector.get_guild_stats("g1", "7d")
+        channel = await collector.count_active_users("g1", channel_id="c1")
+        today = datetime.now().strftime("%Y-%m-%d")
+        single_day = await collector.count_active_users("g1", start_day=today, end_day=today)
+        await collector.close()
+        return stats["active_users"], channel, single_day
+
+    def exact(pred):
+        return len({user for guild, user, channel, ts in records if guild == "g1" and pred(channel, ts)})
+
+    active, channel, single_day = asyncio.run(run())
+    today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+    # Small sets fall in the linear-counting range: within a few percent.
+    for estimate, expected in (
+        (active, exact(lambda c, ts: True)),
+        (channel, exact(lambda c, ts: c == "c1")),
+        (single_day, exact(lambda c, ts: ts >= today_start)),
+    ):
+        assert abs(estimate - expected) <= 0.03 * expected
+
+    # Incremental sketches match a rebuild from the raw events.
+    def sketches():
+        with sqlite3.connect(db_path) as conn:
+            return sorted(conn.execute(
+                "SELECT guild_id, day, channel_id, sketch FROM active_user_sketches"
+            ).fetchall())
+
+    incremental = sketches()
+    with sqlite3.connect(db_path, isolation_level=None) as conn:
+        assert collector_module.rebuild_active_user_sketches(conn) == len(incremental)
+    assert sketches() == incremental
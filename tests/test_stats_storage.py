@@ -0,0 +1,178 @@
+"""Tests for StatsStorage user_stats counters and the JSON blob migration."""
+import asyncio
+import json
+import random
+from collections import Counter
+import sqlite3
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from addons.sketches import SpaceSaving
+from cogs.memory.db import stats_storage as stats_module
+from cogs.memory.db.connection import DatabaseConnection
+from cogs.memory.db.stats_storage import StatsStorage
+
+
+def _record(content, ts, user="u1", guild="g1", channel="c1"):
+    return {
+        "user_id": user,
+        "guild_id": guild,
+        "message_content": content,
+        "channel_id": channel,
+        "timestamp": ts,
+    }
+
+
+def test_upserts_accumulate_counters_and_streak(tmp_path):
+    storage = StatsStorage(DatabaseConnection(tmp_path / "procedural.db"))
+
+    async def run():
+        await storage.upsert_user_stats("u1", "g1", "hello world 😀", "c1", "2024-03-01T10:00:00+00:00")
+        await storage.bulk_upsert_user_stats([
+            _record("hello again 😀😀", "2024-03-01T11:00:00+00:00", channel="c2"),
+            _record("next day hello", "2024-03-02T10:30:00+00:00"),
+            _record("late arrival", "2024-02-28T09:00:00+00:00"),
+        ])
+        return await storage.get_user_stats("u1", "g1")
+
+    stats = asyncio.run(run())
+    assert stats["total_messages"] == 4
+    assert stats["active_hours"] == {"9": 1, "10": 2, "11": 1}
+    assert stats["top_channels"] == {"c1": 3, "c2": 1}
+    assert stats["top_emojis"] == {"😀": 3}
+    assert stats["top_words"]["hello"] == 3
+    # The out-of-order message neither resets nor extends the streak.
+    assert stats["streak_days"] == 2
+    assert stats["streak_last_date"] == "2024-03-02"
+    assert stats["first_message_at"] == "2024-03-01T10:00:00+00:00"
+    assert stats["last_active_at"] == "2024-02-28T09:00:00+00:00"
+
+
+def test_streak_restarts_after_a_gap(tmp_path):
+    storage = StatsStorage(DatabaseConnection(tmp_path / "procedural.db"))
+
+    async def run():
+        await storage.bulk_upsert_user_stats([
+            _record("a", "2024-03-01T10:00:00+00:00"),
+            _record("b", "2024-03-02T10:00:00+00:00"),
+            _record("c", "2024-03-05T10:00:00+00:00"),
+        ])
+        return await storage.get_user_stats("u1", "g1")
+
+    stats = asyncio.run(run())
+    assert (stats["streak_days"], stats["streak_last_date"]) == (1, "2024-03-05")
+
+
+def test_word_counters_are_a_bounded_space_saving_summary(tmp_path, monkeypatch):
+    monkeypatch.setitem(stats_module._SKETCH_CAPACITY, "word", 3)
+    storage = StatsStorage(DatabaseConnection(tmp_path / "procedural.db"))
+    messages = ["alpha alpha bravo", "alpha charlie", "delta", "alpha bravo echo"]
+    expected = SpaceSaving(3)
+
+    async def run():
+        for text in messages:
+            await storage.upsert_user_stats("u1", "g1", text, "c1", "2024-03-01T10:00:00+00:00")
+        return await storage.get_user_stats("u1", "g1")
+
+    stats = asyncio.run(run())
+    for text in messages:
+        expected.merge(Counter(text.split()))
+    assert stats["top_words"] == {key: count for key, count, _ in expected.top()}
+    with storage.db.get_connection() as conn:
+        rows = conn.execute(
+            "SELECT key, count, error FROM user_stat_counts WHERE kind = 'word' ORDER BY count DESC, key"
+        ).fetchall()
+    assert [tuple(row) for row in rows] == expected.top()
+    # alpha (4 occurrences) is always tracked and never overestimated here.
+    assert stats["top_words"]["alpha"] == 4
+
+
+def test_legacy_json_columns_are_migrated(tmp_path):
+    db_path = tmp_path / "procedural.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE user_stats (
+                user_id TEXT NOT NULL,
+                guild_id TEXT NOT NULL,
+                total_messages INTEGER NOT NULL DEFAULT 0,
+                active_hours TEXT NOT NULL DEFAULT '{}',
+                top_channels TEXT NOT NULL DEFAULT '{}',
+                top_emojis TEXT NOT NULL DEFAULT '{}',
+                top_words TEXT NOT NULL DEFAULT '{}',
+                streak_days INTEGER NOT NULL DEFAULT 0,
+                streak_last_date TEXT,
+                last_active_at DATETIME,
+                first_message_at DATETIME,
+                PRIMARY KEY (user_id, guild_id)
+            )
+            """
+        )
+        conn.execute(
+            "INSERT INTO user_stats VALUES ('u1', 'g1', 5, ?, ?, ?, ?, 2, '2024-03-01', "
+            "'2024-03-01T10:00:00+00:00', '2024-02-01T10:00:00+00:00')",
+            (
+                json.dumps({"10": 3, "11": 2}),
+                json.dumps({"c1": 5}),
+                json.dumps({"😀": 1}),
+                json.dumps({"你好": 4, "hello": 1}, ensure_ascii=False),
+            ),
+        )
+        conn.execute("INSERT INTO user_stats (user_id, guild_id, top_words) VALUES ('u2', 'g1', 'not json')")
+
+    storage = StatsStorage(DatabaseConnection(db_path))
+
+    async def run():
+        await storage.upsert_user_stats("u1", "g1", "hello", "c1", "2024-03-02T10:00:00+00:00")
+        return await storage.get_user_stats("u1", "g1"), await storage.get_user_stats("u2", "g1")
+
+    stats, broken = asyncio.run(run())
+    assert stats["total_messages"] == 6
+    assert stats["active_hours"] == {"10": 4, "11": 2}
+    assert stats["top_channels"] == {"c1": 6}
+    assert stats["top_emojis"] == {"😀": 1}
+    assert stats["top_words"] == {"你好": 4, "hello": 2}
+    assert (stats["streak_days"], stats["streak_last_date"]) == (3, "2024-03-02")
+    assert broken["top_words"] == {}
+
+    # The migration runs once: reopening does not add the counters again.
+    storage = StatsStorage(DatabaseConnection(db_path))
+    assert asyncio.run(storage.get_user_stats("u1", "g1"))["top_channels"] == {"c1": 6}
+
+
+def test_bulk_batches_match_message_by_message_updates(tmp_path):
+    rng = random.Random(5)
+    records = [
+        _record(
+            " ".join(rng.choice(["apple", "banana", "cherry", "durian"]) for _ in range(3)) + rng.choice(["", " 😀"]),
+            f"2024-03-{rng.choice([1, 2, 2, 3, 5, 6]):02d}T{rng.randrange(24):02d}:00:00+00:00",
+            user=f"u{rng.randrange(4)}",
+            guild=f"g{rng.randrange(2)}",
+            channel=f"c{rng.randrange(5)}",
+        )
+        for _ in range(300)
+    ]
+    one_by_one = StatsStorage(DatabaseConnection(tmp_path / "single.db"))
+    batched = StatsStorage(DatabaseConnection(tmp_path / "batched.db"))
+
+    async def run():
+        for rec in records:
+            await one_by_one.upsert_user_stats(**rec)
+        for start in range(0, len(records), 64):
+            await batched.bulk_upsert_user_stats(records[start:start + 64])
+
+    asyncio.run(run())
+
+    def dump(storage):
+        with storage.db.get_connection() as conn:
+            return (
+                [tuple(row) for row in conn.execute("SELECT * FROM user_stats ORDER BY user_id, guild_id")],
+                [tuple(row) for row in conn.execute("SELECT * FROM user_stat_counts ORDER BY 1, 2, 3, 4")],
+            )
+
+    # Every summary stays under capacity, so even the counters are exact.
+    assert dump(batched) == dump(one_by_one)